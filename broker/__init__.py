@@ -0,0 +1,27 @@
+"""
+Broker de motores compartido por varios workers de la API.
+Un único proceso (python -m broker) es dueño de los motores, sus pools y la caché de
+análisis, y ejecuta la cola de trabajos, las partidas y las sesiones; los workers se
+conectan a él por un socket Unix (ENGINE_BROKER_SOCKET).
+"""
+
+from .client import BrokerChannel, EngineBrokerClient, RemoteEngine
+from .protocol import BrokerError, DEFAULT_SOCKET_PATH
+from .server import EngineBroker
+from .services import (
+    RemoteGameConnection, RemoteJobManager, RemoteMatch, RemoteMatchRunner, RemoteSessionManager
+)
+
+__all__ = [
+    'EngineBroker',
+    'EngineBrokerClient',
+    'RemoteEngine',
+    'BrokerChannel',
+    'RemoteJobManager',
+    'RemoteMatch',
+    'RemoteMatchRunner',
+    'RemoteSessionManager',
+    'RemoteGameConnection',
+    'BrokerError',
+    'DEFAULT_SOCKET_PATH',
+]
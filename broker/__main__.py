@@ -0,0 +1,84 @@
+"""
+Arranca el broker de motores.
+
+Uso (desde la raíz del repositorio):
+    python -m broker                                   # socket de ENGINE_BROKER_SOCKET o el de por defecto
+    python -m broker --socket /run/chess/engines.sock --config config/engines_local.yaml
+
+Los workers de la API lo usan con la misma ruta en ENGINE_BROKER_SOCKET:
+    ENGINE_BROKER_SOCKET=/run/chess/engines.sock uvicorn main:app --workers 4
+
+El broker también ejecuta la cola de trabajos, las partidas y las sesiones de partida.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+
+from engine_manager import EngineManager
+from jobs import JobManager
+from matches import MatchRunner
+from sessions import SessionManager
+
+from .protocol import DEFAULT_SOCKET_PATH
+from .server import EngineBroker
+
+logger = logging.getLogger("broker")
+
+
+async def serve(socket_path: str, config_paths=None) -> None:
+    """Crea los motores y los servicios, atiende a los workers hasta recibir SIGINT/SIGTERM y limpia"""
+    engine_manager = EngineManager(config_paths)
+    match_runner = MatchRunner(engine_manager)
+    job_manager = JobManager(engine_manager, match_runner=match_runner)
+    session_manager = SessionManager(engine_manager)
+    broker = EngineBroker(
+        engine_manager, socket_path,
+        job_manager=job_manager, match_runner=match_runner, session_manager=session_manager
+    )
+    await broker.start()
+
+    # Los motores se crean y precalientan mientras el broker ya acepta conexiones
+    startup = asyncio.create_task(engine_manager.startup())
+    engine_manager.start_config_watcher()
+    # Una única cola para todos los workers: los trabajos pendientes se reanudan una vez
+    await job_manager.start()
+    await session_manager.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    await stop.wait()
+
+    logger.info("Cerrando broker de motores")
+    await broker.close()
+    startup.cancel()
+    await asyncio.gather(startup, return_exceptions=True)
+    # Los trabajos en curso quedan pendientes y se reanudan en el siguiente arranque
+    await job_manager.shutdown()
+    await session_manager.shutdown()
+    await match_runner.shutdown()
+    await engine_manager.cleanup_all()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--socket",
+        default=os.getenv("ENGINE_BROKER_SOCKET") or DEFAULT_SOCKET_PATH,
+        help=f"Socket Unix en el que escuchar (default: ENGINE_BROKER_SOCKET o {DEFAULT_SOCKET_PATH})"
+    )
+    parser.add_argument(
+        "--config",
+        action="append",
+        help="Archivo de configuración de motores (repetible; default: config/engines_*.yaml)"
+    )
+    args = parser.parse_args()
+    asyncio.run(serve(args.socket, args.config))
+
+
+if __name__ == "__main__":
+    main()
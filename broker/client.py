@@ -0,0 +1,505 @@
+"""
+Cliente del broker de motores para los workers de la API.
+EngineBrokerClient ofrece la misma interfaz que EngineManager, de modo que la API
+funciona igual con motores locales o en el broker:
+    - Las peticiones a los motores (jugadas, lotes, /compare, recarga) van al broker.
+    - Las consultas síncronas (listados, estadísticas, admisión de lotes) se responden con
+      el último snapshot del broker, que se refresca cada SNAPSHOT_INTERVAL segundos.
+Los trabajos, las partidas y las sesiones también viven en el broker (ver services).
+"""
+
+import asyncio
+import itertools
+import logging
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from engines import (
+    AdmissionController, EngineClassifier, MotorOrigin, MotorType, MoveResult, ValidationMode
+)
+from engines.game_analysis import GameAnalyzer, parse_game
+
+from .protocol import MAX_MESSAGE_BYTES, BrokerError, encode, error_from_dict, read_message
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteEngine:
+    """
+    Motor del broker visto desde un worker.
+    Expone los atributos que usan la API y los gestores (tipo, origen, configuración,
+    admisión) y envía al broker las llamadas directas al motor.
+    """
+
+    def __init__(self, client: "EngineBrokerClient", description: Dict[str, Any]):
+        """
+        Args:
+            client: Cliente del broker por el que van las llamadas
+            description: Descripción del motor en el snapshot (ver EngineBroker.snapshot)
+        """
+        self._client = client
+        self._info = description["info"]
+        self.name = self._info["name"]
+        self.motor_type = MotorType(self._info["type"])
+        self.motor_origin = MotorOrigin(self._info["origin"])
+        self.validation_mode = ValidationMode(self._info["validation_mode"])
+        self.config = description["config"]
+        self.max_parallel = description["max_parallel"]
+        self.cacheable = description["cacheable"]
+        self.classification = description["classification"]
+        self._available = self._info["available"]
+        # Estado de la admisión en el broker al tomar el snapshot
+        self.admission = AdmissionController.from_stats(self.name, self._info["admission"])
+
+    def get_info(self) -> Dict[str, Any]:
+        """Información del motor en el último snapshot"""
+        return dict(self._info)
+
+    async def get_move(self, board_state: str, depth: Optional[int] = None, **kwargs) -> MoveResult:
+        """Jugada del motor en el broker, sin caché ni admisión (como MotorBase.get_move)"""
+        result = await self._client.call(
+            "engine_get_move", engine_name=self.name, fen=board_state, depth=depth, **kwargs
+        )
+        return MoveResult.from_dict(result)
+
+    async def annotate_batch(self, positions: List[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+        """Anotación por lotes en el broker (ver GenerativeEngine.annotate_batch)"""
+        return await self._client.call("annotate_batch", engine_name=self.name, positions=positions, **kwargs)
+
+    def __str__(self) -> str:
+        return f"RemoteEngine(name='{self.name}', type={self.motor_type.value}, origin={self.motor_origin.value})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class BrokerChannel:
+    """
+    Petición abierta en ambos sentidos con el broker: el worker le envía mensajes
+    (entradas) y recibe sus eventos hasta que el broker la termina.
+    """
+
+    def __init__(self, client: "EngineBrokerClient", request_id: int, queue: asyncio.Queue):
+        """
+        Args:
+            client: Cliente del broker por el que va el canal
+            request_id: Id de la petición que abrió el canal
+            queue: Mensajes recibidos del broker para esta petición
+        """
+        self._client = client
+        self.id = request_id
+        self._queue = queue
+        self.finished = False
+
+    async def send(self, message: Any) -> None:
+        """
+        Envía un mensaje al broker.
+
+        Raises:
+            BrokerError: Si la conexión con el broker se perdió
+        """
+        await self._client._send({"id": self.id, "input": message})
+
+    async def events(self) -> AsyncIterator[Any]:
+        """
+        Eventos del broker hasta que termina el canal.
+
+        Raises:
+            La excepción enviada por el broker (ver protocol.error_from_dict)
+        """
+        while not self.finished:
+            message = await self._queue.get()
+            self.finished = "event" not in message
+            if "error" in message:
+                raise error_from_dict(message["error"])
+            if "event" in message:
+                yield message["event"]
+
+    async def close(self) -> None:
+        """Cierra el canal (el broker cancela la petición si seguía abierta)"""
+        self._client._pending.pop(self.id, None)
+        if not self.finished and self._client._writer is not None:
+            self.finished = True
+            try:
+                await self._client._send({"id": self.id, "cancel": True})
+            except Exception:
+                pass
+
+
+class EngineBrokerClient:
+    """
+    Gestor de motores de un worker que delega en el broker (ver EngineManager).
+    Todas las peticiones comparten una conexión; si se pierde, las pendientes fallan con
+    BrokerError y la siguiente petición vuelve a conectar.
+    """
+
+    # Posiciones máximas por lote en /move/batch (las mismas que EngineManager)
+    MAX_BATCH_POSITIONS = 500
+    # Segundos entre refrescos del snapshot de motores
+    SNAPSHOT_INTERVAL = 1.0
+    # Espera máxima a que el broker acepte la conexión (segundos)
+    CONNECT_TIMEOUT = 10.0
+    # Pausa entre intentos de conexión (segundos)
+    RECONNECT_DELAY = 0.5
+
+    def __init__(self, socket_path: str):
+        """
+        Args:
+            socket_path: Ruta del socket Unix del broker (ENGINE_BROKER_SOCKET)
+        """
+        self.socket_path = socket_path
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._receiver: Optional[asyncio.Task] = None
+        self._refresher: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._send_lock = asyncio.Lock()
+        self._ids = itertools.count(1)
+        # Mensajes recibidos de cada petición en curso
+        self._pending: Dict[int, asyncio.Queue] = {}
+
+        self._snapshot: Dict[str, Any] = {}
+        self._engines: Dict[str, RemoteEngine] = {}
+        self._ready = asyncio.Event()
+
+    # ------------------------------------------------------------------
+    # Conexión y mensajes
+    # ------------------------------------------------------------------
+
+    async def _connect(self) -> None:
+        """
+        Conecta con el broker si no hay conexión, reintentando hasta CONNECT_TIMEOUT.
+
+        Raises:
+            BrokerError: Si el broker no acepta la conexión a tiempo
+        """
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.CONNECT_TIMEOUT
+            while True:
+                try:
+                    reader, writer = await asyncio.open_unix_connection(self.socket_path, limit=MAX_MESSAGE_BYTES)
+                    break
+                except OSError as e:
+                    if loop.time() >= deadline:
+                        raise BrokerError(f"No se puede conectar con el broker de motores en {self.socket_path}: {e}")
+                    await asyncio.sleep(self.RECONNECT_DELAY)
+            self._reader, self._writer = reader, writer
+            self._receiver = asyncio.create_task(self._receive(reader, writer))
+            logger.info(f"Conectado al broker de motores en {self.socket_path}")
+
+    async def _receive(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Reparte los mensajes del broker entre las peticiones en curso"""
+        try:
+            while True:
+                message = await read_message(reader)
+                queue = self._pending.get(message.get("id"))
+                if queue is not None:
+                    queue.put_nowait(message)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"Conexión con el broker de motores perdida: {e}")
+        finally:
+            if self._writer is writer:
+                self._reader = self._writer = None
+            writer.close()
+            lost = {"error": {"type": "BrokerError", "message": "Conexión con el broker de motores perdida"}}
+            for queue in self._pending.values():
+                queue.put_nowait(lost)
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        async with self._send_lock:
+            if self._writer is None:
+                raise BrokerError("Conexión con el broker de motores perdida")
+            self._writer.write(encode(message))
+            await self._writer.drain()
+
+    async def _exchange(self, method: str, params: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Envía una petición y produce sus mensajes hasta la respuesta final.
+        Si el llamante deja de esperar (cancelación o fin de la iteración), se cancela en el broker.
+
+        Raises:
+            La excepción enviada por el broker (ver protocol.error_from_dict)
+        """
+        await self._connect()
+        request_id = next(self._ids)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._pending[request_id] = queue
+        finished = False
+        try:
+            await self._send({"id": request_id, "method": method, "params": params})
+            while not finished:
+                message = await queue.get()
+                finished = "event" not in message
+                if "error" in message:
+                    raise error_from_dict(message["error"])
+                yield message
+        finally:
+            self._pending.pop(request_id, None)
+            if not finished and self._writer is not None:
+                try:
+                    await self._send({"id": request_id, "cancel": True})
+                except Exception:
+                    pass
+
+    async def call(self, method: str, **params) -> Any:
+        """Ejecuta un método del broker y devuelve su resultado"""
+        async with aclosing(self._exchange(method, params)) as messages:
+            async for message in messages:
+                return message.get("result")
+
+    async def stream(self, method: str, **params) -> AsyncIterator[Any]:
+        """Ejecuta un método del broker que produce eventos"""
+        async with aclosing(self._exchange(method, params)) as messages:
+            async for message in messages:
+                if "event" in message:
+                    yield message["event"]
+
+    async def open_channel(self, method: str, **params) -> BrokerChannel:
+        """
+        Abre un canal con el broker (petición que además recibe mensajes del worker).
+        La petición se envía antes de devolver el canal, de modo que las entradas llegan después.
+
+        Raises:
+            BrokerError: Si el broker no está disponible
+        """
+        await self._connect()
+        request_id = next(self._ids)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._pending[request_id] = queue
+        try:
+            await self._send({"id": request_id, "method": method, "params": params})
+        except BaseException:
+            self._pending.pop(request_id, None)
+            raise
+        return BrokerChannel(self, request_id, queue)
+
+    # ------------------------------------------------------------------
+    # Snapshot
+    # ------------------------------------------------------------------
+
+    async def refresh(self) -> None:
+        """Actualiza el snapshot de motores"""
+        snapshot = await self.call("snapshot")
+        self._snapshot = snapshot
+        self._engines = {
+            description["info"]["name"]: RemoteEngine(self, description)
+            for description in snapshot["engines"]
+        }
+        self._ready.set()
+
+    async def _refresh_loop(self) -> None:
+        available = True
+        while True:
+            try:
+                await self.refresh()
+                if not available:
+                    logger.info("Broker de motores disponible de nuevo")
+                available = True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if available:
+                    logger.warning(f"No se pudo refrescar el estado del broker de motores: {e}")
+                available = False
+            await asyncio.sleep(self.SNAPSHOT_INTERVAL)
+
+    async def startup(self) -> None:
+        """Conecta con el broker (esperando a que arranque) y carga el primer snapshot"""
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_loop())
+        await self._ready.wait()
+
+    def start_config_watcher(self, interval: Optional[float] = None) -> bool:
+        """La configuración la vigila el broker (CONFIG_WATCH_INTERVAL en su entorno)"""
+        return False
+
+    @property
+    def startup_timings(self) -> Dict[str, float]:
+        """Fases del arranque de los motores en el broker"""
+        return self._snapshot.get("startup_timings", {})
+
+    # ------------------------------------------------------------------
+    # Interfaz de EngineManager
+    # ------------------------------------------------------------------
+
+    def get_engine(self, name: str) -> RemoteEngine:
+        """
+        Obtiene un motor por nombre.
+
+        Raises:
+            ValueError: Si el motor no existe (o aún no se ha recibido el snapshot)
+        """
+        engine = self._engines.get(name)
+        if engine is None:
+            available = ", ".join(self._engines.keys())
+            raise ValueError(f"Motor '{name}' no encontrado. Motores disponibles: {available}")
+        return engine
+
+    def list_engines(self) -> List[str]:
+        return list(self._engines.keys())
+
+    def get_engines_info(self) -> List[Dict]:
+        return [engine.get_info() for engine in self._engines.values()]
+
+    def get_classification_matrix(self) -> List[Dict]:
+        return [engine.classification for engine in self._engines.values()]
+
+    def filter_engines_by_type(self, motor_type: MotorType) -> Dict[str, RemoteEngine]:
+        return EngineClassifier.filter_by_type(self._engines, motor_type)
+
+    def filter_engines_by_origin(self, motor_origin: MotorOrigin) -> Dict[str, RemoteEngine]:
+        return EngineClassifier.filter_by_origin(self._engines, motor_origin)
+
+    def get_hedging_stats(self) -> Dict[str, Dict]:
+        return self._snapshot.get("hedging", {})
+
+    def get_token_stats(self) -> Dict[str, Dict]:
+        return self._snapshot.get("tokens", {})
+
+    def get_admission_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: engine.get_info()["admission"] for name, engine in self._engines.items()}
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return self._snapshot.get("cache", {})
+
+    def get_job_stats(self) -> Dict[str, Any]:
+        """Estado de la cola de trabajos del broker (último snapshot)"""
+        return self._snapshot.get("jobs") or {}
+
+    def get_match_stats(self) -> Dict[str, Any]:
+        """Partidas del broker por estado (último snapshot)"""
+        return self._snapshot.get("matches") or {}
+
+    def get_session_stats(self) -> Dict[str, Any]:
+        """Sesiones de partida del broker (último snapshot)"""
+        return self._snapshot.get("sessions") or {}
+
+    def check_admission(self, engine_name: str, priority: str = "batch") -> None:
+        """
+        Comprueba la admisión con el estado del último snapshot (ver EngineManager.check_admission).
+
+        Raises:
+            ValueError: Si el motor no existe
+            EngineOverloadedError: Si el motor está saturado
+        """
+        self.get_engine(engine_name).admission.check(priority)
+
+    def prepare_game_analysis(
+        self,
+        engine_name: str,
+        pgn: Optional[str] = None,
+        moves: Optional[List[str]] = None,
+        start_fen: Optional[str] = None,
+        depth: Optional[int] = None,
+        priority: str = "batch"
+    ) -> GameAnalyzer:
+        """
+        Prepara el análisis de una partida: se parsea en el worker y cada posición se
+        evalúa en el broker (ver EngineManager.prepare_game_analysis).
+
+        Raises:
+            ValueError: Si el motor no existe o no está disponible
+            GameParseError: Si la partida no es válida
+            EngineOverloadedError: Si el motor está saturado
+        """
+        engine = self.get_engine(engine_name)
+        if engine._available is False:
+            raise ValueError(f"El motor {engine_name} no está disponible (verifique configuración o conexión)")
+        board, game_moves = parse_game(pgn, moves, start_fen)
+        engine.admission.check(priority)
+        return GameAnalyzer(engine, board, game_moves, depth, priority)
+
+    async def get_best_move(
+        self,
+        engine_name: str,
+        fen: str,
+        depth: Optional[int] = None,
+        use_cache: bool = True,
+        **kwargs
+    ) -> MoveResult:
+        """Mejor movimiento de un motor, con la caché y la admisión del broker (ver EngineManager.get_best_move)"""
+        result = await self.call(
+            "get_best_move", engine_name=engine_name, fen=fen, depth=depth, use_cache=use_cache, **kwargs
+        )
+        return MoveResult.from_dict(result)
+
+    async def iter_batch_moves(
+        self,
+        engine_name: str,
+        positions: List[Dict[str, Any]],
+        depth: Optional[int] = None,
+        priority: str = "batch",
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Resultados de un lote en orden de finalización (ver EngineManager.iter_batch_moves)"""
+        async with aclosing(self.stream(
+            "iter_batch_moves", engine_name=engine_name, positions=positions, depth=depth, priority=priority, **kwargs
+        )) as results:
+            async for result in results:
+                yield result
+
+    async def get_batch_moves(
+        self,
+        engine_name: str,
+        positions: List[Dict[str, Any]],
+        depth: Optional[int] = None,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """Variante no progresiva de iter_batch_moves (resultados en el orden de 'positions')"""
+        results = [result async for result in self.iter_batch_moves(engine_name, positions, depth, **kwargs)]
+        return sorted(results, key=lambda result: result["index"])
+
+    async def compare_engines(
+        self,
+        fen: str,
+        depth: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, str]:
+        """Sugerencias de todos los motores (ver EngineManager.compare_engines)"""
+        return await self.call("compare_engines", fen=fen, depth=depth, timeout=timeout)
+
+    async def iter_compare_results(
+        self,
+        fen: str,
+        depth: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Resultados de /compare en cuanto terminan (ver EngineManager.iter_compare_results)"""
+        async with aclosing(self.stream("iter_compare_results", fen=fen, depth=depth, timeout=timeout)) as results:
+            async for result in results:
+                yield result
+
+    async def get_metrics(self) -> str:
+        """Métricas del broker, dueño de los motores (ver EngineManager.get_metrics)"""
+        return await self.call("get_metrics")
+
+    async def reload_config(self, drain_timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Recarga la configuración en el broker y actualiza el snapshot (ver EngineManager.reload_config)"""
+        diff = await self.call("reload_config", drain_timeout=drain_timeout)
+        await self.refresh()
+        return diff
+
+    async def cleanup_all(self) -> None:
+        """Cierra la conexión con el broker (los motores siguen en el broker para el resto de workers)"""
+        for task in (self._refresher, self._receiver):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._refresher = self._receiver = None
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+    def __contains__(self, engine_name: str) -> bool:
+        return engine_name in self._engines
+
+    def __str__(self) -> str:
+        return f"EngineBrokerClient({self.socket_path}, {len(self._engines)} motores: {', '.join(self._engines)})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,81 @@
+"""
+Protocolo entre el broker de motores y los workers de la API.
+Mensajes JSON, uno por línea, sobre un socket Unix. Varias peticiones comparten la misma
+conexión y se distinguen por su 'id':
+
+    Petición:     {"id", "method", "params"}
+    Cancelación:  {"id", "cancel": true}            (el worker ya no espera la respuesta)
+    Respuesta:    {"id", "result"}
+    Error:        {"id", "error": {"type", "message", "engine", "retry_after"}}
+    Streaming:    {"id", "event"} por cada elemento y {"id", "end": true} al terminar
+    Entrada:      {"id", "input"}                   (canales: mensaje del worker a una petición en curso)
+"""
+
+import asyncio
+import json
+from typing import Any, Dict
+
+from engines import EngineOverloadedError, InvalidFENError
+from engines.game_analysis import GameParseError
+
+# Socket por defecto (ENGINE_BROKER_SOCKET lo sobrescribe)
+DEFAULT_SOCKET_PATH = "/tmp/chess-trainer-engines.sock"
+
+# Tamaño máximo de un mensaje: un lote de MAX_BATCH_POSITIONS con explicaciones cabe de sobra
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+class BrokerError(RuntimeError):
+    """El broker no está disponible o falló al atender la petición"""
+
+
+# Excepciones que se reconstruyen en el worker con su tipo original (el resto llega como BrokerError)
+_ERROR_TYPES = {
+    "KeyError": KeyError,
+    "ValueError": ValueError,
+    "InvalidFENError": InvalidFENError,
+    "GameParseError": GameParseError,
+}
+
+
+def encode(message: Dict[str, Any]) -> bytes:
+    """Serializa un mensaje en una línea"""
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":"), default=str).encode() + b"\n"
+
+
+async def read_message(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    """
+    Lee el siguiente mensaje de la conexión.
+
+    Raises:
+        ConnectionError: Si la conexión se cerró
+        ValueError: Si el mensaje no es JSON válido o supera MAX_MESSAGE_BYTES
+    """
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Conexión con el broker cerrada")
+    return json.loads(line)
+
+
+def error_to_dict(error: BaseException) -> Dict[str, Any]:
+    """Representación serializable de una excepción"""
+    if isinstance(error, asyncio.TimeoutError):
+        return {"type": "TimeoutError", "message": str(error) or "Tiempo de espera agotado"}
+    # str() de un KeyError añade comillas: la API usa su primer argumento como detalle
+    message = error.args[0] if isinstance(error, KeyError) and error.args else str(error)
+    payload = {"type": type(error).__name__, "message": message}
+    if isinstance(error, EngineOverloadedError):
+        payload.update(engine=error.engine, retry_after=error.retry_after, reason=error.reason)
+    return payload
+
+
+def error_from_dict(payload: Dict[str, Any]) -> Exception:
+    """Reconstruye la excepción enviada por el broker"""
+    kind, message = payload.get("type"), payload.get("message", "")
+    if kind == "EngineOverloadedError":
+        return EngineOverloadedError(payload["engine"], payload["retry_after"], payload["reason"])
+    if kind == "TimeoutError":
+        return asyncio.TimeoutError(message)
+    if kind in _ERROR_TYPES:
+        return _ERROR_TYPES[kind](message)
+    return BrokerError(message if kind == "BrokerError" else f"{kind}: {message}")
@@ -0,0 +1,301 @@
+"""
+Broker de motores: un único proceso dueño de los motores (procesos UCI, conexiones,
+pools y cachés) al que se conectan todos los workers de la API por un socket Unix.
+Con varios workers de uvicorn, cada uno crearía si no su propio EngineManager: N veces
+los procesos de Stockfish/lc0, motores sobresuscritos y la caché de análisis repartida.
+Por lo mismo el broker es también dueño del estado que no puede repartirse entre workers:
+la cola de trabajos, las partidas motor contra motor y las sesiones de partida.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+from contextlib import aclosing
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from engines import EngineClassifier, MotorBase
+
+from .protocol import MAX_MESSAGE_BYTES, encode, error_to_dict, read_message
+
+if TYPE_CHECKING:
+    from jobs import JobManager
+    from matches import MatchRunner
+    from sessions import SessionManager
+
+logger = logging.getLogger(__name__)
+
+# Claves de configuración que no salen del broker
+SECRET_CONFIG_KEYS = ("api_key",)
+
+
+class EngineBroker:
+    """
+    Servidor del broker: atiende las peticiones de los workers con un EngineManager y,
+    si se le dan, con la cola de trabajos, las partidas y las sesiones del proceso.
+    Cada petición se ejecuta en su propia tarea, de modo que una conexión lleva muchas
+    peticiones concurrentes; si el worker la cancela (o se desconecta) la tarea se cancela.
+    """
+
+    def __init__(
+        self,
+        engine_manager,
+        socket_path: str,
+        job_manager: Optional["JobManager"] = None,
+        match_runner: Optional["MatchRunner"] = None,
+        session_manager: Optional["SessionManager"] = None
+    ):
+        """
+        Args:
+            engine_manager: EngineManager que ejecuta las peticiones
+            socket_path: Ruta del socket Unix en el que escuchar
+            job_manager: Cola de trabajos compartida por los workers
+            match_runner: Partidas motor contra motor compartidas por los workers
+            session_manager: Sesiones de partida compartidas por los workers
+        """
+        self.engine_manager = engine_manager
+        self.socket_path = socket_path
+        self.job_manager = job_manager
+        self.match_runner = match_runner
+        self.session_manager = session_manager
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+        # Métodos con una única respuesta y métodos que producen eventos (streaming)
+        self._methods: Dict[str, Callable[..., Any]] = {
+            "snapshot": self.snapshot,
+            "get_best_move": self._get_best_move,
+            "engine_get_move": self._engine_get_move,
+            "annotate_batch": self._annotate_batch,
+            "compare_engines": engine_manager.compare_engines,
+            "reload_config": engine_manager.reload_config,
+            "get_metrics": engine_manager.get_metrics,
+        }
+        self._streams: Dict[str, Callable[..., AsyncIterator[Dict[str, Any]]]] = {
+            "iter_batch_moves": engine_manager.iter_batch_moves,
+            "iter_compare_results": engine_manager.iter_compare_results,
+        }
+        # Canales: además de producir eventos, reciben mensajes del worker ({"id", "input"})
+        self._channels: Dict[str, Callable[..., Awaitable[None]]] = {}
+
+        if job_manager is not None:
+            self._methods.update({
+                "job_submit": job_manager.submit,
+                "job_get": job_manager.get,
+                "job_list": job_manager.list_jobs,
+                "job_cancel": job_manager.cancel,
+            })
+            self._streams["job_events"] = job_manager.events
+        if match_runner is not None:
+            self._methods.update({
+                "match_create": self._match_create,
+                "match_get": self._match_get,
+                "match_list": match_runner.list_matches,
+                "match_stop": self._match_stop,
+            })
+            self._streams["match_events"] = match_runner.events
+        if session_manager is not None:
+            self._channels["game_session"] = self._game_session
+
+    async def start(self) -> None:
+        """
+        Empieza a escuchar en el socket (reemplaza un socket huérfano de una ejecución anterior).
+
+        Raises:
+            RuntimeError: Si ya hay otro broker escuchando en la misma ruta
+        """
+        if os.path.exists(self.socket_path):
+            try:
+                _, writer = await asyncio.open_unix_connection(self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)
+            else:
+                writer.close()
+                raise RuntimeError(f"Ya hay un broker de motores escuchando en {self.socket_path}")
+
+        self._server = await asyncio.start_unix_server(
+            self._serve_connection, path=self.socket_path, limit=MAX_MESSAGE_BYTES
+        )
+        # Solo el usuario y el grupo de la aplicación
+        os.chmod(self.socket_path, 0o660)
+        logger.info(f"Broker de motores escuchando en {self.socket_path} ({len(self.engine_manager)} motores)")
+
+    async def close(self) -> None:
+        """Deja de aceptar conexiones, cierra las abiertas y elimina el socket"""
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Estado de los motores para los workers: con él responden sin consultar al broker
+        (listados, estadísticas y admisión de lotes). Los workers lo refrescan periódicamente.
+
+        Returns:
+            {"engines": [{"info", "classification", "config", "max_parallel", "cacheable"}],
+             "hedging", "tokens", "cache", "startup_timings", "jobs", "matches", "sessions", "pid"}
+        """
+        manager = self.engine_manager
+        return {
+            "engines": [self._describe(engine) for engine in manager.engines.values()],
+            "hedging": manager.get_hedging_stats(),
+            "tokens": manager.get_token_stats(),
+            "cache": manager.get_cache_stats(),
+            "startup_timings": manager.startup_timings,
+            "jobs": self.job_manager.get_stats() if self.job_manager else None,
+            "matches": self.match_runner.get_stats() if self.match_runner else None,
+            "sessions": self.session_manager.get_stats() if self.session_manager else None,
+            "pid": os.getpid(),
+        }
+
+    @staticmethod
+    def _describe(engine: MotorBase) -> Dict[str, Any]:
+        """Descripción de un motor en el snapshot"""
+        return {
+            "info": engine.get_info(),
+            "classification": EngineClassifier.classify_engine(engine),
+            "config": {key: value for key, value in engine.config.items() if key not in SECRET_CONFIG_KEYS},
+            "max_parallel": engine.max_parallel,
+            "cacheable": engine.cacheable,
+        }
+
+    async def _get_best_move(self, engine_name: str, fen: str, **kwargs) -> Dict[str, Any]:
+        result = await self.engine_manager.get_best_move(engine_name, fen, **kwargs)
+        return result.to_dict()
+
+    async def _engine_get_move(self, engine_name: str, fen: str, **kwargs) -> Dict[str, Any]:
+        """Llamada directa al motor, sin caché ni admisión (análisis de partidas, ver GameAnalyzer)"""
+        result = await self.engine_manager.get_engine(engine_name).get_move(fen, **kwargs)
+        return result.to_dict()
+
+    async def _annotate_batch(self, engine_name: str, positions, **kwargs) -> Any:
+        return await self.engine_manager.get_engine(engine_name).annotate_batch(positions, **kwargs)
+
+    async def _match_create(self, **kwargs) -> Dict[str, Any]:
+        match = await self.match_runner.create(**kwargs)
+        return match.state(include_moves=False)
+
+    async def _match_get(self, match_id: str) -> Dict[str, Any]:
+        match = await self.match_runner.get(match_id)
+        return match.state()
+
+    async def _match_stop(self, match_id: str) -> Dict[str, Any]:
+        match = await self.match_runner.stop(match_id)
+        return match.state(include_moves=False)
+
+    async def _game_session(
+        self,
+        inputs: asyncio.Queue,
+        emit: Callable[[Dict[str, Any]], Awaitable[None]]
+    ) -> None:
+        """
+        Conexión WebSocket de un worker (/ws/game): los mensajes del cliente llegan como
+        entradas del canal y los del servidor salen como eventos. Termina con 'close'.
+        """
+        connection = self.session_manager.connect(emit)
+        try:
+            while await connection.handle(await inputs.get()):
+                pass
+        finally:
+            # Desconexión del cliente: la sesión se conserva para 'resume'
+            await connection.close()
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Atiende una conexión de un worker hasta que se cierra"""
+        self._writers.add(writer)
+        tasks: Dict[Any, asyncio.Task] = {}
+        # Entradas pendientes de cada canal abierto
+        inputs: Dict[Any, asyncio.Queue] = {}
+        lock = asyncio.Lock()
+
+        async def send(message: Dict[str, Any]) -> None:
+            async with lock:
+                writer.write(encode(message))
+                await writer.drain()
+
+        try:
+            while True:
+                try:
+                    message = await read_message(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                except ValueError as e:
+                    logger.warning(f"Mensaje inválido de un worker, se cierra la conexión: {e}")
+                    break
+
+                request_id = message.get("id")
+                if message.get("cancel"):
+                    if request_id in tasks:
+                        tasks[request_id].cancel()
+                    continue
+                if "input" in message:
+                    if request_id in inputs:
+                        inputs[request_id].put_nowait(message["input"])
+                    continue
+                method = message.get("method")
+                if method in self._channels:
+                    inputs[request_id] = asyncio.Queue()
+                task = asyncio.create_task(
+                    self._dispatch(request_id, method, message.get("params") or {}, send, inputs.get(request_id))
+                )
+                tasks[request_id] = task
+
+                def forget(_, request_id=request_id) -> None:
+                    tasks.pop(request_id, None)
+                    inputs.pop(request_id, None)
+
+                task.add_done_callback(forget)
+        finally:
+            # El worker se ha ido: nadie espera ya sus peticiones
+            for task in list(tasks.values()):
+                task.cancel()
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _dispatch(
+        self,
+        request_id: Any,
+        method: str,
+        params: Dict[str, Any],
+        send: Callable[[Dict[str, Any]], Awaitable[None]],
+        inputs: Optional[asyncio.Queue] = None
+    ) -> None:
+        """Ejecuta una petición y envía su respuesta, sus eventos o su error"""
+        try:
+            if method in self._channels:
+                async def emit(event: Dict[str, Any]) -> None:
+                    await send({"id": request_id, "event": event})
+
+                await self._channels[method](inputs, emit, **params)
+                await send({"id": request_id, "end": True})
+                return
+
+            if method in self._streams:
+                async with aclosing(self._streams[method](**params)) as events:
+                    async for event in events:
+                        await send({"id": request_id, "event": event})
+                await send({"id": request_id, "end": True})
+                return
+
+            handler = self._methods.get(method)
+            if handler is None:
+                raise ValueError(f"Método desconocido del broker: {method}")
+            result = handler(**params)
+            if inspect.isawaitable(result):
+                result = await result
+            await send({"id": request_id, "result": result})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not isinstance(e, (KeyError, ValueError, asyncio.TimeoutError)):
+                logger.error(f"Error atendiendo {method} en el broker: {e}")
+            try:
+                await send({"id": request_id, "error": error_to_dict(e)})
+            except Exception:
+                pass   # Conexión cerrada: el worker ya no espera la respuesta
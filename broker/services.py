@@ -0,0 +1,206 @@
+"""
+Trabajos, partidas y sesiones del broker vistos desde un worker.
+Con varios workers, la cola de trabajos, las partidas y las sesiones viven solo en el
+broker: cada trabajo se reanuda una vez, cancelar llega al proceso que lo ejecuta y
+cualquier worker encuentra cualquier partida o sesión. Estas clases ofrecen la misma
+interfaz que JobManager, MatchRunner y SessionManager y delegan en el broker.
+"""
+
+import asyncio
+import logging
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from .client import BrokerChannel, EngineBrokerClient
+from .protocol import BrokerError
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteJobManager:
+    """Cola de trabajos del broker (ver jobs.JobManager)"""
+
+    def __init__(self, client: EngineBrokerClient):
+        """
+        Args:
+            client: Cliente del broker por el que van las llamadas
+        """
+        self._client = client
+
+    async def start(self) -> None:
+        """El broker reanuda los trabajos pendientes al arrancar"""
+
+    async def submit(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._client.call("job_submit", kind=kind, params=params)
+
+    async def get(self, job_id: str, include_result: bool = True) -> Dict[str, Any]:
+        return await self._client.call("job_get", job_id=job_id, include_result=include_result)
+
+    async def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        return await self._client.call("job_list", status=status, limit=limit)
+
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        return await self._client.call("job_cancel", job_id=job_id)
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        async with aclosing(self._client.stream("job_events", job_id=job_id)) as events:
+            async for event in events:
+                yield event
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self._client.get_job_stats()
+
+    async def shutdown(self) -> None:
+        """Los trabajos siguen en el broker al cerrar el worker"""
+
+
+class RemoteMatch:
+    """Estado de una partida del broker (lo que la API usa de matches.Match)"""
+
+    def __init__(self, state: Dict[str, Any]):
+        """
+        Args:
+            state: Estado de la partida enviado por el broker (ver Match.state)
+        """
+        self._state = state
+        self.id = state["id"]
+        self.status = state["status"]
+
+    def state(self, include_moves: bool = True) -> Dict[str, Any]:
+        if include_moves:
+            return dict(self._state)
+        return {key: value for key, value in self._state.items() if key not in ("moves", "pgn")}
+
+
+class RemoteMatchRunner:
+    """Partidas motor contra motor del broker (ver matches.MatchRunner)"""
+
+    def __init__(self, client: EngineBrokerClient):
+        """
+        Args:
+            client: Cliente del broker por el que van las llamadas
+        """
+        self._client = client
+
+    async def create(self, **kwargs) -> RemoteMatch:
+        return RemoteMatch(await self._client.call("match_create", **kwargs))
+
+    async def get(self, match_id: str) -> RemoteMatch:
+        return RemoteMatch(await self._client.call("match_get", match_id=match_id))
+
+    async def list_matches(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await self._client.call("match_list", status=status)
+
+    async def stop(self, match_id: str) -> RemoteMatch:
+        return RemoteMatch(await self._client.call("match_stop", match_id=match_id))
+
+    async def events(self, match_id: str) -> AsyncIterator[Dict[str, Any]]:
+        async with aclosing(self._client.stream("match_events", match_id=match_id)) as events:
+            async for event in events:
+                yield event
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self._client.get_match_stats()
+
+    async def shutdown(self) -> None:
+        """Las partidas siguen en el broker al cerrar el worker"""
+
+
+class RemoteGameConnection:
+    """
+    Conexión /ws/game atendida por el broker (ver sessions.GameConnection).
+    Los mensajes del cliente van al broker por un canal y sus respuestas se reenvían
+    al cliente en segundo plano, también mientras los motores juegan solos.
+    """
+
+    def __init__(self, client: EngineBrokerClient, send: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """
+        Args:
+            client: Cliente del broker
+            send: Envía un mensaje JSON al cliente
+        """
+        self._client = client
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self._channel: Optional[BrokerChannel] = None
+        self._forwarder: Optional[asyncio.Task] = None
+
+    async def send(self, event: Dict[str, Any]) -> None:
+        async with self._send_lock:
+            await self._send(event)
+
+    async def _open(self) -> BrokerChannel:
+        """Abre el canal con el broker (o uno nuevo si se perdió la conexión)"""
+        if self._forwarder is None or self._forwarder.done():
+            if self._channel is not None:
+                await self._channel.close()
+            self._channel = await self._client.open_channel("game_session")
+            self._forwarder = asyncio.create_task(self._forward(self._channel))
+        return self._channel
+
+    async def _forward(self, channel: BrokerChannel) -> None:
+        """Reenvía al cliente los eventos del broker hasta que termina el canal"""
+        try:
+            async for event in channel.events():
+                await self.send(event)
+        except BrokerError as e:
+            logger.warning(f"Sesión de partida: se perdió el canal con el broker: {e}")
+            await self.send({"type": "error", "detail": str(e)})
+
+    async def handle(self, message: Any) -> bool:
+        """
+        Envía un mensaje del cliente al broker. Con 'close' espera a que el broker cierre la sesión.
+
+        Returns:
+            False si la conexión debe cerrarse
+        """
+        try:
+            channel = await self._open()
+            await channel.send(message)
+        except BrokerError as e:
+            await self.send({"type": "error", "detail": str(e)})
+            return True
+        if isinstance(message, dict) and message.get("type") == "close":
+            await asyncio.gather(self._forwarder, return_exceptions=True)
+            return False
+        return True
+
+    async def close(self, end_session: bool = False) -> None:
+        """
+        Termina la conexión. La sesión se conserva en el broker para 'resume' salvo que
+        se cierre explícitamente.
+
+        Args:
+            end_session: Descartar también la sesión
+        """
+        if end_session and self._channel is not None and not self._channel.finished:
+            await self.handle({"type": "close"})
+        if self._forwarder is not None:
+            self._forwarder.cancel()
+            await asyncio.gather(self._forwarder, return_exceptions=True)
+        if self._channel is not None:
+            await self._channel.close()
+
+
+class RemoteSessionManager:
+    """Sesiones de partida del broker (ver sessions.SessionManager)"""
+
+    def __init__(self, client: EngineBrokerClient):
+        """
+        Args:
+            client: Cliente del broker por el que van las llamadas
+        """
+        self._client = client
+
+    async def start(self) -> None:
+        """El broker hace el barrido de sesiones inactivas"""
+
+    def connect(self, send: Callable[[Dict[str, Any]], Awaitable[None]]) -> RemoteGameConnection:
+        """Conexión /ws/game de un cliente (ver SessionManager.connect)"""
+        return RemoteGameConnection(self._client, send)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self._client.get_session_stats()
+
+    async def shutdown(self) -> None:
+        """Las sesiones siguen en el broker al cerrar el worker"""
@@ -5,8 +5,17 @@ Utiliza el sistema de Factory y Registry para gestionar múltiples motores.
 
 import logging
 import asyncio
-from typing import Dict, Optional, List
-from engines import MotorBase, EngineFactory, EngineClassifier, MotorType, MotorOrigin
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Optional, List
+from engines import (
+    MotorBase, MoveResult, AnalysisCache, EngineFactory, EngineClassifier,
+    MotorType, MotorOrigin, InvalidFENError, EngineOverloadedError, normalize_fen, DEFAULT_PRIORITY,
+    engine_metrics, render_metrics
+)
+from engines.pool import PREEMPTIBLE_PRIORITIES
+from engines.analysis_cache import DEFAULT_ANALYSIS_CACHE_SIZE
+from engines.game_analysis import GameAnalyzer, parse_game
 
 # Configurar logging
 logging.basicConfig(
@@ -22,7 +31,20 @@ class EngineManager:
     Proporciona interfaz unificada para trabajar con múltiples motores.
     """
     
-    def __init__(self, config_path = None):
+    # Plazo global por defecto de /compare (segundos)
+    DEFAULT_COMPARE_DEADLINE = 30.0
+    # Resultado de los motores que no terminan dentro del plazo
+    TIMEOUT_RESULT = "TIMEOUT"
+    # Posiciones máximas por lote en /move/batch
+    MAX_BATCH_POSITIONS = 500
+    # Parámetros de get_best_move que solo indican cómo enviar la posición al motor
+    ROUTING_KWARGS = ("position_moves", "start_fen", "affinity")
+    # Espera máxima (segundos) para que un motor reemplazado en una recarga termine sus peticiones
+    RELOAD_DRAIN_TIMEOUT = 60.0
+    # Intervalo de comprobación del vaciado de un motor reemplazado (segundos)
+    DRAIN_POLL_INTERVAL = 0.1
+    
+    def __init__(self, config_path = None, cache_size: Optional[int] = None):
         """
         Inicializa el gestor de motores.
         
@@ -31,6 +53,8 @@ class EngineManager:
                         Si es None, carga engines_local.yaml y engines_external.yaml por defecto.
                         Si es una cadena, carga ese archivo único (retrocompatibilidad).
                         Si es una lista, carga todos los archivos especificados.
+            cache_size: Entradas de la caché de análisis (default: ANALYSIS_CACHE_SIZE del
+                        entorno o 4096; 0 la desactiva)
         """
         if config_path is None:
             # Por defecto, cargar ambos archivos separados
@@ -47,32 +71,137 @@ class EngineManager:
         else:
             raise ValueError(f"config_path debe ser str, list o None, recibido: {type(config_path)}")
         
-        self.engines: Dict[str, MotorBase] = {}
+        # Configuración de cada motor y motores ya creados: se crean en segundo plano
+        # (startup) o en su primer uso, no al construir el gestor
+        self._configs: Dict[str, Dict[str, Any]] = {}
+        self._engines: Dict[str, MotorBase] = {}
+        # Duración de cada fase del arranque en ms (ver startup)
+        self.startup_timings: Dict[str, float] = {}
+        if cache_size is None:
+            cache_size = int(os.getenv("ANALYSIS_CACHE_SIZE", DEFAULT_ANALYSIS_CACHE_SIZE))
+        self.analysis_cache = AnalysisCache(cache_size)
+        # Recargas en curso (una a la vez), motores reemplazados que aún se están vaciando
+        # y vigilancia de los archivos de configuración
+        self._reload_lock = asyncio.Lock()
+        self._retiring: Dict[asyncio.Task, MotorBase] = {}
+        self._watcher: Optional[asyncio.Task] = None
         self.load_config()
     
     def load_config(self, config_paths: Optional[List[str]] = None) -> None:
         """
         Carga la configuración de motores desde YAML.
+        Solo lee los archivos: los motores se crean después (ver build_all y get_engine).
         
         Args:
             config_paths: Lista de rutas a archivos de configuración (opcional).
                          Si es None, usa self.config_paths
         """
         paths_to_load = config_paths if config_paths is not None else self.config_paths
+        started = time.perf_counter()
         
         try:
             if len(paths_to_load) == 1:
-                # Un solo archivo: usar método original para retrocompatibilidad
-                self.engines = EngineFactory.create_from_yaml(paths_to_load[0])
+                # Un solo archivo: un error de lectura es fatal (retrocompatibilidad)
+                self._configs = EngineFactory.read_yaml_configs(paths_to_load[0])
             else:
-                # Múltiples archivos: usar método nuevo
-                self.engines = EngineFactory.create_from_multiple_yaml(paths_to_load)
+                # Múltiples archivos: se omiten los que fallan
+                self._configs = EngineFactory.read_multiple_yaml_configs(paths_to_load, strict=False)
+            self._engines = {}
             
-            logger.info(f"Configuración cargada: {len(self.engines)} motores disponibles")
+            self._record_startup_phase("load_config", started)
+            logger.info(f"Configuración cargada: {len(self._configs)} motores configurados")
         except Exception as e:
             logger.error(f"Error cargando configuración desde {paths_to_load}: {e}")
             raise
     
+    @property
+    def engines(self) -> Dict[str, MotorBase]:
+        """Todos los motores en el orden de configuración (crea los que aún no existen)"""
+        for name in list(self._configs):
+            if name not in self._engines:
+                self._build(name)
+        return {name: self._engines[name] for name in self._configs if name in self._engines}
+    
+    def _build(self, name: str) -> Optional[MotorBase]:
+        """
+        Crea un motor configurado.
+        
+        Returns:
+            El motor o None si su configuración no es válida (se descarta, como al cargar)
+        """
+        try:
+            engine = EngineFactory.create_engine(name, self._configs[name])
+        except Exception as e:
+            logger.error(f"Error creando motor {name}: {e}")
+            self._configs.pop(name, None)
+            return None
+        self._engines[name] = engine
+        self._link_hedge_partner(engine)
+        return engine
+    
+    async def build_all(self) -> None:
+        """Crea los motores que aún no existen, cediendo el bucle de eventos entre uno y otro"""
+        for name in list(self._configs):
+            if name in self._configs and name not in self._engines:
+                self._build(name)
+                await asyncio.sleep(0)
+    
+    def _record_startup_phase(self, phase: str, started: float) -> float:
+        """Guarda la duración de una fase del arranque y devuelve el inicio de la siguiente"""
+        now = time.perf_counter()
+        self.startup_timings[f"{phase}_ms"] = round((now - started) * 1000, 1)
+        return now
+    
+    def _link_hedge_partners(self) -> None:
+        """Enlaza cada motor creado con política de hedging con su motor secundario"""
+        for engine in list(self._engines.values()):
+            self._link_hedge_partner(engine)
+    
+    def _link_hedge_partner(self, engine: MotorBase) -> None:
+        """Enlaza un motor con política de hedging con su motor secundario (creándolo si hace falta)"""
+        policy = getattr(engine, 'hedge_policy', None)
+        if not policy:
+            return
+        
+        partner = self._engines.get(policy.partner_name)
+        if partner is None and policy.partner_name in self._configs and policy.partner_name != engine.name:
+            partner = self._build(policy.partner_name)
+        if partner is None or partner is engine or partner.motor_type != MotorType.GENERATIVE:
+            logger.warning(
+                f"Motor {engine.name}: motor de hedge '{policy.partner_name}' no existe o no es generativo, "
+                f"hedging desactivado"
+            )
+            # Tras una recarga, el motor secundario anterior puede haber desaparecido
+            engine.hedge_partner = None
+            return
+        engine.set_hedge_partner(partner)
+    
+    def get_hedging_stats(self) -> Dict[str, Dict]:
+        """
+        Métricas de hedging de los motores que lo tienen configurado.
+        
+        Returns:
+            Diccionario {engine_name: métricas}
+        """
+        return {
+            name: engine.hedge_policy.get_stats()
+            for name, engine in self._engines.items()
+            if getattr(engine, 'hedge_policy', None) and getattr(engine, 'hedge_partner', None)
+        }
+    
+    def get_token_stats(self) -> Dict[str, Dict]:
+        """
+        Uso de tokens acumulado de los motores generativos.
+        
+        Returns:
+            Diccionario {engine_name: métricas de tokens}
+        """
+        return {
+            name: engine.token_stats.get_stats()
+            for name, engine in self._engines.items()
+            if getattr(engine, 'token_stats', None)
+        }
+    
     async def check_all_availability(self) -> None:
         """
         Verifica la disponibilidad de todos los motores.
@@ -90,30 +219,184 @@ class EngineManager:
         available_count = sum(1 for e in self.engines.values() if e._available)
         logger.info(f"Verificación completada: {available_count}/{len(self.engines)} motores disponibles")
 
-    def reload_config(self) -> None:
-        """Recarga la configuración desde los archivos"""
-        # Limpiar motores existentes
-        for engine in self.engines.values():
-            try:
-                import asyncio
-                # Usar loop actual si existe, o crear tarea background
-                try:
-                    loop = asyncio.get_running_loop()
-                    loop.create_task(engine.cleanup())
-                except RuntimeError:
-                    pass # No hay loop corriendo
-            except Exception as e:
-                logger.warning(f"Error limpiando motor al recargar: {e}")
+    async def warmup_all(self) -> None:
+        """
+        Precalienta los motores disponibles (procesos y conexiones HTTP).
+        Debe ejecutarse después de check_all_availability.
+        """
+        engines = [e for e in self.engines.values() if e._available]
+        results = await asyncio.gather(*(e.warmup() for e in engines), return_exceptions=True)
         
-        self.engines.clear()
-        self.load_config()
+        for engine, result in zip(engines, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Error precalentando motor {engine.name}: {result}")
+        
+        logger.info(f"Precalentamiento completado para {len(engines)} motores")
+    
+    async def startup(self) -> None:
+        """
+        Crea los motores, verifica disponibilidad y precalienta (pensado para ejecutarse en
+        background: la API acepta peticiones mientras tanto). La duración de cada fase
+        queda en startup_timings.
+        """
+        started = time.perf_counter()
+        await self.build_all()
+        started = self._record_startup_phase("build", started)
+        await self.check_all_availability()
+        started = self._record_startup_phase("availability", started)
+        await self.warmup_all()
+        self._record_startup_phase("warmup", started)
+        logger.info(f"Arranque de motores completado: {self.startup_timings}")
+    
+    async def reload_config(self, drain_timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Recarga la configuración aplicando solo las diferencias con la actual.
+        Los motores sin cambios conservan sus procesos, conexiones y caché. Los nuevos o
+        modificados se crean y precalientan junto a los actuales, que siguen atendiendo
+        mientras tanto, y después se sustituyen todos a la vez. Los motores reemplazados
+        o eliminados se cierran cuando terminan sus peticiones en curso.
         
-        # Intentar lanzar verificación si hay loop
+        Args:
+            drain_timeout: Espera máxima en segundos para cerrar los motores reemplazados
+                          (default: RELOAD_DRAIN_TIMEOUT)
+            
+        Returns:
+            {"added", "changed", "removed", "unchanged": [nombres], "failed": {nombre: error}}
+            
+        Raises:
+            Exception: Si no se pueden leer los archivos (la configuración actual se mantiene)
+        """
+        async with self._reload_lock:
+            configs = EngineFactory.read_multiple_yaml_configs(self.config_paths)
+            old_configs, old_engines = self._configs, self._engines
+            new_configs: Dict[str, Dict[str, Any]] = {}
+            engines: Dict[str, MotorBase] = {}
+            diff: Dict[str, Any] = {"added": [], "changed": [], "removed": [], "unchanged": [], "failed": {}}
+            created: List[MotorBase] = []
+            
+            for name, config in configs.items():
+                current = old_engines.get(name)
+                if old_configs.get(name) == config:
+                    new_configs[name] = config
+                    if current is not None:
+                        engines[name] = current
+                    diff["unchanged"].append(name)
+                    continue
+                try:
+                    engine = EngineFactory.create_engine(name, config)
+                except Exception as e:
+                    # Un motor que ya existía sigue funcionando con su configuración anterior
+                    diff["failed"][name] = str(e)
+                    if name in old_configs:
+                        new_configs[name] = old_configs[name]
+                        if current is not None:
+                            engines[name] = current
+                    continue
+                new_configs[name] = config
+                engines[name] = engine
+                created.append(engine)
+                diff["changed" if name in old_configs else "added"].append(name)
+            diff["removed"] = [name for name in old_configs if name not in configs]
+            
+            # Preparar los motores nuevos antes de que reciban peticiones
+            await asyncio.gather(*(self._prepare_engine(engine) for engine in created))
+            
+            # Motores sin cambios que se crearon (primer uso) mientras se preparaban los nuevos
+            for name in diff["unchanged"]:
+                if name not in engines and name in old_engines:
+                    engines[name] = old_engines[name]
+            
+            # Sustitución atómica: las peticiones nuevas ya solo ven la configuración nueva
+            self._configs, self._engines = new_configs, engines
+            self._link_hedge_partners()
+            for name in diff["changed"] + diff["removed"]:
+                self.analysis_cache.clear(name)
+            for name, engine in old_engines.items():
+                if engines.get(name) is not engine:
+                    self._retire(engine, drain_timeout)
+        
+        logger.info(
+            f"Configuración recargada: {len(diff['added'])} nuevos, {len(diff['changed'])} modificados, "
+            f"{len(diff['removed'])} eliminados, {len(diff['unchanged'])} sin cambios"
+            + (f", {len(diff['failed'])} con errores" if diff["failed"] else "")
+        )
+        return diff
+    
+    async def _prepare_engine(self, engine: MotorBase) -> None:
+        """Verifica la disponibilidad de un motor nuevo y lo precalienta"""
         try:
-            loop = asyncio.get_running_loop()
-            loop.create_task(self.check_all_availability())
-        except RuntimeError:
-            pass # Se verificará bajo demanda o al arranque de la app
+            if await engine.check_availability():
+                await engine.warmup()
+        except Exception as e:
+            logger.warning(f"Error precalentando motor {engine.name}: {e}")
+    
+    def _retire(self, engine: MotorBase, drain_timeout: Optional[float] = None) -> None:
+        """Cierra en segundo plano un motor retirado de la configuración cuando se vacíe"""
+        task = asyncio.create_task(self._drain(engine, drain_timeout or self.RELOAD_DRAIN_TIMEOUT))
+        self._retiring[task] = engine
+        task.add_done_callback(lambda done: self._retiring.pop(done, None))
+    
+    async def _drain(self, engine: MotorBase, timeout: float) -> None:
+        """Espera a que el motor termine sus peticiones en curso (como mucho 'timeout') y lo limpia"""
+        deadline = time.monotonic() + timeout
+        while engine.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(self.DRAIN_POLL_INTERVAL)
+        if engine.in_flight:
+            logger.warning(f"Motor {engine.name} retirado con {engine.in_flight} peticiones en curso tras {timeout}s")
+        try:
+            await engine.cleanup()
+            logger.info(f"Motor {engine.name} retirado")
+        except Exception as e:
+            logger.warning(f"Error limpiando motor retirado {engine.name}: {e}")
+    
+    def _config_mtimes(self) -> Dict[str, Optional[int]]:
+        """Fecha de modificación de cada archivo de configuración (None si no existe)"""
+        mtimes: Dict[str, Optional[int]] = {}
+        for path in self.config_paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+    
+    def start_config_watcher(self, interval: Optional[float] = None) -> bool:
+        """
+        Recarga la configuración automáticamente cuando cambian sus archivos.
+        
+        Args:
+            interval: Segundos entre comprobaciones (default: CONFIG_WATCH_INTERVAL del
+                     entorno; 0 o sin definir = desactivado)
+            
+        Returns:
+            True si la vigilancia está activa
+        """
+        if interval is None:
+            interval = float(os.getenv("CONFIG_WATCH_INTERVAL", 0))
+        if interval <= 0 or self._watcher is not None:
+            return self._watcher is not None
+        self._watcher = asyncio.create_task(self._watch_config(interval))
+        logger.info(f"Vigilando cambios en {', '.join(self.config_paths)} cada {interval}s")
+        return True
+    
+    async def _watch_config(self, interval: float) -> None:
+        """
+        Sondea las fechas de modificación de los archivos. Solo recarga cuando no han
+        cambiado durante un intervalo completo, para no leer un archivo a medio guardar.
+        """
+        applied = seen = self._config_mtimes()
+        while True:
+            await asyncio.sleep(interval)
+            current = self._config_mtimes()
+            if current != seen:
+                seen = current
+                continue
+            if current == applied:
+                continue
+            applied = current
+            try:
+                await self.reload_config()
+            except Exception as e:
+                logger.error(f"Error recargando configuración modificada, se mantiene la anterior: {e}")
     
     def get_engine(self, name: str) -> MotorBase:
         """
@@ -128,14 +411,17 @@ class EngineManager:
         Raises:
             ValueError: Si el motor no existe
         """
-        if name not in self.engines:
-            available = ", ".join(self.engines.keys())
+        engine = self._engines.get(name)
+        if engine is None and name in self._configs:
+            engine = self._build(name)
+        if engine is None:
+            available = ", ".join(self._configs.keys())
             raise ValueError(
                 f"Motor '{name}' no encontrado. "
                 f"Motores disponibles: {available}"
             )
         
-        return self.engines[name]
+        return engine
     
     def list_engines(self) -> List[str]:
         """
@@ -188,89 +474,421 @@ class EngineManager:
         """
         return EngineClassifier.filter_by_origin(self.engines, motor_origin)
     
-    async def get_best_move(self, engine_name: str, fen: str, depth: Optional[int] = None, **kwargs) -> str:
+    async def get_best_move(
+        self,
+        engine_name: str,
+        fen: str,
+        depth: Optional[int] = None,
+        use_cache: bool = True,
+        **kwargs
+    ) -> MoveResult:
         """
         Obtiene el mejor movimiento de un motor específico.
+        Si el motor es cacheable, las posiciones ya analizadas se sirven desde la caché.
         
         Args:
             engine_name: Nombre del motor
             fen: Posición en formato FEN
             depth: Profundidad de análisis (opcional)
-            **kwargs: Parámetros adicionales específicos del motor
+            use_cache: Consultar y actualizar la caché de análisis
+            **kwargs: Parámetros adicionales específicos del motor. priority (interactive,
+                     compare, batch, background; default: interactive) ordena el acceso
+                     a las instancias del motor; position_moves/start_fen/affinity (ver
+                     ROUTING_KWARGS) indican cómo enviar la posición. Ninguno forma
+                     parte de la clave de caché
             
         Returns:
-            Mejor movimiento en formato UCI
+            MoveResult de esta petición (jugada UCI, explicación, análisis, tiempos y origen)
+            
+        Raises:
+            InvalidFENError: Si la FEN no es válida (antes de tocar el motor)
+            EngineOverloadedError: Si el motor está saturado (solo interactive y compare;
+                                   los lotes se admiten una vez al empezar, ver check_admission)
         """
         engine = self.get_engine(engine_name)
+        fen = normalize_fen(fen, require_moves=True)
         
         # Verificar disponibilidad antes de intentar
         if engine._available is False:
              raise ValueError(f"El motor {engine_name} no está disponible (verifique configuración o conexión)")
         
+        priority = kwargs.pop("priority", DEFAULT_PRIORITY)
+        # Cómo llega la posición al motor (no cambia la jugada ni forma parte de la clave de caché)
+        routing = {key: kwargs.pop(key) for key in self.ROUTING_KWARGS if key in kwargs}
+        use_cache = use_cache and engine.cacheable
+        cache_key = self.analysis_cache.make_key(engine_name, fen, depth, kwargs)
+        if use_cache and (cached := self.analysis_cache.get(cache_key)):
+            logger.debug(f"Movimiento de {engine_name} servido desde caché: {cached.move}")
+            engine.metrics.observe(cached)
+            return cached
+        
         try:
-            move = await engine.get_move(fen, depth, **kwargs)
-            logger.info(f"Movimiento obtenido de {engine_name}: {move}")
-            return move
+            async with engine.admission.admit(priority, check=priority not in PREEMPTIBLE_PRIORITIES):
+                result = await engine.get_move(fen, depth, priority=priority, **routing, **kwargs)
+            logger.info(f"Movimiento obtenido de {engine_name}: {result.move}")
+            if use_cache:
+                self.analysis_cache.put(cache_key, result)
+            return result
+        except EngineOverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Error obteniendo movimiento de {engine_name}: {e}")
+            engine.metrics.observe_error("timeout" if isinstance(e, asyncio.TimeoutError) else "error")
             raise
     
-    async def compare_engines(self, fen: str, depth: Optional[int] = None) -> Dict[str, str]:
+    async def iter_batch_moves(
+        self,
+        engine_name: str,
+        positions: List[Dict[str, Any]],
+        depth: Optional[int] = None,
+        priority: str = "batch",
+        **kwargs
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analiza muchas posiciones con un motor y produce cada resultado en cuanto termina.
+        Las posiciones repetidas se analizan una sola vez y las peticiones se reparten entre
+        las instancias del motor (pool de procesos o de conexiones, ver max_parallel).
+        
+        Args:
+            engine_name: Nombre del motor
+            positions: Lista de {"fen", "depth" (opcional)}
+            depth: Profundidad por defecto de las posiciones sin 'depth'
+            priority: Clase de prioridad de las búsquedas (batch; background en trabajos).
+                      Ceden las instancias del motor a las jugadas interactivas
+            **kwargs: Parámetros adicionales del motor (iguales para todo el lote)
+            
+        Yields:
+            {"index", "fen", "bestmove", "status" (ok|error), "explanation", "analysis",
+             "source", "timings", "error"}; el orden es el de finalización
+            
+        Raises:
+            ValueError: Si el motor no existe, no está disponible o el lote supera MAX_BATCH_POSITIONS
+        """
+        engine = self.get_engine(engine_name)
+        if engine._available is False:
+            raise ValueError(f"El motor {engine_name} no está disponible (verifique configuración o conexión)")
+        if len(positions) > self.MAX_BATCH_POSITIONS:
+            raise ValueError(f"El lote tiene {len(positions)} posiciones (máximo {self.MAX_BATCH_POSITIONS})")
+        
+        # Agrupar posiciones idénticas: una sola petición al motor por (fen, depth)
+        groups: Dict[tuple, List[int]] = {}
+        for index, position in enumerate(positions):
+            item_depth = position.get("depth") or depth
+            try:
+                fen = normalize_fen(position["fen"], require_moves=True)
+            except InvalidFENError as e:
+                yield self._batch_result(index, position["fen"], error=str(e))
+                continue
+            groups.setdefault((fen, item_depth), []).append(index)
+        
+        semaphore = asyncio.Semaphore(engine.max_parallel)
+        
+        async def analyze(fen: str, item_depth: Optional[int]) -> MoveResult:
+            async with semaphore:
+                return await self.get_best_move(engine_name, fen, item_depth, priority=priority, **kwargs)
+        
+        tasks = {
+            asyncio.create_task(analyze(fen, item_depth)): (fen, indexes)
+            for (fen, item_depth), indexes in groups.items()
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    fen, indexes = tasks[task]
+                    if task.exception() is not None:
+                        logger.warning(f"Lote de {engine_name}: error en {fen}: {task.exception()}")
+                        for index in indexes:
+                            yield self._batch_result(index, fen, error=str(task.exception()))
+                        continue
+                    result = task.result()
+                    yield self._batch_result(indexes[0], fen, result)
+                    # Repeticiones dentro del lote: mismo resultado sin volver a consultar
+                    for index in indexes[1:]:
+                        yield self._batch_result(index, fen, result, source="cache")
+        finally:
+            # También si el consumidor deja de leer (cliente desconectado). Esperar a que las
+            # tareas terminen de parar la búsqueda: si no, el motor vuelve al pool aún buscando
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    async def get_batch_moves(
+        self,
+        engine_name: str,
+        positions: List[Dict[str, Any]],
+        depth: Optional[int] = None,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """
+        Variante no progresiva de iter_batch_moves.
+        
+        Returns:
+            Resultados en el mismo orden que 'positions'
+        """
+        results = [result async for result in self.iter_batch_moves(engine_name, positions, depth, **kwargs)]
+        return sorted(results, key=lambda result: result["index"])
+    
+    @staticmethod
+    def _batch_result(
+        index: int,
+        fen: str,
+        result: Optional[MoveResult] = None,
+        source: Optional[str] = None,
+        error: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Resultado de una posición en /move/batch"""
+        return {
+            "index": index,
+            "fen": fen,
+            "bestmove": result.move if result else None,
+            "status": "ok" if result else "error",
+            "explanation": result.explanation if result else None,
+            "analysis": result.analysis if result else None,
+            "source": source or (result.source if result else None),
+            "timings": result.timings if result and not source else {},
+            "error": error
+        }
+    
+    def prepare_game_analysis(
+        self,
+        engine_name: str,
+        pgn: Optional[str] = None,
+        moves: Optional[List[str]] = None,
+        start_fen: Optional[str] = None,
+        depth: Optional[int] = None,
+        priority: str = "batch"
+    ) -> GameAnalyzer:
+        """
+        Valida la partida y el motor y prepara su análisis jugada a jugada.
+        Los errores se lanzan aquí, antes de empezar a producir eventos.
+        
+        Args:
+            engine_name: Nombre del motor
+            pgn: Partida en PGN
+            moves: Jugadas en formato UCI (alternativa a pgn)
+            start_fen: Posición inicial para 'moves'
+            depth: Profundidad por posición
+            priority: Clase de prioridad de las búsquedas (ver engines.PRIORITIES)
+            
+        Returns:
+            GameAnalyzer listo para run()
+            
+        Raises:
+            ValueError: Si el motor no existe o no está disponible
+            GameParseError: Si la partida no es válida
+            EngineOverloadedError: Si el motor está saturado
+        """
+        engine = self.get_engine(engine_name)
+        if engine._available is False:
+            raise ValueError(f"El motor {engine_name} no está disponible (verifique configuración o conexión)")
+        board, game_moves = parse_game(pgn, moves, start_fen)
+        engine.admission.check(priority)
+        return GameAnalyzer(engine, board, game_moves, depth, priority)
+    
+    def check_admission(self, engine_name: str, priority: str = "batch") -> None:
+        """
+        Comprueba si un motor admite trabajo nuevo antes de empezar un lote.
+        Las posiciones del lote no se rechazan una a una: las limita su max_parallel.
+        
+        Raises:
+            ValueError: Si el motor no existe
+            EngineOverloadedError: Si el motor está saturado
+        """
+        self.get_engine(engine_name).admission.check(priority)
+    
+    def get_admission_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Cola, espera estimada y rechazos de cada motor"""
+        return {name: engine.admission.get_stats() for name, engine in self.engines.items()}
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Métricas de la caché de análisis"""
+        return self.analysis_cache.get_stats()
+    
+    async def get_metrics(self) -> str:
+        """
+        Métricas de los motores creados en formato de exposición de Prometheus (GET /metrics).
+        No crea motores pendientes.
+        """
+        return render_metrics(self._engines, self.analysis_cache.get_stats())
+    
+    async def compare_engines(
+        self,
+        fen: str,
+        depth: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, str]:
         """
         Compara las sugerencias de todos los motores disponibles.
+        Los motores se consultan en paralelo: la respuesta tarda lo que el motor más lento
+        dentro del plazo, no la suma de todos. Los que no terminan a tiempo se marcan TIMEOUT.
         
         Args:
             fen: Posición en formato FEN
             depth: Profundidad de análisis
+            timeout: Plazo global en segundos (default: DEFAULT_COMPARE_DEADLINE).
+                    Cada motor puede tener además su propio 'compare_timeout' en la configuración
             
         Returns:
-            Diccionario {engine_name: move}
+            Diccionario {engine_name: move | "NO DISPONIBLE" | "TIMEOUT" | "ERROR: ..."}
+            en el orden de configuración de los motores
         """
-        results = {}
+        results = {
+            result["engine"]: result["bestmove"]
+            async for result in self.iter_compare_results(fen, depth, timeout)
+        }
         
-        # Ejecutar check rápido si no se ha hecho
-        # await self.check_all_availability() # Opcional, puede ser lento
+        # Mantener el orden de configuración
+        return {name: results[name] for name in self.engines if name in results}
+    
+    async def iter_compare_results(
+        self,
+        fen: str,
+        depth: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Consulta todos los motores en paralelo y produce cada resultado en cuanto termina.
+        Al vencer el plazo global, los motores pendientes se cancelan y se producen como TIMEOUT.
         
+        Args:
+            fen: Posición en formato FEN
+            depth: Profundidad de análisis
+            timeout: Plazo global en segundos (default: DEFAULT_COMPARE_DEADLINE)
+            
+        Yields:
+            {"engine", "bestmove", "status" (ok|error|timeout|unavailable), "explanation",
+             "analysis", "source", "elapsed_ms"}
+        """
+        fen = normalize_fen(fen, require_moves=True)
+        deadline = timeout or self.DEFAULT_COMPARE_DEADLINE
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        
+        tasks: Dict[asyncio.Task, str] = {}
         for name, engine in self.engines.items():
             # Saltar motores no disponibles
             if engine._available is False:
-                results[name] = "NO DISPONIBLE"
+                yield self._compare_result(name, "NO DISPONIBLE", "unavailable")
                 continue
-                
-            try:
-                # Para motores generativos, solicitar explicación automáticamente
-                # Verificar si el motor soporta explicaciones
-                kwargs = {}
-                if hasattr(engine, 'get_last_explanation'):
-                    kwargs['explanation'] = True
-                
-                move = await engine.get_move(fen, depth, **kwargs)
-                results[name] = move
-            except Exception as e:
-                logger.warning(f"Motor {name} falló: {e}")
-                results[name] = f"ERROR: {str(e)}"
+            engine_timeout = min(deadline, float(engine.config.get("compare_timeout", deadline)))
+            task = asyncio.create_task(self._compare_one(name, engine, fen, depth, engine_timeout))
+            tasks[task] = name
+        
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = started + deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            # También si el consumidor deja de leer (cliente desconectado). Esperar a que las
+            # tareas terminen de parar la búsqueda: si no, el motor vuelve al pool aún buscando
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
         
-        return results
+        elapsed = loop.time() - started
+        for task in pending:
+            logger.warning(f"Motor {tasks[task]} no terminó dentro del plazo de {deadline}s")
+            engine_metrics(tasks[task]).observe_error("timeout")
+            yield self._compare_result(tasks[task], self.TIMEOUT_RESULT, "timeout", elapsed=elapsed)
+    
+    @staticmethod
+    def _compare_result(
+        name: str,
+        bestmove: str,
+        status: str,
+        result: Optional[MoveResult] = None,
+        elapsed: float = 0.0
+    ) -> Dict[str, Any]:
+        """Resultado de un motor en /compare"""
+        return {
+            "engine": name,
+            "bestmove": bestmove,
+            "status": status,
+            "explanation": result.explanation if result else None,
+            "analysis": result.analysis if result else None,
+            "source": result.source if result else None,
+            "elapsed_ms": round(elapsed * 1000, 1)
+        }
+    
+    async def _compare_one(
+        self,
+        name: str,
+        engine: MotorBase,
+        fen: str,
+        depth: Optional[int],
+        timeout: float
+    ) -> Dict[str, Any]:
+        """
+        Obtiene la sugerencia de un motor para /compare con su propio timeout.
+        
+        Returns:
+            Resultado del motor (ver _compare_result)
+        """
+        started = time.monotonic()
+        try:
+            # Para motores generativos, solicitar explicación automáticamente
+            kwargs = {"priority": "compare"}
+            if engine.motor_type == MotorType.GENERATIVE:
+                kwargs['explanation'] = True
+            
+            async with engine.admission.admit("compare"):
+                result = await asyncio.wait_for(engine.get_move(fen, depth, **kwargs), timeout=timeout)
+            return self._compare_result(name, result.move, "ok", result, time.monotonic() - started)
+        except asyncio.TimeoutError:
+            logger.warning(f"Motor {name} superó su timeout de comparación ({timeout}s)")
+            engine.metrics.observe_error("timeout")
+            return self._compare_result(name, self.TIMEOUT_RESULT, "timeout", elapsed=time.monotonic() - started)
+        except Exception as e:
+            logger.warning(f"Motor {name} falló: {e}")
+            if not isinstance(e, EngineOverloadedError):
+                engine.metrics.observe_error("error")
+            return self._compare_result(name, f"ERROR: {str(e)}", "error", elapsed=time.monotonic() - started)
     
     async def cleanup_all(self) -> None:
-        """Limpia recursos de todos los motores"""
-        for name, engine in self.engines.items():
+        """Limpia recursos de todos los motores (también los retirados que aún se estaban vaciando)"""
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+        
+        retiring = dict(self._retiring)
+        for task in retiring:
+            task.cancel()
+        await asyncio.gather(*retiring, return_exceptions=True)
+        for engine in retiring.values():
+            try:
+                await engine.cleanup()
+            except Exception as e:
+                logger.warning(f"Error limpiando motor retirado {engine.name}: {e}")
+        
+        for name, engine in self._engines.items():
             try:
                 await engine.cleanup()
                 logger.info(f"Motor {name} limpiado")
             except Exception as e:
                 logger.warning(f"Error limpiando motor {name}: {e}")
+        
+        # Cerrar clientes HTTP compartidos que sigan abiertos (importa httpx: solo al apagar)
+        from engines.protocols import HTTPClientPool
+        await HTTPClientPool.close_all()
     
     def __len__(self) -> int:
-        """Retorna el número de motores cargados"""
-        return len(self.engines)
+        """Retorna el número de motores configurados (sin crearlos)"""
+        return len(self._configs)
     
     def __contains__(self, engine_name: str) -> bool:
         """Verifica si un motor existe"""
-        return engine_name in self.engines
+        return engine_name in self._configs
     
     def __str__(self) -> str:
-        return f"EngineManager({len(self.engines)} motores: {', '.join(self.engines.keys())})"
+        return f"EngineManager({len(self._configs)} motores: {', '.join(self._configs.keys())})"
     
     def __repr__(self) -> str:
         return self.__str__()
@@ -4,21 +4,50 @@ Proporciona una arquitectura flexible para trabajar con diferentes tipos de moto
 Actualizado con sistema de protocolos para separar comunicación de lógica de negocio.
 """
 
+import importlib
+
 from .base import MotorBase, MotorType, MotorOrigin, ValidationMode
+from .results import MoveResult, MOVE_SOURCES
+from .pool import ProtocolPool, PRIORITIES, DEFAULT_PRIORITY
+from .analysis_cache import AnalysisCache
+from .admission import AdmissionController, EngineOverloadedError
+from .metrics import EngineMetrics, engine_metrics, render_metrics
 from .factory import EngineFactory, EngineRegistry, EngineClassifier
-from .traditional import TraditionalEngine
-from .neuronal import NeuronalEngine
-from .generative import GenerativeEngine
-from .validators import SchemaValidator, PromptValidator, ValidatorFactory
-
-# Protocolos (exportados para uso avanzado)
-from .protocols import (
-    ProtocolBase,
-    UCIProtocol,
-    RESTProtocol,
-    LocalLLMProtocol,
-    APILLMProtocol
-)
+
+# Exportaciones con dependencias pesadas (python-chess, httpx, jinja2, jsonpath): se importan
+# en el primer acceso para no retrasar el arranque. Los motores se crean en segundo plano
+# (ver EngineManager), así que esos módulos ya no se cargan antes de aceptar tráfico
+_LAZY_EXPORTS = {
+    # Motores
+    'TraditionalEngine': '.traditional',
+    'NeuronalEngine': '.neuronal',
+    'GenerativeEngine': '.generative',
+    # Validadores
+    'SchemaValidator': '.validators',
+    'PromptValidator': '.validators',
+    'ValidatorFactory': '.validators',
+    # Posiciones
+    'InvalidFENError': '.positions',
+    'normalize_fen': '.positions',
+    'parse_fen': '.positions',
+    # Protocolos (exportados para uso avanzado)
+    'ProtocolBase': '.protocols',
+    'UCIProtocol': '.protocols',
+    'RESTProtocol': '.protocols',
+    'LocalLLMProtocol': '.protocols',
+    'APILLMProtocol': '.protocols',
+}
+
+
+def __getattr__(name: str):
+    """Importa una exportación diferida en su primer uso (PEP 562)"""
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     # Clases base
@@ -27,6 +56,23 @@ __all__ = [
     'MotorOrigin',
     'ValidationMode',
     
+    # Resultados
+    'MoveResult',
+    'MOVE_SOURCES',
+    
+    # Paralelismo y caché
+    'ProtocolPool',
+    'PRIORITIES',
+    'DEFAULT_PRIORITY',
+    'AnalysisCache',
+    'AdmissionController',
+    'EngineOverloadedError',
+    
+    # Métricas
+    'EngineMetrics',
+    'engine_metrics',
+    'render_metrics',
+    
     # Factory y Registry
     'EngineFactory',
     'EngineRegistry',
@@ -42,6 +88,11 @@ __all__ = [
     'PromptValidator',
     'ValidatorFactory',
     
+    # Posiciones
+    'InvalidFENError',
+    'normalize_fen',
+    'parse_fen',
+    
     # Protocolos
     'ProtocolBase',
     'UCIProtocol',
@@ -0,0 +1,214 @@
+"""
+Control de admisión por motor.
+Cuenta las peticiones en curso de cada motor (atendiéndose o esperando instancia) y
+rechaza de inmediato las que no se podrían atender a tiempo: cuando la cola está llena
+o la espera estimada supera un umbral. Es preferible devolver un 429 con Retry-After
+al llegar que dejar que todas las peticiones acumuladas acaben en timeout.
+"""
+
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from .pool import PRIORITIES, priority_rank
+
+logger = logging.getLogger(__name__)
+
+# Configuración por defecto (sobrescribible por motor: max_queue, max_queue_wait)
+DEFAULT_MAX_QUEUE = 32
+DEFAULT_MAX_QUEUE_WAIT = 20.0   # Segundos, por debajo del timeout de 30s de UCI
+
+# Peso de la última muestra en las medias móviles de tiempos
+SMOOTHING = 0.2
+
+# Los trabajos en segundo plano ya esperan en su propia cola: nunca se rechazan
+UNBOUNDED_PRIORITIES = ("background",)
+
+
+class EngineOverloadedError(Exception):
+    """El motor tiene demasiadas peticiones pendientes para admitir otra"""
+
+    def __init__(self, engine: str, retry_after: float, reason: str):
+        """
+        Args:
+            engine: Nombre del motor
+            retry_after: Segundos recomendados antes de reintentar
+            reason: Motivo legible del rechazo
+        """
+        self.engine = engine
+        self.retry_after = retry_after
+        self.reason = reason
+        super().__init__(f"Motor {engine} saturado: {reason}. Reintenta en {retry_after:.0f}s")
+
+
+class AdmissionController:
+    """
+    Admisión de peticiones de un motor.
+    Una petición solo cuenta la cola que tiene delante: las de su prioridad o superior
+    (una jugada interactiva no espera detrás de un lote, ver ProtocolPool).
+    La espera estimada es (peticiones por delante que no caben) × tiempo medio de servicio / concurrencia.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        max_queue_wait: float = DEFAULT_MAX_QUEUE_WAIT
+    ):
+        """
+        Args:
+            name: Nombre del motor
+            max_concurrency: Peticiones que el motor atiende a la vez (el resto espera)
+            max_queue: Peticiones en espera máximas por delante de una nueva
+            max_queue_wait: Espera estimada máxima en segundos
+        """
+        self.name = name
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self.max_queue_wait = float(max_queue_wait)
+
+        self._in_flight: Dict[str, int] = {priority: 0 for priority in PRIORITIES}
+        # Medias móviles en segundos (None hasta la primera muestra)
+        self.avg_service: Optional[float] = None
+        self.avg_latency: Optional[float] = None
+
+        # Métricas
+        self.admitted = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_config(cls, name: str, config: Dict[str, Any], default_concurrency: int) -> "AdmissionController":
+        """
+        Crea el controlador con la configuración del motor.
+
+        Args:
+            name: Nombre del motor
+            config: Configuración (max_concurrency, max_queue, max_queue_wait)
+            default_concurrency: Concurrencia si no se configura (instancias del pool)
+        """
+        return cls(
+            name,
+            max_concurrency=config.get("max_concurrency", default_concurrency),
+            max_queue=config.get("max_queue", DEFAULT_MAX_QUEUE),
+            max_queue_wait=config.get("max_queue_wait", DEFAULT_MAX_QUEUE_WAIT),
+        )
+
+    @classmethod
+    def from_stats(cls, name: str, stats: Dict[str, Any]) -> "AdmissionController":
+        """
+        Reconstruye un controlador a partir de get_stats() de otro proceso (broker de motores).
+        Permite decidir la admisión sin consultarle; no registra peticiones propias.
+
+        Args:
+            name: Nombre del motor
+            stats: Resultado de get_stats()
+        """
+        controller = cls(name, stats["max_concurrency"], stats["max_queue"], stats["max_queue_wait"])
+        controller._in_flight.update(stats["in_flight_by_priority"])
+        for key, attribute in (("avg_service_ms", "avg_service"), ("avg_latency_ms", "avg_latency")):
+            if stats.get(key) is not None:
+                setattr(controller, attribute, stats[key] / 1000)
+        controller.admitted = stats["admitted"]
+        controller.rejected = stats["rejected"]
+        return controller
+
+    @property
+    def in_flight(self) -> int:
+        """Peticiones en curso de todas las prioridades"""
+        return sum(self._in_flight.values())
+
+    def _ahead(self, priority: str) -> int:
+        """Peticiones en curso con la misma prioridad o superior"""
+        rank = priority_rank(priority)
+        return sum(count for name, count in self._in_flight.items() if PRIORITIES[name] <= rank)
+
+    def queued(self, priority: str = "background") -> int:
+        """Peticiones esperando instancia por delante de una nueva de 'priority' (default: todas)"""
+        return max(0, self._ahead(priority) - self.max_concurrency)
+
+    def estimated_wait(self, priority: str = "interactive") -> float:
+        """Segundos estimados que esperaría una petición nueva de 'priority' antes de ser atendida"""
+        if self.avg_service is None:
+            return 0.0
+        blocked = self._ahead(priority) - self.max_concurrency + 1
+        return max(0, blocked) * self.avg_service / self.max_concurrency
+
+    def check(self, priority: str) -> None:
+        """
+        Comprueba si se admitiría una petición nueva.
+
+        Raises:
+            EngineOverloadedError: Si la cola está llena o la espera estimada supera max_queue_wait
+        """
+        if priority in UNBOUNDED_PRIORITIES:
+            return
+
+        queued = self.queued(priority)
+        wait = self.estimated_wait(priority)
+        if queued >= self.max_queue:
+            reason = f"{queued} peticiones en cola (máximo {self.max_queue})"
+        elif wait > self.max_queue_wait:
+            reason = f"espera estimada de {wait:.1f}s (máximo {self.max_queue_wait:.0f}s)"
+        else:
+            return
+
+        self.rejected += 1
+        retry_after = max(1, math.ceil(wait or (self.avg_service or 1.0)))
+        logger.info(f"Admisión de {self.name}: petición {priority} rechazada ({reason})")
+        raise EngineOverloadedError(self.name, retry_after, reason)
+
+    @asynccontextmanager
+    async def admit(self, priority: str, check: bool = True) -> AsyncIterator[None]:
+        """
+        Registra una petición en curso durante el bloque 'async with'.
+
+        Args:
+            priority: Clase de prioridad de la petición
+            check: Rechazar si el motor está saturado (False para las posiciones de un lote
+                   ya admitido, que van limitadas por su propio max_parallel)
+
+        Raises:
+            EngineOverloadedError: Si check y el motor está saturado
+        """
+        if check:
+            self.check(priority)
+        # Sin cola por delante, la latencia de la petición es su tiempo de servicio
+        uncontended = self._ahead(priority) < self.max_concurrency
+        self._in_flight[priority] += 1
+        self.admitted += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._in_flight[priority] -= 1
+        # Solo las peticiones completadas alimentan las medias
+        elapsed = time.monotonic() - started
+        self.avg_latency = self._smooth(self.avg_latency, elapsed)
+        if uncontended:
+            self.avg_service = self._smooth(self.avg_service, elapsed)
+
+    @staticmethod
+    def _smooth(average: Optional[float], sample: float) -> float:
+        return sample if average is None else average + SMOOTHING * (sample - average)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Profundidad de cola, tiempos medios y rechazos"""
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return round(seconds * 1000, 1) if seconds is not None else None
+
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_queue_wait": self.max_queue_wait,
+            "in_flight": self.in_flight,
+            "in_flight_by_priority": dict(self._in_flight),
+            "queued": self.queued(),
+            "avg_service_ms": ms(self.avg_service),
+            "avg_latency_ms": ms(self.avg_latency),
+            "estimated_wait_ms": ms(self.estimated_wait()),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
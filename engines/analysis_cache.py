@@ -0,0 +1,94 @@
+"""
+Caché LRU de resultados de análisis.
+Guarda el MoveResult de cada (motor, posición, profundidad, opciones) para servir
+posiciones repetidas sin volver a consultar al motor.
+"""
+
+import copy
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from .results import MoveResult
+
+# Entradas máximas por defecto
+DEFAULT_ANALYSIS_CACHE_SIZE = 4096
+
+
+class AnalysisCache:
+    """LRU en memoria de resultados de motores"""
+
+    def __init__(self, max_size: int = DEFAULT_ANALYSIS_CACHE_SIZE):
+        """
+        Args:
+            max_size: Número máximo de resultados guardados (0 = caché desactivada)
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, MoveResult]" = OrderedDict()
+
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(engine: str, fen: str, depth: Optional[int], options: Optional[Dict[str, Any]] = None) -> Hashable:
+        """
+        Clave de una petición.
+
+        Args:
+            engine: Nombre del motor
+            fen: Posición normalizada
+            depth: Profundidad pedida (None = la del motor)
+            options: Parámetros adicionales que cambian el resultado (explanation, strategy...)
+        """
+        extra = tuple(sorted((key, str(value)) for key, value in (options or {}).items()))
+        return (engine, fen, depth, extra)
+
+    def get(self, key: Hashable) -> Optional[MoveResult]:
+        """
+        Busca un resultado.
+
+        Returns:
+            Copia del resultado con source="cache" (None si no está)
+        """
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        cached = copy.deepcopy(result)
+        cached.source = "cache"
+        cached.timings = {}
+        return cached
+
+    def put(self, key: Hashable, result: MoveResult) -> None:
+        """Guarda un resultado (desaloja el menos usado si se supera max_size)"""
+        if self.max_size <= 0:
+            return
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self, engine: Optional[str] = None) -> None:
+        """Vacía la caché (solo las entradas de 'engine' si se indica)"""
+        if engine is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == engine]:
+            del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de la caché"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
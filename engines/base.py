@@ -8,6 +8,10 @@ from enum import Enum
 from typing import Any, Dict, Optional
 import logging
 
+from .admission import AdmissionController
+from .metrics import EngineMetrics, engine_metrics
+from .results import MoveResult
+
 logger = logging.getLogger(__name__)
 
 
@@ -61,6 +65,7 @@ class MotorBase(ABC):
         self.config = config
         self._initialized = False
         self._available = None  # Estado de disponibilidad (None=unknown, True=yes, False=no)
+        self._admission: Optional[AdmissionController] = None
         
         logger.info(
             f"Motor creado: {name} | Tipo: {motor_type.value} | "
@@ -68,7 +73,7 @@ class MotorBase(ABC):
         )
     
     @abstractmethod
-    async def get_move(self, board_state: str, depth: Optional[int] = None, **kwargs) -> str:
+    async def get_move(self, board_state: str, depth: Optional[int] = None, **kwargs) -> MoveResult:
         """
         Obtiene el mejor movimiento para un estado del tablero dado.
         
@@ -78,10 +83,44 @@ class MotorBase(ABC):
             **kwargs: Parámetros adicionales específicos del motor
             
         Returns:
-            Movimiento en notación algebraica (ej: "e2e4")
+            MoveResult con la jugada (ej: "e2e4"), explicación, análisis y tiempos de esta petición
         """
         pass
     
+    @property
+    def admission(self) -> AdmissionController:
+        """
+        Control de admisión del motor (max_concurrency, max_queue, max_queue_wait en la configuración).
+        Se crea en el primer uso, cuando el motor ya conoce su max_parallel.
+        """
+        if self._admission is None:
+            self._admission = AdmissionController.from_config(self.name, self.config, self.max_parallel)
+        return self._admission
+    
+    @property
+    def metrics(self) -> EngineMetrics:
+        """Peticiones, latencias y datos de búsqueda acumulados (por nombre: sobreviven a las recargas)"""
+        return engine_metrics(self.name)
+    
+    @property
+    def max_parallel(self) -> int:
+        """Peticiones get_move que el motor puede atender a la vez (lotes de posiciones)"""
+        return max(1, int(self.config.get("max_parallel", 1)))
+    
+    @property
+    def in_flight(self) -> int:
+        """Peticiones en curso (al recargar la configuración, un motor reemplazado se cierra al llegar a 0)"""
+        return self.admission.in_flight
+    
+    @property
+    def cacheable(self) -> bool:
+        """
+        Indica si sus resultados pueden servirse desde la caché de análisis.
+        Por defecto sí, salvo motores generativos (respuestas no deterministas).
+        Se puede forzar por motor con 'analysis_cache: true/false'.
+        """
+        return bool(self.config.get("analysis_cache", self.motor_type != MotorType.GENERATIVE))
+    
     @abstractmethod
     async def validate_response(self, response: Any) -> bool:
         """
@@ -116,6 +155,17 @@ class MotorBase(ABC):
             
         return self._available
 
+    async def warmup(self) -> None:
+        """
+        Precalienta el motor: inicializa y abre conexiones antes del primer movimiento.
+        Se puede desactivar por motor con 'warmup: false' en la configuración.
+        """
+        if not self.config.get("warmup", True):
+            return
+        await self.initialize()
+        if hasattr(self, 'protocol'):
+            await self.protocol.warmup()
+    
     async def initialize(self) -> None:
         """Inicializa el motor (si requiere setup previo)"""
         if not self._initialized:
@@ -147,7 +197,9 @@ class MotorBase(ABC):
             "validation_mode": self.validation_mode.value,
             "initialized": self._initialized,
             "available": self._available if self._available is not None else True, # Asumir true si no se ha verificado
-            "description": self.config.get("description", "")  # Descripción del motor desde configuración
+            "description": self.config.get("description", ""),  # Descripción del motor desde configuración
+            "admission": self.admission.get_stats(),
+            "latency": self.metrics.latency_summary()
         }
     
     def __str__(self) -> str:
@@ -4,77 +4,125 @@ Implementa los patrones Factory Method y Registry.
 Actualizado para soportar arquitectura con protocolos.
 """
 
+import importlib
 import logging
-from typing import Any, Dict, Type, Optional, List
+from importlib.metadata import entry_points
+from typing import Any, Dict, Type, Optional, List, Union
 import yaml
-import sys
-import os
-
-# Agregar el directorio raíz al path para importar config
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import resolve_config_dict
 from .base import MotorBase, MotorType, MotorOrigin
-from .traditional import TraditionalEngine
-from .neuronal import NeuronalEngine
-from .generative import GenerativeEngine
 
 logger = logging.getLogger(__name__)
 
+# Grupo de entry points con el que otros paquetes añaden tipos de motor ("tipo = modulo:Clase")
+ENTRY_POINT_GROUP = "chess_trainer.engines"
+
+# Cargador YAML en C si PyYAML se compiló con libyaml (bastante más rápido al arrancar)
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 class EngineRegistry:
     """
     Registro de tipos de motores disponibles.
     Permite añadir nuevos motores sin modificar código base.
+    Las clases pueden registrarse como "modulo:Clase" y solo se importan al crear el
+    primer motor de ese tipo; los paquetes instalados se descubren por entry points
+    (ENTRY_POINT_GROUP) sin importar sus módulos.
     """
     
-    _registry: Dict[str, Type[MotorBase]] = {}
+    _registry: Dict[str, Union[Type[MotorBase], str]] = {}
+    _entry_points_loaded = False
     
     @classmethod
-    def register(cls, engine_type: str, engine_class: Type[MotorBase]) -> None:
+    def register(cls, engine_type: str, engine_class: Union[Type[MotorBase], str]) -> None:
         """
         Registra una nueva clase de motor.
         
         Args:
             engine_type: Identificador del tipo de motor
-            engine_class: Clase del motor a registrar
+            engine_class: Clase del motor a registrar o su ruta "modulo:Clase" (importación diferida)
         """
         if engine_type in cls._registry:
             logger.warning(f"Sobrescribiendo motor registrado: {engine_type}")
         
         cls._registry[engine_type] = engine_class
-        logger.info(f"Motor registrado: {engine_type} -> {engine_class.__name__}")
+        logger.debug(f"Motor registrado: {engine_type} -> {getattr(engine_class, '__name__', engine_class)}")
+    
+    @classmethod
+    def _discover(cls) -> None:
+        """Registra (sin importarlos) los tipos de motor anunciados por entry points, una vez por proceso"""
+        if cls._entry_points_loaded:
+            return
+        cls._entry_points_loaded = True
+        try:
+            discovered = entry_points(group=ENTRY_POINT_GROUP)
+        except Exception as e:
+            logger.warning(f"No se pudieron leer los entry points de {ENTRY_POINT_GROUP}: {e}")
+            return
+        for entry_point in discovered:
+            # Los tipos integrados tienen prioridad
+            if entry_point.name not in cls._registry:
+                cls.register(entry_point.name, entry_point.value)
+    
+    @staticmethod
+    def _import(path: str) -> Type[MotorBase]:
+        """
+        Importa una clase de motor a partir de "modulo:Clase".
+        
+        Raises:
+            ImportError: Si el módulo no se puede importar
+            ValueError: Si la ruta no es válida o no es una subclase de MotorBase
+        """
+        module_name, _, class_name = path.partition(":")
+        if not class_name:
+            raise ValueError(f"Ruta de motor inválida '{path}' (formato: modulo:Clase)")
+        engine_class = getattr(importlib.import_module(module_name), class_name, None)
+        if not (isinstance(engine_class, type) and issubclass(engine_class, MotorBase)):
+            raise ValueError(f"'{path}' no es una clase de motor (subclase de MotorBase)")
+        return engine_class
     
     @classmethod
     def get(cls, engine_type: str) -> Optional[Type[MotorBase]]:
         """
-        Obtiene la clase de motor registrada.
+        Obtiene la clase de motor registrada (la importa si se registró por ruta).
         
         Args:
             engine_type: Identificador del tipo de motor
             
         Returns:
-            Clase del motor o None si no existe
+            Clase del motor o None si no existe o no se puede importar
         """
-        return cls._registry.get(engine_type)
+        cls._discover()
+        engine_class = cls._registry.get(engine_type)
+        if isinstance(engine_class, str):
+            try:
+                engine_class = cls._import(engine_class)
+            except Exception as e:
+                logger.error(f"No se pudo cargar el motor '{engine_type}' ({cls._registry[engine_type]}): {e}")
+                return None
+            cls._registry[engine_type] = engine_class
+        return engine_class
     
     @classmethod
     def list_registered(cls) -> list:
         """Lista todos los tipos de motores registrados"""
+        cls._discover()
         return list(cls._registry.keys())
     
     @classmethod
     def is_registered(cls, engine_type: str) -> bool:
         """Verifica si un tipo de motor está registrado"""
+        cls._discover()
         return engine_type in cls._registry
 
 
-# Registrar motores por defecto (simplificado con nueva arquitectura)
-EngineRegistry.register("traditional", TraditionalEngine)
-EngineRegistry.register("traditional_uci", TraditionalEngine)  # Retrocompatibilidad
-EngineRegistry.register("traditional_rest", TraditionalEngine)  # Retrocompatibilidad
-EngineRegistry.register("neuronal", NeuronalEngine)
-EngineRegistry.register("generative", GenerativeEngine)
+# Registrar motores por defecto (se importan al crear el primer motor de cada tipo)
+EngineRegistry.register("traditional", f"{__package__}.traditional:TraditionalEngine")
+EngineRegistry.register("traditional_uci", f"{__package__}.traditional:TraditionalEngine")  # Retrocompatibilidad
+EngineRegistry.register("traditional_rest", f"{__package__}.traditional:TraditionalEngine")  # Retrocompatibilidad
+EngineRegistry.register("neuronal", f"{__package__}.neuronal:NeuronalEngine")
+EngineRegistry.register("generative", f"{__package__}.generative:GenerativeEngine")
 
 
 class EngineFactory:
@@ -206,6 +254,75 @@ class EngineFactory:
         )
         return "traditional"
     
+    @staticmethod
+    def read_yaml_configs(yaml_path: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Lee la configuración de los motores de un archivo YAML sin crearlos.
+        Resuelve variables de entorno en formato ${VARIABLE}.
+        
+        Args:
+            yaml_path: Ruta al archivo YAML
+            
+        Returns:
+            Diccionario {name: config} en el orden del archivo
+            
+        Raises:
+            FileNotFoundError: Si el archivo no existe
+            yaml.YAMLError: Si el archivo no es YAML válido
+        """
+        with open(yaml_path, 'r', encoding='utf-8') as f:
+            config = yaml.load(f, Loader=YAML_LOADER) or {}
+        
+        # Resolver variables de entorno en la configuración
+        config = resolve_config_dict(config)
+        
+        return {
+            name: resolve_config_dict(engine_config)
+            for name, engine_config in (config.get("engines") or {}).items()
+        }
+    
+    @staticmethod
+    def read_multiple_yaml_configs(yaml_paths: List[str], strict: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Lee y combina la configuración de los motores de varios archivos YAML sin crearlos.
+        
+        Args:
+            yaml_paths: Lista de rutas a archivos YAML (los que no existen se omiten)
+            strict: Si un archivo inválido o con motores duplicados es un error (al recargar es
+                    preferible mantener la configuración actual). Con False se omite ese archivo,
+                    como en create_from_multiple_yaml
+            
+        Returns:
+            Diccionario combinado {name: config}
+            
+        Raises:
+            yaml.YAMLError: Si strict y algún archivo no es YAML válido
+            ValueError: Si strict y hay nombres de motores duplicados entre archivos
+        """
+        all_configs: Dict[str, Dict[str, Any]] = {}
+        
+        for yaml_path in yaml_paths:
+            try:
+                configs = EngineFactory.read_yaml_configs(yaml_path)
+                
+                duplicates = set(all_configs) & set(configs)
+                if duplicates:
+                    raise ValueError(
+                        f"Motores duplicados encontrados en {yaml_path}: {', '.join(sorted(duplicates))}"
+                    )
+            except FileNotFoundError:
+                logger.warning(f"Archivo de configuración no encontrado: {yaml_path}, omitiendo...")
+                continue
+            except Exception as e:
+                if strict:
+                    raise
+                logger.error(f"Error cargando {yaml_path}: {e}")
+                continue
+            
+            all_configs.update(configs)
+        
+        return all_configs
+    
     @staticmethod
     def create_from_yaml(yaml_path: str) -> Dict[str, MotorBase]:
         """
@@ -219,19 +336,11 @@ class EngineFactory:
             Diccionario de motores creados {name: engine}
         """
         try:
-            with open(yaml_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-            
-            # Resolver variables de entorno en la configuración
-            config = resolve_config_dict(config)
-            
-            engines_config = config.get("engines", {})
+            engines_config = EngineFactory.read_yaml_configs(yaml_path)
             engines = {}
             
             for name, engine_config in engines_config.items():
                 try:
-                    # Resolver variables de entorno en la configuración del motor
-                    engine_config = resolve_config_dict(engine_config)
                     engine = EngineFactory.create_engine(name, engine_config)
                     engines[name] = engine
                 except Exception as e:
@@ -0,0 +1,291 @@
+"""
+Análisis de partidas completas.
+Reproduce la partida con python-chess (push, sin volver a parsear FENs), pide a un motor
+la evaluación de cada posición enviándola como 'position startpos moves ...' para que
+conserve su tabla hash, y clasifica cada jugada (imprecisión, error, error grave)
+con la pérdida de centipeones y la precisión por jugada, al estilo de Lichess.
+"""
+
+import io
+import logging
+import math
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import chess
+import chess.pgn
+
+from .base import MotorBase, MotorType
+from .results import MoveResult
+
+logger = logging.getLogger(__name__)
+
+# Jugadas máximas (medias jugadas) por partida
+MAX_GAME_PLIES = 600
+
+# Límite de la evaluación en centipeones (las de mate se convierten a ±MATE_CP)
+EVAL_CAP_CP = 1000
+MATE_CP = 10000
+
+# Caída de probabilidad de ganar (0-100) a partir de la que se clasifica la jugada
+# (equivalen a 0.3/0.2/0.1 de "winning chances" en Lichess)
+CLASSIFICATION_THRESHOLDS = (
+    ("blunder", 15.0),
+    ("mistake", 10.0),
+    ("inaccuracy", 5.0),
+)
+
+
+class GameParseError(ValueError):
+    """La partida (PGN o lista de jugadas) no es válida"""
+
+
+def parse_game(
+    pgn: Optional[str] = None,
+    moves: Optional[List[str]] = None,
+    start_fen: Optional[str] = None
+) -> Tuple[chess.Board, List[chess.Move]]:
+    """
+    Obtiene la posición inicial y las jugadas de una partida.
+
+    Args:
+        pgn: Partida en PGN (se usa su cabecera FEN si la tiene)
+        moves: Jugadas en formato UCI (alternativa a pgn)
+        start_fen: Posición inicial para 'moves' (default: posición inicial estándar)
+
+    Returns:
+        Tupla (tablero inicial, jugadas legales en orden)
+
+    Raises:
+        GameParseError: Si no hay partida, el PGN no se puede leer o hay jugadas ilegales
+    """
+    if pgn:
+        game = chess.pgn.read_game(io.StringIO(pgn))
+        if game is None:
+            raise GameParseError("No se pudo leer ninguna partida del PGN")
+        if game.errors:
+            raise GameParseError(f"PGN inválido: {game.errors[0]}")
+        board = game.board()
+        game_moves = list(game.mainline_moves())
+    elif moves is not None:
+        try:
+            board = chess.Board(start_fen) if start_fen else chess.Board()
+        except ValueError as e:
+            raise GameParseError(f"FEN inicial inválida: {e}")
+        game_moves = []
+        replay = board.copy(stack=False)
+        for index, uci in enumerate(moves):
+            try:
+                move = chess.Move.from_uci(uci)
+            except ValueError:
+                raise GameParseError(f"Jugada {index + 1} con formato inválido: {uci}")
+            if move not in replay.legal_moves:
+                raise GameParseError(f"Jugada {index + 1} ilegal: {uci}")
+            replay.push(move)
+            game_moves.append(move)
+    else:
+        raise GameParseError("Indica 'pgn' o 'moves'")
+
+    if not game_moves:
+        raise GameParseError("La partida no tiene jugadas")
+    if len(game_moves) > MAX_GAME_PLIES:
+        raise GameParseError(f"La partida tiene {len(game_moves)} medias jugadas (máximo {MAX_GAME_PLIES})")
+    return board, game_moves
+
+
+def score_to_cp(analysis: Optional[Dict[str, Any]]) -> Optional[int]:
+    """
+    Evaluación en centipeones desde el punto de vista del bando que mueve.
+    Los mates se convierten a ±MATE_CP (más cerca cuanto más corto).
+
+    Returns:
+        Centipeones o None si el motor no dio puntuación
+    """
+    if not analysis:
+        return None
+    if analysis.get("mate") is not None:
+        mate = analysis["mate"]
+        return MATE_CP - abs(mate) if mate > 0 else -MATE_CP + abs(mate)
+    return analysis.get("score_cp")
+
+
+def win_percent(cp: int) -> float:
+    """Probabilidad de ganar (0-100) para una evaluación en centipeones (fórmula de Lichess)"""
+    cp = max(-EVAL_CAP_CP, min(EVAL_CAP_CP, cp))
+    return 50 + 50 * (2 / (1 + math.exp(-0.00368208 * cp)) - 1)
+
+
+def move_accuracy(win_before: float, win_after: float) -> float:
+    """Precisión de una jugada (0-100) según la caída de probabilidad de ganar (fórmula de Lichess)"""
+    accuracy = 103.1668 * math.exp(-0.04354 * max(0.0, win_before - win_after)) - 3.1669
+    return max(0.0, min(100.0, accuracy))
+
+
+def classify(win_drop: float) -> Optional[str]:
+    """Clasificación de la jugada según la caída de probabilidad de ganar (None = sin etiqueta)"""
+    for label, threshold in CLASSIFICATION_THRESHOLDS:
+        if win_drop >= threshold:
+            return label
+    return None
+
+
+class GameAnalyzer:
+    """
+    Analiza una partida jugada a jugada con un motor.
+    Cada posición se evalúa una sola vez: la evaluación tras una jugada es la
+    evaluación previa de la siguiente.
+    """
+
+    def __init__(
+        self,
+        engine: MotorBase,
+        board: chess.Board,
+        moves: List[chess.Move],
+        depth: Optional[int] = None,
+        priority: str = "batch"
+    ):
+        """
+        Args:
+            engine: Motor que evalúa las posiciones (UCI para obtener evaluaciones)
+            board: Posición inicial
+            moves: Jugadas de la partida
+            depth: Profundidad por posición (None = la del motor)
+            priority: Clase de prioridad de las búsquedas (cede el motor a las jugadas interactivas)
+        """
+        self.engine = engine
+        self.board = board
+        self.moves = moves
+        self.depth = depth
+        self.priority = priority
+        self.start_fen = board.fen()
+        # Solo los motores no generativos reciben la posición como partida
+        self._incremental = engine.motor_type != MotorType.GENERATIVE
+
+        self._losses: Dict[bool, List[int]] = {chess.WHITE: [], chess.BLACK: []}
+        self._accuracies: Dict[bool, List[float]] = {chess.WHITE: [], chess.BLACK: []}
+        self._counts: Dict[bool, Dict[str, int]] = {
+            color: {label: 0 for label, _ in CLASSIFICATION_THRESHOLDS} for color in (chess.WHITE, chess.BLACK)
+        }
+
+    async def _evaluate(self, board: chess.Board, played: List[str]) -> Tuple[Optional[MoveResult], Optional[int]]:
+        """
+        Evalúa una posición.
+
+        Returns:
+            Tupla (resultado del motor o None si la partida terminó, cp para el bando que mueve)
+        """
+        if board.is_checkmate():
+            return None, -MATE_CP
+        if board.is_game_over(claim_draw=False):
+            return None, 0
+
+        kwargs = {"position_moves": list(played), "start_fen": self.start_fen} if self._incremental else {}
+        result = await self.engine.get_move(board.fen(), self.depth, priority=self.priority, **kwargs)
+        return result, score_to_cp(result.analysis)
+
+    async def run(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analiza la partida.
+
+        Yields:
+            Un evento "ply" por jugada y un "summary" final con ACPL y precisión por bando
+        """
+        board = self.board.copy(stack=False)
+        played: List[str] = []
+        before, cp_before = await self._evaluate(board, played)
+
+        for ply, move in enumerate(self.moves, start=1):
+            mover = board.turn
+            move_number = board.fullmove_number
+            fen_before = board.fen()
+            san = board.san(move)
+            best_san = None
+            if before is not None:
+                try:
+                    best_san = board.san(chess.Move.from_uci(before.move))
+                except ValueError:
+                    pass
+
+            board.push(move)
+            played.append(move.uci())
+            after, cp_after = await self._evaluate(board, played)
+
+            yield self._ply_event(ply, move_number, mover, move, san, fen_before, before, best_san, cp_before, cp_after)
+            before, cp_before = after, cp_after
+
+        yield self.summary()
+
+    def _ply_event(
+        self,
+        ply: int,
+        move_number: int,
+        mover: bool,
+        move: chess.Move,
+        san: str,
+        fen_before: str,
+        best: Optional[MoveResult],
+        best_san: Optional[str],
+        cp_before: Optional[int],
+        cp_after: Optional[int]
+    ) -> Dict[str, Any]:
+        """Evento de una jugada (evaluaciones desde el punto de vista de las blancas)"""
+        sign = 1 if mover == chess.WHITE else -1
+        event = {
+            "type": "ply",
+            "ply": ply,
+            "move_number": move_number,
+            "color": "white" if mover == chess.WHITE else "black",
+            "move": move.uci(),
+            "san": san,
+            "fen": fen_before,
+            "bestmove": best.move if best else None,
+            "best_san": best_san,
+            "eval_before": sign * cp_before if cp_before is not None else None,
+            "eval_after": sign * -cp_after if cp_after is not None else None,
+            "cp_loss": None,
+            "accuracy": None,
+            "classification": None,
+            "analysis": best.analysis if best else None,
+        }
+
+        if cp_before is None or cp_after is None:
+            return event
+
+        # Desde el punto de vista del bando que mueve (la evaluación tras la jugada es del rival)
+        best_cp = max(-EVAL_CAP_CP, min(EVAL_CAP_CP, cp_before))
+        played_cp = max(-EVAL_CAP_CP, min(EVAL_CAP_CP, -cp_after))
+        if best is not None and best.move == move.uci():
+            played_cp = max(played_cp, best_cp)
+        cp_loss = max(0, best_cp - played_cp)
+        win_drop = max(0.0, win_percent(best_cp) - win_percent(played_cp))
+        accuracy = move_accuracy(win_percent(best_cp), win_percent(played_cp))
+        classification = classify(win_drop)
+
+        self._losses[mover].append(cp_loss)
+        self._accuracies[mover].append(accuracy)
+        if classification:
+            self._counts[mover][classification] += 1
+
+        event.update({"cp_loss": cp_loss, "accuracy": round(accuracy, 1), "classification": classification})
+        return event
+
+    def summary(self) -> Dict[str, Any]:
+        """ACPL, precisión media y número de errores por bando"""
+        def side(color: bool) -> Dict[str, Any]:
+            losses = self._losses[color]
+            accuracies = self._accuracies[color]
+            return {
+                "acpl": round(sum(losses) / len(losses), 1) if losses else None,
+                "accuracy": round(sum(accuracies) / len(accuracies), 1) if accuracies else None,
+                "evaluated_moves": len(losses),
+                "inaccuracies": self._counts[color]["inaccuracy"],
+                "mistakes": self._counts[color]["mistake"],
+                "blunders": self._counts[color]["blunder"],
+            }
+
+        return {
+            "type": "summary",
+            "engine": self.engine.name,
+            "plies": len(self.moves),
+            "white": side(chess.WHITE),
+            "black": side(chess.BLACK),
+        }
@@ -4,20 +4,33 @@ Ejemplos: GPT-Chess-Assistant, modelos locales con LangChain/LangGraph
 Refactorizado para usar protocolos de comunicación mediante composición.
 """
 
+import asyncio
 import logging
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, List, Optional, Tuple
 import os
 import yaml
 import re
+from functools import lru_cache
 from pathlib import Path
 from jinja2 import Template, Environment, FileSystemLoader
 
 from .base import MotorBase, MotorType, MotorOrigin, ValidationMode
-from .protocols import LocalLLMProtocol, APILLMProtocol
+from .admission import EngineOverloadedError
+from .pool import DEFAULT_PRIORITY
+from .results import MoveResult
+from .protocols import LocalLLMProtocol, APILLMProtocol, RequestReport
 from .validators import PromptValidator, SchemaValidator
+from .positions import InvalidFENError, normalize_fen, parse_fen
+from .hedging import HedgePolicy
+from .token_budget import COMPACT_LEVELS, TokenUsageStats
+from .protocols.rate_limit import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
+# Peticiones simultáneas por defecto en lotes de posiciones (max_parallel)
+DEFAULT_MAX_PARALLEL = 4
+
 # Cargar estrategias válidas desde configuración
 _STRATEGIES_CACHE: Optional[Dict[str, Dict[str, str]]] = None
 
@@ -123,6 +136,9 @@ class GenerativeEngine(MotorBase):
         self.provider = provider
         self.validator = PromptValidator()
         
+        # Con structured output el protocolo restringe la respuesta a un JSON con jugada legal
+        self.structured_output = bool(config.get("structured_output", False))
+        
         # Crear protocolo según proveedor (patrón Bridge)
         if provider == "local":
             self.protocol = LocalLLMProtocol(config)
@@ -132,8 +148,106 @@ class GenerativeEngine(MotorBase):
             self.protocol = APILLMProtocol(config)
             logger.info(f"Motor generativo {name} usando APILLMProtocol ({provider})")
         
-        # Cargar template de prompt (ahora es un objeto Jinja2 Template)
-        self.prompt_template = self._load_prompt_template()
+        # Template de prompt (objeto Jinja2 Template): se compila en el primer uso
+        self._uses_default_template = False
+        self._prompt_template: Optional[Template] = None
+        
+        # Prefijo estático (instrucciones) renderizado una vez por nivel de compactación:
+        # idéntico en todas las peticiones para aprovechar la caché de prefijos del proveedor
+        self._system_prompts: Dict[int, Optional[str]] = {}
+        
+        # Presupuesto de tokens del prompt (None = sin límite) y contabilidad de uso
+        self.prompt_budget: Optional[int] = config.get("prompt_budget")
+        self.token_stats = TokenUsageStats()
+        
+        # Hedging: el motor secundario lo enlaza EngineManager tras crear todos los motores
+        self.hedge_policy: Optional[HedgePolicy] = HedgePolicy(config["hedge"]) if config.get("hedge") else None
+        self.hedge_partner: Optional["GenerativeEngine"] = None
+    
+    def set_hedge_partner(self, partner: "GenerativeEngine") -> None:
+        """
+        Enlaza el motor secundario usado para hedging.
+        
+        Args:
+            partner: Motor generativo al que se envía el mismo prompt si el principal tarda
+        """
+        self.hedge_partner = partner
+        logger.info(f"Motor {self.name} con hedging hacia {partner.name}")
+    
+    @property
+    def prompt_template(self) -> Template:
+        """Template de la posición (se carga en el primer uso, ver _load_prompt_template)"""
+        if self._prompt_template is None:
+            self._prompt_template = self._load_prompt_template()
+        return self._prompt_template
+    
+    @property
+    def system_prompt(self) -> Optional[str]:
+        """Prefijo estático sin compactar (ver _load_system_prompt)"""
+        return self._load_system_prompt()
+    
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _jinja_env() -> Environment:
+        """
+        Entorno Jinja2 con los templates de config/, compartido por todos los motores:
+        cada archivo se compila una sola vez (y de nuevo solo si cambia en disco)
+        """
+        config_path = Path(__file__).parent.parent / "config"
+        return Environment(
+            loader=FileSystemLoader(str(config_path)),
+            trim_blocks=True,
+            lstrip_blocks=True
+        )
+    
+    def _load_system_prompt(self, compact_level: int = 0) -> Optional[str]:
+        """
+        Renderiza el prefijo estático del prompt (instrucciones de sistema).
+        Solo depende de datos fijos (estrategias), así que el texto es el mismo en
+        cada movimiento y el proveedor puede reutilizar su caché de prefijos.
+        
+        Orden de prioridad:
+        1. system_prompt_template (archivo en config/ o template inline)
+        2. prompt_system.md.jinja, solo si se usa el template de posición por defecto
+        3. None: los templates personalizados ya incluyen sus propias instrucciones
+        
+        Args:
+            compact_level: Nivel de compactación (índice de COMPACT_LEVELS)
+        
+        Returns:
+            Texto del prefijo o None
+        """
+        if compact_level in self._system_prompts:
+            return self._system_prompts[compact_level]
+        
+        # El prefijo por defecto solo se usa con el template de posición por defecto
+        if self._prompt_template is None:
+            self._prompt_template = self._load_prompt_template()
+        
+        jinja_env = self._jinja_env()
+        source = self.config.get("system_prompt_template")
+        
+        try:
+            if source:
+                if source.endswith('.jinja'):
+                    template = jinja_env.get_template(source)
+                else:
+                    template = jinja_env.from_string(source)
+            elif self._uses_default_template:
+                template = jinja_env.get_template("prompt_system.md.jinja")
+            else:
+                template = None
+            
+            system_prompt = template.render(
+                strategies=_load_chess_strategies(),
+                **COMPACT_LEVELS[compact_level]
+            ).strip() if template else None
+        except Exception as e:
+            logger.warning(f"No se pudo cargar el prefijo de sistema del motor {self.name}: {e}")
+            system_prompt = None
+        
+        self._system_prompts[compact_level] = system_prompt
+        return system_prompt
     
     def _load_prompt_template(self) -> Template:
         """
@@ -148,12 +262,7 @@ class GenerativeEngine(MotorBase):
         Returns:
             Template Jinja2
         """
-        config_path = Path(__file__).parent.parent / "config"
-        jinja_env = Environment(
-            loader=FileSystemLoader(str(config_path)),
-            trim_blocks=True,
-            lstrip_blocks=True
-        )
+        jinja_env = self._jinja_env()
         
         # 1. Forma legacy: prompt_template_file (archivo específico, para casos especiales)
         prompt_file = self.config.get("prompt_template_file")
@@ -184,6 +293,7 @@ class GenerativeEngine(MotorBase):
         try:
             template = jinja_env.get_template(md_template_file)
             logger.debug(f"Template cargado desde {md_template_file}")
+            self._uses_default_template = True
             return template
         except Exception as e:
             logger.warning(f"No se pudo cargar {md_template_file}: {e}")
@@ -347,17 +457,22 @@ NO incluyas nada más que el movimiento UCI.
         
         Args:
             board_state: Posición en formato FEN
-            **kwargs: Contexto adicional (move_history, strategy, etc.)
+            **kwargs: Contexto adicional (move_history, strategy, compact_level, etc.).
+                     move_count (medias jugadas ya conocidas, p. ej. en sesiones de partida)
+                     evita volver a contarlas a partir del historial
             
         Returns:
             Prompt formateado
         """
         # Contexto adicional con valores por defecto
         move_history = kwargs.get("move_history", "Inicio de la partida")
+        compact_level = kwargs.get("compact_level", 0)
         explanation = kwargs.get("explanation", False)
         
         # Contar movimientos para decidir si mostrar selección de estrategia
-        move_count = self._count_moves(move_history)
+        move_count = kwargs.get("move_count")
+        if move_count is None:
+            move_count = self._count_moves(move_history)
         show_strategy_selection = move_count >= 4 and move_count < 10
         
         # Detectar fase de apertura después de 10 movimientos
@@ -387,7 +502,7 @@ NO incluyas nada más que el movimiento UCI.
         legal_moves_sample = []
         try:
             import chess
-            board = chess.Board(board_state)
+            board = parse_fen(board_state)
             legal_moves_list = list(board.legal_moves)
             legal_moves_str_list = [str(move) for move in legal_moves_list]
             
@@ -414,7 +529,8 @@ NO incluyas nada más que el movimiento UCI.
             "selected_strategy": selected_strategy_info,  # Estrategia seleccionada si existe
             "explanation": explanation,
             "legal_moves": legal_moves_analyzed if legal_moves_analyzed else legal_moves_sample,  # Movimientos analizados o lista simple
-            "current_turn": current_turn  # Color que tiene el turno
+            "current_turn": current_turn,  # Color que tiene el turno
+            **COMPACT_LEVELS[compact_level]  # Secciones incluidas según prompt_budget
         }
         
         # Log del historial recibido para debugging
@@ -433,7 +549,7 @@ NO incluyas nada más que el movimiento UCI.
             legal_moves_sample = []
             try:
                 import chess
-                board = chess.Board(board_state)
+                board = parse_fen(board_state)
                 legal_moves_list = list(board.legal_moves)
                 legal_moves_sample = [str(move) for move in legal_moves_list[:5]]
                 if legal_moves_sample:
@@ -467,6 +583,69 @@ NO incluyas nada más que el movimiento UCI."""
         
         return prompt
     
+    def build_prompts(self, board_state: str, **kwargs) -> Tuple[Optional[str], str, int]:
+        """
+        Construye el prefijo de sistema y el prompt respetando 'prompt_budget'.
+        Si el total estimado supera el presupuesto, se renderizan variantes más compactas
+        (COMPACT_LEVELS) hasta que quepa o se agoten los niveles.
+        
+        Args:
+            board_state: Posición en formato FEN
+            **kwargs: Contexto adicional (ver build_prompt)
+            
+        Returns:
+            Tupla (prefijo de sistema, prompt, nivel de compactación usado)
+        """
+        for level in range(len(COMPACT_LEVELS)):
+            system = self._load_system_prompt(level)
+            prompt = self.build_prompt(board_state, compact_level=level, **kwargs)
+            tokens = estimate_tokens(system or "") + estimate_tokens(prompt)
+            
+            if not self.prompt_budget or tokens <= self.prompt_budget:
+                break
+        else:
+            logger.warning(
+                f"Motor {self.name}: prompt de ~{tokens} tokens supera prompt_budget={self.prompt_budget} "
+                f"incluso en modo compacto"
+            )
+        
+        if level:
+            logger.debug(f"Motor {self.name}: prompt compactado (nivel {level}, ~{tokens} tokens)")
+        return system, prompt, level
+    
+    def _record_usage(
+        self,
+        system: Optional[str],
+        prompt: str,
+        response: str,
+        compact_level: int,
+        usage: Optional[Dict[str, int]] = None
+    ) -> Dict[str, int]:
+        """
+        Registra los tokens de una petición: los del proveedor o, si no los informa, estimados.
+        
+        Args:
+            usage: Uso informado por el proveedor en esta petición (ver RequestReport)
+        
+        Returns:
+            Uso registrado {"prompt_tokens", "completion_tokens", "cached_tokens"}
+        """
+        if usage:
+            recorded = {
+                "prompt_tokens": usage.get("prompt_tokens", 0),
+                "completion_tokens": usage.get("completion_tokens", 0),
+                "cached_tokens": usage.get("cached_tokens", 0),
+            }
+            self.token_stats.record(**recorded, compact_level=compact_level)
+        else:
+            recorded = {
+                "prompt_tokens": estimate_tokens(system or "") + estimate_tokens(prompt),
+                "completion_tokens": estimate_tokens(response),
+                "cached_tokens": 0,
+            }
+            self.token_stats.record(**recorded, estimated=True, compact_level=compact_level)
+        return recorded
+    
     def parse_output(self, llm_response: str, board_state: str) -> str:
         """
         Parsea la salida del LLM para extraer el movimiento.
@@ -487,13 +666,12 @@ NO incluyas nada más que el movimiento UCI."""
         
         logger.debug(f"Parseando respuesta del LLM. FEN: {board_state}, Respuesta: {llm_response[:200]}")
         
-        move = self.validator.validate_and_extract(llm_response, board_state)
+        move = self._extract_move(llm_response, board_state)
         
         if not move:
             # Intentar obtener movimientos legales para el mensaje de error
             try:
-                import chess
-                board = chess.Board(board_state)
+                board = parse_fen(board_state)
                 legal_moves_sample = [str(m) for m in list(board.legal_moves)[:5]]
                 legal_moves_str = ", ".join(legal_moves_sample)
             except Exception:
@@ -515,6 +693,26 @@ NO incluyas nada más que el movimiento UCI."""
         logger.info(f"Movimiento válido extraído: {move}")
         return move
     
+    def _extract_move(self, llm_response: str, board_state: str) -> Optional[str]:
+        """
+        Extrae la jugada legal de la respuesta.
+        Con structured output se lee el JSON; si no es JSON válido se recurre al parsing de texto.
+        """
+        if self.structured_output:
+            move = self.validator.validate_structured(llm_response, board_state)
+            if move:
+                return move
+            logger.warning(f"Motor {self.name}: respuesta no estructurada, usando extracción por texto")
+        return self.validator.validate_and_extract(llm_response, board_state)
+    
+    def _extract_explanation(self, llm_response: str) -> str:
+        """Obtiene la explicación: campo 'explanation' del JSON o el texto completo"""
+        if self.structured_output:
+            data = self.validator.parse_structured(llm_response)
+            if data and data.get("explanation"):
+                return data["explanation"]
+        return llm_response
+    
     async def _check_availability(self) -> bool:
         """Verifica disponibilidad delegando en el protocolo"""
         return await self.protocol.check_availability()
@@ -523,9 +721,128 @@ NO incluyas nada más que el movimiento UCI."""
         """Inicializa el protocolo de comunicación"""
         await self.protocol.initialize()
     
-    async def get_move(self, board_state: str, depth: Optional[int] = None, **kwargs) -> str:
+    async def get_move(self, board_state: str, depth: Optional[int] = None, **kwargs) -> MoveResult:
         """
         Obtiene el mejor movimiento usando el motor generativo.
+        Si hay política de hedging y el motor tarda más del umbral, lanza el mismo
+        prompt al motor secundario y devuelve la primera jugada legal.
+        
+        Args:
+            board_state: Posición en formato FEN
+            depth: No aplica directamente para LLMs
+            **kwargs: Contexto adicional (move_history, strategy, explanation).
+                     hedge=False desactiva el hedging para esta petición.
+                     priority solo se usa para admitir la petición de hedge en el motor
+                     secundario; affinity no aplica: las peticiones al LLM no pasan por un
+                     pool de instancias (su concurrencia la limita el rate limiter del proveedor)
+            
+        Returns:
+            MoveResult con la jugada, la explicación (si se pidió), tokens y tiempos
+        """
+        priority = kwargs.pop("priority", DEFAULT_PRIORITY)
+        kwargs.pop("affinity", None)
+        # Sin control de tiempo propio: el reloj de partida lo aplica quien llama
+        kwargs.pop("clock", None)
+        hedge = kwargs.pop("hedge", True)
+        if hedge and self.hedge_policy and self.hedge_partner:
+            result = await self._get_move_hedged(board_state, depth, priority, **kwargs)
+        else:
+            result = await self._get_move_direct(board_state, depth, **kwargs)
+        self.metrics.observe(result)
+        return result
+    
+    async def _get_move_hedged(
+        self,
+        board_state: str,
+        depth: Optional[int],
+        priority: str,
+        **kwargs
+    ) -> MoveResult:
+        """
+        Ejecuta la petición principal y, pasado el delay de la política, la del motor secundario.
+        Gana la primera que devuelve una jugada legal; la otra se cancela.
+        Si gana el secundario, su resultado se devuelve con source="hedge".
+        La petición de hedge pasa por la admisión del secundario: si está saturado no se lanza.
+        """
+        policy = self.hedge_policy
+        policy.requests += 1
+        started = time.monotonic()
+        hedge_won = False
+        
+        def record_primary(task: asyncio.Task) -> None:
+            # Si pierde contra el hedge, el tiempo hasta cancelarlo es una cota inferior de su
+            # latencia: sin él, las peticiones lentas no entrarían en el percentil
+            if task.cancelled():
+                if not hedge_won:
+                    return
+            elif task.exception() is not None:
+                return
+            policy.record_latency(time.monotonic() - started)
+        
+        primary = asyncio.create_task(self._get_move_direct(board_state, depth, **kwargs))
+        primary.add_done_callback(record_primary)
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=policy.current_delay())
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        
+        partner = self.hedge_partner
+        if done or partner._available is False or not policy.allow_hedge():
+            return await primary
+        try:
+            partner.admission.check(priority)
+        except EngineOverloadedError as e:
+            logger.info(f"Sin hedge para {self.name}: {e}")
+            return await primary
+        
+        policy.hedged += 1
+        logger.info(f"Motor {self.name} supera {policy.current_delay():.2f}s, lanzando hedge a {partner.name}")
+        secondary = asyncio.create_task(self._get_move_secondary(board_state, depth, priority, **kwargs))
+        
+        pending = {primary, secondary}
+        last_error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        logger.warning(f"Petición {'hedge' if task is secondary else 'principal'} falló: {last_error}")
+                        continue
+                    
+                    result = task.result()
+                    if task is primary:
+                        policy.primary_wins += 1
+                    else:
+                        policy.hedge_wins += 1
+                        hedge_won = True
+                        result.source = "hedge"
+                    result.add_timing("total_ms", time.monotonic() - started)
+                    return result
+        finally:
+            for task in pending:
+                task.cancel()
+                policy.cancelled += 1
+        
+        raise last_error
+    
+    async def _get_move_secondary(
+        self,
+        board_state: str,
+        depth: Optional[int],
+        priority: str,
+        **kwargs
+    ) -> MoveResult:
+        """Petición de hedge al motor secundario, registrada en su control de admisión"""
+        partner = self.hedge_partner
+        # La saturación ya se comprobó al decidir el hedge
+        async with partner.admission.admit(priority, check=False):
+            return await partner.get_move(board_state, depth, hedge=False, **kwargs)
+    
+    async def _get_move_direct(self, board_state: str, depth: Optional[int] = None, **kwargs) -> MoveResult:
+        """
+        Obtiene el movimiento del propio proveedor.
         Implementa sistema de reintentos si la respuesta no es válida.
         
         Args:
@@ -534,28 +851,51 @@ NO incluyas nada más que el movimiento UCI."""
             **kwargs: Contexto adicional (move_history, strategy, explanation)
             
         Returns:
-            Mejor movimiento en formato UCI
+            MoveResult con la jugada, la explicación (si se pidió), tokens y tiempos
             
         Raises:
             ValueError: Si después de los reintentos no se obtiene un movimiento válido
         """
+        started = time.perf_counter()
+        
         # Asegurar inicialización
         await self.initialize()
         
-        # Construir prompt contextual una vez
-        prompt = self.build_prompt(board_state, **kwargs)
+        # Construir prompt contextual una vez (compactado si supera prompt_budget)
+        system, prompt, compact_level = self.build_prompts(board_state, **kwargs)
+        prompt_built = time.perf_counter()
+        llm_seconds = 0.0
+        usage: Dict[str, int] = {}
         
         # Enviar posición al protocolo
         await self.protocol.send_position(board_state)
         
-        # Número máximo de reintentos
-        max_retries = kwargs.get("max_retries", 3)
+        # Jugadas legales: permiten al protocolo cortar el streaming en cuanto aparece una
+        legal_moves = [move.uci() for move in parse_fen(board_state).legal_moves]
+        
+        # Peticiones máximas al proveedor: un único presupuesto para los reintentos por
+        # respuesta inválida y los del protocolo por errores transitorios (429/503/conexión)
+        max_retries = kwargs.pop("max_retries", self.config.get("max_retries", 3))
         retry_count = 0
         
         while retry_count < max_retries:
             try:
                 # Llamar al LLM vía protocolo (pasar prompt en kwargs)
-                llm_response = await self.protocol.request_move(depth, prompt=prompt, **kwargs)
+                request_started = time.perf_counter()
+                # Datos propios de esta petición (el protocolo es compartido por las concurrentes)
+                report = RequestReport()
+                try:
+                    llm_response = await self.protocol.request_move(
+                        depth, prompt=prompt, system=system, legal_moves=legal_moves,
+                        max_attempts=max_retries - retry_count, report=report, **kwargs
+                    )
+                finally:
+                    llm_seconds += time.perf_counter() - request_started
+                # Intentos que el protocolo gastó en errores transitorios
+                retry_count += report.attempts - 1
+                recorded = self._record_usage(system, prompt, llm_response, compact_level, report.usage)
+                for key, value in recorded.items():
+                    usage[key] = usage.get(key, 0) + value
                 
                 # Parsear la salida y extraer movimiento
                 move = self.parse_output(llm_response, board_state)
@@ -564,11 +904,16 @@ NO incluyas nada más que el movimiento UCI."""
                 if await self.validate_response(llm_response, board_state):
                     logger.info(f"Motor generativo {self.name} sugiere: {move} (intento {retry_count + 1})")
                     
-                    # Guardar explicación si se solicitó
-                    if kwargs.get("explanation"):
-                        self._last_explanation = llm_response
-                    
-                    return move
+                    result = MoveResult(
+                        move,
+                        self.name,
+                        explanation=self._extract_explanation(llm_response) if kwargs.get("explanation") else None,
+                        usage=usage
+                    )
+                    result.add_timing("prompt_ms", prompt_built - started)
+                    result.add_timing("llm_ms", llm_seconds)
+                    result.add_timing("total_ms", time.perf_counter() - started)
+                    return result
                 else:
                     logger.warning(
                         f"Motor generativo {self.name} generó movimiento inválido en intento {retry_count + 1}. "
@@ -582,6 +927,7 @@ NO incluyas nada más que el movimiento UCI."""
             
             # Incrementar contador de reintentos
             retry_count += 1
+            self.metrics.move_retries += 1
             
             # Si aún hay reintentos disponibles, esperar un poco antes de reintentar
             # Aumentar el tiempo de espera progresivamente para dar más tiempo al LLM
@@ -597,6 +943,72 @@ NO incluyas nada más que el movimiento UCI."""
             f"Última respuesta: {llm_response[:200] if 'llm_response' in locals() else 'N/A'}"
         )
     
+    async def annotate_batch(self, positions: List[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+        """
+        Anota muchas posiciones (jugada + explicación) mediante la API batch del proveedor.
+        Pensado para procesar partidas guardadas sin latencia interactiva: es más barato
+        y no consume el rate limit del tráfico en vivo.
+        
+        Args:
+            positions: Lista de {"fen", "move_history" (opcional), "id" (opcional)}
+            **kwargs: Contexto adicional para el prompt (strategy, etc.)
+            
+        Returns:
+            Lista en el mismo orden con {"id", "fen", "move", "explanation", "error"}; una FEN
+            inválida deja su error en la posición sin afectar al resto del lote
+            
+        Raises:
+            ValueError: Si el proveedor no tiene API batch
+        """
+        if not isinstance(self.protocol, APILLMProtocol) or not self.protocol.supports_batch:
+            raise ValueError(f"Motor {self.name}: el proveedor {self.provider} no soporta procesamiento por lotes")
+        
+        await self.initialize()
+        
+        # El custom_id se genera por posición: el proveedor solo admite [a-zA-Z0-9_-]{1,64}
+        # y los resultados se indexan por él, así que no puede ser el id del llamador
+        annotations = []
+        items = []
+        for index, position in enumerate(positions):
+            annotation = {"id": position.get("id", f"pos-{index}"), "fen": position["fen"],
+                          "move": None, "explanation": None, "error": None}
+            annotations.append(annotation)
+            try:
+                fen = normalize_fen(position["fen"], require_moves=True)
+            except InvalidFENError as e:
+                # Una FEN inválida solo invalida su posición, no el lote entero
+                annotation["error"] = str(e)
+                continue
+            annotation["fen"] = fen
+            context = dict(kwargs, explanation=True)
+            if position.get("move_history"):
+                context["move_history"] = position["move_history"]
+            system, prompt, _ = self.build_prompts(fen, **context)
+            items.append({
+                "custom_id": f"pos-{index}",
+                "annotation": annotation,
+                "prompt": prompt,
+                "system": system,
+                "legal_moves": [move.uci() for move in parse_fen(fen).legal_moves],
+                "explanation": True,
+            })
+        
+        texts = await self.protocol.run_batch(items) if items else {}
+        
+        for item in items:
+            annotation = item["annotation"]
+            text = texts.get(item["custom_id"])
+            if text is None:
+                annotation["error"] = "Sin respuesta del proveedor"
+                continue
+            try:
+                annotation["move"] = self.parse_output(text, annotation["fen"])
+                annotation["explanation"] = self._extract_explanation(text)
+            except ValueError as e:
+                annotation["error"] = str(e)
+        
+        return annotations
+    
     async def validate_response(self, llm_response: str, board_state: str) -> bool:
         """
         Valida que la respuesta del LLM contenga un movimiento válido.
@@ -608,12 +1020,21 @@ NO incluyas nada más que el movimiento UCI."""
         Returns:
             True si es válida
         """
-        move = self.validator.validate_and_extract(llm_response, board_state)
+        move = self._extract_move(llm_response, board_state)
         return move is not None
     
-    def get_last_explanation(self) -> Optional[str]:
-        """Retorna la última explicación generada (si existe)"""
-        return getattr(self, '_last_explanation', None)
+    @property
+    def max_parallel(self) -> int:
+        """Peticiones simultáneas al proveedor (el rate limiter sigue aplicando sus límites)"""
+        return max(1, int(self.config.get("max_parallel", DEFAULT_MAX_PARALLEL)))
+    
+    def get_info(self) -> Dict[str, Any]:
+        """Información del motor, incluyendo uso de tokens y métricas de hedging si está configurado"""
+        info = super().get_info()
+        info["tokens"] = self.token_stats.get_stats()
+        if self.hedge_policy:
+            info["hedge"] = self.hedge_policy.get_stats()
+        return info
     
     async def _do_cleanup(self):
         """Limpia recursos del protocolo"""
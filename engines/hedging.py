@@ -0,0 +1,100 @@
+"""
+Política de hedging para motores generativos.
+Si el proveedor principal tarda más que un umbral (fijo o percentil observado),
+se lanza el mismo prompt a un motor secundario y se usa la primera jugada legal.
+"""
+
+import logging
+import math
+from collections import deque
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy:
+    """
+    Configuración y métricas del hedging de un motor.
+
+    Configuración YAML (clave 'hedge' del motor):
+        engine: Nombre del motor generativo secundario (obligatorio)
+        delay: Segundos de espera antes de lanzar el secundario, o percentil
+               observado del motor principal (ej: "p90"). Default: "p90"
+        fallback_delay: Espera mientras no haya muestras suficientes (default: 5.0)
+        min_samples: Muestras necesarias para usar el percentil (default: 10)
+        window: Número de latencias recientes que se conservan (default: 200)
+        max_hedge_rate: Fracción máxima de peticiones con hedge, limita el gasto extra (default: 0.25)
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Args:
+            config: Sección 'hedge' de la configuración del motor
+        """
+        self.partner_name: Optional[str] = config.get("engine")
+        if not self.partner_name:
+            raise ValueError("La configuración 'hedge' requiere 'engine' (motor secundario)")
+
+        self.delay: Union[float, str] = config.get("delay", "p90")
+        self.fallback_delay = float(config.get("fallback_delay", 5.0))
+        self.min_samples = int(config.get("min_samples", 10))
+        self.max_hedge_rate = float(config.get("max_hedge_rate", 0.25))
+
+        self._latencies: deque = deque(maxlen=int(config.get("window", 200)))
+        self._percentile = self._parse_percentile(self.delay)
+
+        # Métricas
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+        self.cancelled = 0
+
+    @staticmethod
+    def _parse_percentile(delay: Union[float, str]) -> Optional[float]:
+        """Convierte 'p90' en 0.90; None si el delay es un número fijo"""
+        if isinstance(delay, str) and delay.lower().startswith("p"):
+            value = float(delay[1:])
+            if not 0 < value < 100:
+                raise ValueError(f"Percentil de hedge inválido: {delay}")
+            return value / 100.0
+        return None
+
+    def record_latency(self, seconds: float) -> None:
+        """Registra la latencia de una respuesta del motor principal"""
+        self._latencies.append(seconds)
+
+    def current_delay(self) -> float:
+        """
+        Espera antes de lanzar el motor secundario.
+
+        Returns:
+            Segundos: delay fijo, percentil observado o fallback_delay si faltan muestras
+        """
+        if self._percentile is None:
+            return float(self.delay)
+        if len(self._latencies) < self.min_samples:
+            return self.fallback_delay
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, max(0, math.ceil(self._percentile * len(ordered)) - 1))
+        return ordered[index]
+
+    def allow_hedge(self) -> bool:
+        """Indica si se puede lanzar un hedge sin superar max_hedge_rate"""
+        if self.requests == 0:
+            return True
+        return (self.hedged + 1) / self.requests <= self.max_hedge_rate
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas del hedging (para /engines/hedging)"""
+        return {
+            "partner": self.partner_name,
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_rate": round(self.hedged / self.requests, 4) if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "primary_wins": self.primary_wins,
+            "cancelled": self.cancelled,
+            "current_delay": round(self.current_delay(), 3),
+            "samples": len(self._latencies),
+        }
@@ -0,0 +1,323 @@
+"""
+Métricas de los motores en formato de exposición de Prometheus (GET /metrics).
+Los contadores e histogramas de cada motor se acumulan aquí por nombre, de modo que
+sobreviven a las recargas de configuración. El estado instantáneo (colas, pools, cachés,
+limitadores y clientes HTTP) se lee de los propios componentes en cada consulta.
+"""
+
+import bisect
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .results import MOVE_SOURCES, MoveResult
+
+# Límites superiores de los histogramas
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)   # Segundos
+DEPTH_BUCKETS = (1, 2, 4, 6, 8, 10, 12, 15, 18, 21, 25, 30, 40, 60)
+NPS_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 2.5e7, 5e7, 1e8)
+
+# Motivos de fallo de una petición
+ERROR_REASONS = ("error", "timeout")
+
+# Inicio del proceso (para process_start_time_seconds)
+PROCESS_START_TIME = time.time()
+
+
+class Histogram:
+    """Histograma acumulativo con límites fijos (como los de Prometheus)"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # Una cuenta por límite más la de +Inf (no acumuladas)
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Cuentas acumuladas por límite ('le'), terminando en +Inf"""
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        total, result = 0, []
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Cuantil estimado por interpolación lineal dentro del bucket (como histogram_quantile).
+        None sin observaciones; el último límite finito si cae en +Inf.
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        total = 0
+        for index, count in enumerate(self.counts):
+            if count and total + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - total) / count
+            total += count
+        return self.buckets[-1]
+
+
+class EngineMetrics:
+    """Contadores e histogramas acumulados de un motor"""
+
+    def __init__(self):
+        self.requests: Dict[str, int] = {source: 0 for source in MOVE_SOURCES}
+        self.errors: Dict[str, int] = {reason: 0 for reason in ERROR_REASONS}
+        # Latencia por fase (total, queue, setup, search, prompt, llm...) en segundos
+        self.latency: Dict[str, Histogram] = {}
+        # Datos de búsqueda que informan los motores UCI
+        self.depth = Histogram(DEPTH_BUCKETS)
+        self.nps = Histogram(NPS_BUCKETS)
+        # Respuestas de motores generativos descartadas por jugada inválida
+        self.move_retries = 0
+
+    def observe(self, result: MoveResult) -> None:
+        """Registra una jugada servida (las de caché solo cuentan como petición)"""
+        self.requests[result.source] += 1
+        if result.source == "cache":
+            return
+        for key, ms in result.timings.items():
+            if key.endswith("_ms"):
+                phase = key[:-len("_ms")]
+                if phase not in self.latency:
+                    self.latency[phase] = Histogram(LATENCY_BUCKETS)
+                self.latency[phase].observe(ms / 1000)
+        analysis = result.analysis or {}
+        if analysis.get("depth") is not None:
+            self.depth.observe(analysis["depth"])
+        if analysis.get("nps"):
+            self.nps.observe(analysis["nps"])
+
+    def observe_error(self, reason: str = "error") -> None:
+        """Registra una petición fallida (ver ERROR_REASONS)"""
+        self.errors[reason] += 1
+
+    def latency_summary(self) -> Dict[str, Any]:
+        """Latencia total resumida (para /engines/info): peticiones al motor, media, p50 y p95 en ms"""
+        total = self.latency.get("total")
+
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return round(seconds * 1000, 1) if seconds is not None else None
+
+        if total is None or total.count == 0:
+            return {"count": 0, "avg_ms": None, "p50_ms": None, "p95_ms": None}
+        return {
+            "count": total.count,
+            "avg_ms": ms(total.sum / total.count),
+            "p50_ms": ms(total.quantile(0.5)),
+            "p95_ms": ms(total.quantile(0.95)),
+        }
+
+
+# Métricas por nombre de motor
+_ENGINE_METRICS: Dict[str, EngineMetrics] = {}
+
+
+def engine_metrics(name: str) -> EngineMetrics:
+    """Métricas del motor 'name' (se crean en el primer uso)"""
+    if name not in _ENGINE_METRICS:
+        _ENGINE_METRICS[name] = EngineMetrics()
+    return _ENGINE_METRICS[name]
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsWriter:
+    """Construye el texto en formato de exposición de Prometheus (text/plain; version=0.0.4)"""
+
+    def __init__(self, prefix: str = "chess_"):
+        self.prefix = prefix
+        self._lines: List[str] = []
+
+    def metric(self, name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict[str, Any], float]]) -> None:
+        """
+        Añade una métrica (counter o gauge) con sus muestras.
+
+        Args:
+            name: Nombre sin prefijo
+            kind: counter o gauge
+            help_text: Descripción
+            samples: Pares (etiquetas, valor); las muestras con valor None se omiten
+        """
+        name = self.prefix + name
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if value is not None:
+                self._lines.append(f"{name}{self._labels(labels)} {_format_value(value)}")
+
+    def histogram(self, name: str, help_text: str, samples: Iterable[Tuple[Dict[str, Any], Histogram]]) -> None:
+        """Añade un histograma con sus series (una por conjunto de etiquetas)"""
+        name = self.prefix + name
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in samples:
+            for bound, count in histogram.cumulative():
+                self._lines.append(f"{name}_bucket{self._labels({**labels, 'le': bound})} {count}")
+            self._lines.append(f"{name}_sum{self._labels(labels)} {_format_value(round(histogram.sum, 6))}")
+            self._lines.append(f"{name}_count{self._labels(labels)} {histogram.count}")
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> str:
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+
+def render_metrics(engines: Dict[str, Any], cache_stats: Dict[str, Any]) -> str:
+    """
+    Métricas de los motores y de sus recursos compartidos.
+
+    Args:
+        engines: Motores creados {nombre: MotorBase}
+        cache_stats: Métricas de la caché de análisis (AnalysisCache.get_stats)
+
+    Returns:
+        Texto en formato de exposición de Prometheus
+    """
+    # Solo al consultar las métricas: importa httpx
+    from .protocols import HTTPClientPool, get_all_rate_limiters
+
+    writer = MetricsWriter()
+    accumulated = sorted(_ENGINE_METRICS.items())
+    infos = {name: engine.get_info() for name, engine in engines.items()}
+
+    writer.metric("engine_up", "gauge", "Motor disponible (1) o no (0)", (
+        ({"engine": name, "type": info["type"]}, bool(info["available"])) for name, info in infos.items()
+    ))
+
+    # Peticiones y latencias (acumuladas por nombre de motor)
+    writer.metric("engine_requests_total", "counter", "Jugadas servidas por origen (engine, hedge, cache, book, tablebase)", (
+        ({"engine": name, "source": source}, count)
+        for name, metrics in accumulated for source, count in metrics.requests.items()
+    ))
+    writer.metric("engine_errors_total", "counter", "Peticiones fallidas por motivo", (
+        ({"engine": name, "reason": reason}, count)
+        for name, metrics in accumulated for reason, count in metrics.errors.items()
+    ))
+    writer.metric("engine_move_retries_total", "counter", "Respuestas de motores generativos descartadas por jugada inválida", (
+        ({"engine": name}, metrics.move_retries) for name, metrics in accumulated
+    ))
+    writer.histogram("engine_latency_seconds", "Latencia de las jugadas por fase (total, queue, setup, search, prompt, llm)", (
+        ({"engine": name, "phase": phase}, histogram)
+        for name, metrics in accumulated for phase, histogram in sorted(metrics.latency.items())
+    ))
+    writer.histogram("engine_search_depth", "Profundidad alcanzada por búsqueda (motores UCI)", (
+        ({"engine": name}, metrics.depth) for name, metrics in accumulated if metrics.depth.count
+    ))
+    writer.histogram("engine_search_nps", "Nodos por segundo por búsqueda (motores UCI)", (
+        ({"engine": name}, metrics.nps) for name, metrics in accumulated if metrics.nps.count
+    ))
+
+    # Admisión y colas
+    admission = {name: info["admission"] for name, info in infos.items()}
+    writer.metric("engine_in_flight", "gauge", "Peticiones en curso (atendiéndose o en cola)", (
+        ({"engine": name}, stats["in_flight"]) for name, stats in admission.items()
+    ))
+    writer.metric("engine_queue_depth", "gauge", "Peticiones esperando instancia", (
+        ({"engine": name}, stats["queued"]) for name, stats in admission.items()
+    ))
+    writer.metric("engine_estimated_wait_seconds", "gauge", "Espera estimada de una petición interactiva nueva", (
+        ({"engine": name}, (stats["estimated_wait_ms"] or 0) / 1000) for name, stats in admission.items()
+    ))
+    writer.metric("engine_admitted_total", "counter", "Peticiones admitidas", (
+        ({"engine": name}, stats["admitted"]) for name, stats in admission.items()
+    ))
+    writer.metric("engine_rejected_total", "counter", "Peticiones rechazadas por saturación (429)", (
+        ({"engine": name}, stats["rejected"]) for name, stats in admission.items()
+    ))
+
+    # Pools de procesos/conexiones
+    pools = {name: info["pool"] for name, info in infos.items() if "pool" in info}
+    writer.metric("engine_pool_size", "gauge", "Instancias máximas del pool", (
+        ({"engine": name}, stats["size"]) for name, stats in pools.items()
+    ))
+    writer.metric("engine_pool_instances", "gauge", "Instancias creadas del pool", (
+        ({"engine": name}, stats["instances"]) for name, stats in pools.items()
+    ))
+    writer.metric("engine_pool_in_use", "gauge", "Instancias ocupadas", (
+        ({"engine": name}, stats["in_use"]) for name, stats in pools.items()
+    ))
+    writer.metric("engine_pool_utilization", "gauge", "Fracción de instancias ocupadas", (
+        ({"engine": name}, round(stats["in_use"] / stats["size"], 3)) for name, stats in pools.items()
+    ))
+    writer.metric("engine_pool_waiting", "gauge", "Peticiones esperando instancia del pool", (
+        ({"engine": name}, stats["waiting"]) for name, stats in pools.items()
+    ))
+    writer.metric("engine_pool_preemptions_total", "counter", "Búsquedas interrumpidas por otra más prioritaria", (
+        ({"engine": name}, stats["preemptions"]) for name, stats in pools.items()
+    ))
+    writer.metric("engine_process_restarts_total", "counter", "Procesos del motor reiniciados tras morir", (
+        ({"engine": name}, stats["restarts"]) for name, stats in pools.items()
+    ))
+
+    # Caché de análisis
+    writer.metric("analysis_cache_hits_total", "counter", "Aciertos de la caché de análisis", [({}, cache_stats["hits"])])
+    writer.metric("analysis_cache_misses_total", "counter", "Fallos de la caché de análisis", [({}, cache_stats["misses"])])
+    writer.metric("analysis_cache_entries", "gauge", "Entradas de la caché de análisis", [({}, cache_stats["entries"])])
+
+    # Motores generativos: tokens por motor y proveedor, reintentos y esperas por proveedor
+    tokens = {
+        name: (getattr(engine, "provider", None), engine.token_stats.get_stats())
+        for name, engine in engines.items() if getattr(engine, "token_stats", None)
+    }
+    writer.metric("llm_tokens_total", "counter", "Tokens consumidos por tipo (prompt, completion, cached)", (
+        ({"engine": name, "provider": provider, "kind": kind}, stats[f"{kind}_tokens"])
+        for name, (provider, stats) in tokens.items() for kind in ("prompt", "completion", "cached")
+    ))
+    writer.metric("llm_requests_total", "counter", "Peticiones a proveedores LLM", (
+        ({"engine": name, "provider": provider}, stats["requests"]) for name, (provider, stats) in tokens.items()
+    ))
+    limiters = get_all_rate_limiters()
+    writer.metric("llm_retries_total", "counter", "Reintentos de peticiones al proveedor (429, 503, errores de red)", (
+        ({"limiter": name, "provider": name.split(":")[0]}, stats["retries"]) for name, stats in limiters.items()
+    ))
+    writer.metric("llm_throttled_total", "counter", "Respuestas 429 del proveedor", (
+        ({"limiter": name, "provider": name.split(":")[0]}, stats["throttled"]) for name, stats in limiters.items()
+    ))
+    writer.metric("llm_rate_limit_wait_seconds_total", "counter", "Tiempo esperado por el limitador del proveedor", (
+        ({"limiter": name, "provider": name.split(":")[0]}, stats["total_wait_seconds"]) for name, stats in limiters.items()
+    ))
+    writer.metric("llm_in_flight", "gauge", "Peticiones en curso al proveedor", (
+        ({"limiter": name, "provider": name.split(":")[0]}, stats["in_flight"]) for name, stats in limiters.items()
+    ))
+
+    # Clientes HTTP compartidos: un host puede tener varios (opciones de conexión distintas o
+    # share_http_client: false), así que cada serie lleva el id del cliente
+    clients = HTTPClientPool.stats()
+    client_labels = [
+        {"client": client["client"], "origin": client["origin"], "http2": str(client["http2"]).lower()}
+        for client in clients
+    ]
+    writer.metric("http_clients", "gauge", "Clientes HTTP compartidos abiertos", [({}, len(clients))])
+    writer.metric("http_client_refs", "gauge", "Protocolos que comparten un cliente HTTP", (
+        (labels, client["refs"]) for labels, client in zip(client_labels, clients)
+    ))
+    writer.metric("http_client_max_connections", "gauge", "Conexiones máximas de un cliente HTTP", (
+        (labels, client["max_connections"]) for labels, client in zip(client_labels, clients)
+    ))
+
+    writer.metric("process_start_time_seconds", "gauge", "Inicio del proceso (epoch)", [({}, round(PROCESS_START_TIME, 3))])
+    return writer.render()
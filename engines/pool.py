@@ -0,0 +1,228 @@
+"""
+Pool de instancias de protocolo para un motor.
+Permite atender varias peticiones del mismo motor en paralelo: cada petición toma
+una instancia en exclusiva (un proceso UCI, o un protocolo REST que comparte el
+cliente HTTP del host) y la devuelve al terminar.
+
+Las peticiones que esperan instancia se atienden por prioridad (interactive, compare,
+batch, background) y, dentro de cada una, por orden de llegada. Una petición que espera
+puede además interrumpir la búsqueda de otra de menor prioridad marcada como
+interrumpible (UCI 'stop'); la interrumpida vuelve a la cola y repite su búsqueda.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .protocols import ProtocolBase
+
+logger = logging.getLogger(__name__)
+
+# Clases de prioridad (menor valor = se atiende antes)
+PRIORITIES = {
+    "interactive": 0,   # Jugada que el usuario está esperando (/move)
+    "compare": 1,       # /compare
+    "batch": 2,         # /move/batch, /analyze/game
+    "background": 3,    # Trabajos en segundo plano (/jobs)
+}
+DEFAULT_PRIORITY = "interactive"
+
+# Clases cuyas búsquedas pueden interrumpirse para ceder la instancia
+PREEMPTIBLE_PRIORITIES = ("batch", "background")
+# Veces que se puede interrumpir una misma búsqueda antes de dejarla terminar (evita inanición)
+MAX_PREEMPTIONS = 3
+
+# Claves de afinidad recordadas por pool (p. ej. sesiones de partida)
+MAX_AFFINITY_KEYS = 1024
+
+
+def priority_rank(priority: str) -> int:
+    """
+    Valor numérico de una clase de prioridad.
+
+    Raises:
+        ValueError: Si la clase no existe
+    """
+    try:
+        return PRIORITIES[priority]
+    except KeyError:
+        raise ValueError(f"Prioridad desconocida: {priority}. Válidas: {', '.join(PRIORITIES)}")
+
+
+class ProtocolPool:
+    """
+    Conjunto de instancias de un mismo protocolo que se prestan de una en una.
+    Las instancias adicionales se crean bajo demanda hasta 'size' y se reutilizan.
+    Se presta primero la última devuelta (LIFO): peticiones consecutivas, como las
+    jugadas de una partida, caen en la misma instancia y aprovechan su tabla hash.
+    Con una clave de afinidad (p. ej. el id de una sesión) se prefiere la instancia
+    que atendió la petición anterior con esa clave, si está libre.
+    """
+
+    def __init__(self, factory: Callable[[], ProtocolBase], size: int = 1, primary: Optional[ProtocolBase] = None):
+        """
+        Args:
+            factory: Crea una instancia nueva del protocolo
+            size: Instancias máximas (procesos o peticiones simultáneas)
+            primary: Instancia ya creada por el motor (se usa como la primera del pool)
+        """
+        self.factory = factory
+        self.size = max(1, int(size))
+        self.members: List[ProtocolBase] = [primary or factory()]
+        self._idle: List[ProtocolBase] = [self.members[0]]
+        # Peticiones esperando instancia: (valor de prioridad, orden de llegada, clase, futuro)
+        self._waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._order = itertools.count()
+        # Préstamos en curso: id(instancia) -> [prioridad, interrumpible]
+        self._active: Dict[int, List[Any]] = {}
+        # Última instancia de cada clave de afinidad: clave -> id(instancia)
+        self._affinity: "OrderedDict[Hashable, int]" = OrderedDict()
+
+        # Métricas
+        self.in_use = 0
+        self.leases = 0
+        self.preemptions = 0
+
+    @property
+    def primary(self) -> ProtocolBase:
+        """Primera instancia (la que usa el motor para warmup y disponibilidad)"""
+        return self.members[0]
+
+    @property
+    def waiting(self) -> int:
+        """Peticiones esperando instancia"""
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    async def _acquire(self, rank: int, priority: str, affinity: Optional[Hashable] = None) -> ProtocolBase:
+        """
+        Toma una instancia libre (la de la afinidad si lo está), crea una nueva si hay hueco
+        o espera su turno. Mientras espera, interrumpe si puede una búsqueda de menor prioridad.
+        """
+        if self._idle:
+            preferred = self._affinity.get(affinity) if affinity is not None else None
+            for index, protocol in enumerate(self._idle):
+                if id(protocol) == preferred:
+                    return self._idle.pop(index)
+            return self._idle.pop()
+        if len(self.members) < self.size:
+            protocol = self.factory()
+            self.members.append(protocol)
+            logger.info(f"Pool de {protocol.config.get('name', 'motor')}: nueva instancia ({len(self.members)}/{self.size})")
+            return protocol
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (rank, next(self._order), priority, future))
+        self._preempt_for(rank)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Si la instancia llegó justo al cancelar, devolverla para el siguiente
+            if future.done() and not future.cancelled():
+                self._release(future.result())
+            raise
+
+    def _preempt_for(self, rank: int) -> None:
+        """Pide a la búsqueda interrumpible de menor prioridad (si es menor que 'rank') que ceda su instancia"""
+        candidates = [
+            (lease_rank, protocol_id) for protocol_id, (lease_rank, preemptible) in self._active.items()
+            if preemptible and lease_rank > rank
+        ]
+        if not candidates:
+            return
+        _, protocol_id = max(candidates)
+        protocol = next(member for member in self.members if id(member) == protocol_id)
+        # Una sola interrupción por préstamo
+        self._active[protocol_id][1] = False
+        if protocol.preempt():
+            self.preemptions += 1
+            logger.debug(f"Pool de {protocol.config.get('name', 'motor')}: búsqueda interrumpida para una petición más prioritaria")
+
+    def _release(self, protocol: ProtocolBase) -> None:
+        """Entrega la instancia a la petición en espera más prioritaria o la deja libre"""
+        protocol.preempt_requested = False
+        while self._waiters:
+            *_, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(protocol)
+                return
+        self._idle.append(protocol)
+
+    def _remember(self, affinity: Hashable, protocol: ProtocolBase) -> None:
+        """Recuerda la instancia de una clave de afinidad (las más antiguas se olvidan)"""
+        self._affinity[affinity] = id(protocol)
+        self._affinity.move_to_end(affinity)
+        while len(self._affinity) > MAX_AFFINITY_KEYS:
+            self._affinity.popitem(last=False)
+
+    @asynccontextmanager
+    async def lease(
+        self,
+        priority: str = DEFAULT_PRIORITY,
+        preemptible: Optional[bool] = None,
+        affinity: Optional[Hashable] = None
+    ) -> AsyncIterator[ProtocolBase]:
+        """
+        Presta una instancia en exclusiva durante el bloque 'async with'.
+
+        Args:
+            priority: Clase de prioridad de la petición (ver PRIORITIES)
+            preemptible: Si otra petición más prioritaria puede interrumpir la búsqueda
+                         (default: solo las clases de PREEMPTIBLE_PRIORITIES)
+            affinity: Clave para volver a la misma instancia en peticiones sucesivas
+
+        Yields:
+            Instancia del protocolo (se inicializa sola en su primera petición).
+            Si se interrumpe, su request_move lanza SearchPreempted
+
+        Raises:
+            ValueError: Si la prioridad no existe
+        """
+        rank = priority_rank(priority)
+        if preemptible is None:
+            preemptible = priority in PREEMPTIBLE_PRIORITIES
+
+        protocol = await self._acquire(rank, priority, affinity)
+        if affinity is not None:
+            self._remember(affinity, protocol)
+        self._active[id(protocol)] = [rank, preemptible]
+        self.in_use += 1
+        self.leases += 1
+        try:
+            yield protocol
+        finally:
+            self.in_use -= 1
+            self._active.pop(id(protocol), None)
+            self._release(protocol)
+
+    async def cleanup(self) -> None:
+        """Limpia todas las instancias y deja solo la principal (sin inicializar)"""
+        for protocol in self.members:
+            try:
+                await protocol.cleanup()
+            except Exception as e:
+                logger.warning(f"Error limpiando instancia del pool: {e}")
+
+        self.members = self.members[:1]
+        self._idle = [self.members[0]]
+        self._affinity.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado del pool"""
+        waiting_by_priority = {priority: 0 for priority in PRIORITIES}
+        for _, _, priority, future in self._waiters:
+            if not future.done():
+                waiting_by_priority[priority] += 1
+        return {
+            "size": self.size,
+            "instances": len(self.members),
+            "in_use": self.in_use,
+            "waiting": sum(waiting_by_priority.values()),
+            "waiting_by_priority": waiting_by_priority,
+            "leases": self.leases,
+            "preemptions": self.preemptions,
+            "restarts": sum(protocol.restarts for protocol in self.members),
+        }
@@ -0,0 +1,114 @@
+"""
+Validación y normalización de posiciones FEN.
+Mantiene una caché LRU de tableros parseados compartida por la API y los motores.
+"""
+
+import logging
+from functools import lru_cache
+from typing import Tuple
+
+import chess
+
+logger = logging.getLogger(__name__)
+
+# Número máximo de posiciones parseadas que se mantienen en caché
+FEN_CACHE_SIZE = 4096
+
+
+class InvalidFENError(ValueError):
+    """La cadena recibida no es una posición FEN válida o jugable"""
+    pass
+
+
+@lru_cache(maxsize=FEN_CACHE_SIZE)
+def _parse(fen: str) -> Tuple[chess.Board, str]:
+    """
+    Parsea y valida una FEN ya limpia de espacios.
+
+    Args:
+        fen: Posición en formato FEN
+
+    Returns:
+        Tupla (tablero, FEN canónica). El tablero NO debe modificarse.
+
+    Raises:
+        InvalidFENError: Si la FEN no se puede parsear o la posición es imposible
+    """
+    try:
+        board = chess.Board(fen)
+    except ValueError as e:
+        raise InvalidFENError(f"FEN inválida: {e}") from e
+
+    status = board.status()
+    if status != chess.STATUS_VALID:
+        problems = [flag.name.lower() for flag in chess.Status if flag and flag in status]
+        raise InvalidFENError(f"Posición imposible en FEN '{fen}': {', '.join(problems)}")
+
+    return board, board.fen()
+
+
+def _clean(fen: str) -> str:
+    """Elimina espacios sobrantes para que variantes triviales compartan entrada en la caché"""
+    if not isinstance(fen, str):
+        raise InvalidFENError(f"FEN debe ser string, recibido: {type(fen).__name__}")
+    cleaned = " ".join(fen.split())
+    if not cleaned:
+        raise InvalidFENError("FEN vacía")
+    return cleaned
+
+
+def normalize_fen(fen: str, require_moves: bool = False) -> str:
+    """
+    Valida una FEN y devuelve su forma canónica.
+    La forma canónica completa contadores omitidos y solo conserva la casilla
+    de captura al paso cuando la captura es legal, de modo que posiciones
+    idénticas producen siempre la misma cadena.
+
+    Args:
+        fen: Posición en formato FEN
+        require_moves: Rechazar posiciones sin movimientos legales (mate o ahogado)
+
+    Returns:
+        FEN canónica
+
+    Raises:
+        InvalidFENError: Si la FEN no es válida
+    """
+    board, canonical = _parse(_clean(fen))
+
+    if require_moves and not any(board.generate_legal_moves()):
+        result = "jaque mate" if board.is_check() else "ahogado"
+        raise InvalidFENError(f"La posición no tiene movimientos legales ({result}): {canonical}")
+
+    return canonical
+
+
+def parse_fen(fen: str) -> chess.Board:
+    """
+    Obtiene un tablero para una FEN usando la caché LRU.
+
+    Args:
+        fen: Posición en formato FEN
+
+    Returns:
+        Copia del tablero cacheado (se puede modificar libremente)
+
+    Raises:
+        InvalidFENError: Si la FEN no es válida
+    """
+    board, _ = _parse(_clean(fen))
+    return board.copy(stack=False)
+
+
+def is_valid_fen(fen: str) -> bool:
+    """Indica si una FEN es válida sin lanzar excepción"""
+    try:
+        normalize_fen(fen)
+        return True
+    except InvalidFENError:
+        return False
+
+
+def cache_info():
+    """Estadísticas de la caché de tableros parseados (hits, misses, tamaño)"""
+    return _parse.cache_info()
@@ -3,17 +3,50 @@ Módulo de protocolos de comunicación para motores de ajedrez.
 Separa la lógica de comunicación de la lógica del motor.
 """
 
-from .base import ProtocolBase
-from .uci import UCIProtocol
-from .rest import RESTProtocol
-from .local_llm import LocalLLMProtocol
-from .api_llm import APILLMProtocol
+import importlib
+
+from .base import ProtocolBase, RequestReport, SearchPreempted
+
+# Los protocolos HTTP importan httpx y jsonpath: se cargan en el primer acceso (PEP 562)
+_LAZY_EXPORTS = {
+    'UCIProtocol': '.uci',
+    'RESTProtocol': '.rest',
+    'LocalLLMProtocol': '.local_llm',
+    'APILLMProtocol': '.api_llm',
+    'HTTPClientPool': '.http_client',
+    'HTTPClientHandle': '.http_client',
+    'ProviderRateLimiter': '.rate_limit',
+    'get_rate_limiter': '.rate_limit',
+    'get_all_rate_limiters': '.rate_limit',
+    'ProviderBatch': '.batch',
+    'BatchError': '.batch',
+}
+
+
+def __getattr__(name: str):
+    """Importa una exportación diferida en su primer uso"""
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     'ProtocolBase',
+    'RequestReport',
+    'SearchPreempted',
     'UCIProtocol',
     'RESTProtocol',
     'LocalLLMProtocol',
-    'APILLMProtocol'
+    'APILLMProtocol',
+    'HTTPClientPool',
+    'HTTPClientHandle',
+    'ProviderRateLimiter',
+    'get_rate_limiter',
+    'get_all_rate_limiters',
+    'ProviderBatch',
+    'BatchError'
 ]
 
@@ -2,19 +2,26 @@
 Protocolo para APIs de LLMs externos (OpenAI, Anthropic, Cohere, etc.)
 """
 
+import asyncio
 import logging
 import httpx
 from typing import Optional, Dict, Any
 from .base import ProtocolBase
+from .http_client import HTTPClientHandle
+from .streaming import read_streamed_text
+from .constraints import MOVE_SCHEMA_NAME, move_json_schema
+from .rate_limit import estimate_tokens, get_rate_limiter
+from .usage import extract_usage, merge_usage
+from .batch import BATCH_PROVIDERS, ProviderBatch
+import json
 
-# Importar módulo de configuración para variables de entorno
-import sys
-from pathlib import Path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from config import get_api_key, get_api_url
 
 logger = logging.getLogger(__name__)
 
+# Peticiones máximas por jugada si el motor no indica 'max_attempts'
+DEFAULT_MAX_ATTEMPTS = 3
+
 
 class APILLMProtocol(ProtocolBase):
     """
@@ -22,6 +29,9 @@ class APILLMProtocol(ProtocolBase):
     Soporta OpenAI, Anthropic, Cohere y otros proveedores.
     """
     
+    # Proveedores con streaming SSE soportado
+    STREAMING_PROVIDERS = ("openai", "anthropic")
+    
     def __init__(self, config: Dict[str, Any]):
         """
         Inicializa el protocolo para API de LLM.
@@ -89,6 +99,18 @@ class APILLMProtocol(ProtocolBase):
         # Propiedades no críticas: pueden tener valores por defecto
         self.timeout = config.get("timeout", 60.0)
         
+        # Streaming (SSE): solo proveedores con formato de eventos conocido
+        self.stream = bool(config.get("stream", False)) and self.provider in self.STREAMING_PROVIDERS
+        
+        # Structured output: restringir la respuesta a un JSON con una jugada legal
+        self.structured_output = bool(config.get("structured_output", False))
+        
+        # Cliente HTTP compartido por host (keep-alive entre movimientos y reintentos)
+        self.http = HTTPClientHandle(self.api_url, config)
+        
+        # Limitador compartido por proveedor y API key (rpm, tpm, concurrencia, Retry-After)
+        self.rate_limiter = get_rate_limiter(self.provider, self.api_key, config)
+        
         self.current_fen: Optional[str] = None
     
     async def check_availability(self) -> bool:
@@ -105,6 +127,11 @@ class APILLMProtocol(ProtocolBase):
             
         return True
 
+    async def warmup(self) -> None:
+        """Abre la conexión con el proveedor antes del primer movimiento"""
+        if await self.check_availability():
+            await self.http.warmup()
+    
     async def initialize(self) -> None:
         """API LLM no requiere inicialización especial"""
         self._initialized = True
@@ -126,7 +153,13 @@ class APILLMProtocol(ProtocolBase):
         
         Args:
             depth: No usado directamente
-            **kwargs: Debe incluir 'prompt' con el prompt construido
+            **kwargs: Debe incluir 'prompt' con el prompt construido.
+                     'system' es el prefijo estático de instrucciones (cacheable).
+                     Con streaming activo, 'legal_moves' permite cortar la respuesta
+                     en cuanto aparece una jugada legal (salvo si se pidió 'explanation'
+                     o hay structured output). 'max_attempts' limita las peticiones al
+                     proveedor, reintentos incluidos (default: DEFAULT_MAX_ATTEMPTS).
+                     'report' (RequestReport) recibe el uso de tokens y los intentos de la petición
             
         Returns:
             Respuesta textual del LLM
@@ -137,36 +170,74 @@ class APILLMProtocol(ProtocolBase):
         prompt = kwargs.get("prompt")
         if not prompt:
             raise ValueError("APILLMProtocol requiere 'prompt' en kwargs")
+        system = kwargs.get("system")
+        report = kwargs.get("report")
+        
+        legal_moves = kwargs.get("legal_moves")
+        explanation = bool(kwargs.get("explanation", False))
+        # Con structured output cortar en la jugada dejaría el JSON sin cerrar
+        stop_early = not explanation and not self.structured_output
         
         # Construir headers y payload según proveedor
-        headers, payload = self._build_request(prompt)
+        headers, payload = self._build_request(prompt, system)
+        if self.structured_output and legal_moves:
+            self._apply_move_constraint(payload, legal_moves, explanation)
+        if self.stream:
+            payload["stream"] = True
+            if self.provider == "openai":
+                # El último evento incluye el uso (no llega si se corta el stream)
+                payload["stream_options"] = {"include_usage": True}
+        
+        # Tokens estimados para el cupo por minuto (se corrige con el uso real si llega)
+        estimated_tokens = estimate_tokens(prompt) + estimate_tokens(system or "") + int(self.config.get("max_tokens", 500))
         
-        # Reintentos para errores 503 (Service Unavailable) y 429 (Too Many Requests)
-        max_retries = 3
+        # Reintentos para errores 503 (Service Unavailable), 429 (Too Many Requests) y de conexión.
+        # 'max_attempts' lo fija el motor con los intentos que le quedan: un único presupuesto
+        max_retries = max(1, int(kwargs.get("max_attempts", DEFAULT_MAX_ATTEMPTS)))
         retry_count = 0
         last_exception = None
+        # Espera antes del siguiente intento tras un error de conexión (ya sin hueco en el limitador)
+        retry_delay = 0.0
         
         while retry_count < max_retries:
+            if retry_delay:
+                logger.info(f"Esperando {retry_delay:.1f}s antes de reintentar...")
+                await asyncio.sleep(retry_delay)
+                retry_delay = 0.0
+            if report is not None:
+                report.attempts = retry_count + 1
+            # Esperar turno en el limitador compartido del proveedor/API key (sin esperar
+            # más que el timeout de la petición si el servidor pidió un bloqueo largo)
+            await self.rate_limiter.acquire(estimated_tokens, timeout=self.timeout)
+            usage: Dict[str, int] = {}
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    logger.debug(f"Llamando a API {self.provider} (intento {retry_count + 1}/{max_retries})")
-                    logger.debug(f"URL: {self.api_url}, Modelo: {self.model}")
-                    
-                    response = await client.post(
+                logger.debug(f"Llamando a API {self.provider} (intento {retry_count + 1}/{max_retries})")
+                logger.debug(f"URL: {self.api_url}, Modelo: {self.model}")
+                
+                if self.stream:
+                    text = await self._post_streaming(headers, payload, legal_moves, stop_early, usage)
+                else:
+                    response = await self.http.client.post(
                         self.api_url,
                         headers=headers,
-                        json=payload
+                        json=payload,
+                        timeout=self.timeout
                     )
                     
+                    if response.is_success:
+                        self.rate_limiter.update_from_headers(response.headers, response.status_code)
                     response.raise_for_status()
                     data = response.json()
                     
                     # Extraer texto según proveedor
                     text = self._extract_text(data)
-                    
-                    logger.info(f"Respuesta de {self.provider}: {text[:100]}...")
-                    return text
-                    
+                    merge_usage(usage, extract_usage(data))
+                
+                logger.info(f"Respuesta de {self.provider}: {text[:100]}...")
+                if report is not None:
+                    report.usage = usage
+                return text
+                
             except httpx.HTTPStatusError as e:
                 error_detail = f"Error HTTP {e.response.status_code} en API {self.provider}"
                 try:
@@ -181,13 +252,18 @@ class APILLMProtocol(ProtocolBase):
                 
                 last_exception = e
                 
-                # Reintentar solo para errores 503 y 429
-                if e.response.status_code in [503, 429] and retry_count < max_retries - 1:
+                # Respetar Retry-After / cabeceras de rate limit; el bloqueo aplica a todas
+                # las peticiones con esta API key para no saturar al proveedor
+                server_wait = self.rate_limiter.update_from_headers(e.response.headers, e.response.status_code)
+                
+                # Reintentar solo para errores 503 y 429, y si la espera pedida cabe en el timeout
+                retryable_wait = server_wait is None or server_wait <= self.timeout
+                if e.response.status_code in [503, 429] and retryable_wait and retry_count < max_retries - 1:
                     retry_count += 1
-                    wait_time = 2 ** retry_count  # Backoff exponencial: 2s, 4s, 8s
-                    logger.info(f"Esperando {wait_time}s antes de reintentar...")
-                    import asyncio
-                    await asyncio.sleep(wait_time)
+                    self.rate_limiter.retries += 1
+                    if server_wait is None:
+                        self.rate_limiter.block_for(self.rate_limiter.backoff(retry_count))
+                    logger.info(f"Reintentando cuando el limitador de {self.provider} lo permita...")
                     continue
                 
                 # Para errores 503, proporcionar información útil
@@ -217,30 +293,68 @@ class APILLMProtocol(ProtocolBase):
                 # Reintentar solo para errores de conexión/timeout
                 if retry_count < max_retries - 1:
                     retry_count += 1
-                    wait_time = 2 ** retry_count
-                    logger.info(f"Esperando {wait_time}s antes de reintentar...")
-                    import asyncio
-                    await asyncio.sleep(wait_time)
+                    self.rate_limiter.retries += 1
+                    # Se espera al inicio del siguiente intento, tras liberar el hueco en 'finally'
+                    retry_delay = self.rate_limiter.backoff(retry_count)
                     continue
                 
                 raise
+            finally:
+                actual_tokens = usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0) if usage else None
+                self.rate_limiter.release(estimated_tokens, actual_tokens)
         
         # Si llegamos aquí, todos los reintentos fallaron
         if last_exception:
             raise last_exception
         raise Exception(f"No se pudo obtener respuesta de {self.provider} después de {max_retries} intentos")
     
-    def _build_request(self, prompt: str) -> tuple[Dict[str, str], Dict[str, Any]]:
+    async def _post_streaming(
+        self,
+        headers: Dict[str, str],
+        payload: Dict[str, Any],
+        legal_moves: Optional[list],
+        stop_early: bool,
+        usage: Optional[Dict[str, int]] = None
+    ) -> str:
+        """
+        Envía la petición con streaming SSE y acumula el texto.
+        Al salir del contexto se cierra el stream, de modo que cortar la lectura
+        deja de consumir (y pagar) tokens. El uso informado en los eventos se vuelca en 'usage'.
+        
+        Returns:
+            Texto recibido (parcial si se cortó al detectar la jugada)
+        """
+        async with self.http.client.stream(
+            "POST",
+            self.api_url,
+            headers=headers,
+            json=payload,
+            timeout=self.timeout
+        ) as response:
+            if response.status_code >= 400:
+                # Leer el cuerpo para que el manejo de errores pueda mostrarlo
+                await response.aread()
+            else:
+                self.rate_limiter.update_from_headers(response.headers, response.status_code)
+            response.raise_for_status()
+            return await read_streamed_text(response, legal_moves, stop_early, usage=usage)
+    
+    def _build_request(self, prompt: str, system: Optional[str] = None) -> tuple[Dict[str, str], Dict[str, Any]]:
         """
         Construye headers y payload según el proveedor.
+        El prefijo de sistema va siempre primero y sin cambios entre peticiones para que
+        el proveedor reutilice su caché de prefijos (automática en OpenAI, cache_control
+        en Anthropic). Se desactiva el marcado explícito con 'prompt_cache: false'.
         
         Args:
-            prompt: Prompt construido
+            prompt: Prompt construido (parte variable, específica de la posición)
+            system: Prefijo estático de instrucciones (opcional)
             
         Returns:
             Tupla (headers, payload)
         """
         headers = {"Content-Type": "application/json"}
+        prompt_cache = self.config.get("prompt_cache", True)
         
         if self.provider == "openai":
             headers["Authorization"] = f"Bearer {self.api_key}"
@@ -249,7 +363,7 @@ class APILLMProtocol(ProtocolBase):
                 "messages": [
                     {
                         "role": "system",
-                        "content": "Eres un asistente experto en ajedrez."
+                        "content": system or "Eres un asistente experto en ajedrez."
                     },
                     {
                         "role": "user",
@@ -259,6 +373,9 @@ class APILLMProtocol(ProtocolBase):
                 "temperature": self.config.get("temperature", 0.3),
                 "max_tokens": self.config.get("max_tokens", 500)
             }
+            # Mejora el enrutado hacia servidores con el prefijo ya cacheado
+            if cache_key := self.config.get("prompt_cache_key"):
+                payload["prompt_cache_key"] = cache_key
             
         elif self.provider == "anthropic":
             headers["x-api-key"] = self.api_key
@@ -274,12 +391,17 @@ class APILLMProtocol(ProtocolBase):
                 "max_tokens": self.config.get("max_tokens", 500),
                 "temperature": self.config.get("temperature", 0.3)
             }
+            if system:
+                block: Dict[str, Any] = {"type": "text", "text": system}
+                if prompt_cache:
+                    block["cache_control"] = {"type": "ephemeral"}
+                payload["system"] = [block]
             
         elif self.provider == "cohere":
             headers["Authorization"] = f"Bearer {self.api_key}"
             payload = {
                 "model": self.model,
-                "prompt": prompt,
+                "prompt": self._join_prompt(prompt, system),
                 "max_tokens": self.config.get("max_tokens", 500),
                 "temperature": self.config.get("temperature", 0.3)
             }
@@ -300,6 +422,8 @@ class APILLMProtocol(ProtocolBase):
                     "maxOutputTokens": self.config.get("max_tokens", 500)
                 }
             }
+            if system:
+                payload["systemInstruction"] = {"parts": [{"text": system}]}
             
         else:
             # Formato genérico para otros proveedores
@@ -307,13 +431,53 @@ class APILLMProtocol(ProtocolBase):
                 headers["Authorization"] = f"Bearer {self.api_key}"
             payload = {
                 "model": self.model,
-                "prompt": prompt,
+                "prompt": self._join_prompt(prompt, system),
                 "max_tokens": self.config.get("max_tokens", 500),
                 "temperature": self.config.get("temperature", 0.3)
             }
         
         return headers, payload
     
+    @staticmethod
+    def _join_prompt(prompt: str, system: Optional[str]) -> str:
+        """Antepone el prefijo de sistema al prompt en APIs sin rol de sistema"""
+        return f"{system}\n\n{prompt}" if system else prompt
+    
+    def _apply_move_constraint(self, payload: Dict[str, Any], legal_moves: list, explanation: bool) -> None:
+        """
+        Añade al payload la restricción de salida según el proveedor:
+        - openai: response_format con JSON schema estricto (enum de jugadas legales)
+        - anthropic: herramienta obligatoria cuyo input_schema es el mismo schema
+        - google: responseSchema en generationConfig
+        Otros proveedores no soportan restricciones y se dejan sin modificar.
+        
+        Args:
+            payload: Payload construido por _build_request (se modifica in-place)
+            legal_moves: Jugadas legales en formato UCI
+            explanation: Incluir campo 'explanation' en la respuesta
+        """
+        schema = move_json_schema(legal_moves, with_explanation=explanation)
+        
+        if self.provider == "openai":
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": MOVE_SCHEMA_NAME, "strict": True, "schema": schema}
+            }
+        elif self.provider == "anthropic":
+            payload["tools"] = [{
+                "name": MOVE_SCHEMA_NAME,
+                "description": "Envía la jugada elegida en formato UCI",
+                "input_schema": schema
+            }]
+            payload["tool_choice"] = {"type": "tool", "name": MOVE_SCHEMA_NAME}
+        elif self.provider == "google":
+            generation_config = payload.setdefault("generationConfig", {})
+            generation_config["responseMimeType"] = "application/json"
+            # Gemini no admite additionalProperties en responseSchema
+            generation_config["responseSchema"] = {k: v for k, v in schema.items() if k != "additionalProperties"}
+        else:
+            logger.debug(f"Proveedor {self.provider} sin soporte de structured output, se usa texto libre")
+    
     def _extract_text(self, data: Dict[str, Any]) -> str:
         """
         Extrae el texto generado según el proveedor.
@@ -328,6 +492,10 @@ class APILLMProtocol(ProtocolBase):
             return data["choices"][0]["message"]["content"]
         
         elif self.provider == "anthropic":
+            # Con structured output la respuesta llega como bloque tool_use
+            for block in data["content"]:
+                if block.get("type") == "tool_use":
+                    return json.dumps(block.get("input", {}), ensure_ascii=False)
             return data["content"][0]["text"]
         
         elif self.provider == "cohere":
@@ -351,7 +519,27 @@ class APILLMProtocol(ProtocolBase):
         
         raise ValueError(f"No se pudo extraer texto de respuesta de {self.provider}: {data}")
     
+    @property
+    def supports_batch(self) -> bool:
+        """Indica si el proveedor tiene API batch soportada"""
+        return self.provider in BATCH_PROVIDERS
+    
+    async def run_batch(self, items: list) -> Dict[str, Optional[str]]:
+        """
+        Procesa muchos prompts mediante la API batch del proveedor (sin latencia interactiva).
+        
+        Args:
+            items: Elementos del lote (custom_id, prompt, system, legal_moves, explanation)
+            
+        Returns:
+            Diccionario {custom_id: texto generado o None si falló}
+        """
+        if not self._initialized:
+            await self.initialize()
+        return await ProviderBatch(self).run(items)
+    
     async def cleanup(self) -> None:
-        """API LLM no requiere limpieza"""
+        """Libera el cliente HTTP compartido"""
+        await self.http.close()
         self._initialized = False
         logger.debug(f"APILLMProtocol cleanup completado ({self.provider})")
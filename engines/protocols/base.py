@@ -4,12 +4,30 @@ Implementa el patrón Bridge para separar comunicación de lógica de negocio.
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class SearchPreempted(Exception):
+    """La búsqueda se interrumpió para ceder la instancia a una petición más prioritaria"""
+
+
+class RequestReport:
+    """
+    Datos de una petición que el protocolo rellena para quien la hizo.
+    Las peticiones concurrentes de un motor generativo comparten la instancia del
+    protocolo, así que estos datos no pueden quedar en ella.
+    """
+
+    def __init__(self):
+        # Uso de tokens informado por el servidor (vacío si no lo informa)
+        self.usage: Dict[str, int] = {}
+        # Peticiones al servidor que consumió (reintentos incluidos)
+        self.attempts = 1
+
+
 class ProtocolBase(ABC):
     """
     Clase base abstracta para protocolos de comunicación.
@@ -25,6 +43,12 @@ class ProtocolBase(ABC):
         """
         self.config = config
         self._initialized = False
+        # Datos de búsqueda de la última petición (score, depth, pv...) si el motor los da
+        self.last_analysis: Optional[Dict[str, Any]] = None
+        # Se ha pedido ceder la instancia (ver preempt); el pool lo limpia al devolverla
+        self.preempt_requested = False
+        # Veces que se ha reiniciado el proceso o la conexión tras morir (métricas)
+        self.restarts = 0
     
     @abstractmethod
     async def initialize(self) -> None:
@@ -44,6 +68,19 @@ class ProtocolBase(ABC):
         """
         pass
     
+    async def send_moves(self, fen: str, moves: List[str], start_fen: Optional[str] = None) -> None:
+        """
+        Envía una posición como partida: posición inicial más las jugadas hasta llegar a ella.
+        Los protocolos que lo aprovechan (UCI) conservan así su estado entre posiciones
+        consecutivas de la misma partida. Por defecto envía solo la posición final.
+        
+        Args:
+            fen: Posición resultante en formato FEN
+            moves: Jugadas en formato UCI desde la posición inicial
+            start_fen: Posición inicial (None = posición inicial estándar)
+        """
+        await self.send_position(fen)
+    
     @abstractmethod
     async def request_move(self, depth: Optional[int] = None, **kwargs) -> str:
         """
@@ -66,6 +103,24 @@ class ProtocolBase(ABC):
         """
         pass
     
+    async def warmup(self) -> None:
+        """
+        Precalienta recursos costosos (conexiones, procesos) antes del primer movimiento.
+        Por defecto no hace nada.
+        """
+        pass
+    
+    def preempt(self) -> bool:
+        """
+        Pide interrumpir la búsqueda en curso para ceder la instancia a una petición
+        más prioritaria. Si el protocolo lo soporta, request_move lanza SearchPreempted.
+        Por defecto no se puede interrumpir (p. ej. una petición HTTP ya enviada).
+        
+        Returns:
+            True si la búsqueda se interrumpirá
+        """
+        return False
+    
     async def check_availability(self) -> bool:
         """
         Verifica si el protocolo puede funcionar con la configuración actual.
@@ -0,0 +1,285 @@
+"""
+Procesamiento por lotes (batch) para APIs de LLMs.
+Envía muchos prompts en una sola petición a la API batch del proveedor (OpenAI Batch API,
+Anthropic Message Batches), espera a que termine y devuelve los textos por custom_id.
+No compite con el tráfico interactivo por el rate limit y el precio por token es menor.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from .api_llm import APILLMProtocol
+
+logger = logging.getLogger(__name__)
+
+# Proveedores con API batch soportada
+BATCH_PROVIDERS = ("openai", "anthropic")
+
+# Valores por defecto de la configuración batch
+DEFAULT_POLL_INTERVAL = 30.0
+DEFAULT_BATCH_TIMEOUT = 24 * 3600.0
+
+# Formato de custom_id que aceptan ambos proveedores
+CUSTOM_ID_PATTERN = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")
+
+
+class BatchError(RuntimeError):
+    """El lote falló, expiró o no terminó dentro del tiempo máximo"""
+
+
+class ProviderBatch:
+    """
+    Cliente de la API batch del proveedor de un APILLMProtocol.
+    Reutiliza la construcción de payloads y la extracción de texto del protocolo.
+
+    Cada elemento del lote es un diccionario con:
+        custom_id: Identificador único (letras, números, '_' o '-', máx. 64)
+        prompt: Prompt de la posición
+        system: Prefijo de sistema (opcional)
+        legal_moves: Jugadas legales, para structured output (opcional)
+        explanation: Pedir explicación en la respuesta (opcional)
+    """
+
+    def __init__(self, protocol: "APILLMProtocol"):
+        """
+        Args:
+            protocol: Protocolo configurado (openai o anthropic)
+        """
+        if protocol.provider not in BATCH_PROVIDERS:
+            raise ValueError(
+                f"El proveedor {protocol.provider} no tiene API batch soportada. "
+                f"Soportados: {', '.join(BATCH_PROVIDERS)}"
+            )
+        self.protocol = protocol
+        self.provider = protocol.provider
+        config = protocol.config
+        self.poll_interval = float(config.get("batch_poll_interval", DEFAULT_POLL_INTERVAL))
+        self.timeout = float(config.get("batch_timeout", DEFAULT_BATCH_TIMEOUT))
+        self.base_url = self._base_url(config.get("batch_api_url"))
+
+    def _base_url(self, configured: Optional[str]) -> str:
+        """
+        URL base de la API batch.
+        OpenAI: raíz de la API (…/v1), con /files y /batches debajo.
+        Anthropic: …/v1/messages/batches.
+        """
+        if configured:
+            return configured.rstrip("/")
+
+        api_url = self.protocol.api_url.rstrip("/")
+        if self.provider == "anthropic":
+            return f"{api_url}/batches"
+
+        for suffix in ("/chat/completions", "/completions"):
+            if api_url.endswith(suffix):
+                return api_url[:-len(suffix)]
+        return api_url
+
+    def _headers(self, json_body: bool = True) -> Dict[str, str]:
+        """Cabeceras de autenticación del proveedor (sin Content-Type para multipart)"""
+        headers, _ = self.protocol._build_request("")
+        if not json_body:
+            headers.pop("Content-Type", None)
+        return headers
+
+    def _body(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Payload de una petición del lote, igual al de una petición síncrona"""
+        _, payload = self.protocol._build_request(item["prompt"], item.get("system"))
+        legal_moves = item.get("legal_moves")
+        if self.protocol.structured_output and legal_moves:
+            self.protocol._apply_move_constraint(payload, legal_moves, bool(item.get("explanation", False)))
+        return payload
+
+    async def submit(self, items: List[Dict[str, Any]]) -> str:
+        """
+        Envía el lote.
+
+        Args:
+            items: Elementos del lote (ver docstring de la clase)
+
+        Returns:
+            Identificador del lote en el proveedor
+
+        Raises:
+            ValueError: Si el lote está vacío o algún custom_id es inválido o está repetido
+        """
+        if not items:
+            raise ValueError("El lote está vacío")
+        seen = set()
+        for item in items:
+            custom_id = item["custom_id"]
+            if not isinstance(custom_id, str) or not CUSTOM_ID_PATTERN.match(custom_id):
+                raise ValueError(f"custom_id inválido: {custom_id!r} (letras, números, '_' o '-', máx. 64)")
+            if custom_id in seen:
+                # Los resultados se indexan por custom_id: uno repetido pisaría al otro
+                raise ValueError(f"custom_id repetido en el lote: {custom_id}")
+            seen.add(custom_id)
+        client = self.protocol.http.client
+
+        if self.provider == "anthropic":
+            response = await client.post(
+                self.base_url,
+                headers=self._headers(),
+                json={"requests": [
+                    {"custom_id": item["custom_id"], "params": self._body(item)} for item in items
+                ]},
+                timeout=self.protocol.timeout
+            )
+            response.raise_for_status()
+            batch_id = response.json()["id"]
+        else:
+            endpoint = urlsplit(self.protocol.api_url).path
+            lines = [
+                json.dumps({
+                    "custom_id": item["custom_id"],
+                    "method": "POST",
+                    "url": endpoint,
+                    "body": self._body(item),
+                }, ensure_ascii=False)
+                for item in items
+            ]
+            upload = await client.post(
+                f"{self.base_url}/files",
+                headers=self._headers(json_body=False),
+                data={"purpose": "batch"},
+                files={"file": ("batch.jsonl", "\n".join(lines).encode("utf-8"), "application/jsonl")},
+                timeout=self.protocol.timeout
+            )
+            upload.raise_for_status()
+
+            response = await client.post(
+                f"{self.base_url}/batches",
+                headers=self._headers(),
+                json={
+                    "input_file_id": upload.json()["id"],
+                    "endpoint": endpoint,
+                    "completion_window": "24h",
+                },
+                timeout=self.protocol.timeout
+            )
+            response.raise_for_status()
+            batch_id = response.json()["id"]
+
+        logger.info(f"Lote {batch_id} enviado a {self.provider} ({len(items)} peticiones)")
+        return batch_id
+
+    async def status(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Consulta el estado del lote.
+
+        Returns:
+            Diccionario con 'state' normalizado ('in_progress', 'ended' o 'failed')
+            y 'raw' (respuesta del proveedor)
+        """
+        response = await self.protocol.http.client.get(
+            f"{self.base_url}/batches/{batch_id}" if self.provider == "openai" else f"{self.base_url}/{batch_id}",
+            headers=self._headers(),
+            timeout=self.protocol.timeout
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        if self.provider == "anthropic":
+            state = "ended" if data.get("processing_status") == "ended" else "in_progress"
+        else:
+            status = data.get("status")
+            if status == "completed":
+                state = "ended"
+            elif status in ("expired", "cancelled"):
+                # Puede haber resultados parciales
+                state = "ended" if data.get("output_file_id") else "failed"
+            elif status == "failed":
+                state = "failed"
+            else:
+                state = "in_progress"
+
+        return {"state": state, "raw": data}
+
+    async def results(self, batch: Dict[str, Any]) -> Dict[str, Optional[str]]:
+        """
+        Descarga los resultados de un lote terminado.
+
+        Args:
+            batch: Respuesta del proveedor ('raw' de status())
+
+        Returns:
+            Diccionario {custom_id: texto generado o None si esa petición falló}
+        """
+        client = self.protocol.http.client
+        results: Dict[str, Optional[str]] = {}
+
+        if self.provider == "anthropic":
+            urls = [batch["results_url"]] if batch.get("results_url") else []
+        else:
+            urls = [
+                f"{self.base_url}/files/{file_id}/content"
+                for file_id in (batch.get("output_file_id"), batch.get("error_file_id"))
+                if file_id
+            ]
+
+        for url in urls:
+            response = await client.get(url, headers=self._headers(), timeout=self.protocol.timeout)
+            response.raise_for_status()
+            for line in response.text.splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                results[entry["custom_id"]] = self._entry_text(entry)
+
+        return results
+
+    def _entry_text(self, entry: Dict[str, Any]) -> Optional[str]:
+        """Texto de una línea de resultados (None si la petición falló)"""
+        try:
+            if self.provider == "anthropic":
+                result = entry.get("result") or {}
+                if result.get("type") != "succeeded":
+                    logger.warning(f"Petición {entry.get('custom_id')} del lote falló: {result}")
+                    return None
+                return self.protocol._extract_text(result["message"])
+
+            response = entry.get("response") or {}
+            if entry.get("error") or response.get("status_code") != 200:
+                logger.warning(f"Petición {entry.get('custom_id')} del lote falló: {entry.get('error') or response}")
+                return None
+            return self.protocol._extract_text(response["body"])
+        except (KeyError, IndexError, ValueError) as e:
+            logger.warning(f"Resultado del lote sin texto ({entry.get('custom_id')}): {e}")
+            return None
+
+    async def run(self, items: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+        """
+        Envía el lote, espera a que termine (polling) y devuelve los resultados.
+
+        Args:
+            items: Elementos del lote
+
+        Returns:
+            Diccionario {custom_id: texto o None}. Los custom_id sin resultado se devuelven como None
+
+        Raises:
+            BatchError: Si el lote falla o supera batch_timeout
+        """
+        batch_id = await self.submit(items)
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            status = await self.status(batch_id)
+            if status["state"] == "ended":
+                break
+            if status["state"] == "failed":
+                raise BatchError(f"Lote {batch_id} de {self.provider} falló: {status['raw']}")
+            if time.monotonic() >= deadline:
+                raise BatchError(f"Lote {batch_id} de {self.provider} no terminó en {self.timeout:.0f}s")
+            logger.debug(f"Lote {batch_id} en curso, nueva consulta en {self.poll_interval:.0f}s")
+            await asyncio.sleep(self.poll_interval)
+
+        results = await self.results(status["raw"])
+        logger.info(f"Lote {batch_id} terminado: {sum(1 for t in results.values() if t)}/{len(items)} respuestas")
+        return {item["custom_id"]: results.get(item["custom_id"]) for item in items}
@@ -0,0 +1,66 @@
+"""
+Restricciones de salida para LLMs (structured output / constrained decoding).
+Limitan la respuesta del modelo a un JSON cuyo campo 'move' solo puede ser una jugada legal.
+"""
+
+import json
+from typing import Any, Dict, List
+
+# Nombre de la herramienta/schema usado en las peticiones
+MOVE_SCHEMA_NAME = "chess_move"
+
+
+def move_json_schema(legal_moves: List[str], with_explanation: bool = False) -> Dict[str, Any]:
+    """
+    JSON Schema de la respuesta: {"move": <jugada legal>[, "explanation": str]}.
+
+    Args:
+        legal_moves: Jugadas legales en formato UCI
+        with_explanation: Incluir el campo 'explanation'
+
+    Returns:
+        Schema compatible con el modo estricto de OpenAI, tools de Anthropic y Ollama
+    """
+    properties: Dict[str, Any] = {
+        "move": {
+            "type": "string",
+            "enum": list(legal_moves),
+            "description": "Jugada elegida en formato UCI"
+        }
+    }
+    if with_explanation:
+        properties["explanation"] = {
+            "type": "string",
+            "description": "Breve explicación del razonamiento"
+        }
+
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties.keys()),
+        "additionalProperties": False
+    }
+
+
+def move_gbnf_grammar(legal_moves: List[str], with_explanation: bool = False) -> str:
+    """
+    Gramática GBNF (llama.cpp) equivalente a move_json_schema.
+
+    Args:
+        legal_moves: Jugadas legales en formato UCI
+        with_explanation: Incluir el campo 'explanation'
+
+    Returns:
+        Gramática GBNF como texto
+    """
+    alternatives = " | ".join(json.dumps(json.dumps(move)) for move in legal_moves)
+    rules = [
+        'root ::= "{" ws "\\"move\\"" ws ":" ws move'
+        + (' ws "," ws "\\"explanation\\"" ws ":" ws string' if with_explanation else "")
+        + ' ws "}"',
+        f"move ::= {alternatives}",
+        'ws ::= [ \\t\\n]*',
+    ]
+    if with_explanation:
+        rules.append('string ::= "\\"" ([^"\\\\\\n] | "\\\\" ["\\\\/bfnrt])* "\\""')
+    return "\n".join(rules) + "\n"
@@ -0,0 +1,189 @@
+"""
+Clientes HTTP compartidos para los protocolos de red.
+Mantiene un httpx.AsyncClient de larga duración por host (keep-alive, HTTP/2 opcional)
+para no pagar un handshake TCP+TLS en cada movimiento.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import logging
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Valores por defecto de la configuración de conexiones
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+
+
+def _origin(url: str) -> str:
+    """Devuelve esquema://host[:puerto] de una URL"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class HTTPClientPool:
+    """
+    Registro de clientes httpx compartidos por host.
+    Los protocolos adquieren un cliente mediante HTTPClientHandle y lo liberan en cleanup();
+    el cliente se cierra cuando no queda ningún protocolo usándolo.
+    """
+
+    _clients: Dict[Tuple, httpx.AsyncClient] = {}
+    _refs: Dict[Tuple, int] = {}
+    _http2_available: Optional[bool] = None
+
+    @classmethod
+    def _supports_http2(cls) -> bool:
+        """HTTP/2 requiere el paquete opcional 'h2' (httpx[http2])"""
+        if cls._http2_available is None:
+            cls._http2_available = importlib.util.find_spec("h2") is not None
+            if not cls._http2_available:
+                logger.warning("HTTP/2 solicitado pero 'h2' no está instalado (pip install httpx[http2]). Usando HTTP/1.1")
+        return cls._http2_available
+
+    @classmethod
+    def _key(cls, url: str, config: Dict[str, Any]) -> Tuple:
+        """
+        Clave del cliente: host + opciones de conexión (+ motor si no se comparte).
+        El timeout no forma parte de la clave: cada petición pasa el suyo (timeout=)
+        """
+        http2 = bool(config.get("http2", False)) and cls._supports_http2()
+        key = (
+            _origin(url),
+            http2,
+            int(config.get("max_connections", DEFAULT_MAX_CONNECTIONS)),
+            int(config.get("max_keepalive_connections", DEFAULT_MAX_KEEPALIVE)),
+            float(config.get("keepalive_expiry", DEFAULT_KEEPALIVE_EXPIRY)),
+        )
+        if not config.get("share_http_client", True):
+            key += (config.get("name"),)
+        return key
+
+    @classmethod
+    def acquire(cls, url: str, config: Dict[str, Any]) -> Tuple[Tuple, httpx.AsyncClient]:
+        """
+        Obtiene (o crea) el cliente compartido para la URL.
+
+        Args:
+            url: URL a la que se harán las peticiones
+            config: Configuración del motor (límites de conexión, http2, etc.)
+
+        Returns:
+            Tupla (clave, cliente) - la clave se usa para liberar el cliente
+        """
+        key = cls._key(url, config)
+        client = cls._clients.get(key)
+
+        if client is None or client.is_closed:
+            origin, http2, max_connections, max_keepalive, keepalive_expiry = key[:5]
+            client = httpx.AsyncClient(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive,
+                    keepalive_expiry=keepalive_expiry,
+                ),
+                timeout=float(config.get("timeout", 30.0)),
+            )
+            cls._clients[key] = client
+            cls._refs[key] = 0
+            logger.info(
+                f"Cliente HTTP creado para {origin} (http2={http2}, "
+                f"max_connections={max_connections}, keepalive={max_keepalive})"
+            )
+
+        cls._refs[key] = cls._refs.get(key, 0) + 1
+        return key, client
+
+    @classmethod
+    async def release(cls, key: Tuple) -> None:
+        """Libera una referencia y cierra el cliente si ya nadie lo usa"""
+        if key not in cls._refs:
+            return
+        cls._refs[key] -= 1
+        if cls._refs[key] <= 0:
+            client = cls._clients.pop(key, None)
+            cls._refs.pop(key, None)
+            if client is not None and not client.is_closed:
+                await client.aclose()
+                logger.debug(f"Cliente HTTP cerrado para {key[0]}")
+
+    @classmethod
+    async def close_all(cls) -> None:
+        """Cierra todos los clientes (al apagar la aplicación)"""
+        clients = list(cls._clients.values())
+        cls._clients.clear()
+        cls._refs.clear()
+        await asyncio.gather(*(c.aclose() for c in clients if not c.is_closed), return_exceptions=True)
+
+    @staticmethod
+    def client_id(key: Tuple) -> str:
+        """Identificador corto y estable de un cliente (un host puede tener varios, ver _key)"""
+        return hashlib.sha256(repr(key).encode()).hexdigest()[:8]
+
+    @classmethod
+    def stats(cls) -> list:
+        """Estado de los clientes abiertos (id, host, referencias, http2)"""
+        return [
+            {
+                "client": cls.client_id(key),
+                "origin": key[0],
+                "http2": key[1],
+                "max_connections": key[2],
+                "refs": cls._refs.get(key, 0),
+            }
+            for key in cls._clients
+        ]
+
+
+class HTTPClientHandle:
+    """
+    Acceso de un protocolo al cliente compartido de su host.
+    Se crea en el constructor del protocolo y el cliente se adquiere perezosamente.
+    """
+
+    def __init__(self, url: Optional[str], config: Dict[str, Any]):
+        """
+        Args:
+            url: URL base del servicio (puede ser None si el motor no está configurado)
+            config: Configuración del motor
+        """
+        self.url = url
+        self.config = config
+        self._key: Optional[Tuple] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Cliente compartido (se crea en el primer uso)"""
+        if not self.url:
+            raise ValueError("No hay URL configurada para crear el cliente HTTP")
+        if self._client is None or self._client.is_closed:
+            self._key, self._client = HTTPClientPool.acquire(self.url, self.config)
+        return self._client
+
+    async def warmup(self, timeout: float = 5.0) -> None:
+        """
+        Resuelve DNS y abre una conexión (TCP+TLS) al host para que la primera
+        petición real la reutilice. Los errores se ignoran: solo es una optimización.
+        """
+        if not self.url or not self.config.get("prewarm", True):
+            return
+        try:
+            await self.client.head(_origin(self.url), timeout=timeout)
+            logger.debug(f"Conexión precalentada con {_origin(self.url)}")
+        except Exception as e:
+            logger.debug(f"No se pudo precalentar {self.url}: {e}")
+
+    async def close(self) -> None:
+        """Libera el cliente compartido"""
+        if self._key is not None:
+            await HTTPClientPool.release(self._key)
+        self._key = None
+        self._client = None
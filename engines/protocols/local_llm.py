@@ -2,18 +2,38 @@
 Protocolo para LLMs locales (Ollama, LM Studio, LocalAI, etc.)
 """
 
+import asyncio
 import logging
 import httpx
 from typing import Optional, Dict, Any
 from .base import ProtocolBase
+from .http_client import HTTPClientHandle
+from .streaming import read_streamed_text
+from .constraints import move_gbnf_grammar, move_json_schema
+from .usage import extract_usage, merge_usage
 
 logger = logging.getLogger(__name__)
 
+# Tipos de servidor local soportados:
+#   probe: ruta GET que identifica al servidor (en orden de detección)
+#   generate: ruta de generación de texto
+LOCAL_LLM_FLAVORS: Dict[str, Dict[str, Optional[str]]] = {
+    "ollama": {"probe": "/api/version", "generate": "/api/generate"},
+    "llamacpp": {"probe": "/props", "generate": "/completion"},
+    "lmstudio": {"probe": "/api/v0/models", "generate": "/v1/completions"},
+    "openai": {"probe": "/v1/models", "generate": "/v1/completions"},
+    "generic": {"probe": None, "generate": "/generate"},  # LocalAI y servidores antiguos
+}
+
+# Tiempo que Ollama mantiene el modelo cargado tras cada petición
+DEFAULT_KEEP_ALIVE = "30m"
+
 
 class LocalLLMProtocol(ProtocolBase):
     """
     Protocolo para comunicación con LLMs locales.
-    Compatible con Ollama, LM Studio, LocalAI y otros servidores locales.
+    Compatible con Ollama, llama.cpp server, LM Studio, LocalAI y otros servidores
+    OpenAI-compatibles. El tipo de servidor se detecta una vez y se recuerda.
     """
     
     def __init__(self, config: Dict[str, Any]):
@@ -37,6 +57,25 @@ class LocalLLMProtocol(ProtocolBase):
         # Propiedades no críticas: pueden tener valores por defecto
         self.timeout = config.get("timeout", 60.0)  # Mayor timeout para LLMs
         self.model_path = config.get("model_path")
+        self.stream = bool(config.get("stream", False))
+        # Structured output: gramática GBNF (llama.cpp) y JSON schema (Ollama)
+        self.structured_output = bool(config.get("structured_output", False))
+        
+        # Tipo de servidor: "auto" lo detecta una vez y lo recuerda
+        flavor = config.get("flavor", "auto")
+        if flavor != "auto" and flavor not in LOCAL_LLM_FLAVORS:
+            raise ValueError(
+                f"flavor '{flavor}' no soportado. Opciones: auto, {', '.join(LOCAL_LLM_FLAVORS)}"
+            )
+        self.auto_detect = flavor == "auto"
+        self.flavor: Optional[str] = None if self.auto_detect else flavor
+        self._detect_lock = asyncio.Lock()
+        
+        # Ollama: mantener el modelo residente entre movimientos
+        self.keep_alive = config.get("keep_alive", DEFAULT_KEEP_ALIVE)
+        
+        # Cliente HTTP compartido (keep-alive con el servidor local)
+        self.http = HTTPClientHandle(self.endpoint, config)
         
         self.current_fen: Optional[str] = None
     
@@ -48,56 +87,125 @@ class LocalLLMProtocol(ProtocolBase):
             return False
             
         try:
-            async with httpx.AsyncClient(timeout=2.0) as client:
-                # Intentar ping al endpoint
-                # Probar endpoints comunes de health/version
-                endpoints_to_try = ["/health", "/version", "/api/version", "/v1/models"]
-                
-                for path in endpoints_to_try:
-                    try:
-                        await client.get(f"{self.endpoint}{path}")
-                        return True
-                    except httpx.HTTPStatusError:
-                        # Si responde con error HTTP (ej 404), el servidor existe
-                        return True
-                    except Exception:
-                        continue
-                
-                # Si no hay endpoints de health, intentar conexión a raíz
+            # Si el servidor se identifica (o ya se conocía), está disponible
+            if await self._ensure_flavor():
+                return True
+            
+            client = self.http.client
+            
+            # Intentar ping al endpoint
+            # Probar endpoints comunes de health/version
+            endpoints_to_try = ["/health", "/version", "/api/version", "/v1/models"]
+            
+            for path in endpoints_to_try:
                 try:
-                    await client.head(self.endpoint)
+                    await client.get(f"{self.endpoint}{path}", timeout=2.0)
+                    return True
+                except httpx.HTTPStatusError:
+                    # Si responde con error HTTP (ej 404), el servidor existe
                     return True
-                except:
-                    pass
-                    
+                except Exception:
+                    continue
+            
+            # Si no hay endpoints de health, intentar conexión a raíz
+            try:
+                await client.head(self.endpoint, timeout=2.0)
+                return True
+            except:
+                pass
+                
             return False
         except Exception:
             return False
 
     async def initialize(self) -> None:
         """
-        Verifica que el endpoint del LLM local esté disponible.
+        Verifica que el endpoint del LLM local esté disponible y detecta el tipo de servidor.
         """
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                # Intentar ping al endpoint
+            flavor = await self._ensure_flavor()
+            if flavor:
+                logger.info(f"LocalLLMProtocol conectado: {self.endpoint} ({flavor})")
+            else:
+                logger.warning(
+                    f"No se pudo identificar el servidor en {self.endpoint}, "
+                    "se detectará en la primera petición"
+                )
+        except Exception as e:
+            logger.warning(f"No se pudo conectar a LLM local: {e}")
+        
+        # No falla la inicialización, se intentará en request_move
+        self._initialized = True
+    
+    async def _ensure_flavor(self) -> Optional[str]:
+        """
+        Devuelve el tipo de servidor, detectándolo solo si aún no se conoce.
+        
+        Returns:
+            Nombre del tipo (clave de LOCAL_LLM_FLAVORS) o None si ningún probe respondió
+        """
+        if self.flavor:
+            return self.flavor
+        
+        async with self._detect_lock:
+            # Otra petición pudo detectarlo mientras esperábamos el lock
+            if self.flavor:
+                return self.flavor
+            
+            client = self.http.client
+            for name, flavor in LOCAL_LLM_FLAVORS.items():
+                if not flavor["probe"]:
+                    continue
                 try:
-                    response = await client.get(f"{self.endpoint}/health")
-                    if response.status_code == 200:
-                        logger.info(f"LocalLLMProtocol conectado: {self.endpoint}")
-                except:
-                    # Algunos servidores no tienen endpoint de health
-                    logger.warning(
-                        f"No se pudo verificar health de {self.endpoint}, "
-                        "asumiendo que está disponible"
-                    )
-            
-            self._initialized = True
+                    response = await client.get(f"{self.endpoint}{flavor['probe']}", timeout=2.0)
+                except Exception:
+                    continue
+                if response.status_code == 200:
+                    self.flavor = name
+                    logger.info(f"Servidor LLM local detectado en {self.endpoint}: {name}")
+                    return name
             
+            return None
+    
+    def _forget_flavor(self) -> None:
+        """Olvida el tipo detectado para volver a detectarlo (solo en modo auto)"""
+        if self.auto_detect and self.flavor:
+            logger.info(f"Servidor {self.endpoint} dejó de responder como {self.flavor}, se volverá a detectar")
+            self.flavor = None
+    
+    async def warmup(self) -> None:
+        """
+        Abre la conexión con el servidor local y carga el modelo antes del primer movimiento.
+        En Ollama basta una petición sin prompt; en el resto se genera un único token.
+        Se puede desactivar la generación con 'warmup_generation: false'.
+        """
+        await self.http.warmup()
+        if not self.config.get("warmup_generation", True):
+            return
+        
+        flavor = await self._ensure_flavor()
+        if not flavor:
+            return
+        
+        if flavor == "ollama":
+            payload: Dict[str, Any] = {"keep_alive": self.keep_alive}
+            if model := self.config.get("model"):
+                payload["model"] = model
+        else:
+            payload = self._adapt_payload(flavor, {
+                "prompt": "1.",
+                "max_tokens": 1,
+                "temperature": 0.0,
+                "stream": False,
+            })
+        
+        url = f"{self.endpoint}{LOCAL_LLM_FLAVORS[flavor]['generate']}"
+        try:
+            response = await self.http.client.post(url, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            logger.info(f"Modelo local precalentado en {self.endpoint} ({flavor})")
         except Exception as e:
-            logger.warning(f"No se pudo conectar a LLM local: {e}")
-            # No falla la inicialización, se intentará en request_move
-            self._initialized = True
+            logger.debug(f"No se pudo precalentar el modelo en {self.endpoint}: {e}")
     
     async def send_position(self, fen: str) -> None:
         """
@@ -115,7 +223,11 @@ class LocalLLMProtocol(ProtocolBase):
         
         Args:
             depth: No usado directamente, puede incluirse en el prompt
-            **kwargs: Debe incluir 'prompt' con el prompt construido
+            **kwargs: Debe incluir 'prompt' con el prompt construido.
+                     'system' es el prefijo estático de instrucciones (cacheable).
+                     Con streaming activo, 'legal_moves' permite cortar la respuesta
+                     en cuanto aparece una jugada legal (salvo si se pidió 'explanation'
+                     o hay structured output). 'report' (RequestReport) recibe el uso de tokens
             
         Returns:
             Respuesta textual del LLM (debe ser parseada por el motor)
@@ -128,76 +240,166 @@ class LocalLLMProtocol(ProtocolBase):
             raise ValueError("LocalLLMProtocol requiere 'prompt' en kwargs")
         
         # Construir payload según formato del servidor local
-        payload = self._build_payload(prompt, **kwargs)
+        payload = self._build_payload(**kwargs)
+        legal_moves = kwargs.get("legal_moves")
+        # Con structured output cortar en la jugada dejaría el JSON sin cerrar
+        stop_early = not kwargs.get("explanation", False) and not self.structured_output
+        report = kwargs.get("report")
+        usage = report.usage if report is not None else {}
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # Intentar endpoint de generación
-                endpoints_to_try = [
-                    "/generate",  # LM Studio, LocalAI
-                    "/api/generate",  # Ollama
-                    "/v1/completions",  # OpenAI-compatible
-                    "/completion",  # Alternativa
-                ]
-                
-                last_error = None
-                for endpoint_path in endpoints_to_try:
-                    try:
-                        url = f"{self.endpoint}{endpoint_path}"
-                        logger.debug(f"Intentando endpoint: {url}")
-                        
-                        response = await client.post(url, json=payload)
-                        
-                        if response.status_code == 404:
-                            continue  # Probar siguiente endpoint
-                        
-                        response.raise_for_status()
-                        data = response.json()
-                        
-                        # Extraer texto de respuesta
-                        text = self._extract_text(data)
-                        
-                        if text:
-                            logger.info(f"Respuesta del LLM local: {text[:100]}...")
-                            return text
-                        
-                    except httpx.HTTPStatusError as e:
-                        if e.response.status_code != 404:
-                            last_error = e
-                            break
-                    except Exception as e:
-                        last_error = e
-                        continue
-                
-                # Si llegamos aquí, ningún endpoint funcionó
-                raise RuntimeError(
-                    f"No se pudo conectar a LLM local en {self.endpoint}. "
-                    f"Endpoints probados: {endpoints_to_try}. "
-                    f"Último error: {last_error}"
-                )
-                
+            flavor = await self._ensure_flavor()
+            
+            if flavor:
+                try:
+                    text = await self._generate(flavor, payload, legal_moves, stop_early, usage)
+                except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                    status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+                    # Un 404 o un fallo de conexión puede indicar que cambió el servidor
+                    if not self.auto_detect or status not in (None, 404):
+                        raise
+                    self._forget_flavor()
+                    flavor = await self._ensure_flavor()
+                    if not flavor:
+                        raise
+                    text = await self._generate(flavor, payload, legal_moves, stop_early, usage)
+            else:
+                text = await self._generate_probing(payload, legal_moves, stop_early, usage)
+            
+            if text:
+                logger.info(f"Respuesta del LLM local: {text[:100]}...")
+                return text
+            
+            raise RuntimeError(f"El LLM local en {self.endpoint} devolvió una respuesta vacía")
+            
         except Exception as e:
             logger.error(f"Error llamando a LLM local: {e}")
             raise
     
-    def _build_payload(self, prompt: str, **kwargs) -> Dict[str, Any]:
+    async def _generate(
+        self,
+        flavor: str,
+        payload: Dict[str, Any],
+        legal_moves: Optional[list],
+        stop_early: bool,
+        usage: Optional[Dict[str, int]] = None
+    ) -> Optional[str]:
+        """
+        Envía la petición de generación al endpoint del tipo de servidor.
+        El uso de tokens informado por el servidor se vuelca en 'usage'.
+        
+        Returns:
+            Texto generado
+            
+        Raises:
+            httpx.HTTPStatusError: Si el servidor responde con error (incluido 404)
+        """
+        url = f"{self.endpoint}{LOCAL_LLM_FLAVORS[flavor]['generate']}"
+        request_payload = self._adapt_payload(flavor, payload)
+        logger.debug(f"Generando con {url} ({flavor})")
+        
+        if usage is None:
+            usage = {}
+        if self.stream:
+            text = await self._post_streaming(url, request_payload, legal_moves, stop_early, usage)
+        else:
+            response = await self.http.client.post(url, json=request_payload, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            text = self._extract_text(data)
+            merge_usage(usage, extract_usage(data))
+        
+        return text
+    
+    async def _generate_probing(
+        self,
+        payload: Dict[str, Any],
+        legal_moves: Optional[list],
+        stop_early: bool,
+        usage: Optional[Dict[str, int]] = None
+    ) -> Optional[str]:
+        """
+        Último recurso si ningún probe identificó al servidor: prueba los endpoints de
+        generación de cada tipo y recuerda el primero que responde.
+        """
+        last_error = None
+        for name in LOCAL_LLM_FLAVORS:
+            try:
+                text = await self._generate(name, payload, legal_moves, stop_early, usage)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 404:
+                    continue
+                last_error = e
+                break
+            except Exception as e:
+                last_error = e
+                continue
+            
+            if self.auto_detect:
+                self.flavor = name
+                logger.info(f"Servidor LLM local en {self.endpoint} responde como {name}")
+            return text
+        
+        raise RuntimeError(
+            f"No se pudo conectar a LLM local en {self.endpoint}. "
+            f"Endpoints probados: {[f['generate'] for f in LOCAL_LLM_FLAVORS.values()]}. "
+            f"Último error: {last_error}"
+        )
+    
+    async def _post_streaming(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        legal_moves: Optional[list],
+        stop_early: bool,
+        usage: Optional[Dict[str, int]] = None
+    ) -> Optional[str]:
+        """
+        Envía la petición en modo streaming (NDJSON de Ollama o SSE de llama.cpp/OpenAI).
+        El uso informado en los eventos se vuelca en 'usage'.
+        
+        Returns:
+            Texto recibido (parcial si se cortó al detectar la jugada)
+        """
+        async with self.http.client.stream("POST", url, json=payload, timeout=self.timeout) as response:
+            if response.status_code >= 400:
+                await response.aread()
+            response.raise_for_status()
+            return await read_streamed_text(response, legal_moves, stop_early, usage=usage)
+    
+    def _build_payload(self, prompt: str, system: Optional[str] = None, **kwargs) -> Dict[str, Any]:
         """
         Construye el payload según el formato del servidor local.
+        El prefijo de sistema va delante del prompt sin cambios entre peticiones, así el
+        servidor reutiliza la caché KV de ese prefijo.
         
         Args:
             prompt: Prompt construido
+            system: Prefijo estático de instrucciones (opcional)
             **kwargs: Parámetros adicionales
             
         Returns:
             Payload formateado
         """
         payload = {
-            "prompt": prompt,
+            "prompt": f"{system}\n\n{prompt}" if system else prompt,
             "max_tokens": self.config.get("max_tokens", 500),
             "temperature": self.config.get("temperature", 0.3),
-            "stop": self.config.get("stop_sequences", ["\n\n", "Human:", "User:"])
+            "stop": self.config.get("stop_sequences", ["\n\n", "Human:", "User:"]),
+            # Explícito: algunos servidores (Ollama) hacen streaming por defecto
+            "stream": self.stream
         }
         
+        # Restringir la salida a un JSON con una jugada legal
+        legal_moves = kwargs.get("legal_moves")
+        if self.structured_output and legal_moves:
+            explanation = bool(kwargs.get("explanation", False))
+            payload["grammar"] = move_gbnf_grammar(legal_moves, with_explanation=explanation)
+            payload["format"] = move_json_schema(legal_moves, with_explanation=explanation)
+            # Las secuencias de parada por defecto podrían cortar el JSON
+            if "stop_sequences" not in self.config:
+                payload.pop("stop", None)
+        
         # Si hay modelo específico configurado
         if model := self.config.get("model"):
             payload["model"] = model
@@ -208,6 +410,40 @@ class LocalLLMProtocol(ProtocolBase):
         
         return payload
     
+    def _adapt_payload(self, flavor: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Adapta el payload genérico al formato nativo de cada servidor.
+        
+        Args:
+            flavor: Tipo de servidor
+            payload: Payload construido por _build_payload
+            
+        Returns:
+            Nuevo payload con los nombres de parámetros del servidor
+        """
+        adapted = dict(payload)
+        
+        if flavor == "ollama":
+            # Ollama agrupa los parámetros de muestreo en 'options'
+            options = dict(adapted.pop("options", {}))
+            options["num_predict"] = adapted.pop("max_tokens", None)
+            options["temperature"] = adapted.pop("temperature", None)
+            if "stop" in adapted:
+                options["stop"] = adapted.pop("stop")
+            adapted["options"] = {k: v for k, v in options.items() if v is not None}
+            adapted.setdefault("keep_alive", self.keep_alive)
+            adapted.pop("grammar", None)
+        elif flavor == "llamacpp":
+            adapted["n_predict"] = adapted.pop("max_tokens", None)
+            adapted.pop("format", None)
+            # Reutilizar la caché KV del prefijo común entre peticiones
+            adapted.setdefault("cache_prompt", self.config.get("prompt_cache", True))
+        elif flavor in ("openai", "lmstudio"):
+            # JSON schema de Ollama no es válido aquí; llama.cpp en modo OpenAI sí acepta 'grammar'
+            adapted.pop("format", None)
+        
+        return adapted
+    
     def _extract_text(self, data: Dict[str, Any]) -> Optional[str]:
         """
         Extrae el texto generado de la respuesta.
@@ -223,6 +459,10 @@ class LocalLLMProtocol(ProtocolBase):
         if "response" in data:
             return data["response"]
         
+        # llama.cpp /completion format
+        if "content" in data:
+            return data["content"]
+        
         # LM Studio / LocalAI format
         if "text" in data:
             return data["text"]
@@ -246,6 +486,7 @@ class LocalLLMProtocol(ProtocolBase):
         return None
     
     async def cleanup(self) -> None:
-        """LLM local no requiere limpieza especial"""
+        """Libera el cliente HTTP compartido"""
+        await self.http.close()
         self._initialized = False
         logger.debug("LocalLLMProtocol cleanup completado")
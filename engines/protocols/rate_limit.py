@@ -0,0 +1,318 @@
+"""
+Limitador de tasa por proveedor y API key para APIs de LLMs.
+Combina token buckets (peticiones y tokens por minuto), un límite de peticiones
+concurrentes y los tiempos de espera indicados por el servidor (Retry-After y
+cabeceras de rate limit).
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import re
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Concurrencia por defecto si no se configura max_concurrency
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Bloqueo máximo por cabeceras del servidor (un Retry-After erróneo no debe bloquear indefinidamente)
+DEFAULT_MAX_SERVER_WAIT = 120.0
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimación rápida de tokens de un texto (~4 caracteres por token).
+
+    Args:
+        text: Texto a estimar
+
+    Returns:
+        Número aproximado de tokens
+    """
+    return max(1, len(text) // 4) if text else 0
+
+
+class TokenBucket:
+    """Token bucket con recarga continua expresada por minuto"""
+
+    def __init__(self, per_minute: float):
+        """
+        Args:
+            per_minute: Capacidad (y velocidad de recarga) por minuto
+        """
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Segundos hasta que haya 'amount' disponible (0 si ya lo hay)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Consume unidades (puede quedar en negativo al corregir con el uso real)"""
+        self._refill()
+        self.tokens -= amount
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """
+    Parsea duraciones de cabeceras de rate limit.
+    Formatos: '20' (segundos), '1s', '6m0s', '250ms', fecha RFC 3339 o fecha HTTP.
+    """
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        factors = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+        return sum(float(n) * factors[u] for n, u in parts)
+
+    for parser in (lambda v: datetime.fromisoformat(v.replace("Z", "+00:00")), parsedate_to_datetime):
+        try:
+            moment = parser(value)
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=timezone.utc)
+            return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+        except (ValueError, TypeError):
+            continue
+
+    return None
+
+
+class ProviderRateLimiter:
+    """
+    Limitador compartido por todas las peticiones a un proveedor con la misma API key.
+    Las peticiones esperan en orden de llegada (FIFO) hasta tener hueco de concurrencia,
+    cupo de peticiones/tokens por minuto y hasta que venza cualquier bloqueo del servidor.
+    """
+
+    def __init__(self, name: str, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 max_server_wait: float = DEFAULT_MAX_SERVER_WAIT):
+        """
+        Args:
+            name: Identificador para logs (proveedor)
+            rpm: Peticiones por minuto (None = sin límite)
+            tpm: Tokens por minuto (None = sin límite)
+            max_concurrency: Peticiones simultáneas máximas
+            max_server_wait: Segundos máximos de bloqueo por Retry-After o cabeceras de reset
+        """
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max_concurrency
+        self.max_server_wait = float(max_server_wait)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._blocked_until = 0.0
+
+        # Métricas
+        self.in_flight = 0
+        self.waiting = 0
+        self.throttled = 0
+        self.retries = 0
+        self.total_wait = 0.0
+
+    async def acquire(self, tokens: int = 0, timeout: Optional[float] = None) -> None:
+        """
+        Espera turno para una petición.
+
+        Args:
+            tokens: Tokens estimados de la petición (prompt + max_tokens)
+            timeout: Espera máxima en segundos (None = sin límite)
+
+        Raises:
+            asyncio.TimeoutError: Si el cupo o el bloqueo del servidor no se liberan antes de
+                                  'timeout' (se falla de inmediato, sin esperar en vano)
+        """
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+            try:
+                # El lock es FIFO: las peticiones obtienen cupo en orden de llegada
+                async with self._lock:
+                    while True:
+                        delay = max(
+                            self._blocked_until - time.monotonic(),
+                            self.requests.delay_for(1) if self.requests else 0.0,
+                            self.tokens.delay_for(tokens) if self.tokens and tokens else 0.0,
+                        )
+                        if delay <= 0:
+                            break
+                        if deadline is not None and time.monotonic() + delay > deadline:
+                            raise asyncio.TimeoutError(
+                                f"Rate limiter {self.name}: la espera de {delay:.1f}s supera el timeout de {timeout:.0f}s"
+                            )
+                        logger.debug(f"Rate limiter {self.name}: esperando {delay:.2f}s")
+                        await asyncio.sleep(delay)
+
+                    if self.requests:
+                        self.requests.consume(1)
+                    if self.tokens and tokens:
+                        self.tokens.consume(tokens)
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.total_wait += time.monotonic() - started
+
+    def release(self, estimated_tokens: int = 0, actual_tokens: Optional[int] = None) -> None:
+        """
+        Libera el hueco de concurrencia y corrige el cupo de tokens con el uso real.
+
+        Args:
+            estimated_tokens: Tokens reservados en acquire()
+            actual_tokens: Tokens realmente consumidos (si el proveedor los informa)
+        """
+        if self.tokens and actual_tokens is not None:
+            self.tokens.consume(actual_tokens - estimated_tokens)
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0):
+        """Context manager: acquire() al entrar y release() al salir"""
+        await self.acquire(tokens)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def block_for(self, seconds: float) -> None:
+        """Bloquea nuevas peticiones durante 'seconds' (extiende un bloqueo existente)"""
+        until = time.monotonic() + seconds
+        if until > self._blocked_until:
+            self._blocked_until = until
+            logger.info(f"Rate limiter {self.name}: bloqueado {seconds:.1f}s por indicación del servidor")
+
+    def update_from_headers(self, headers: Mapping[str, str], status_code: int) -> Optional[float]:
+        """
+        Aplica Retry-After y cabeceras de rate limit (OpenAI y Anthropic).
+
+        Args:
+            headers: Cabeceras de la respuesta
+            status_code: Código HTTP de la respuesta
+
+        Returns:
+            Segundos de espera indicados por el servidor (None si no indica nada).
+            El bloqueo se limita a max_server_wait, pero se devuelve la espera indicada
+        """
+        wait = None
+
+        if status_code in (429, 503) and (retry_after := headers.get("retry-after")):
+            wait = _parse_duration(retry_after)
+
+        # Cupo agotado: esperar al reset aunque la petición haya ido bien
+        for remaining_key, reset_key in (
+            ("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+            ("x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+            ("anthropic-ratelimit-requests-remaining", "anthropic-ratelimit-requests-reset"),
+            ("anthropic-ratelimit-tokens-remaining", "anthropic-ratelimit-tokens-reset"),
+        ):
+            remaining = headers.get(remaining_key)
+            reset = headers.get(reset_key)
+            if remaining is not None and reset and remaining.strip() == "0":
+                reset_wait = _parse_duration(reset)
+                if reset_wait is not None:
+                    wait = max(wait or 0.0, reset_wait)
+
+        if wait is not None and wait > 0:
+            if wait > self.max_server_wait:
+                logger.warning(
+                    f"Rate limiter {self.name}: el servidor pide esperar {wait:.0f}s, "
+                    f"se limita a {self.max_server_wait:.0f}s"
+                )
+            self.block_for(min(wait, self.max_server_wait))
+        if status_code == 429:
+            self.throttled += 1
+        return wait
+
+    @staticmethod
+    def backoff(retry_count: int, base: float = 1.0, cap: float = 30.0) -> float:
+        """Backoff exponencial con jitter para cuando el servidor no indica espera"""
+        return min(cap, base * (2 ** retry_count)) * random.uniform(0.5, 1.0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado del limitador"""
+        return {
+            "name": self.name,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "blocked_for": round(max(0.0, self._blocked_until - time.monotonic()), 2),
+            "total_wait_seconds": round(self.total_wait, 2),
+            "requests_available": round(self.requests.tokens, 1) if self.requests else None,
+            "tokens_available": round(self.tokens.tokens, 1) if self.tokens else None,
+        }
+
+
+# Limitadores compartidos {(proveedor, hash de api_key): limitador}
+_LIMITERS: Dict[tuple, ProviderRateLimiter] = {}
+
+
+def get_rate_limiter(provider: str, api_key: Optional[str], config: Dict[str, Any]) -> ProviderRateLimiter:
+    """
+    Obtiene el limitador compartido para un proveedor y API key.
+    El primer motor que lo crea fija los límites (sección 'rate_limit' de su configuración).
+
+    Args:
+        provider: Nombre del proveedor
+        api_key: API key (se usa solo su hash como clave)
+        config: Configuración del motor
+
+    Returns:
+        Limitador compartido
+    """
+    key_hash = hashlib.sha256((api_key or "").encode()).hexdigest()[:12]
+    key = (provider, key_hash)
+    limiter = _LIMITERS.get(key)
+
+    if limiter is None:
+        settings = config.get("rate_limit") or {}
+        limiter = ProviderRateLimiter(
+            name=f"{provider}:{key_hash[:6]}",
+            rpm=settings.get("rpm"),
+            tpm=settings.get("tpm"),
+            max_concurrency=int(settings.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)),
+            max_server_wait=float(settings.get("max_server_wait", DEFAULT_MAX_SERVER_WAIT)),
+        )
+        _LIMITERS[key] = limiter
+        logger.info(
+            f"Rate limiter creado para {provider}: rpm={settings.get('rpm')}, tpm={settings.get('tpm')}, "
+            f"max_concurrency={limiter.max_concurrency}"
+        )
+    elif config.get("rate_limit"):
+        logger.debug(f"Rate limiter de {provider} ya existe, se ignora rate_limit de {config.get('name')}")
+
+    return limiter
+
+
+def get_all_rate_limiters() -> Dict[str, Dict[str, Any]]:
+    """Estado de todos los limitadores creados"""
+    return {limiter.name: limiter.get_stats() for limiter in _LIMITERS.values()}
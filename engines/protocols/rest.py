@@ -8,11 +8,7 @@ import httpx
 from typing import Optional, Dict, Any
 from jsonpath import jsonpath
 from .base import ProtocolBase
-
-# Importar módulo de configuración para variables de entorno
-import sys
-from pathlib import Path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from .http_client import HTTPClientHandle
 from config import get_api_key
 
 logger = logging.getLogger(__name__)
@@ -52,6 +48,9 @@ class RESTProtocol(ProtocolBase):
         if not self.url:
             raise ValueError("RESTProtocol requiere 'url' en configuración")
         
+        # Cliente HTTP compartido por host (keep-alive entre peticiones)
+        self.http = HTTPClientHandle(self.url, config)
+        
         self.current_fen: Optional[str] = None
     
     async def check_availability(self) -> bool:
@@ -72,13 +71,12 @@ class RESTProtocol(ProtocolBase):
             try:
                 # Solo verificar si el puerto está abierto/responde
                 # Usar un timeout muy corto para no bloquear
-                async with httpx.AsyncClient(timeout=1.0) as client:
-                    # Intentar un GET a la raíz o health si es posible, sino solo conexión
-                    try:
-                        await client.head(self.url)
-                    except httpx.HTTPStatusError:
-                        # Si responde con error HTTP (ej: 404, 405), el servidor existe
-                        pass
+                # Intentar un HEAD a la URL, solo importa que el servidor responda
+                try:
+                    await self.http.client.head(self.url, timeout=1.0)
+                except httpx.HTTPStatusError:
+                    # Si responde con error HTTP (ej: 404, 405), el servidor existe
+                    pass
                 return True
             except Exception:
                 return False
@@ -90,6 +88,10 @@ class RESTProtocol(ProtocolBase):
             
         return True
 
+    async def warmup(self) -> None:
+        """Abre la conexión con el servicio antes del primer movimiento"""
+        await self.http.warmup()
+    
     async def initialize(self) -> None:
         """REST no requiere inicialización especial"""
         self._initialized = True
@@ -141,50 +143,54 @@ class RESTProtocol(ProtocolBase):
         )
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                # Realizar petición según método
-                if self.method == "GET":
-                    response = await client.get(
-                        self.url,
-                        params=payload,
-                        headers=headers
-                    )
-                elif self.method == "POST":
-                    response = await client.post(
-                        self.url,
-                        json=payload,
-                        headers=headers
-                    )
-                elif self.method == "PUT":
-                    response = await client.put(
-                        self.url,
-                        json=payload,
-                        headers=headers
-                    )
-                else:
-                    raise ValueError(f"Método HTTP no soportado: {self.method}")
-                
-                # Manejo especial de errores 404 (común en APIs de ajedrez)
-                if response.status_code == 404:
-                    try:
-                        error_data = response.json()
-                        error_msg = error_data.get('error', 'Recurso no encontrado')
-                    except:
-                        error_msg = 'Recurso no encontrado'
-                    raise ValueError(f"API Error 404: {error_msg}")
-                
-                # Lanzar excepción para otros errores HTTP
-                response.raise_for_status()
-                
-                # Parsear respuesta
-                data = response.json()
-                
-                # Extraer movimiento
-                move = self._extract_move(data)
-                logger.debug(f"Movimiento extraído de REST: {move}")
-                
-                return move
-                
+            client = self.http.client
+            
+            # Realizar petición según método
+            if self.method == "GET":
+                response = await client.get(
+                    self.url,
+                    params=payload,
+                    headers=headers,
+                    timeout=self.timeout
+                )
+            elif self.method == "POST":
+                response = await client.post(
+                    self.url,
+                    json=payload,
+                    headers=headers,
+                    timeout=self.timeout
+                )
+            elif self.method == "PUT":
+                response = await client.put(
+                    self.url,
+                    json=payload,
+                    headers=headers,
+                    timeout=self.timeout
+                )
+            else:
+                raise ValueError(f"Método HTTP no soportado: {self.method}")
+            
+            # Manejo especial de errores 404 (común en APIs de ajedrez)
+            if response.status_code == 404:
+                try:
+                    error_data = response.json()
+                    error_msg = error_data.get('error', 'Recurso no encontrado')
+                except:
+                    error_msg = 'Recurso no encontrado'
+                raise ValueError(f"API Error 404: {error_msg}")
+            
+            # Lanzar excepción para otros errores HTTP
+            response.raise_for_status()
+            
+            # Parsear respuesta
+            data = response.json()
+            
+            # Extraer movimiento
+            move = self._extract_move(data)
+            logger.debug(f"Movimiento extraído de REST: {move}")
+            
+            return move
+            
         except httpx.HTTPError as e:
             logger.error(f"Error HTTP en RESTProtocol: {e}")
             raise
@@ -268,6 +274,7 @@ class RESTProtocol(ProtocolBase):
         )
     
     async def cleanup(self) -> None:
-        """REST no requiere limpieza de recursos"""
+        """Libera el cliente HTTP compartido"""
+        await self.http.close()
         self._initialized = False
         logger.debug("RESTProtocol cleanup completado")
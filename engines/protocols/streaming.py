@@ -0,0 +1,117 @@
+"""
+Lectura de respuestas en streaming de LLMs.
+Soporta Server-Sent Events (OpenAI, Anthropic, llama.cpp) y NDJSON (Ollama).
+"""
+
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+import httpx
+
+from ..validators import IncrementalMoveParser
+from .usage import extract_usage, merge_usage
+
+logger = logging.getLogger(__name__)
+
+
+async def iter_stream_events(response: httpx.Response) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Itera los eventos JSON de una respuesta en streaming.
+    Acepta líneas SSE ('data: {...}') y líneas NDJSON ('{...}').
+
+    Args:
+        response: Respuesta httpx abierta con client.stream()
+
+    Yields:
+        Cada evento decodificado como diccionario
+    """
+    async for line in response.aiter_lines():
+        line = line.strip()
+        if not line or line.startswith(":") or line.startswith("event:"):
+            continue
+        if line.startswith("data:"):
+            line = line[len("data:"):].strip()
+        if line == "[DONE]":
+            break
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            logger.debug(f"Línea de streaming no JSON ignorada: {line[:100]}")
+            continue
+        if isinstance(event, dict):
+            yield event
+
+
+def extract_stream_delta(event: Dict[str, Any]) -> str:
+    """
+    Extrae el fragmento de texto de un evento de streaming.
+    Soporta formatos OpenAI (chat y completions), Anthropic, Ollama y llama.cpp.
+
+    Args:
+        event: Evento decodificado
+
+    Returns:
+        Texto del fragmento (cadena vacía si el evento no aporta texto)
+    """
+    # Anthropic: content_block_delta con delta.text (o partial_json al usar tools)
+    if event.get("type") == "content_block_delta":
+        delta = event.get("delta", {})
+        return delta.get("text") or delta.get("partial_json") or ""
+
+    # OpenAI y compatibles
+    choices = event.get("choices")
+    if choices:
+        choice = choices[0]
+        delta = choice.get("delta") or {}
+        return delta.get("content") or choice.get("text") or ""
+
+    # Ollama (/api/generate)
+    if "response" in event:
+        return event.get("response") or ""
+
+    # llama.cpp server (/completion)
+    if "content" in event and isinstance(event["content"], str):
+        return event["content"]
+
+    return ""
+
+
+async def read_streamed_text(
+    response: httpx.Response,
+    legal_moves: Optional[list] = None,
+    stop_early: bool = True,
+    extract: Callable[[Dict[str, Any]], str] = extract_stream_delta,
+    usage: Optional[Dict[str, int]] = None
+) -> str:
+    """
+    Acumula el texto de una respuesta en streaming.
+    Si se proporcionan las jugadas legales y stop_early es True, deja de leer
+    en cuanto aparece una jugada legal completa (el llamador cierra el stream).
+
+    Args:
+        response: Respuesta httpx abierta con client.stream()
+        legal_moves: Jugadas legales de la posición (UCI)
+        stop_early: Cortar el stream al detectar la jugada
+        extract: Función que obtiene el texto de cada evento
+        usage: Diccionario donde acumular el uso de tokens informado en los eventos
+
+    Returns:
+        Texto recibido hasta el corte (o completo)
+    """
+    parser = IncrementalMoveParser(legal_moves) if legal_moves else None
+    chunks = []
+
+    async for event in iter_stream_events(response):
+        if usage is not None:
+            merge_usage(usage, extract_usage(event))
+        delta = extract(event)
+        if not delta:
+            continue
+        chunks.append(delta)
+
+        if parser and parser.feed(delta) and stop_early:
+            logger.info(f"Jugada legal detectada en streaming ({parser.move}), cerrando stream")
+            break
+
+    return "".join(chunks)
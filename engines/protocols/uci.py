@@ -7,11 +7,66 @@ import asyncio
 import logging
 import shutil
 import os
-from typing import Optional, Dict, Any
-from .base import ProtocolBase
+from typing import Optional, Dict, Any, List
+from .base import ProtocolBase, SearchPreempted
 
 logger = logging.getLogger(__name__)
 
+# FEN de la posición inicial estándar (se envía como 'startpos')
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# Campos del reloj de partida que se envían en 'go' (milisegundos)
+CLOCK_FIELDS = ("wtime", "btime", "winc", "binc", "movestogo")
+
+# Campos numéricos de las líneas 'info' que se conservan en el análisis
+_INFO_INT_FIELDS = ("depth", "seldepth", "nodes", "nps", "time", "multipv")
+
+
+def parse_info_line(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Parsea una línea 'info' de UCI con datos de búsqueda.
+    
+    Args:
+        line: Línea de la salida del motor (ej: "info depth 12 score cp 34 nodes 1200 pv e2e4 e7e5")
+        
+    Returns:
+        Diccionario con depth, seldepth, nodes, nps, time, score_cp o mate, y pv;
+        None si la línea no es 'info' o no trae puntuación
+    """
+    tokens = line.split()
+    if not tokens or tokens[0] != "info" or "score" not in tokens:
+        return None
+    
+    info: Dict[str, Any] = {}
+    i = 1
+    while i < len(tokens):
+        token = tokens[i]
+        if token in _INFO_INT_FIELDS and i + 1 < len(tokens):
+            try:
+                info[token] = int(tokens[i + 1])
+            except ValueError:
+                pass
+            i += 2
+        elif token == "score" and i + 2 < len(tokens):
+            kind, value = tokens[i + 1], tokens[i + 2]
+            try:
+                info["score_cp" if kind == "cp" else "mate"] = int(value)
+            except ValueError:
+                pass
+            i += 3
+            # lowerbound/upperbound: la puntuación es solo una cota
+            if i < len(tokens) and tokens[i] in ("lowerbound", "upperbound"):
+                info["bound"] = tokens[i]
+                i += 1
+        elif token == "pv":
+            info["pv"] = tokens[i + 1:]
+            break
+        elif token == "string":
+            break
+        else:
+            i += 1
+    return info
+
 
 class UCIProtocol(ProtocolBase):
     """
@@ -33,6 +88,10 @@ class UCIProtocol(ProtocolBase):
         
         self.process: Optional[asyncio.subprocess.Process] = None
         self.current_fen: Optional[str] = None
+        # Búsqueda cancelada cuyo 'bestmove' aún no se ha leído
+        self._stale_search = False
+        # Hay un 'go' enviado cuyo 'bestmove' aún no se ha recibido
+        self._searching = False
     
     async def check_availability(self) -> bool:
         """
@@ -214,33 +273,73 @@ class UCIProtocol(ProtocolBase):
         await self._write(f"position fen {fen}")
         logger.debug(f"Posición enviada: {fen[:50]}...")
     
+    async def send_moves(self, fen: str, moves: List[str], start_fen: Optional[str] = None) -> None:
+        """
+        Envía la posición como 'position startpos moves ...' (o 'position fen <inicial> moves ...').
+        Al analizar una partida jugada a jugada el motor reconoce la continuación y
+        reutiliza su tabla hash.
+        
+        Args:
+            fen: Posición resultante (se reenvía tal cual si el proceso se reinicia)
+            moves: Jugadas en formato UCI desde la posición inicial
+            start_fen: Posición inicial (None = posición inicial estándar)
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        self.current_fen = fen
+        base = "startpos" if start_fen in (None, STARTING_FEN) else f"fen {start_fen}"
+        await self._write(f"position {base} moves {' '.join(moves)}" if moves else f"position {base}")
+        logger.debug(f"Posición enviada como partida: {base} + {len(moves)} jugadas")
+    
     async def request_move(self, depth: Optional[int] = None, **kwargs) -> str:
         """
         Solicita el mejor movimiento al motor UCI.
         
         Args:
             depth: Profundidad de búsqueda
-            **kwargs: Parámetros adicionales (ignorados)
+            **kwargs: Parámetros adicionales. clock ({"wtime", "btime", "winc", "binc"} en
+                     milisegundos) busca con reloj de partida en lugar de search_mode
             
         Returns:
-            Movimiento en formato UCI (ej: "e2e4")
+            Movimiento en formato UCI (ej: "e2e4").
+            Los datos de la última línea 'info' quedan en last_analysis
         """
         if not self._initialized:
             await self.initialize()
+        self.last_analysis = None
         
         # Verificar que el proceso sigue activo
         if not self.process or self.process.returncode is not None:
             logger.warning("Proceso UCI murió, reiniciando...")
+            self.restarts += 1
             await self.initialize()
             if self.current_fen:
                 await self.send_position(self.current_fen)
         
+        # Descartar el bestmove de una búsqueda cancelada antes de lanzar otra
+        if self._stale_search:
+            await self._drain_stale_search()
+        
+        # Interrumpida antes de empezar: ceder la instancia sin buscar
+        if self.preempt_requested:
+            raise SearchPreempted("Búsqueda interrumpida antes de empezar")
+        
         # Determinar modo de búsqueda
         search_mode = self.config.get("search_mode", "depth")
         search_value = depth or self.config.get("default_depth") or self.config.get("default_search_value", 15)
         
+        # Reloj de partida: el motor administra su tiempo; el plazo de lectura cubre el reloj
+        clock = kwargs.get("clock")
+        timeout_seconds = 30.0  # Timeout para obtener bestmove
+        
         # Enviar comando de búsqueda según el modo
-        if search_mode == "nodes":
+        self._searching = True
+        if clock:
+            fields = [f"{key} {max(0, int(clock[key]))}" for key in CLOCK_FIELDS if clock.get(key) is not None]
+            await self._write(f"go {' '.join(fields)}")
+            timeout_seconds = max(timeout_seconds, max(clock.get("wtime", 0), clock.get("btime", 0)) / 1000 + 5)
+        elif search_mode == "nodes":
             await self._write(f"go nodes {search_value}")
         elif search_mode == "time":
             await self._write(f"go movetime {search_value}")
@@ -250,7 +349,6 @@ class UCIProtocol(ProtocolBase):
         # Leer hasta obtener bestmove (con timeout)
         max_iterations = 1000
         iteration = 0
-        timeout_seconds = 30.0  # Timeout para obtener bestmove
         
         while iteration < max_iterations:
             if not self.process or not self.process.stdout:
@@ -264,7 +362,18 @@ class UCIProtocol(ProtocolBase):
                 decoded = line.decode().strip()
                 logger.debug(f"UCIProtocol bestmove lectura: {decoded}")
                 
+                # Conservar el análisis más reciente de la línea principal
+                if decoded.startswith("info"):
+                    info = parse_info_line(decoded)
+                    if info and info.get("multipv", 1) == 1:
+                        info.pop("multipv", None)
+                        self.last_analysis = info
+                
                 if decoded.startswith("bestmove"):
+                    self._searching = False
+                    if self.preempt_requested:
+                        # 'stop' enviado por preempt(): el resultado es parcial, se descarta
+                        raise SearchPreempted("Búsqueda interrumpida por una petición más prioritaria")
                     parts = decoded.split()
                     if len(parts) >= 2:
                         move = parts[1]
@@ -274,15 +383,70 @@ class UCIProtocol(ProtocolBase):
                         raise ValueError(f"Formato de bestmove inválido: {decoded}")
                 
                 iteration += 1
+            except asyncio.CancelledError:
+                # Petición cancelada (p. ej. plazo de /compare): detener la búsqueda
+                # y dejar pendiente la lectura de su bestmove
+                self._stop_search()
+                raise
             except asyncio.TimeoutError:
                 logger.error(f"Timeout esperando bestmove después de {timeout_seconds}s")
+                self._stop_search()
                 raise RuntimeError(f"Timeout esperando bestmove del motor UCI (más de {timeout_seconds}s)")
+            except SearchPreempted:
+                raise
             except Exception as e:
                 logger.error(f"Error leyendo bestmove: {e}")
                 raise
-        
+
+        # El motor sigue buscando: detenerlo como en el timeout para que su bestmove
+        # no se lea como respuesta de la siguiente petición
+        logger.error(f"No se recibió bestmove después de {max_iterations} líneas")
+        self._stop_search()
         raise RuntimeError(f"No se recibió bestmove después de {max_iterations} iteraciones")
     
+    def preempt(self) -> bool:
+        """
+        Interrumpe la búsqueda en curso con 'stop' (o la siguiente, si aún no ha empezado).
+        request_move lee el bestmove parcial, lo descarta y lanza SearchPreempted.
+        """
+        self.preempt_requested = True
+        if self._searching:
+            self._write_stop()
+        return True
+    
+    def _stop_search(self) -> None:
+        """
+        Envía 'stop' sin esperar (se puede llamar durante una cancelación).
+        El bestmove resultante se descarta en la siguiente petición.
+        """
+        self._searching = False
+        if self._write_stop():
+            self._stale_search = True
+    
+    def _write_stop(self) -> bool:
+        """Escribe 'stop' sin esperar al drain. Returns True si se pudo enviar"""
+        if self.process and self.process.stdin and self.process.returncode is None:
+            try:
+                self.process.stdin.write(b"stop\n")
+                return True
+            except Exception as e:
+                logger.debug(f"No se pudo enviar stop al motor UCI: {e}")
+        return False
+    
+    async def _drain_stale_search(self, timeout: float = 5.0) -> None:
+        """Lee y descarta la salida de una búsqueda detenida hasta su 'bestmove'"""
+        self._stale_search = False
+        try:
+            await self._read_until("bestmove", timeout=timeout)
+            logger.debug("Descartado bestmove de búsqueda cancelada")
+        except RuntimeError:
+            # El motor no respondió a 'stop': reiniciar el proceso
+            logger.warning("El motor UCI no respondió a stop, reiniciando proceso")
+            await self.cleanup()
+            await self.initialize()
+            if self.current_fen:
+                await self.send_position(self.current_fen)
+    
     async def _write(self, command: str) -> None:
         """
         Escribe un comando al proceso UCI.
@@ -355,3 +519,4 @@ class UCIProtocol(ProtocolBase):
             finally:
                 self.process = None
                 self._initialized = False
+                self._searching = False
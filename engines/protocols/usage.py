@@ -0,0 +1,84 @@
+"""
+Extracción del uso de tokens informado por los proveedores de LLMs.
+Normaliza los distintos formatos a {"prompt_tokens", "completion_tokens", "cached_tokens"}.
+"""
+
+from typing import Any, Dict, Optional
+
+
+def extract_usage(data: Dict[str, Any]) -> Optional[Dict[str, int]]:
+    """
+    Extrae el uso de tokens de una respuesta (o de un evento de streaming).
+    Soporta OpenAI y compatibles, Anthropic, Google, Ollama y llama.cpp.
+
+    Args:
+        data: Respuesta JSON o evento decodificado
+
+    Returns:
+        Diccionario normalizado o None si la respuesta no informa uso
+    """
+    if not isinstance(data, dict):
+        return None
+
+    # Anthropic en streaming: message_start lleva el uso dentro de 'message'
+    usage = data.get("usage")
+    if usage is None and isinstance(data.get("message"), dict):
+        usage = data["message"].get("usage")
+
+    if isinstance(usage, dict):
+        # OpenAI y compatibles
+        if "prompt_tokens" in usage or "completion_tokens" in usage:
+            details = usage.get("prompt_tokens_details") or {}
+            return {
+                "prompt_tokens": int(usage.get("prompt_tokens") or 0),
+                "completion_tokens": int(usage.get("completion_tokens") or 0),
+                "cached_tokens": int(details.get("cached_tokens") or 0),
+            }
+        # Anthropic: input_tokens excluye lo leído/escrito en caché
+        if "input_tokens" in usage or "output_tokens" in usage:
+            cached = int(usage.get("cache_read_input_tokens") or 0)
+            created = int(usage.get("cache_creation_input_tokens") or 0)
+            return {
+                "prompt_tokens": int(usage.get("input_tokens") or 0) + cached + created,
+                "completion_tokens": int(usage.get("output_tokens") or 0),
+                "cached_tokens": cached,
+            }
+
+    # Google (Gemini)
+    metadata = data.get("usageMetadata")
+    if isinstance(metadata, dict):
+        return {
+            "prompt_tokens": int(metadata.get("promptTokenCount") or 0),
+            "completion_tokens": int(metadata.get("candidatesTokenCount") or 0),
+            "cached_tokens": int(metadata.get("cachedContentTokenCount") or 0),
+        }
+
+    # Ollama (solo en la respuesta final)
+    if "prompt_eval_count" in data or "eval_count" in data:
+        return {
+            "prompt_tokens": int(data.get("prompt_eval_count") or 0),
+            "completion_tokens": int(data.get("eval_count") or 0),
+            "cached_tokens": 0,
+        }
+
+    # llama.cpp server
+    if "tokens_evaluated" in data or "tokens_predicted" in data:
+        return {
+            "prompt_tokens": int(data.get("tokens_evaluated") or 0),
+            "completion_tokens": int(data.get("tokens_predicted") or 0),
+            "cached_tokens": int(data.get("tokens_cached") or 0),
+        }
+
+    return None
+
+
+def merge_usage(target: Dict[str, int], update: Optional[Dict[str, int]]) -> None:
+    """
+    Combina el uso de varios eventos de streaming en 'target' (in-place).
+    Se queda con el máximo de cada campo: los proveedores envían valores acumulados.
+    """
+    if not update:
+        return
+    for key, value in update.items():
+        if value > target.get(key, 0):
+            target[key] = value
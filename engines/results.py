@@ -0,0 +1,79 @@
+"""
+Resultado de una petición de movimiento.
+Cada llamada a get_move devuelve su propio MoveResult (jugada, explicación, análisis,
+tiempos y origen), de modo que peticiones concurrentes al mismo motor no comparten estado.
+"""
+
+from typing import Any, Dict, Optional
+
+# Orígenes posibles de la jugada
+MOVE_SOURCES = ("engine", "hedge", "cache", "book", "tablebase")
+
+
+class MoveResult:
+    """Jugada sugerida por un motor junto con los datos de esa petición concreta"""
+
+    def __init__(
+        self,
+        move: str,
+        engine: str,
+        explanation: Optional[str] = None,
+        analysis: Optional[Dict[str, Any]] = None,
+        timings: Optional[Dict[str, float]] = None,
+        source: str = "engine",
+        usage: Optional[Dict[str, int]] = None
+    ):
+        """
+        Args:
+            move: Jugada en formato UCI (ej: "e2e4")
+            engine: Motor que produjo la jugada (el secundario si ganó el hedge)
+            explanation: Explicación de la jugada (solo motores generativos, si se pidió)
+            analysis: Datos de la búsqueda (score_cp, mate, depth, nodes, nps, pv) si el motor los da
+            timings: Desglose de tiempos en milisegundos (total_ms, search_ms, ...)
+            source: Origen de la jugada (ver MOVE_SOURCES)
+            usage: Tokens de la petición (motores generativos)
+        """
+        if source not in MOVE_SOURCES:
+            raise ValueError(f"Origen de jugada desconocido: {source}. Válidos: {', '.join(MOVE_SOURCES)}")
+        self.move = move
+        self.engine = engine
+        self.explanation = explanation
+        self.analysis = analysis
+        self.timings = timings or {}
+        self.source = source
+        self.usage = usage
+
+    def add_timing(self, key: str, seconds: float) -> None:
+        """Registra un tiempo (en segundos) en el desglose, en milisegundos"""
+        self.timings[key] = round(seconds * 1000, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación serializable (para respuestas de la API)"""
+        return {
+            "move": self.move,
+            "engine": self.engine,
+            "explanation": self.explanation,
+            "analysis": self.analysis,
+            "timings": self.timings,
+            "source": self.source,
+            "usage": self.usage,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MoveResult":
+        """Reconstruye el resultado a partir de to_dict() (p. ej. recibido del broker de motores)"""
+        return cls(
+            data["move"],
+            data["engine"],
+            explanation=data.get("explanation"),
+            analysis=data.get("analysis"),
+            timings=data.get("timings"),
+            source=data.get("source", "engine"),
+            usage=data.get("usage"),
+        )
+
+    def __str__(self) -> str:
+        return self.move
+
+    def __repr__(self) -> str:
+        return f"MoveResult(move='{self.move}', engine='{self.engine}', source={self.source})"
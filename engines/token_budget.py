@@ -0,0 +1,78 @@
+"""
+Contabilidad de tokens y presupuesto de prompt para motores generativos.
+Registra los tokens de cada petición (los informados por el proveedor o, si no los hay,
+estimados localmente) y define los niveles de compactación del prompt.
+"""
+
+from typing import Any, Dict, Optional
+
+# Niveles de compactación: secciones del template que se mantienen en cada nivel.
+# Se aplican en orden hasta que el prompt cabe en 'prompt_budget'; primero se quitan
+# las secciones de menor valor (catálogo de estrategias, principios genéricos).
+COMPACT_LEVELS = (
+    {"show_strategy_catalog": True, "show_principles": True, "show_move_categories": True},
+    {"show_strategy_catalog": False, "show_principles": True, "show_move_categories": True},
+    {"show_strategy_catalog": False, "show_principles": False, "show_move_categories": True},
+    {"show_strategy_catalog": False, "show_principles": False, "show_move_categories": False},
+)
+
+
+class TokenUsageStats:
+    """Acumulado de tokens de un motor generativo"""
+
+    def __init__(self):
+        self.requests = 0
+        self.estimated_requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.compacted_requests = 0
+        self.last: Optional[Dict[str, Any]] = None
+
+    def record(
+        self,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int = 0,
+        estimated: bool = False,
+        compact_level: int = 0
+    ) -> None:
+        """
+        Registra el uso de una petición.
+
+        Args:
+            prompt_tokens: Tokens de entrada (incluye el prefijo de sistema)
+            completion_tokens: Tokens generados
+            cached_tokens: Tokens de entrada servidos desde la caché del proveedor
+            estimated: True si los valores son estimaciones locales
+            compact_level: Nivel de compactación usado (0 = prompt completo)
+        """
+        self.requests += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cached_tokens += cached_tokens
+        if estimated:
+            self.estimated_requests += 1
+        if compact_level:
+            self.compacted_requests += 1
+        self.last = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+            "source": "estimated" if estimated else "provider",
+            "compact_level": compact_level,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas acumuladas (para /engines/tokens)"""
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "avg_prompt_tokens": round(self.prompt_tokens / self.requests, 1) if self.requests else 0.0,
+            "avg_completion_tokens": round(self.completion_tokens / self.requests, 1) if self.requests else 0.0,
+            "estimated_requests": self.estimated_requests,
+            "compacted_requests": self.compacted_requests,
+            "last": self.last,
+        }
@@ -5,14 +5,20 @@ Refactorizado para usar protocolos de comunicación mediante composición.
 """
 
 import logging
+import time
 from typing import Any, Dict, Optional
 
 from .base import MotorBase, MotorType, MotorOrigin, ValidationMode
-from .protocols import UCIProtocol, RESTProtocol
+from .results import MoveResult
+from .pool import ProtocolPool, DEFAULT_PRIORITY, MAX_PREEMPTIONS, PREEMPTIBLE_PRIORITIES
+from .protocols import SearchPreempted, UCIProtocol, RESTProtocol
 from .validators import SchemaValidator
 
 logger = logging.getLogger(__name__)
 
+# Tamaño del pool de protocolos por defecto
+DEFAULT_POOL_SIZE = {"uci": 1, "rest": 4}
+
 
 class TraditionalEngine(MotorBase):
     """
@@ -57,6 +63,12 @@ class TraditionalEngine(MotorBase):
             self.protocol = RESTProtocol(config)
             logger.info(f"Motor tradicional {name} usando RESTProtocol")
         
+        # Instancias adicionales para peticiones en paralelo: procesos UCI (pool_size, default: 1)
+        # o protocolos REST que comparten el cliente HTTP del host (default: 4)
+        protocol_class = type(self.protocol)
+        pool_size = config.get("pool_size", DEFAULT_POOL_SIZE[protocol_type])
+        self.pool = ProtocolPool(lambda: protocol_class(config), size=pool_size, primary=self.protocol)
+        
         self.validator = SchemaValidator()
     
     async def _check_availability(self) -> bool:
@@ -67,33 +79,70 @@ class TraditionalEngine(MotorBase):
         """Inicializa el protocolo de comunicación"""
         await self.protocol.initialize()
     
-    async def get_move(self, board_state: str, depth: Optional[int] = None, **kwargs) -> str:
+    async def get_move(self, board_state: str, depth: Optional[int] = None, **kwargs) -> MoveResult:
         """
         Obtiene el mejor movimiento delegando al protocolo.
         
         Args:
             board_state: Posición en formato FEN
             depth: Profundidad de búsqueda
-            **kwargs: Parámetros adicionales
+            **kwargs: Parámetros adicionales. position_moves (jugadas UCI desde start_fen)
+                     envía la posición como partida para que el motor conserve su estado;
+                     priority (interactive, compare, batch, background) ordena la espera
+                     de instancia y las de baja prioridad ceden su búsqueda a las demás;
+                     affinity (p. ej. id de sesión) vuelve a la instancia de la petición anterior;
+                     clock (reloj de partida, ver UCIProtocol.request_move) pasa al protocolo
             
         Returns:
-            Mejor movimiento en formato UCI
+            MoveResult con el mejor movimiento en formato UCI, el análisis de la búsqueda
+            (si el protocolo lo da) y el desglose de tiempos
         """
+        started = time.perf_counter()
+        position_moves = kwargs.pop("position_moves", None)
+        start_fen = kwargs.pop("start_fen", None)
+        priority = kwargs.pop("priority", DEFAULT_PRIORITY)
+        affinity = kwargs.pop("affinity", None)
+        
         # Asegurar inicialización
         await self.initialize()
         
-        # Enviar posición al protocolo
-        await self.protocol.send_position(board_state)
-        
-        # Solicitar movimiento
-        move = await self.protocol.request_move(depth, **kwargs)
+        preemptions = 0
+        while True:
+            # Tomar una instancia libre del pool (espera por prioridad si todas están ocupadas)
+            preemptible = priority in PREEMPTIBLE_PRIORITIES and preemptions < MAX_PREEMPTIONS
+            async with self.pool.lease(priority, preemptible, affinity) as protocol:
+                leased = time.perf_counter()
+                # Enviar posición al protocolo (como partida si se conocen las jugadas)
+                if position_moves is not None:
+                    await protocol.send_moves(board_state, position_moves, start_fen)
+                else:
+                    await protocol.send_position(board_state)
+                searching = time.perf_counter()
+                
+                # Solicitar movimiento
+                try:
+                    move = await protocol.request_move(depth, **kwargs)
+                except SearchPreempted:
+                    # Cedida a una petición más prioritaria: volver a la cola y repetir la búsqueda
+                    preemptions += 1
+                    logger.info(f"Motor tradicional {self.name}: búsqueda {priority} interrumpida ({preemptions}), se reencola")
+                    continue
+                analysis = protocol.last_analysis
+                finished = time.perf_counter()
+            break
         
         # Validar movimiento
         if not await self.validate_response(move):
             raise ValueError(f"Motor {self.name} retornó movimiento inválido: {move}")
         
         logger.info(f"Motor tradicional {self.name} sugiere: {move}")
-        return move
+        result = MoveResult(move, self.name, analysis=analysis)
+        result.add_timing("queue_ms", leased - started)
+        result.add_timing("setup_ms", searching - leased)
+        result.add_timing("search_ms", finished - searching)
+        result.add_timing("total_ms", finished - started)
+        self.metrics.observe(result)
+        return result
     
     async def validate_response(self, response: Any) -> bool:
         """
@@ -109,6 +158,22 @@ class TraditionalEngine(MotorBase):
             return False
         return self.validator.validate_uci_move(response)
     
+    @property
+    def max_parallel(self) -> int:
+        """Una petición por instancia del pool"""
+        return self.pool.size
+    
+    @property
+    def in_flight(self) -> int:
+        """Incluye las búsquedas que toman instancia sin pasar por la admisión (p. ej. /analyze/game)"""
+        return max(super().in_flight, self.pool.in_use + self.pool.waiting)
+    
+    def get_info(self) -> Dict[str, Any]:
+        """Información del motor, incluyendo el estado del pool de protocolos"""
+        info = super().get_info()
+        info["pool"] = self.pool.get_stats()
+        return info
+    
     async def _do_cleanup(self):
-        """Limpia recursos del protocolo"""
-        await self.protocol.cleanup()
+        """Limpia recursos de todas las instancias del protocolo"""
+        await self.pool.cleanup()
@@ -4,10 +4,13 @@ Implementa el patrón Decorator para añadir validación.
 """
 
 import re
+import json
 import logging
-from typing import Any, Optional
+from typing import Any, Dict, Iterable, Optional
 import chess
 
+from .positions import parse_fen
+
 logger = logging.getLogger(__name__)
 
 
@@ -56,7 +59,7 @@ class SchemaValidator:
             True si la jugada es legal
         """
         try:
-            board = chess.Board(fen)
+            board = parse_fen(fen)
             chess_move = chess.Move.from_uci(move)
             is_legal = chess_move in board.legal_moves
             
@@ -221,6 +224,115 @@ class PromptValidator:
         
         logger.warning(f"No se encontró ningún movimiento válido en: {text[:200]}")
         return None
+    
+    @staticmethod
+    def parse_structured(text: str) -> Optional[Dict[str, Any]]:
+        """
+        Parsea una respuesta estructurada {"move": "...", "explanation": "..."}.
+        Tolera bloques de código markdown y texto alrededor del objeto JSON.
+        
+        Args:
+            text: Respuesta del LLM generada con structured output
+            
+        Returns:
+            Diccionario con al menos 'move' o None si no es JSON válido
+        """
+        if not isinstance(text, str) or not text.strip():
+            return None
+        
+        candidates = [text.strip()]
+        # Objeto JSON embebido en texto o en bloque ```json
+        embedded = re.search(r'\{.*\}', text, re.DOTALL)
+        if embedded:
+            candidates.append(embedded.group(0))
+        
+        for candidate in candidates:
+            try:
+                data = json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, dict) and isinstance(data.get("move"), str):
+                return data
+        
+        logger.debug(f"Respuesta no estructurada: {text[:200]}")
+        return None
+    
+    @staticmethod
+    def validate_structured(text: str, fen: str) -> Optional[str]:
+        """
+        Extrae la jugada de una respuesta estructurada y verifica su legalidad.
+        
+        Args:
+            text: Respuesta JSON del LLM
+            fen: Posición del tablero en formato FEN
+            
+        Returns:
+            Jugada legal en formato UCI o None
+        """
+        data = PromptValidator.parse_structured(text)
+        if not data:
+            return None
+        
+        move = data["move"].strip().lower()
+        if SchemaValidator.validate_uci_move(move) and SchemaValidator.validate_move_legal(move, fen):
+            logger.info(f"Jugada estructurada válida y legal: {move}")
+            return move
+        return None
+
+
+class IncrementalMoveParser:
+    """
+    Extrae la primera jugada legal de un texto que llega por fragmentos (streaming).
+    Aplica el mismo criterio que PromptValidator.validate_and_extract (primera jugada
+    UCI legal del texto) pero sin esperar a la respuesta completa.
+    """
+    
+    UCI_TOKEN = re.compile(r'\b([a-h][1-8][a-h][1-8][qrbn]?)\b', re.IGNORECASE)
+    
+    def __init__(self, legal_moves: Iterable[str]):
+        """
+        Args:
+            legal_moves: Jugadas legales de la posición en formato UCI
+        """
+        self.legal_moves = {move.lower() for move in legal_moves}
+        self.text = ""
+        self.move: Optional[str] = None
+        self._scan_from = 0
+    
+    def feed(self, chunk: str) -> Optional[str]:
+        """
+        Añade un fragmento de texto y busca una jugada legal completa.
+        
+        Args:
+            chunk: Nuevo fragmento recibido
+            
+        Returns:
+            Jugada legal encontrada o None si aún no hay ninguna
+        """
+        if chunk:
+            self.text += chunk
+        return self._scan(final=False)
+    
+    def finish(self) -> Optional[str]:
+        """Busca en el texto completo, aceptando también una jugada al final del texto"""
+        return self._scan(final=True)
+    
+    def _scan(self, final: bool) -> Optional[str]:
+        if self.move:
+            return self.move
+        
+        for match in self.UCI_TOKEN.finditer(self.text, self._scan_from):
+            # Un token al final del texto puede continuar (ej: e7e8 -> e7e8q)
+            if not final and match.end() == len(self.text):
+                break
+            candidate = match.group(1).lower()
+            if candidate in self.legal_moves:
+                self.move = candidate
+                logger.debug(f"Jugada legal detectada en streaming tras {len(self.text)} caracteres: {candidate}")
+                return candidate
+            self._scan_from = match.end()
+        
+        return None
 
 
 class ValidatorFactory:
@@ -2,7 +2,7 @@ import { useState, useRef, useCallback, useMemo } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Chess } from 'chess.js';
 import { Chessboard } from 'react-chessboard';
-import { compareEngines } from './api';
+import { compareEnginesStream } from './api';
 
 /**
  * Página de Comparación de Motores
@@ -217,22 +217,37 @@ function ComparePage() {
     setComparisonResults(null);
 
     try {
-      const results = await compareEngines(position, depth);
-
-      // Validar respuesta
-      if (!results || typeof results !== 'object') {
-        throw new Error('Respuesta inválida del servidor');
-      }
+      // Los resultados llegan por motor según terminan: se pintan de forma progresiva
+      const summary = await compareEnginesStream(position, depth, (event) => {
+        if (event.type === 'start') {
+          setComparisonResults({
+            fen: event.fen,
+            engines_compared: event.engines.length,
+            results: event.engines.map(engine => ({
+              engine,
+              bestmove: null,
+              explanation: null,
+              pending: true
+            }))
+          });
+        } else if (event.type === 'result') {
+          setComparisonResults(prev => prev && {
+            ...prev,
+            results: prev.results.map(result =>
+              result.engine === event.engine ? { ...event, pending: false } : result
+            )
+          });
+        } else if (event.type === 'summary') {
+          setComparisonResults(prev => prev && { ...prev, summary: event });
+        }
+      });
 
-      if (!results.results) {
-        throw new Error('La respuesta no contiene resultados');
+      if (!summary) {
+        throw new Error('La comparación terminó sin resumen');
       }
-
-      setComparisonResults(results);
     } catch (err) {
       console.error('Error en handleCompare:', err);
       setError(err.message || 'Error desconocido al comparar motores');
-      setComparisonResults(null);
     } finally {
       setIsComparing(false);
     }
@@ -279,7 +294,9 @@ function ComparePage() {
     // Procesar resultados: identificar errores y disponibilidad
     const processedResults = resultsArray.map(result => ({
       ...result,
+      isPending: Boolean(result.pending),
       isError: result.bestmove && result.bestmove.toString().startsWith('ERROR:'),
+      isTimeout: result.status === 'timeout' || result.bestmove === 'TIMEOUT',
       isUnavailable: result.bestmove === 'NO DISPONIBLE'
     }));
 
@@ -458,6 +475,12 @@ function ComparePage() {
                 }}>
                   <div className="history-title glow" style={{ margin: 0 }}>
                     ▼ RESULTADOS ({comparisonResults.engines_compared} motores)
+                    {comparisonResults.summary && (
+                      <span style={{ fontSize: '16px', color: '#ccc', marginLeft: '10px' }}>
+                        {(comparisonResults.summary.elapsed_ms / 1000).toFixed(1)}s
+                        {comparisonResults.summary.timeouts > 0 && ` · ${comparisonResults.summary.timeouts} TIMEOUT`}
+                      </span>
+                    )}
                   </div>
                   <div style={{ width: '200px', minWidth: '150px' }}>
                     <input
@@ -502,10 +525,10 @@ function ComparePage() {
                               borderBottom: '1px solid rgba(36, 163, 42, 0.3)',
                               backgroundColor: result.isError
                                 ? 'rgba(255, 0, 0, 0.1)'
-                                : result.isUnavailable
+                                : result.isUnavailable || result.isTimeout
                                   ? 'rgba(128, 128, 128, 0.1)'
                                   : 'transparent',
-                              opacity: result.isUnavailable ? 0.6 : 1
+                              opacity: result.isUnavailable || result.isPending ? 0.6 : 1
                             }}
                           >
                             <td style={{
@@ -517,10 +540,19 @@ function ComparePage() {
                             </td>
                             <td style={{
                               padding: '10px',
-                              color: result.isError ? '#ff4444' : result.isUnavailable ? '#aaa' : '#fff',
+                              color: result.isError ? '#ff4444' : result.isUnavailable || result.isTimeout ? '#aaa' : '#fff',
                               verticalAlign: 'top'
                             }}>
-                              {result.bestmove || 'N/A'}
+                              {result.isPending ? (
+                                <span className="blink">...</span>
+                              ) : (
+                                result.bestmove || 'N/A'
+                              )}
+                              {result.elapsed_ms > 0 && (
+                                <div style={{ fontSize: '14px', color: '#aaa' }}>
+                                  {(result.elapsed_ms / 1000).toFixed(2)}s
+                                </div>
+                              )}
                             </td>
                             <td style={{
                               padding: '10px',
@@ -540,6 +572,14 @@ function ComparePage() {
                                 <span style={{ color: '#aaa', fontStyle: 'italic' }}>
                                   Motor no disponible o mal configurado.
                                 </span>
+                              ) : result.isPending ? (
+                                <span style={{ color: '#aaa', fontStyle: 'italic' }}>
+                                  Analizando...
+                                </span>
+                              ) : result.isTimeout ? (
+                                <span style={{ color: '#aaa', fontStyle: 'italic' }}>
+                                  El motor no respondió dentro del plazo.
+                                </span>
                               ) : (
                                 'Análisis completado (sin explicación textual).'
                               )}
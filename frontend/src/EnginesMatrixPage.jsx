@@ -1,12 +1,22 @@
 import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { fetchEnginesMatrix } from './api';
+import { fetchEnginesMatrix, fetchEnginesInfo } from './api';
+
+// Intervalo de refresco de la latencia y la carga de los motores (ms)
+const LOAD_REFRESH_MS = 3000;
+
+const formatMs = (ms) => {
+  if (ms === null || ms === undefined) return '—';
+  return ms >= 1000 ? `${(ms / 1000).toFixed(1)}s` : `${Math.round(ms)}ms`;
+};
 
 function EnginesMatrixPage() {
   const navigate = useNavigate();
   const [matrix, setMatrix] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState(null);
+  // Latencia y carga en vivo por motor (nombre -> {latency, admission})
+  const [load, setLoad] = useState({});
 
   useEffect(() => {
     fetchEnginesMatrix()
@@ -20,6 +30,35 @@ function EnginesMatrixPage() {
       });
   }, []);
 
+  useEffect(() => {
+    let cancelled = false;
+    const refresh = () => {
+      fetchEnginesInfo()
+        .then(data => {
+          if (cancelled || !data || !Array.isArray(data.engines)) return;
+          const byName = {};
+          data.engines.forEach(engine => {
+            byName[engine.name] = { latency: engine.latency, admission: engine.admission };
+          });
+          setLoad(byName);
+        })
+        .catch(err => console.warn('⚠️ No se pudo refrescar la carga de los motores:', err));
+    };
+    refresh();
+    const timer = setInterval(refresh, LOAD_REFRESH_MS);
+    return () => {
+      cancelled = true;
+      clearInterval(timer);
+    };
+  }, []);
+
+  const getLatencyColor = (ms) => {
+    if (ms === null || ms === undefined) return '#888';
+    if (ms < 500) return '#4ae2a0';
+    if (ms < 3000) return '#e2a04a';
+    return '#ff4444';
+  };
+
   const getTypeColor = (type) => {
     switch(type) {
       case 'traditional': return '#4a90e2';
@@ -104,6 +143,8 @@ function EnginesMatrixPage() {
                           <th>TIPO</th>
                           <th>ORIGEN</th>
                           <th>VALIDACIÓN</th>
+                          <th>LATENCIA p50 / p95</th>
+                          <th>EN CURSO</th>
                         </tr>
                       </thead>
                       <tbody>
@@ -121,6 +162,17 @@ function EnginesMatrixPage() {
                             <td style={{ color: '#aaa' }}>
                               {row.validation_mode}
                             </td>
+                            <td
+                              style={{ color: getLatencyColor(load[row.name]?.latency?.p95_ms) }}
+                              title={`${load[row.name]?.latency?.count ?? 0} jugadas calculadas`}
+                            >
+                              {formatMs(load[row.name]?.latency?.p50_ms)} / {formatMs(load[row.name]?.latency?.p95_ms)}
+                            </td>
+                            <td style={{ color: '#aaa' }}>
+                              {load[row.name]?.admission
+                                ? `${load[row.name].admission.in_flight} (${load[row.name].admission.queued} en cola)`
+                                : '—'}
+                            </td>
                           </tr>
                         ))}
                       </tbody>
@@ -2,7 +2,7 @@ import React, { useEffect, useState, useRef, useCallback, useMemo } from 'react'
 import { useLocation } from 'react-router-dom';
 import { Chess } from 'chess.js';
 import { Chessboard } from 'react-chessboard';
-import { fetchBestMove, fetchStrategies, fetchEnginesInfo } from './api';
+import { fetchBestMove, fetchStrategies, fetchEnginesInfo, openGameSession, createMatch, watchMatch, stopMatch } from './api';
 import CustomSelect from './CustomSelect';
 
 function GamePage() {
@@ -19,6 +19,11 @@ function GamePage() {
   const [selectedStrategy, setSelectedStrategy] = useState(null);
   const [boardSize, setBoardSize] = useState(600);
   const [enginesInfo, setEnginesInfo] = useState({});
+  // Sesión WebSocket: el servidor guarda la partida y envía las jugadas de los motores.
+  // Si no se puede abrir, se usa POST /move con la FEN y el historial en cada jugada
+  const sessionRef = useRef(null);
+  // El servidor juega los turnos de los motores (sesión abriéndose o partida motor contra motor)
+  const serverGameRef = useRef(false);
   
   // Determinar si el motor actual es generativo
   const isCurrentEngineGenerative = useMemo(() => {
@@ -139,6 +144,11 @@ function GamePage() {
   useEffect(() => {
     const game = gameRef.current;
     
+    // Con sesión WebSocket el servidor juega los turnos de los motores
+    if (sessionRef.current || serverGameRef.current) {
+      return;
+    }
+    
     // No hacer nada si el juego terminó o está procesando
     if (game.isGameOver() || isProcessing) {
       return;
@@ -162,7 +172,9 @@ function GamePage() {
       console.log(`Es turno del motor: ${currentPlayer}`);
       // Pequeño delay para evitar problemas de estado
       const timeoutId = setTimeout(() => {
-        makeEngineMove(currentPlayer);
+        if (!sessionRef.current && !serverGameRef.current) {
+          makeEngineMove(currentPlayer);
+        }
       }, 200);
       
       return () => clearTimeout(timeoutId);
@@ -236,14 +248,167 @@ function GamePage() {
     console.log("Motor B seleccionado:", selectedEngineB);
     updateStatus();
     
-    // Si el primer turno es de un motor, hacer que juegue
-    const firstPlayer = getCurrentPlayer();
-    if (firstPlayer) {
-      setTimeout(() => {
+    // Partida humano contra humano: no hace falta sesión
+    const isEngine = (engine) => engine && engine !== 'human';
+    if (!isEngine(selectedEngineA) && !isEngine(selectedEngineB)) {
+      return;
+    }
+    
+    let closed = false;
+    let retryTimeout = null;
+    serverGameRef.current = true;
+    
+    // Sin sesión ni partida en el servidor: el navegador pide cada jugada con POST /move
+    const fallbackToHttp = (error) => {
+      console.warn('⚠️ Partida en el servidor no disponible, se usa POST /move:', error);
+      serverGameRef.current = false;
+      if (closed) return;
+      // Si el primer turno es de un motor, hacer que juegue
+      const firstPlayer = getCurrentPlayer();
+      if (firstPlayer) {
         makeEngineMove(firstPlayer);
-      }, 500);
+      }
+    };
+    
+    // Motor contra motor: el servidor juega la partida completa y la retransmite
+    if (isEngine(selectedEngineA) && isEngine(selectedEngineB)) {
+      const controller = new AbortController();
+      let matchId = null;
+      
+      const handleMatchEvent = (event) => {
+        if (closed) return;
+        if (event.type === 'move') {
+          try {
+            gameRef.current.move(event.move);
+            lastMoveWasEngineRef.current = true;
+            setPosition(gameRef.current.fen());
+            updateStatus();
+          } catch (error) {
+            console.error("Error al aplicar movimiento del motor:", error);
+            setStatus(`Error: No se pudo aplicar el movimiento ${event.move}. ${error.message}`);
+          }
+        } else if (event.type === 'end') {
+          matchId = null;
+          setIsProcessing(false);
+          setStatus(`Fin de la partida: ${event.result} (${event.termination})`);
+        }
+      };
+      
+      setIsProcessing(true);
+      createMatch({
+        white: selectedEngineA,
+        black: selectedEngineB,
+        fen: gameRef.current.fen(),
+        time_control: null,
+        depth: 10,
+      })
+        .then(match => {
+          if (closed) {
+            stopMatch(match.id).catch(() => {});
+            return;
+          }
+          matchId = match.id;
+          console.log('✅ Partida en el servidor:', match.id);
+          return watchMatch(match.id, handleMatchEvent, controller.signal);
+        })
+        .catch(error => {
+          if (closed) return;
+          setIsProcessing(false);
+          if (matchId) {
+            setStatus(`Error: ${error.message}`);
+          } else {
+            fallbackToHttp(error);
+          }
+        });
+      
+      return () => {
+        closed = true;
+        serverGameRef.current = false;
+        controller.abort();
+        if (matchId) {
+          stopMatch(matchId).catch(() => {});
+        }
+      };
     }
-  }, [updateStatus, getCurrentPlayer, makeEngineMove, selectedEngineA, selectedEngineB]);
+    
+    // Mensajes de la sesión: aplicar las jugadas de los motores al tablero local
+    const handleSessionMessage = (message) => {
+      if (closed) return;
+      const game = gameRef.current;
+      
+      if (message.type === 'thinking') {
+        setIsProcessing(true);
+      } else if (message.type === 'move' && message.by === 'engine') {
+        try {
+          game.move(message.move);
+          lastMoveWasEngineRef.current = true;
+          setPosition(game.fen());
+          updateStatus();
+        } catch (error) {
+          console.error("Error al aplicar movimiento del motor:", error);
+          setStatus(`Error: No se pudo aplicar el movimiento ${message.move}. ${error.message}`);
+        }
+        setIsProcessing(false);
+      } else if (message.type === 'error') {
+        setStatus(`Error: ${message.detail}`);
+        setIsProcessing(false);
+        // Motor saturado (429): volver a pedir la jugada cuando indique el servidor
+        if (message.retry_after && sessionRef.current) {
+          retryTimeout = setTimeout(() => sessionRef.current?.send({ type: 'play' }), message.retry_after * 1000);
+        }
+      } else if (message.type === 'game_over') {
+        setIsProcessing(false);
+        updateStatus();
+      } else if (message.type === 'closed') {
+        // Conexión perdida: seguir la partida con peticiones HTTP
+        sessionRef.current = null;
+        setIsProcessing(false);
+      }
+    };
+    
+    openGameSession(
+      {
+        white: selectedEngineA || 'human',
+        black: selectedEngineB || 'human',
+        fen: gameRef.current.fen(),
+        depth: 10,
+        strategy: selectedStrategy || undefined,
+      },
+      handleSessionMessage
+    )
+      .then(session => {
+        serverGameRef.current = false;
+        if (closed) {
+          session.close();
+          return;
+        }
+        sessionRef.current = session;
+        console.log('✅ Sesión de partida abierta:', session.sessionId);
+      })
+      .catch(fallbackToHttp);
+    
+    return () => {
+      closed = true;
+      serverGameRef.current = false;
+      clearTimeout(retryTimeout);
+      sessionRef.current?.close();
+      sessionRef.current = null;
+    };
+    // La sesión se abre una vez por partida (motores seleccionados)
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [selectedEngineA, selectedEngineB]);
+  
+  // Enviar la estrategia elegida a la sesión (la usan los motores generativos)
+  useEffect(() => {
+    sessionRef.current?.send({ type: 'options', strategy: selectedStrategy });
+  }, [selectedStrategy]);
+
+  // Enviar la jugada del humano a la sesión (el servidor la valida y responde el motor)
+  const sendMoveToSession = useCallback((move) => {
+    if (sessionRef.current) {
+      sessionRef.current.sendMove(move.from + move.to + (move.promotion || ''));
+    }
+  }, []);
 
   // Función para obtener los movimientos posibles de una casilla
   const getPossibleMoves = useCallback((square) => {
@@ -301,6 +466,7 @@ function GamePage() {
         
         // Actualizar posición
         lastMoveWasEngineRef.current = false; // El movimiento fue humano
+        sendMoveToSession(move);
         setPosition(game.fen());
         updateStatus();
         
@@ -323,7 +489,7 @@ function GamePage() {
       setSelectedSquare(null);
       setPossibleMoves({});
     }
-  }, [selectedSquare, isProcessing, getPossibleMoves, updateStatus, getCurrentPlayer]);
+  }, [selectedSquare, isProcessing, getPossibleMoves, updateStatus, getCurrentPlayer, sendMoveToSession]);
 
   const onPieceDrop = useCallback((sourceSquare, targetSquare) => {
     console.log("onPieceDrop llamado:", sourceSquare, "->", targetSquare);
@@ -350,6 +516,7 @@ function GamePage() {
       
       // Actualizar posición inmediatamente
       lastMoveWasEngineRef.current = false; // El movimiento fue humano
+      sendMoveToSession(move);
       setPosition(game.fen());
       
       // Limpiar selección/estilos al completar el movimiento
@@ -367,7 +534,7 @@ function GamePage() {
       console.log("Movimiento ILEGAL:", error.message);
       return false;
     }
-  }, [isProcessing, updateStatus, getCurrentPlayer]);
+  }, [isProcessing, updateStatus, getCurrentPlayer, sendMoveToSession]);
 
   const onPieceDragBegin = useCallback((piece, sourceSquare) => {
     if (isProcessing) return;
@@ -139,7 +139,12 @@ export const fetchBestMove = async (engineName, fen, depth = 10, options = {}) =
       const errorData = await response.json().catch(() => ({ 
         detail: `Error HTTP ${response.status}: ${response.statusText}` 
       }));
-      throw new Error(errorData.detail || 'Error desconocido del servidor');
+      const error = new Error(errorData.detail || 'Error desconocido del servidor');
+      // 429: motor saturado, el backend indica cuándo reintentar
+      if (response.status === 429) {
+        error.retryAfter = Number(response.headers.get('Retry-After')) || 1;
+      }
+      throw error;
     }
     
     const data = await response.json();
@@ -355,6 +360,244 @@ export const compareEngines = async (fen, depth = null) => {
   }
 };
 
+/**
+ * Compara los motores recibiendo cada resultado en cuanto termina (NDJSON)
+ * Eventos: start {engines}, result {engine, bestmove, status, explanation, elapsed_ms}, summary
+ * @param {string} fen - Posición del tablero en formato FEN
+ * @param {number} depth - Profundidad de análisis (opcional)
+ * @param {Function} onEvent - Callback invocado con cada evento según llega
+ * @param {AbortSignal} signal - Señal para cancelar la comparación (opcional)
+ * @returns {Promise<Object|null>} Evento summary final
+ */
+export const compareEnginesStream = async (fen, depth = null, onEvent = () => {}, signal = undefined) => {
+  const backendUrl = getBackendUrl();
+  const requestBody = { fen };
+  if (depth !== null) {
+    requestBody.depth = depth;
+  }
+  
+  const response = await fetch(`${backendUrl}/compare/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'Accept': 'application/x-ndjson',
+    },
+    body: JSON.stringify(requestBody),
+    signal,
+  });
+  
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({ 
+      detail: `Error HTTP ${response.status}: ${response.statusText}` 
+    }));
+    throw new Error(errorData.detail || 'Error desconocido del servidor');
+  }
+  
+  return readNdjsonStream(response, onEvent, 'Error comparando motores');
+};
+
+/**
+ * Lee una respuesta NDJSON, invocando onEvent con cada evento según llega
+ * @param {Response} response - Respuesta de fetch
+ * @param {Function} onEvent - Callback por evento
+ * @param {string} errorMessage - Mensaje si un evento de error no trae detalle
+ * @returns {Promise<Object|null>} Evento summary final
+ */
+const readNdjsonStream = async (response, onEvent, errorMessage) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let summary = null;
+  
+  const handleLine = (line) => {
+    if (!line.trim()) return;
+    const event = JSON.parse(line);
+    if (event.type === 'error') {
+      throw new Error(event.detail || errorMessage);
+    }
+    if (event.type === 'summary') {
+      summary = event;
+    }
+    onEvent(event);
+  };
+  
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    lines.forEach(handleLine);
+  }
+  handleLine(buffer + decoder.decode());
+  
+  return summary;
+};
+
+/**
+ * Analiza una partida completa jugada a jugada (NDJSON progresivo)
+ * Cada evento 'ply' trae evaluación, mejor jugada, pérdida en centipeones y clasificación;
+ * el 'summary' final trae ACPL y precisión por bando.
+ * @param {Object} game - { pgn } o { moves: [uci...], start_fen }
+ * @param {string} engine - Nombre del motor (UCI para obtener evaluaciones)
+ * @param {number} depth - Profundidad por posición (opcional)
+ * @param {Function} onEvent - Callback invocado con cada evento según llega
+ * @param {AbortSignal} signal - Señal para cancelar el análisis (opcional)
+ * @returns {Promise<Object|null>} Evento summary final
+ */
+export const analyzeGameStream = async (game, engine, depth = null, onEvent = () => {}, signal = undefined) => {
+  const backendUrl = getBackendUrl();
+  const requestBody = { ...game, engine, stream: true };
+  if (depth !== null) {
+    requestBody.depth = depth;
+  }
+  
+  const response = await fetch(`${backendUrl}/analyze/game`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'Accept': 'application/x-ndjson',
+    },
+    body: JSON.stringify(requestBody),
+    signal,
+  });
+  
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({ 
+      detail: `Error HTTP ${response.status}: ${response.statusText}` 
+    }));
+    throw new Error(errorData.detail || 'Error desconocido del servidor');
+  }
+  
+  return readNdjsonStream(response, onEvent, 'Error analizando la partida');
+};
+
+/**
+ * Abre una partida con estado en el servidor (WebSocket /ws/game).
+ * El servidor guarda el tablero, valida cada jugada del humano y envía las respuestas
+ * de los motores en cuanto las tiene ('thinking', 'move', 'game_over', 'error').
+ * @param {Object} options - { white, black, fen, depth, strategy, explanation } ('human' o null = humano)
+ * @param {Function} onMessage - Callback invocado con cada mensaje del servidor
+ *                               ({ type: 'closed' } si se pierde la conexión)
+ * @returns {Promise<{sessionId: string, send: Function, sendMove: Function, close: Function}>}
+ *          Se resuelve cuando el servidor crea la sesión
+ */
+export const openGameSession = (options, onMessage = () => {}) => new Promise((resolve, reject) => {
+  const wsUrl = `${getBackendUrl().replace(/^http/, 'ws')}/ws/game`;
+  const socket = new WebSocket(wsUrl);
+  let opened = false;
+  
+  const session = {
+    sessionId: null,
+    send: (message) => {
+      if (socket.readyState === WebSocket.OPEN) {
+        socket.send(JSON.stringify(message));
+      }
+    },
+    sendMove: (move) => session.send({ type: 'move', move }),
+    close: () => {
+      session.send({ type: 'close' });
+      socket.close();
+    },
+  };
+  
+  socket.onopen = () => session.send({ type: 'new', ...options });
+  socket.onmessage = (event) => {
+    const message = JSON.parse(event.data);
+    if (!opened) {
+      if (message.type === 'error') {
+        reject(new Error(message.detail));
+        socket.close();
+        return;
+      }
+      if (message.type === 'session') {
+        opened = true;
+        session.sessionId = message.session_id;
+        resolve(session);
+      }
+    }
+    onMessage(message);
+  };
+  socket.onerror = () => {
+    if (!opened) {
+      reject(new Error('No se pudo abrir la sesión de partida'));
+    }
+  };
+  socket.onclose = () => {
+    if (opened) {
+      onMessage({ type: 'closed' });
+    }
+  };
+});
+
+/**
+ * Juega una partida motor contra motor en el servidor (POST /matches)
+ * El servidor juega la partida completa con reloj y adjudicación; se sigue con watchMatch
+ * @param {Object} options - { white, black, time_control ('60+0.6' o null), depth, fen, adjudication }
+ * @returns {Promise<Object>} Estado inicial de la partida (id, status, time_control, clock...)
+ */
+export const createMatch = async (options) => {
+  const backendUrl = getBackendUrl();
+  const response = await fetch(`${backendUrl}/matches`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify(options),
+  });
+  
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({ 
+      detail: `Error HTTP ${response.status}: ${response.statusText}` 
+    }));
+    throw new Error(errorData.detail || 'Error desconocido del servidor');
+  }
+  
+  return response.json();
+};
+
+/**
+ * Sigue una partida del servidor (NDJSON) hasta que termina
+ * Eventos: state (al conectar, con las jugadas ya hechas), status, move {ply, move, san, color,
+ * engine, fen, clock, analysis}, end {result, termination, winner, pgn}
+ * @param {string} matchId - Id de la partida
+ * @param {Function} onEvent - Callback invocado con cada evento según llega
+ * @param {AbortSignal} signal - Señal para dejar de seguir la partida (opcional)
+ * @returns {Promise<null>}
+ */
+export const watchMatch = async (matchId, onEvent = () => {}, signal = undefined) => {
+  const backendUrl = getBackendUrl();
+  const response = await fetch(`${backendUrl}/matches/${matchId}/events`, {
+    headers: {
+      'Accept': 'application/x-ndjson',
+    },
+    signal,
+  });
+  
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({ 
+      detail: `Error HTTP ${response.status}: ${response.statusText}` 
+    }));
+    throw new Error(errorData.detail || 'Error desconocido del servidor');
+  }
+  
+  return readNdjsonStream(response, onEvent, 'Error siguiendo la partida');
+};
+
+/**
+ * Detiene una partida del servidor (queda sin resultado)
+ * @param {string} matchId - Id de la partida
+ * @returns {Promise<Object>} Estado de la partida
+ */
+export const stopMatch = async (matchId) => {
+  const backendUrl = getBackendUrl();
+  const response = await fetch(`${backendUrl}/matches/${matchId}/stop`, { method: 'POST' });
+  if (!response.ok) {
+    throw new Error(`Error HTTP ${response.status}: ${response.statusText}`);
+  }
+  return response.json();
+};
+
 /**
  * Recarga la configuración de motores desde el archivo YAML
  * @returns {Promise<{status: string, message: string, engines_loaded: number}>}
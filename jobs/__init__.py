@@ -0,0 +1,18 @@
+"""
+Trabajos en segundo plano (análisis largos que no caben en una petición HTTP).
+Persistidos en SQLite, con progreso, cancelación y reanudación tras reinicios.
+"""
+
+from .handlers import JOB_KINDS, MAX_JOB_POSITIONS
+from .manager import JobManager, JobContext, JOB_STATES, TERMINAL_STATES
+from .store import JobStore
+
+__all__ = [
+    'JobManager',
+    'JobContext',
+    'JobStore',
+    'JOB_KINDS',
+    'JOB_STATES',
+    'TERMINAL_STATES',
+    'MAX_JOB_POSITIONS',
+]
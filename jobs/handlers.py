@@ -0,0 +1,209 @@
+"""
+Tipos de trabajo en segundo plano.
+Cada tipo tiene una validación (rápida, se ejecuta al enviar el trabajo) y una ejecución
+que informa del progreso a través del JobContext.
+"""
+
+import logging
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import chess
+
+from engines import MotorType
+from matches.tournament import Tournament
+
+if TYPE_CHECKING:
+    from engine_manager import EngineManager
+    from .manager import JobContext
+
+logger = logging.getLogger(__name__)
+
+# Posiciones máximas por trabajo (se procesan en lotes de EngineManager.MAX_BATCH_POSITIONS)
+MAX_JOB_POSITIONS = 20000
+
+
+def _require_engine(manager: "EngineManager", params: Dict[str, Any]) -> None:
+    """Valida que el trabajo indica un motor existente"""
+    if not params.get("engine"):
+        raise ValueError("Falta el parámetro 'engine'")
+    manager.get_engine(params["engine"])
+
+
+def _positions(params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Normaliza 'positions' (FENs o {fen, depth, id}) a diccionarios"""
+    positions = params.get("positions")
+    if not isinstance(positions, list) or not positions:
+        raise ValueError("'positions' debe ser una lista no vacía de FENs o {fen, depth}")
+    if len(positions) > MAX_JOB_POSITIONS:
+        raise ValueError(f"El trabajo tiene {len(positions)} posiciones (máximo {MAX_JOB_POSITIONS})")
+    return [{"fen": item} if isinstance(item, str) else dict(item) for item in positions]
+
+
+async def _analyze_positions(
+    ctx: "JobContext",
+    engine: str,
+    positions: List[Dict[str, Any]],
+    depth: Optional[int]
+) -> List[Dict[str, Any]]:
+    """
+    Analiza posiciones por lotes con EngineManager.iter_batch_moves e informa del progreso.
+    Las búsquedas van con prioridad 'background': ceden el motor a cualquier otra petición.
+    """
+    manager = ctx.engine_manager
+    chunk_size = manager.MAX_BATCH_POSITIONS
+    results: List[Dict[str, Any]] = []
+
+    for offset in range(0, len(positions), chunk_size):
+        chunk = positions[offset:offset + chunk_size]
+        async for result in manager.iter_batch_moves(engine, chunk, depth, priority="background"):
+            result["index"] += offset
+            results.append(result)
+            await ctx.report(len(results), len(positions), result)
+
+    return sorted(results, key=lambda result: result["index"])
+
+
+# ---------------------------------------------------------------------------
+# analyze_game: partida completa (PGN o jugadas UCI)
+# ---------------------------------------------------------------------------
+
+def _game_args(params: Dict[str, Any]) -> Dict[str, Any]:
+    moves = params.get("moves")
+    return {
+        "pgn": params.get("pgn"),
+        "moves": moves.split() if isinstance(moves, str) else moves,
+        "start_fen": params.get("start_fen"),
+        "depth": params.get("depth"),
+    }
+
+
+def validate_analyze_game(manager: "EngineManager", params: Dict[str, Any]) -> None:
+    _require_engine(manager, params)
+    manager.prepare_game_analysis(params["engine"], priority="background", **_game_args(params))
+
+
+async def run_analyze_game(ctx: "JobContext", params: Dict[str, Any]) -> Dict[str, Any]:
+    analyzer = ctx.engine_manager.prepare_game_analysis(params["engine"], priority="background", **_game_args(params))
+    plies = []
+    summary = None
+    async for event in analyzer.run():
+        if event["type"] == "summary":
+            summary = event
+            continue
+        plies.append(event)
+        await ctx.report(len(plies), len(analyzer.moves), event)
+    return {"plies": plies, "summary": summary}
+
+
+# ---------------------------------------------------------------------------
+# batch_moves: muchas posiciones (p. ej. precálculo de aperturas)
+# ---------------------------------------------------------------------------
+
+def validate_batch_moves(manager: "EngineManager", params: Dict[str, Any]) -> None:
+    _require_engine(manager, params)
+    _positions(params)
+
+
+async def run_batch_moves(ctx: "JobContext", params: Dict[str, Any]) -> Dict[str, Any]:
+    results = await _analyze_positions(ctx, params["engine"], _positions(params), params.get("depth"))
+    return {
+        "results": results,
+        "completed": sum(1 for result in results if result["status"] == "ok"),
+        "errors": sum(1 for result in results if result["status"] == "error"),
+    }
+
+
+# ---------------------------------------------------------------------------
+# epd_suite: suite de test EPD (bm/am), puntúa las posiciones resueltas
+# ---------------------------------------------------------------------------
+
+def _parse_epd(text: str) -> List[Dict[str, Any]]:
+    """Parsea las líneas EPD: FEN, id y jugadas esperadas (bm) o a evitar (am) en UCI"""
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("Falta el parámetro 'epd' (texto con una posición EPD por línea)")
+
+    entries = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            board, ops = chess.Board.from_epd(line)
+        except ValueError as e:
+            raise ValueError(f"Línea EPD {number} inválida: {e}")
+        entries.append({
+            "id": str(ops.get("id", f"pos-{len(entries) + 1}")),
+            "fen": board.fen(),
+            "bm": [move.uci() for move in ops.get("bm", [])],
+            "am": [move.uci() for move in ops.get("am", [])],
+        })
+    if len(entries) > MAX_JOB_POSITIONS:
+        raise ValueError(f"La suite tiene {len(entries)} posiciones (máximo {MAX_JOB_POSITIONS})")
+    return entries
+
+
+def validate_epd_suite(manager: "EngineManager", params: Dict[str, Any]) -> None:
+    _require_engine(manager, params)
+    _parse_epd(params.get("epd"))
+
+
+async def run_epd_suite(ctx: "JobContext", params: Dict[str, Any]) -> Dict[str, Any]:
+    entries = _parse_epd(params["epd"])
+    results = await _analyze_positions(ctx, params["engine"], entries, params.get("depth"))
+
+    solved = 0
+    for entry, result in zip(entries, results):
+        move = result["bestmove"]
+        result.update({"id": entry["id"], "bm": entry["bm"], "am": entry["am"]})
+        result["solved"] = bool(move) and (move in entry["bm"] if entry["bm"] else move not in entry["am"])
+        solved += result["solved"]
+
+    return {"results": results, "solved": solved, "total": len(entries)}
+
+
+# ---------------------------------------------------------------------------
+# annotate_batch: anotación con la API batch del proveedor (motores generativos)
+# ---------------------------------------------------------------------------
+
+def validate_annotate_batch(manager: "EngineManager", params: Dict[str, Any]) -> None:
+    _require_engine(manager, params)
+    if manager.get_engine(params["engine"]).motor_type != MotorType.GENERATIVE:
+        raise ValueError("annotate_batch requiere un motor generativo")
+    _positions(params)
+
+
+async def run_annotate_batch(ctx: "JobContext", params: Dict[str, Any]) -> Dict[str, Any]:
+    engine = ctx.engine_manager.get_engine(params["engine"])
+    positions = _positions(params)
+    await ctx.report(0, len(positions))
+    annotations = await engine.annotate_batch(positions)
+    await ctx.report(len(positions), len(positions))
+    return {"annotations": annotations}
+
+
+# ---------------------------------------------------------------------------
+# tournament: torneo round_robin o gauntlet con Elo y SPRT (ver matches.tournament)
+# ---------------------------------------------------------------------------
+
+def validate_tournament(manager: "EngineManager", params: Dict[str, Any]) -> None:
+    # Sin 'engine': los torneos comparten el límite de trabajos por motor y se juegan de uno en uno
+    Tournament(manager, params)
+
+
+async def run_tournament(ctx: "JobContext", params: Dict[str, Any]) -> Dict[str, Any]:
+    if ctx.match_runner is None:
+        raise RuntimeError("El gestor de trabajos no tiene MatchRunner para jugar torneos")
+    tournament = Tournament(ctx.engine_manager, params, tournament_id=ctx.job["id"])
+    return await tournament.run(ctx.match_runner, ctx.report)
+
+
+# Tipos de trabajo: {nombre: (validación, ejecución)}
+JOB_KINDS: Dict[str, Tuple[
+    Callable[["EngineManager", Dict[str, Any]], None],
+    Callable[["JobContext", Dict[str, Any]], Awaitable[Dict[str, Any]]],
+]] = {
+    "analyze_game": (validate_analyze_game, run_analyze_game),
+    "batch_moves": (validate_batch_moves, run_batch_moves),
+    "epd_suite": (validate_epd_suite, run_epd_suite),
+    "annotate_batch": (validate_annotate_batch, run_annotate_batch),
+    "tournament": (validate_tournament, run_tournament),
+}
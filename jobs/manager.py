@@ -0,0 +1,325 @@
+"""
+Gestor de trabajos en segundo plano.
+Los trabajos se guardan en SQLite al enviarse, se ejecutan fuera de las peticiones HTTP
+con un límite global de concurrencia y otro por motor, publican su progreso a los
+suscriptores y se reanudan desde el principio si el backend se reinicia a mitad.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+from .handlers import JOB_KINDS
+from .store import JobStore
+
+if TYPE_CHECKING:
+    from engine_manager import EngineManager
+    from matches import MatchRunner
+
+logger = logging.getLogger(__name__)
+
+# Estados de un trabajo
+JOB_STATES = ("queued", "running", "completed", "failed", "cancelled")
+TERMINAL_STATES = ("completed", "failed", "cancelled")
+
+# Configuración por defecto (sobrescribible con JOBS_DB_PATH y JOBS_MAX_WORKERS)
+DEFAULT_DB_PATH = "data/jobs.sqlite3"
+DEFAULT_MAX_WORKERS = 2
+# Trabajos simultáneos por motor si no se configura 'job_concurrency'
+DEFAULT_ENGINE_CONCURRENCY = 1
+# Segundos mínimos entre escrituras del progreso en SQLite
+PROGRESS_PERSIST_INTERVAL = 2.0
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobContext:
+    """Contexto que recibe la ejecución de un trabajo"""
+
+    def __init__(self, manager: "JobManager", job: Dict[str, Any]):
+        self._manager = manager
+        self.job = job
+        self.engine_manager = manager.engine_manager
+        self.match_runner = manager.match_runner
+        self._persisted_at = 0.0
+
+    async def report(self, done: int, total: int, item: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Informa del progreso.
+
+        Args:
+            done: Unidades terminadas (posiciones, jugadas...)
+            total: Unidades totales
+            item: Resultado parcial recién terminado (se envía a los suscriptores, no se guarda)
+        """
+        self.job["progress"] = {"done": done, "total": total}
+        event = {"type": "progress", "id": self.job["id"], "done": done, "total": total}
+        if item is not None:
+            event["item"] = item
+        self._manager._publish(self.job["id"], event)
+
+        loop = asyncio.get_running_loop()
+        if done >= total or loop.time() - self._persisted_at >= PROGRESS_PERSIST_INTERVAL:
+            self._persisted_at = loop.time()
+            await self._manager.store.update(self.job["id"], progress=self.job["progress"])
+
+
+class JobManager:
+    """
+    Cola de trabajos persistente.
+    Un trabajo pendiente arranca cuando hay hueco global (max_workers) y hueco en su motor
+    ('job_concurrency' en la configuración del motor); los demás esperan en orden de llegada.
+    """
+
+    def __init__(
+        self,
+        engine_manager: "EngineManager",
+        db_path: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        match_runner: Optional["MatchRunner"] = None
+    ):
+        """
+        Args:
+            engine_manager: Gestor de motores con el que se ejecutan los trabajos
+            db_path: Archivo SQLite (default: JOBS_DB_PATH o data/jobs.sqlite3)
+            max_workers: Trabajos simultáneos (default: JOBS_MAX_WORKERS o 2)
+            match_runner: Donde se juegan las partidas de los torneos
+        """
+        self.engine_manager = engine_manager
+        self.match_runner = match_runner
+        self.store = JobStore(db_path or os.getenv("JOBS_DB_PATH", DEFAULT_DB_PATH))
+        self.max_workers = max_workers or int(os.getenv("JOBS_MAX_WORKERS", DEFAULT_MAX_WORKERS))
+
+        self._jobs: Dict[str, Dict[str, Any]] = {}   # Trabajos activos (queued/running)
+        self._queue: List[str] = []                  # Pendientes en orden de llegada
+        self._running: Dict[str, asyncio.Task] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._stopping = False
+
+    async def start(self) -> None:
+        """Recupera los trabajos pendientes o interrumpidos y los vuelve a encolar"""
+        for job in await self.store.unfinished():
+            if job["status"] == "running":
+                logger.info(f"Trabajo {job['id']} interrumpido por un reinicio, se vuelve a encolar")
+                job.update(status="queued", started_at=None, progress=None)
+                await self.store.update(job["id"], status="queued", started_at=None, progress=None)
+            self._jobs[job["id"]] = job
+            self._queue.append(job["id"])
+
+        if self._queue:
+            logger.info(f"{len(self._queue)} trabajos pendientes recuperados")
+        self._dispatch()
+
+    async def submit(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Valida y encola un trabajo.
+
+        Args:
+            kind: Tipo de trabajo (ver JOB_KINDS)
+            params: Parámetros del tipo (todos requieren 'engine' salvo tournament, que usa 'engines')
+
+        Returns:
+            Trabajo creado (ver public_view)
+
+        Raises:
+            ValueError: Si el tipo no existe o los parámetros no son válidos
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Tipo de trabajo desconocido: {kind}. Válidos: {', '.join(JOB_KINDS)}")
+        validate, _ = JOB_KINDS[kind]
+        validate(self.engine_manager, params)
+
+        job = {
+            "id": uuid.uuid4().hex[:16],
+            "kind": kind,
+            "engine": params.get("engine"),
+            "status": "queued",
+            "params": params,
+            "progress": None,
+            "result": None,
+            "error": None,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        await self.store.insert(job)
+        self._jobs[job["id"]] = job
+        self._queue.append(job["id"])
+        logger.info(f"Trabajo {job['id']} ({kind}) encolado para {job['engine']}")
+
+        self._dispatch()
+        return self.public_view(job)
+
+    async def get(self, job_id: str, include_result: bool = True) -> Dict[str, Any]:
+        """
+        Estado de un trabajo.
+
+        Raises:
+            KeyError: Si el trabajo no existe
+        """
+        job = self._jobs.get(job_id) or await self.store.get(job_id)
+        if job is None:
+            raise KeyError(f"Trabajo '{job_id}' no encontrado")
+        return self.public_view(job, include_result)
+
+    async def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Trabajos más recientes primero (sin resultados)"""
+        jobs = await self.store.list(status, limit)
+        # El progreso en memoria es más reciente que el guardado
+        return [self.public_view(self._jobs.get(job["id"], job), include_result=False) for job in jobs]
+
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        """
+        Cancela un trabajo pendiente o en curso (los terminados no cambian).
+
+        Raises:
+            KeyError: Si el trabajo no existe
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return await self.get(job_id, include_result=False)
+
+        if job_id in self._running:
+            # La ejecución marca el trabajo como cancelado al recibir la cancelación
+            task = self._running[job_id]
+            task.cancel()
+            await asyncio.wait({task})
+        else:
+            self._queue.remove(job_id)
+            await self._finish(job, "cancelled")
+        return self.public_view(job, include_result=False)
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Progreso de un trabajo: su estado actual y después cada actualización hasta que termina.
+
+        Raises:
+            KeyError: Si el trabajo no existe
+        """
+        snapshot = await self.get(job_id, include_result=False)
+        if snapshot["status"] in TERMINAL_STATES or job_id not in self._jobs:
+            yield {"type": "status", **snapshot}
+            return
+
+        # Suscribirse antes de entregar el estado para no perder eventos intermedios
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        try:
+            yield {"type": "status", **snapshot}
+            while True:
+                event = await queue.get()
+                yield event
+                if event["type"] == "status" and event["status"] in TERMINAL_STATES:
+                    return
+        finally:
+            self._subscribers[job_id].remove(queue)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    async def shutdown(self) -> None:
+        """
+        Detiene los trabajos en curso sin marcarlos como cancelados:
+        quedan pendientes y se reanudan en el siguiente arranque.
+        """
+        self._stopping = True
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.store.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado de la cola"""
+        running_by_engine: Dict[str, int] = {}
+        for job_id in self._running:
+            engine = self._jobs[job_id]["engine"]
+            running_by_engine[engine] = running_by_engine.get(engine, 0) + 1
+        return {
+            "max_workers": self.max_workers,
+            "running": len(self._running),
+            "queued": len(self._queue),
+            "running_by_engine": running_by_engine,
+        }
+
+    @staticmethod
+    def public_view(job: Dict[str, Any], include_result: bool = True) -> Dict[str, Any]:
+        """Representación de un trabajo para la API"""
+        view = {
+            key: job.get(key)
+            for key in ("id", "kind", "engine", "status", "progress", "error", "created_at", "started_at", "finished_at")
+        }
+        if include_result:
+            view["result"] = job.get("result")
+        return view
+
+    def _engine_limit(self, engine_name: Optional[str]) -> int:
+        """Trabajos simultáneos permitidos para un motor"""
+        try:
+            engine = self.engine_manager.get_engine(engine_name)
+        except ValueError:
+            return DEFAULT_ENGINE_CONCURRENCY
+        return max(1, int(engine.config.get("job_concurrency", DEFAULT_ENGINE_CONCURRENCY)))
+
+    def _dispatch(self) -> None:
+        """Arranca los trabajos pendientes que tienen hueco global y en su motor"""
+        if self._stopping:
+            return
+        running_by_engine: Dict[str, int] = {}
+        for job_id in self._running:
+            engine = self._jobs[job_id]["engine"]
+            running_by_engine[engine] = running_by_engine.get(engine, 0) + 1
+
+        for job_id in list(self._queue):
+            if len(self._running) >= self.max_workers:
+                break
+            engine = self._jobs[job_id]["engine"]
+            if running_by_engine.get(engine, 0) >= self._engine_limit(engine):
+                continue
+            self._queue.remove(job_id)
+            running_by_engine[engine] = running_by_engine.get(engine, 0) + 1
+            self._running[job_id] = asyncio.create_task(self._run(self._jobs[job_id]))
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        """Ejecuta un trabajo y guarda su resultado"""
+        _, run = JOB_KINDS[job["kind"]]
+        job.update(status="running", started_at=_now())
+        await self.store.update(job["id"], status="running", started_at=job["started_at"])
+        self._publish(job["id"], {"type": "status", **self.public_view(job, include_result=False)})
+        logger.info(f"Trabajo {job['id']} ({job['kind']}) en curso")
+
+        try:
+            result = await run(JobContext(self, job), job["params"])
+            await self._finish(job, "completed", result=result)
+        except asyncio.CancelledError:
+            if self._stopping:
+                # Reinicio del backend: el trabajo sigue pendiente en SQLite
+                await self.store.update(job["id"], status="queued", started_at=None)
+                raise
+            await self._finish(job, "cancelled")
+        except Exception as e:
+            logger.warning(f"Trabajo {job['id']} falló: {e}")
+            await self._finish(job, "failed", error=str(e))
+        finally:
+            self._running.pop(job["id"], None)
+            self._dispatch()
+
+    async def _finish(self, job: Dict[str, Any], status: str, result: Any = None, error: Optional[str] = None) -> None:
+        """Marca un trabajo como terminado, lo guarda y avisa a los suscriptores"""
+        job.update(status=status, result=result, error=error, finished_at=_now())
+        await self.store.update(
+            job["id"], status=status, result=result, error=error,
+            progress=job.get("progress"), finished_at=job["finished_at"]
+        )
+        self._jobs.pop(job["id"], None)
+        logger.info(f"Trabajo {job['id']} {status}")
+        self._publish(job["id"], {"type": "status", **self.public_view(job, include_result=False)})
+
+    def _publish(self, job_id: str, event: Dict[str, Any]) -> None:
+        """Envía un evento a los suscriptores del trabajo"""
+        for queue in self._subscribers.get(job_id, []):
+            queue.put_nowait(event)
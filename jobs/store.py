@@ -0,0 +1,114 @@
+"""
+Persistencia de trabajos en SQLite.
+Las operaciones se ejecutan en un hilo (asyncio.to_thread) para no bloquear el event loop.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Columnas de la tabla y las que se guardan como JSON
+_COLUMNS = (
+    "id", "kind", "engine", "status", "params", "progress", "result", "error",
+    "created_at", "started_at", "finished_at",
+)
+_JSON_COLUMNS = ("params", "progress", "result")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    engine TEXT,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+
+class JobStore:
+    """Tabla 'jobs' de una base de datos SQLite"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Ruta del archivo SQLite (se crea con su directorio si no existe; ":memory:" para pruebas)
+        """
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            self._conn.commit()
+        return [self._decode(row) for row in rows]
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        for column in _JSON_COLUMNS:
+            if job.get(column) is not None:
+                job[column] = json.loads(job[column])
+        return job
+
+    @staticmethod
+    def _encode(column: str, value: Any) -> Any:
+        return json.dumps(value, ensure_ascii=False) if column in _JSON_COLUMNS and value is not None else value
+
+    async def insert(self, job: Dict[str, Any]) -> None:
+        """Guarda un trabajo nuevo"""
+        columns = [column for column in job if column in _COLUMNS]
+        sql = f"INSERT INTO jobs ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        await asyncio.to_thread(self._execute, sql, tuple(self._encode(c, job[c]) for c in columns))
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        """Actualiza columnas de un trabajo"""
+        columns = [column for column in fields if column in _COLUMNS]
+        if not columns:
+            return
+        sql = f"UPDATE jobs SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?"
+        values = tuple(self._encode(c, fields[c]) for c in columns) + (job_id,)
+        await asyncio.to_thread(self._execute, sql, values)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Trabajo por id (None si no existe)"""
+        rows = await asyncio.to_thread(self._execute, "SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return rows[0] if rows else None
+
+    async def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Trabajos más recientes primero, sin el resultado"""
+        columns = ", ".join(column for column in _COLUMNS if column != "result")
+        if status:
+            sql, params = f"SELECT {columns} FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+        else:
+            sql, params = f"SELECT {columns} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    async def unfinished(self) -> List[Dict[str, Any]]:
+        """Trabajos pendientes o interrumpidos (queued/running), en orden de llegada"""
+        return await asyncio.to_thread(
+            self._execute,
+            "SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+        )
+
+    def close(self) -> None:
+        """Cierra la conexión"""
+        with self._lock:
+            self._conn.close()
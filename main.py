@@ -3,19 +3,36 @@ Chess Trainer API - Backend FastAPI
 Proporciona endpoints para interactuar con múltiples motores de ajedrez.
 """
 
-from fastapi import FastAPI, HTTPException
+import time
+
+# Inicio del arranque: la duración de cada fase se publica en GET /health
+_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, Dict, Any, List, Union
 from engine_manager import EngineManager
-from engines import MotorType, MotorOrigin
-from engines.generative import get_valid_strategies, get_strategy_info
+from broker import EngineBrokerClient, RemoteJobManager, RemoteMatchRunner, RemoteSessionManager
+from jobs import JobManager, JOB_KINDS, JOB_STATES
+from sessions import SessionManager
+from matches import (
+    MatchRunner, MATCH_STATES, DEFAULT_ADJUDICATION, DEFAULT_TIME_CONTROL, TOURNAMENT_FORMATS, read_tournament_pgn
+)
+from engines import MotorType, MotorOrigin, InvalidFENError, EngineOverloadedError, normalize_fen
+from engines.game_analysis import GameParseError
+from engines.protocols import get_all_rate_limiters
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
 import os
+import json
 import logging
 import asyncio
 
+# Fases del arranque en ms: imports, creación de gestores y aplicación lista para aceptar
+# peticiones. Las fases de los motores (en segundo plano) están en engine_manager.startup_timings
+STARTUP_TIMINGS: Dict[str, float] = {"imports_ms": round((time.perf_counter() - _STARTED) * 1000, 1)}
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -60,6 +77,12 @@ def get_cors_origins() -> List[str]:
     ]
 
 
+# Motor saturado (control de admisión)
+def overloaded_error(e: EngineOverloadedError) -> HTTPException:
+    """Respuesta 429 para un motor saturado, con el tiempo recomendado antes de reintentar"""
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
+
+
 # Modelos Pydantic
 class MoveRequest(BaseModel):
     """Request para obtener un movimiento"""
@@ -73,12 +96,101 @@ class MoveRequest(BaseModel):
     )
     explanation: Optional[bool] = Field(False, description="Solicitar explicación (motores generativos)")
 
+    @field_validator("fen")
+    @classmethod
+    def validate_fen(cls, value: str) -> str:
+        """Rechaza FEN inválidas en el borde de la API y las normaliza"""
+        return normalize_fen(value, require_moves=True)
+
 
 class MoveResponse(BaseModel):
     """Response con el movimiento sugerido"""
     engine: str
     bestmove: str
     explanation: Optional[str] = None
+    analysis: Optional[Dict[str, Any]] = None  # score_cp/mate, depth, nodes, nps, pv (motores UCI)
+    timings: Dict[str, float] = {}  # Desglose de tiempos en ms
+    source: str = "engine"  # engine | hedge | cache | book | tablebase
+
+
+class BatchPosition(BaseModel):
+    """Posición de un lote"""
+    fen: str = Field(..., description="Posición del tablero en formato FEN")
+    depth: Optional[int] = Field(None, description="Profundidad de análisis (default: la del lote)")
+
+
+class BatchMoveRequest(BaseModel):
+    """Request para analizar muchas posiciones con un motor"""
+    engine: str = Field(..., description="Nombre del motor a usar")
+    positions: List[Union[str, BatchPosition]] = Field(
+        ...,
+        min_length=1,
+        description="FENs o {fen, depth}; las FEN inválidas se devuelven como error sin abortar el lote"
+    )
+    depth: Optional[int] = Field(None, description="Profundidad por defecto")
+    explanation: Optional[bool] = Field(False, description="Solicitar explicación (motores generativos)")
+    stream: bool = Field(False, description="Devolver los resultados como NDJSON según terminan")
+
+
+class AnalyzeGameRequest(BaseModel):
+    """Request para analizar una partida completa"""
+    engine: str = Field(..., description="Nombre del motor a usar (UCI para obtener evaluaciones)")
+    pgn: Optional[str] = Field(None, description="Partida en PGN")
+    moves: Optional[Union[List[str], str]] = Field(
+        None,
+        description="Jugadas en formato UCI (lista o separadas por espacios), alternativa a 'pgn'"
+    )
+    start_fen: Optional[str] = Field(None, description="Posición inicial para 'moves' (default: inicial estándar)")
+    depth: Optional[int] = Field(None, description="Profundidad de análisis por posición")
+    stream: bool = Field(True, description="Devolver una evaluación por jugada como NDJSON según se calcula")
+
+
+class JobRequest(BaseModel):
+    """Request para crear un trabajo en segundo plano"""
+    kind: str = Field(..., description=f"Tipo de trabajo: {', '.join(JOB_KINDS)}")
+    params: Dict[str, Any] = Field(
+        ...,
+        description="Parámetros del trabajo; todos requieren 'engine' salvo tournament (ej: analyze_game: pgn o "
+                    "moves, depth; batch_moves: positions, depth; epd_suite: epd, depth; annotate_batch: positions; "
+                    "tournament: ver POST /tournaments)"
+    )
+
+
+class MatchRequest(BaseModel):
+    """Request para jugar una partida motor contra motor en el servidor"""
+    white: str = Field(..., description="Motor de las blancas")
+    black: str = Field(..., description="Motor de las negras")
+    time_control: Optional[str] = Field(
+        DEFAULT_TIME_CONTROL,
+        description="Control de tiempo 'base+incremento' en segundos; null para jugar a profundidad fija"
+    )
+    depth: Optional[int] = Field(None, ge=1, description="Profundidad por jugada (sin reloj o motores sin control de tiempo)")
+    fen: Optional[str] = Field(None, description="Posición inicial (default: posición inicial estándar)")
+    moves: Optional[List[str]] = Field(None, description="Jugadas de apertura (UCI) desde 'fen'")
+    adjudication: Optional[Dict[str, Any]] = Field(
+        None,
+        description=f"Umbrales de adjudicación: {', '.join(DEFAULT_ADJUDICATION)}"
+    )
+
+
+class TournamentRequest(BaseModel):
+    """Request para jugar un torneo entre motores (se ejecuta como trabajo en segundo plano)"""
+    engines: List[str] = Field(..., min_length=2, description="Motores; en gauntlet el primero juega contra el resto")
+    format: str = Field("round_robin", description=f"Formato: {', '.join(TOURNAMENT_FORMATS)}")
+    openings: Optional[Union[List[str], str]] = Field(
+        None,
+        description="Aperturas (FEN/EPD o jugadas desde la posición inicial), cada una se juega con ambos colores"
+    )
+    rounds: int = Field(1, ge=1, description="Vueltas a la lista de aperturas")
+    time_control: Optional[str] = Field(DEFAULT_TIME_CONTROL, description="Control de tiempo 'base+incremento' en segundos")
+    depth: Optional[int] = Field(None, ge=1, description="Profundidad por jugada (sin reloj)")
+    adjudication: Optional[Dict[str, Any]] = Field(None, description="Umbrales de adjudicación")
+    concurrency: Optional[int] = Field(None, ge=1, description="Partidas simultáneas (default: MATCHES_MAX_RUNNING)")
+    sprt: Optional[Dict[str, float]] = Field(
+        None,
+        description="SPRT con dos motores: {elo0, elo1, alpha, beta}; el torneo para al aceptar una hipótesis"
+    )
+    name: Optional[str] = Field(None, description="Nombre del torneo (cabecera Event del PGN)")
 
 
 class EngineInfo(BaseModel):
@@ -96,6 +208,18 @@ class CompareRequest(BaseModel):
     """Request para comparar motores"""
     fen: str = Field(..., description="Posición del tablero en formato FEN")
     depth: Optional[int] = Field(None, description="Profundidad de análisis")
+    timeout: Optional[float] = Field(
+        None,
+        gt=0,
+        le=300,
+        description="Plazo global en segundos; los motores que no terminan se marcan TIMEOUT"
+    )
+
+    @field_validator("fen")
+    @classmethod
+    def validate_fen(cls, value: str) -> str:
+        """Rechaza FEN inválidas en el borde de la API y las normaliza"""
+        return normalize_fen(value, require_moves=True)
 
 
 # Crear aplicación FastAPI
@@ -121,7 +245,7 @@ app.add_middleware(
         "Origin",
         "X-Requested-With",
     ],  # Solo headers necesarios
-    expose_headers=["Content-Type"],  # Headers que el frontend puede leer
+    expose_headers=["Content-Type", "Retry-After"],  # Headers que el frontend puede leer
     max_age=3600,  # Cache de preflight requests por 1 hora
 )
 
@@ -132,8 +256,28 @@ logger.info(f"Backend URL: http://0.0.0.0:8000")
 logger.info(f"CORS permitiendo orígenes: {cors_origins}")
 logger.info("=" * 50)
 
-# Inicializar gestor de motores
-engine_manager = EngineManager()
+# Inicializar gestor de motores: propio del proceso o, con ENGINE_BROKER_SOCKET, el broker
+# compartido por todos los workers (python -m broker)
+broker_socket = os.getenv("ENGINE_BROKER_SOCKET")
+engine_manager = EngineBrokerClient(broker_socket) if broker_socket else EngineManager()
+
+if broker_socket:
+    # Trabajos, partidas y sesiones también viven en el broker: una sola cola y un solo
+    # dueño de cada partida y sesión para todos los workers
+    match_runner = RemoteMatchRunner(engine_manager)
+    job_manager = RemoteJobManager(engine_manager)
+    session_manager = RemoteSessionManager(engine_manager)
+else:
+    # Partidas motor contra motor jugadas en el servidor
+    match_runner = MatchRunner(engine_manager)
+
+    # Cola de trabajos en segundo plano (persistida en SQLite); los torneos juegan en match_runner
+    job_manager = JobManager(engine_manager, match_runner=match_runner)
+
+    # Sesiones de partida por WebSocket (tablero mantenido en el servidor)
+    session_manager = SessionManager(engine_manager)
+
+STARTUP_TIMINGS["init_ms"] = round((time.perf_counter() - _STARTED) * 1000 - STARTUP_TIMINGS["imports_ms"], 1)
 
 # Solo montar archivos estáticos si existe el directorio dist (modo producción)
 if os.path.exists("frontend/dist"):
@@ -146,14 +290,30 @@ async def startup_event():
     logger.info("Iniciando Chess Trainer API v2.0.0")
     logger.info(f"Motores cargados: {len(engine_manager)}")
     
-    # Verificar disponibilidad en background para no bloquear el arranque
-    asyncio.create_task(engine_manager.check_all_availability())
+    # Verificar disponibilidad y precalentar conexiones en background para no bloquear el arranque
+    asyncio.create_task(engine_manager.startup())
+    
+    # Reanudar los trabajos que quedaron pendientes o interrumpidos
+    await job_manager.start()
+    
+    # Barrido de sesiones de partida inactivas
+    await session_manager.start()
+    
+    # Recarga automática de la configuración de motores (CONFIG_WATCH_INTERVAL)
+    engine_manager.start_config_watcher()
+    
+    STARTUP_TIMINGS["ready_ms"] = round((time.perf_counter() - _STARTED) * 1000, 1)
+    logger.info(f"API lista para aceptar peticiones: {STARTUP_TIMINGS}")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Evento de cierre de la aplicación"""
     logger.info("Cerrando Chess Trainer API")
+    # Los trabajos en curso quedan pendientes y se reanudan en el siguiente arranque
+    await job_manager.shutdown()
+    await session_manager.shutdown()
+    await match_runner.shutdown()
     await engine_manager.cleanup_all()
 
 
@@ -191,8 +351,31 @@ async def api_info():
             "GET /engines": "Lista de motores disponibles",
             "GET /engines/info": "Información detallada de motores",
             "GET /engines/matrix": "Matriz de clasificación de motores",
+            "GET /engines/hedging": "Métricas de hedging de motores generativos",
+            "GET /engines/rate-limits": "Estado de los limitadores de tasa por proveedor",
+            "GET /engines/tokens": "Uso de tokens de los motores generativos",
             "POST /move": "Obtener mejor movimiento de un motor",
+            "POST /move/batch": "Analizar muchas posiciones con un motor (opcionalmente NDJSON)",
+            "POST /analyze/game": "Analizar una partida (PGN o jugadas UCI) con evaluación por jugada, ACPL y precisión",
+            "GET /engines/cache": "Estado de la caché de análisis",
+            "GET /engines/load": "Cola, espera estimada y rechazos (429) por motor",
+            "GET /metrics": "Métricas en formato Prometheus (peticiones, latencias, colas, pools, caché, tokens)",
+            "POST /jobs": "Crear un trabajo en segundo plano (analyze_game, batch_moves, epd_suite, annotate_batch, tournament)",
+            "GET /jobs": "Listar trabajos y estado de la cola",
+            "GET /jobs/{id}": "Estado, progreso y resultado de un trabajo",
+            "GET /jobs/{id}/events": "Progreso de un trabajo en streaming (NDJSON)",
+            "POST /jobs/{id}/cancel": "Cancelar un trabajo",
+            "WS /ws/game": "Partida con estado en el servidor: jugadas incrementales y respuestas del motor",
+            "GET /sessions": "Sesiones de partida activas",
+            "POST /matches": "Jugar una partida motor contra motor en el servidor (reloj y adjudicación)",
+            "GET /matches": "Listar partidas en curso y terminadas",
+            "GET /matches/{id}": "Estado, jugadas y PGN de una partida",
+            "GET /matches/{id}/events": "Retransmisión de una partida (NDJSON)",
+            "POST /matches/{id}/stop": "Detener una partida",
+            "POST /tournaments": "Torneo round_robin o gauntlet con Elo y SPRT (trabajo en segundo plano)",
+            "GET /tournaments/{id}/pgn": "Partidas de un torneo en PGN",
             "POST /compare": "Comparar sugerencias de todos los motores",
+            "POST /compare/stream": "Comparar motores con resultados progresivos (NDJSON)",
             "GET /strategies": "Lista de estrategias disponibles para motores generativos",
             "GET /health": "Estado de salud de la API"
         }
@@ -201,10 +384,16 @@ async def api_info():
 
 @app.get("/health")
 async def health_check():
-    """Verifica el estado de salud de la API"""
+    """
+    Verifica el estado de salud de la API.
+    'startup' incluye la duración de cada fase del arranque; engines_ready indica si los
+    motores ya se crearon y precalentaron en segundo plano.
+    """
     return {
         "status": "healthy",
         "engines": len(engine_manager),
+        "engines_ready": "warmup_ms" in engine_manager.startup_timings,
+        "startup": {**STARTUP_TIMINGS, **engine_manager.startup_timings},
         "version": "2.0.0"
     }
 
@@ -270,6 +459,77 @@ async def get_classification_matrix():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/engines/hedging")
+async def get_hedging_stats():
+    """
+    Métricas de hedging de motores generativos.
+    Permite vigilar la tasa de hedge para mantener acotado el gasto extra.
+    """
+    try:
+        stats = engine_manager.get_hedging_stats()
+        return {
+            "engines": stats,
+            "count": len(stats)
+        }
+    except Exception as e:
+        logger.error(f"Error obteniendo métricas de hedging: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/engines/tokens")
+async def get_token_stats():
+    """
+    Uso de tokens por motor generativo (prompt, respuesta y caché).
+    Los valores vienen del proveedor; si no los informa se estiman localmente.
+    """
+    stats = engine_manager.get_token_stats()
+    return {
+        "engines": stats,
+        "count": len(stats)
+    }
+
+
+@app.get("/engines/rate-limits")
+async def get_rate_limits():
+    """
+    Estado de los limitadores de tasa de las APIs de LLMs.
+    Un limitador por proveedor y API key, compartido por todos sus motores.
+    """
+    limiters = get_all_rate_limiters()
+    return {
+        "limiters": limiters,
+        "count": len(limiters)
+    }
+
+
+@app.get("/engines/cache")
+async def get_analysis_cache():
+    """
+    Estado de la caché de análisis (posiciones ya resueltas por motores deterministas).
+    """
+    return engine_manager.get_cache_stats()
+
+
+@app.get("/engines/load")
+async def get_engines_load():
+    """
+    Carga de cada motor: peticiones en curso y en cola, tiempo medio de servicio,
+    espera estimada para una jugada interactiva y peticiones rechazadas con 429.
+    """
+    return engine_manager.get_admission_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Métricas en formato de exposición de Prometheus: peticiones por motor y origen
+    (engine, hedge, cache, book, tablebase), latencia por fase, profundidad y nps de las
+    búsquedas UCI, colas, pools, caché, tokens y reintentos por proveedor, clientes HTTP
+    y reinicios de procesos. Con ENGINE_BROKER_SOCKET son las del broker.
+    """
+    return PlainTextResponse(await engine_manager.get_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/engines/filter/type/{motor_type}")
 async def filter_engines_by_type(motor_type: str):
     """Filtra motores por tipo (traditional, neuronal, generative)"""
@@ -344,6 +604,8 @@ async def get_best_move(move_request: MoveRequest):
         # La estrategia ahora es opcional - el modelo la elegirá automáticamente después de 4 movimientos
         if move_request.strategy:
             # Validar estrategia si se proporciona explícitamente
+            # (engines.generative importa jinja2 y httpx: se carga en el primer uso, no al arrancar)
+            from engines.generative import get_valid_strategies
             valid_strategies = get_valid_strategies()
             if move_request.strategy.lower() not in [s.lower() for s in valid_strategies]:
                 raise HTTPException(
@@ -355,32 +617,30 @@ async def get_best_move(move_request: MoveRequest):
         if move_request.explanation:
             kwargs["explanation"] = move_request.explanation
         
-        # Obtener movimiento
-        best_move = await engine_manager.get_best_move(
+        # Obtener movimiento (el resultado es propio de esta petición)
+        result = await engine_manager.get_best_move(
             move_request.engine,
             move_request.fen,
             move_request.depth,
             **kwargs
         )
         
-        response = MoveResponse(
+        return MoveResponse(
             engine=move_request.engine,
-            bestmove=best_move
+            bestmove=result.move,
+            explanation=result.explanation,
+            analysis=result.analysis,
+            timings=result.timings,
+            source=result.source
         )
         
-        # Si es motor generativo y se solicitó explicación
-        if move_request.explanation:
-            try:
-                engine = engine_manager.get_engine(move_request.engine)
-                if hasattr(engine, 'get_last_explanation'):
-                    explanation = engine.get_last_explanation()
-                    if explanation:
-                        response.explanation = explanation
-            except Exception as e:
-                logger.warning(f"No se pudo obtener explicación: {e}")
-        
-        return response
-        
+    except HTTPException:
+        raise
+    except EngineOverloadedError as e:
+        raise overloaded_error(e)
+    except InvalidFENError as e:
+        logger.warning(f"FEN inválida: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except ValueError as e:
         logger.warning(f"Error de validación: {e}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -389,11 +649,370 @@ async def get_best_move(move_request: MoveRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/move/batch")
+async def get_batch_moves(batch_request: BatchMoveRequest):
+    """
+    Obtiene el mejor movimiento de un motor para muchas posiciones en una sola llamada.
+    Las posiciones repetidas se analizan una vez, se usa la caché de análisis y las
+    peticiones se reparten entre las instancias del motor.
+    
+    Sin 'stream' devuelve los resultados en el orden de entrada. Con 'stream' (NDJSON):
+        {"type": "start", "engine", "positions"}
+        {"type": "result", "index", "fen", "bestmove", "status", "explanation", "analysis", "source", "timings", "error"}
+        {"type": "summary", "engine", "positions", "completed", "errors", "cached", "elapsed_ms"}
+    """
+    positions = [
+        {"fen": item} if isinstance(item, str) else item.model_dump()
+        for item in batch_request.positions
+    ]
+    kwargs = {"explanation": True} if batch_request.explanation else {}
+    
+    # Errores del lote completo (motor inexistente, lote demasiado grande, motor saturado)
+    try:
+        engine_manager.get_engine(batch_request.engine)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if len(positions) > engine_manager.MAX_BATCH_POSITIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El lote tiene {len(positions)} posiciones (máximo {engine_manager.MAX_BATCH_POSITIONS})"
+        )
+    try:
+        engine_manager.check_admission(batch_request.engine, "batch")
+    except EngineOverloadedError as e:
+        raise overloaded_error(e)
+    
+    def summary(results: List[Dict[str, Any]], started: float) -> Dict[str, Any]:
+        return {
+            "engine": batch_request.engine,
+            "positions": len(positions),
+            "completed": sum(1 for r in results if r["status"] == "ok"),
+            "errors": sum(1 for r in results if r["status"] == "error"),
+            "cached": sum(1 for r in results if r["source"] == "cache"),
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1)
+        }
+    
+    if not batch_request.stream:
+        started = time.monotonic()
+        try:
+            results = await engine_manager.get_batch_moves(
+                batch_request.engine, positions, batch_request.depth, **kwargs
+            )
+        except ValueError as e:
+            logger.warning(f"Error de validación en lote: {e}")
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error analizando lote: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        return {"results": results, **summary(results, started)}
+    
+    async def events():
+        started = time.monotonic()
+        results = []
+        yield json.dumps({"type": "start", "engine": batch_request.engine, "positions": len(positions)}) + "\n"
+        
+        try:
+            async for result in engine_manager.iter_batch_moves(
+                batch_request.engine, positions, batch_request.depth, **kwargs
+            ):
+                results.append(result)
+                yield json.dumps({"type": "result", **result}, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.error(f"Error analizando lote (stream): {e}")
+            yield json.dumps({"type": "error", "detail": str(e)}, ensure_ascii=False) + "\n"
+        
+        yield json.dumps({"type": "summary", **summary(results, started)}) + "\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/analyze/game")
+async def analyze_game(game_request: AnalyzeGameRequest):
+    """
+    Analiza una partida jugada a jugada con un motor.
+    El motor recibe cada posición como continuación de la anterior ('position startpos moves ...'),
+    de modo que conserva su tabla hash entre jugadas.
+    
+    Con 'stream' (default, NDJSON):
+        {"type": "start", "engine", "plies"}
+        {"type": "ply", "ply", "move_number", "color", "move", "san", "fen", "bestmove", "best_san",
+         "eval_before", "eval_after", "cp_loss", "accuracy", "classification", "analysis"}
+        {"type": "summary", "engine", "plies", "white": {"acpl", "accuracy", ...}, "black": {...}}
+    Sin 'stream' devuelve {"plies": [...], "summary": {...}}.
+    Las evaluaciones van en centipeones desde el punto de vista de las blancas.
+    """
+    moves = game_request.moves.split() if isinstance(game_request.moves, str) else game_request.moves
+    try:
+        analyzer = engine_manager.prepare_game_analysis(
+            game_request.engine,
+            pgn=game_request.pgn,
+            moves=moves,
+            start_fen=game_request.start_fen,
+            depth=game_request.depth
+        )
+    except GameParseError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except EngineOverloadedError as e:
+        raise overloaded_error(e)
+    
+    if not game_request.stream:
+        try:
+            events = [event async for event in analyzer.run()]
+        except Exception as e:
+            logger.error(f"Error analizando partida: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        return {"plies": events[:-1], "summary": events[-1]}
+    
+    async def events():
+        yield json.dumps({"type": "start", "engine": game_request.engine, "plies": len(analyzer.moves)}) + "\n"
+        try:
+            async for event in analyzer.run():
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.error(f"Error analizando partida (stream): {e}")
+            yield json.dumps({"type": "error", "detail": str(e)}, ensure_ascii=False) + "\n"
+            yield json.dumps(analyzer.summary()) + "\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(job_request: JobRequest):
+    """
+    Crea un trabajo en segundo plano y devuelve su id sin esperar a que termine.
+    El progreso se consulta con GET /jobs/{id} o en streaming con GET /jobs/{id}/events.
+    """
+    try:
+        return await job_manager.submit(job_request.kind, job_request.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/jobs")
+async def list_jobs(
+    status: Optional[str] = Query(None, description=f"Filtrar por estado: {', '.join(JOB_STATES)}"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Lista los trabajos más recientes (sin resultados) y el estado de la cola.
+    """
+    if status and status not in JOB_STATES:
+        raise HTTPException(status_code=400, detail=f"Estado inválido: {status}. Válidos: {', '.join(JOB_STATES)}")
+    return {
+        "jobs": await job_manager.list_jobs(status, limit),
+        "queue": job_manager.get_stats()
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Estado, progreso y (si terminó) resultado de un trabajo.
+    """
+    try:
+        return await job_manager.get(job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Progreso de un trabajo en streaming (NDJSON), hasta que termina.
+    
+    Eventos (uno por línea):
+        {"type": "status", "id", "status", "progress", ...}  al conectar y en cada cambio de estado
+        {"type": "progress", "id", "done", "total", "item"}   por unidad terminada (jugada, posición...)
+    """
+    try:
+        await job_manager.get(job_id, include_result=False)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    
+    async def events():
+        async for event in job_manager.events(job_id):
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """
+    Cancela un trabajo pendiente o en curso. Los trabajos terminados no cambian.
+    """
+    try:
+        return await job_manager.cancel(job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+
+@app.websocket("/ws/game")
+async def game_session(websocket: WebSocket):
+    """
+    Partida con estado en el servidor. El cliente envía solo sus jugadas (UCI) y el
+    servidor valida cada una sobre su tablero y envía las respuestas de los motores.
+    Protocolo de mensajes en sessions/connection.py.
+    """
+    await websocket.accept()
+    connection = session_manager.connect(websocket.send_json)
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                await connection.send({"type": "error", "detail": "Mensaje JSON inválido"})
+                continue
+            if not await connection.handle(message):
+                await websocket.close()
+                break
+    except WebSocketDisconnect:
+        logger.debug("Cliente de partida desconectado")
+    finally:
+        # La sesión se conserva para reanudarla con 'resume' hasta que expire
+        await connection.close()
+
+
+@app.get("/sessions")
+async def get_sessions():
+    """Sesiones de partida activas y descartadas (LRU e inactividad)"""
+    return session_manager.get_stats()
+
+
+@app.post("/matches", status_code=202)
+async def create_match(match_request: MatchRequest):
+    """
+    Pone en marcha una partida motor contra motor y devuelve su estado sin esperar a que termine.
+    Las jugadas se siguen con GET /matches/{id}/events.
+    """
+    try:
+        match = await match_runner.create(
+            white=match_request.white,
+            black=match_request.black,
+            time_control=match_request.time_control,
+            depth=match_request.depth,
+            fen=match_request.fen,
+            adjudication=match_request.adjudication,
+            moves=match_request.moves
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return match.state(include_moves=False)
+
+
+@app.get("/matches")
+async def list_matches(
+    status: Optional[str] = Query(None, description=f"Filtrar por estado: {', '.join(MATCH_STATES)}")
+):
+    """
+    Lista las partidas (sin jugadas), las más recientes primero.
+    """
+    if status and status not in MATCH_STATES:
+        raise HTTPException(status_code=400, detail=f"Estado inválido: {status}. Válidos: {', '.join(MATCH_STATES)}")
+    return {
+        "matches": await match_runner.list_matches(status),
+        "runner": match_runner.get_stats()
+    }
+
+
+@app.get("/matches/{match_id}")
+async def get_match(match_id: str):
+    """
+    Estado, reloj, jugadas y PGN de una partida.
+    """
+    try:
+        return (await match_runner.get(match_id)).state()
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+
+@app.get("/matches/{match_id}/events")
+async def stream_match_events(match_id: str):
+    """
+    Retransmisión de una partida en streaming (NDJSON), hasta que termina.
+    Cualquier número de espectadores puede seguir la misma partida.
+    
+    Eventos (uno por línea):
+        {"type": "state", ...}   al conectar: estado completo con las jugadas ya hechas
+        {"type": "status", ...}  la partida empieza (si estaba en cola)
+        {"type": "move", "ply", "move", "san", "color", "engine", "fen", "elapsed_ms", "clock", "analysis"}
+        {"type": "end", "result", "termination", "winner", "pgn"}
+    """
+    try:
+        await match_runner.get(match_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    
+    async def events():
+        async for event in match_runner.events(match_id):
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/matches/{match_id}/stop")
+async def stop_match(match_id: str):
+    """
+    Detiene una partida en curso (queda sin resultado). Las terminadas no cambian.
+    """
+    try:
+        match = await match_runner.stop(match_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    return match.state(include_moves=False)
+
+
+@app.post("/tournaments", status_code=202)
+async def create_tournament(tournament_request: TournamentRequest):
+    """
+    Encola un torneo como trabajo en segundo plano (kind 'tournament') y devuelve el trabajo.
+    El progreso (una entrada por partida) se sigue con GET /jobs/{id}/events y el resultado
+    (clasificación, Elo por enfrentamiento, SPRT) con GET /jobs/{id}.
+    """
+    try:
+        return await job_manager.submit("tournament", tournament_request.model_dump(exclude_unset=True))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/tournaments/{job_id}/pgn", response_class=PlainTextResponse)
+async def get_tournament_pgn(job_id: str):
+    """
+    Partidas terminadas de un torneo en PGN (también mientras se juega).
+    """
+    try:
+        job = await job_manager.get(job_id, include_result=False)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    if job["kind"] != "tournament":
+        raise HTTPException(status_code=400, detail=f"El trabajo {job_id} no es un torneo")
+    return await asyncio.to_thread(read_tournament_pgn, job_id)
+
+
 @app.get("/strategies")
 async def get_strategies():
     """
     Obtiene la lista de estrategias disponibles para motores generativos.
     """
+    from engines.generative import get_valid_strategies, get_strategy_info
     try:
         valid_strategies = get_valid_strategies()
         strategies_info = {}
@@ -422,34 +1041,18 @@ async def compare_engines(compare_request: CompareRequest):
     Compara las sugerencias de todos los motores disponibles para una posición.
     """
     try:
-        # Obtener resultados como diccionario {engine_name: move}
-        results_dict = await engine_manager.compare_engines(
-            compare_request.fen,
-            compare_request.depth
-        )
+        # Cada resultado trae su propia explicación y análisis
+        results = {
+            result["engine"]: result
+            async for result in engine_manager.iter_compare_results(
+                compare_request.fen,
+                compare_request.depth,
+                compare_request.timeout
+            )
+        }
         
-        # Convertir diccionario a array de objetos con formato estándar
-        results_array = []
-        for engine_name, bestmove in results_dict.items():
-            result_item = {
-                "engine": engine_name,
-                "bestmove": bestmove,
-                "explanation": None
-            }
-            
-            # Intentar obtener explicación si el motor la tiene disponible
-            # (principalmente para motores generativos)
-            try:
-                engine = engine_manager.get_engine(engine_name)
-                if hasattr(engine, 'get_last_explanation'):
-                    explanation = engine.get_last_explanation()
-                    if explanation:
-                        result_item["explanation"] = explanation
-            except Exception as e:
-                # Si no se puede obtener explicación, continuar sin ella
-                logger.debug(f"No se pudo obtener explicación para {engine_name}: {e}")
-            
-            results_array.append(result_item)
+        # Mantener el orden de configuración
+        results_array = [results[name] for name in engine_manager.list_engines() if name in results]
         
         return {
             "fen": compare_request.fen,
@@ -461,25 +1064,63 @@ async def compare_engines(compare_request: CompareRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/compare/stream")
+async def compare_engines_stream(compare_request: CompareRequest):
+    """
+    Variante progresiva de /compare (NDJSON): un evento por motor en cuanto termina.
+    
+    Eventos (uno por línea):
+        {"type": "start", "fen", "engines"}
+        {"type": "result", "engine", "bestmove", "status", "explanation", "analysis", "source", "elapsed_ms"}
+        {"type": "summary", "fen", "engines_compared", "completed", "timeouts", "errors", "elapsed_ms"}
+    """
+    fen = compare_request.fen
+    
+    async def events():
+        started = time.monotonic()
+        counts = {"ok": 0, "timeout": 0, "error": 0, "unavailable": 0}
+        yield json.dumps({"type": "start", "fen": fen, "engines": engine_manager.list_engines()}) + "\n"
+        
+        try:
+            async for result in engine_manager.iter_compare_results(fen, compare_request.depth, compare_request.timeout):
+                counts[result["status"]] += 1
+                yield json.dumps({"type": "result", **result}, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.error(f"Error comparando motores (stream): {e}")
+            yield json.dumps({"type": "error", "detail": str(e)}, ensure_ascii=False) + "\n"
+        
+        yield json.dumps({
+            "type": "summary",
+            "fen": fen,
+            "engines_compared": sum(counts.values()),
+            "completed": counts["ok"],
+            "timeouts": counts["timeout"],
+            "errors": counts["error"],
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1)
+        }) + "\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/reload")
 async def reload_configuration():
     """
-    Recarga la configuración de motores desde el archivo YAML.
+    Recarga la configuración de motores desde los archivos YAML sin cortar el servicio.
+    Solo se reemplazan los motores cuya configuración ha cambiado: los demás conservan
+    sus procesos y conexiones, y los reemplazados terminan sus peticiones antes de cerrarse.
+    Con CONFIG_WATCH_INTERVAL la recarga se hace sola al modificar los archivos.
     """
     try:
-        # Limpiar motores actuales
-        await engine_manager.cleanup_all()
-        
-        # Recargar configuración
-        engine_manager.reload_config()
-        
-        # Relanzar verificación de disponibilidad en background
-        asyncio.create_task(engine_manager.check_all_availability())
-        
+        diff = await engine_manager.reload_config()
         return {
             "status": "success",
             "message": "Configuración recargada",
-            "engines_loaded": len(engine_manager)
+            "engines_loaded": len(engine_manager),
+            **diff
         }
     except Exception as e:
         logger.error(f"Error recargando configuración: {e}")
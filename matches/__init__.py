@@ -0,0 +1,32 @@
+"""
+Partidas motor contra motor jugadas en el servidor.
+Con reloj, adjudicación (tablas Syzygy, abandono, tablas) y retransmisión a espectadores,
+y torneos (round_robin, gauntlet) con Elo y SPRT.
+"""
+
+from .adjudication import Adjudicator, DEFAULT_ADJUDICATION, open_tablebase
+from .clock import TimeControl, GameClock, DEFAULT_TIME_CONTROL
+from .runner import Match, MatchRunner, MATCH_STATES, FINISHED_STATES
+from .openings import DEFAULT_OPENINGS, parse_openings
+from .stats import SPRT, elo_estimate
+from .tournament import Tournament, TOURNAMENT_FORMATS, read_tournament_pgn
+
+__all__ = [
+    'Match',
+    'MatchRunner',
+    'MATCH_STATES',
+    'FINISHED_STATES',
+    'Adjudicator',
+    'DEFAULT_ADJUDICATION',
+    'open_tablebase',
+    'TimeControl',
+    'GameClock',
+    'DEFAULT_TIME_CONTROL',
+    'Tournament',
+    'TOURNAMENT_FORMATS',
+    'read_tournament_pgn',
+    'DEFAULT_OPENINGS',
+    'parse_openings',
+    'SPRT',
+    'elo_estimate',
+]
@@ -0,0 +1,162 @@
+"""
+Adjudicación de partidas entre motores.
+Termina antes las partidas cuyo resultado ya está decidido: por tablas de finales
+Syzygy, por abandono (ambos motores coinciden en una ventaja decisiva durante varias
+jugadas), por tablas (evaluación cercana a 0 en ambos motores) o por longitud máxima.
+"""
+
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import chess
+import chess.syzygy
+
+logger = logging.getLogger(__name__)
+
+# Umbrales por defecto (sobrescribibles por partida con 'adjudication')
+DEFAULT_ADJUDICATION: Dict[str, Any] = {
+    "resign_score": 700,       # Centipeones de ventaja para abandonar
+    "resign_moves": 3,         # Jugadas seguidas de cada motor por encima del umbral (0 = desactivado)
+    "draw_score": 10,          # Centipeones máximos (en valor absoluto) para tablas
+    "draw_moves": 8,           # Jugadas seguidas de cada motor dentro del umbral (0 = desactivado)
+    "draw_move_number": 40,    # Jugada a partir de la que se adjudican tablas
+    "max_moves": 200,          # Jugadas completas antes de declarar tablas (0 = sin límite)
+    "tablebase": True,         # Consultar las tablas Syzygy de MATCH_SYZYGY_PATH
+}
+
+# Puntuación equivalente a un mate (el mate siempre supera cualquier umbral)
+MATE_SCORE = 100000
+
+RESULTS = {chess.WHITE: "1-0", chess.BLACK: "0-1", None: "1/2-1/2"}
+COLOR_NAMES = {chess.WHITE: "white", chess.BLACK: "black"}
+
+_tablebases: Dict[str, Optional[chess.syzygy.Tablebase]] = {}
+
+
+def outcome_dict(winner: Optional[bool], termination: str) -> Dict[str, Any]:
+    """Resultado de una partida: {"result", "termination", "winner"}"""
+    return {
+        "result": RESULTS[winner],
+        "termination": termination,
+        "winner": COLOR_NAMES[winner] if winner is not None else None,
+    }
+
+
+def open_tablebase(path: Optional[str] = None) -> Optional[chess.syzygy.Tablebase]:
+    """
+    Tablas Syzygy del directorio indicado (default: MATCH_SYZYGY_PATH), abiertas una vez por proceso.
+
+    Returns:
+        Tablas abiertas o None si no hay tablas configuradas o no se pueden abrir
+    """
+    path = path or os.getenv("MATCH_SYZYGY_PATH")
+    if not path:
+        return None
+    if path not in _tablebases:
+        try:
+            _tablebases[path] = chess.syzygy.open_tablebase(path)
+            logger.info(f"Tablas Syzygy cargadas desde {path}")
+        except Exception as e:
+            logger.warning(f"No se pudieron abrir las tablas Syzygy de {path}: {e}")
+            _tablebases[path] = None
+    return _tablebases[path]
+
+
+class Adjudicator:
+    """Sigue las evaluaciones de una partida y decide si se puede dar por terminada"""
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None, tablebase: Optional[chess.syzygy.Tablebase] = None):
+        """
+        Args:
+            options: Umbrales (ver DEFAULT_ADJUDICATION); los que falten toman el valor por defecto
+            tablebase: Tablas Syzygy abiertas (ver open_tablebase) o None
+
+        Raises:
+            ValueError: Si una opción no existe o no es numérica
+        """
+        options = options or {}
+        unknown = set(options) - set(DEFAULT_ADJUDICATION)
+        if unknown:
+            raise ValueError(
+                f"Opciones de adjudicación desconocidas: {', '.join(sorted(unknown))}. "
+                f"Válidas: {', '.join(DEFAULT_ADJUDICATION)}"
+            )
+        self.options = dict(DEFAULT_ADJUDICATION)
+        for key, value in options.items():
+            if key == "tablebase":
+                self.options[key] = bool(value)
+            elif isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f"La opción de adjudicación '{key}' debe ser un número >= 0")
+            else:
+                self.options[key] = int(value)
+
+        self.tablebase = tablebase if self.options["tablebase"] else None
+        # Evaluaciones desde el punto de vista de las blancas, por bando que movió (None = sin evaluación)
+        self._scores: Dict[bool, List[Optional[int]]] = {chess.WHITE: [], chess.BLACK: []}
+
+    @staticmethod
+    def score_of(analysis: Optional[Dict[str, Any]]) -> Optional[int]:
+        """Puntuación en centipeones desde el punto de vista del motor (mate = ±MATE_SCORE)"""
+        if not analysis:
+            return None
+        if analysis.get("mate") is not None:
+            return MATE_SCORE if analysis["mate"] > 0 else -MATE_SCORE
+        return analysis.get("score_cp")
+
+    def record(self, color: bool, analysis: Optional[Dict[str, Any]]) -> None:
+        """
+        Registra la evaluación que dio el motor de 'color' al hacer su jugada.
+
+        Args:
+            color: Bando que acaba de mover
+            analysis: Análisis de la búsqueda (score_cp o mate, desde el punto de vista del motor)
+        """
+        score = self.score_of(analysis)
+        if score is not None and color == chess.BLACK:
+            score = -score
+        self._scores[color].append(score)
+
+    def _streak(self, count: int, predicate) -> bool:
+        """Las últimas 'count' evaluaciones de ambos bandos cumplen 'predicate'"""
+        if count <= 0:
+            return False
+        for scores in self._scores.values():
+            recent = scores[-count:]
+            if len(recent) < count or any(score is None or not predicate(score) for score in recent):
+                return False
+        return True
+
+    def check(self, board: chess.Board) -> Optional[Dict[str, Any]]:
+        """
+        Comprueba si la partida se puede adjudicar en la posición actual.
+
+        Returns:
+            Resultado (ver outcome_dict) o None si la partida debe seguir
+        """
+        options = self.options
+
+        if self.tablebase is not None and not board.castling_rights \
+                and chess.popcount(board.occupied) <= chess.syzygy.TBPIECES:
+            try:
+                wdl = self.tablebase.probe_wdl(board)
+            except (KeyError, IndexError):
+                wdl = None
+            if wdl is not None:
+                # ±1: victoria o derrota que la regla de las 50 jugadas convierte en tablas
+                winner = None if abs(wdl) < 2 else (board.turn if wdl > 0 else not board.turn)
+                return outcome_dict(winner, "tablebase")
+
+        resign = options["resign_score"]
+        if self._streak(options["resign_moves"], lambda score: score >= resign):
+            return outcome_dict(chess.WHITE, "resignation")
+        if self._streak(options["resign_moves"], lambda score: score <= -resign):
+            return outcome_dict(chess.BLACK, "resignation")
+
+        if board.fullmove_number >= options["draw_move_number"] \
+                and self._streak(options["draw_moves"], lambda score: abs(score) <= options["draw_score"]):
+            return outcome_dict(None, "adjudicated_draw")
+
+        if options["max_moves"] and board.fullmove_number > options["max_moves"]:
+            return outcome_dict(None, "max_moves")
+        return None
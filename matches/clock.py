@@ -0,0 +1,98 @@
+"""
+Control de tiempo de las partidas entre motores.
+El tiempo se descuenta con el reloj del servidor (sin la espera de instancia) y los
+motores UCI reciben el reloj en 'go wtime/btime/winc/binc' para administrarlo ellos.
+"""
+
+from typing import Dict
+
+import chess
+
+# Control de tiempo por defecto: tiempo base + incremento por jugada, en segundos
+DEFAULT_TIME_CONTROL = "60+0.6"
+# Milisegundos que un motor puede pasarse de su tiempo antes de perder (latencia de IPC/red)
+DEFAULT_TIME_MARGIN_MS = 100
+
+
+class TimeControl:
+    """Tiempo base e incremento por jugada, en segundos (formato "base+incremento")"""
+
+    def __init__(self, base: float, increment: float = 0.0):
+        """
+        Args:
+            base: Segundos iniciales de cada bando
+            increment: Segundos que se suman tras cada jugada
+        """
+        if base <= 0 or increment < 0:
+            raise ValueError("El control de tiempo requiere base > 0 e incremento >= 0")
+        self.base = float(base)
+        self.increment = float(increment)
+
+    @classmethod
+    def parse(cls, text: str) -> "TimeControl":
+        """
+        Parsea un control de tiempo ("60+0.6", "300", "180+2").
+
+        Raises:
+            ValueError: Si el formato no es válido
+        """
+        base, _, increment = str(text).strip().partition("+")
+        try:
+            return cls(float(base), float(increment or 0))
+        except ValueError:
+            raise ValueError(f"Control de tiempo inválido: '{text}' (formato: base+incremento en segundos)")
+
+    def __str__(self) -> str:
+        return f"{self.base:g}+{self.increment:g}"
+
+
+class GameClock:
+    """Tiempo restante de cada bando durante una partida"""
+
+    def __init__(self, time_control: TimeControl, margin_ms: int = DEFAULT_TIME_MARGIN_MS):
+        """
+        Args:
+            time_control: Control de tiempo de la partida
+            margin_ms: Exceso tolerado antes de perder por tiempo
+        """
+        self.time_control = time_control
+        self.margin_ms = margin_ms
+        self.increment_ms = round(time_control.increment * 1000)
+        self.remaining: Dict[bool, float] = {
+            chess.WHITE: time_control.base * 1000,
+            chess.BLACK: time_control.base * 1000,
+        }
+
+    def uci(self) -> Dict[str, int]:
+        """Reloj para 'go' de UCI (kwarg 'clock' de get_best_move)"""
+        return {
+            "wtime": max(0, int(self.remaining[chess.WHITE])),
+            "btime": max(0, int(self.remaining[chess.BLACK])),
+            "winc": self.increment_ms,
+            "binc": self.increment_ms,
+        }
+
+    def timeout(self, color: bool) -> float:
+        """Segundos que puede pensar el bando antes de perder por tiempo"""
+        return max(0.0, self.remaining[color] + self.margin_ms) / 1000
+
+    def charge(self, color: bool, elapsed_ms: float) -> bool:
+        """
+        Descuenta el tiempo de una jugada y suma el incremento.
+
+        Returns:
+            False si el bando se quedó sin tiempo (más allá del margen)
+        """
+        self.remaining[color] -= elapsed_ms
+        if self.remaining[color] < -self.margin_ms:
+            self.remaining[color] = 0
+            return False
+        self.remaining[color] = max(0.0, self.remaining[color]) + self.increment_ms
+        return True
+
+    def to_dict(self) -> Dict[str, int]:
+        """Tiempo restante en milisegundos por bando"""
+        return {
+            "white_ms": int(self.remaining[chess.WHITE]),
+            "black_ms": int(self.remaining[chess.BLACK]),
+        }
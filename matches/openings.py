@@ -0,0 +1,100 @@
+"""
+Aperturas para torneos.
+Cada apertura se juega por parejas (una partida con cada color), de modo que la ventaja
+de la apertura se compensa y los resultados de la pareja se pueden analizar juntos.
+"""
+
+from typing import Any, Dict, List, Optional, Union
+
+import chess
+
+# Aperturas por defecto: líneas equilibradas y variadas (jugadas UCI desde la posición inicial)
+DEFAULT_OPENINGS = [
+    ("Ruy Lopez", "e2e4 e7e5 g1f3 b8c6 f1b5 a7a6"),
+    ("Italiana", "e2e4 e7e5 g1f3 b8c6 f1c4 f8c5"),
+    ("Siciliana Najdorf", "e2e4 c7c5 g1f3 d7d6 d2d4 c5d4 f3d4 g8f6 b1c3 a7a6"),
+    ("Francesa", "e2e4 e7e6 d2d4 d7d5 b1c3 g8f6"),
+    ("Caro-Kann", "e2e4 c7c6 d2d4 d7d5 b1c3 d5e4 c3e4"),
+    ("Gambito de dama rehusado", "d2d4 d7d5 c2c4 e7e6 b1c3 g8f6"),
+    ("Eslava", "d2d4 d7d5 c2c4 c7c6 g1f3 g8f6"),
+    ("Nimzoindia", "d2d4 g8f6 c2c4 e7e6 b1c3 f8b4"),
+    ("India de rey", "d2d4 g8f6 c2c4 g7g6 b1c3 f8g7 e2e4 d7d6"),
+    ("Inglesa", "c2c4 e7e5 b1c3 g8f6 g1f3 b8c6"),
+    ("Réti", "g1f3 d7d5 g2g3 g8f6 f1g2 e7e6"),
+    ("Escocesa", "e2e4 e7e5 g1f3 b8c6 d2d4 e5d4 f3d4"),
+]
+
+# Aperturas máximas por torneo
+MAX_OPENINGS = 500
+
+
+def _parse_opening(text: str, index: int) -> Dict[str, Any]:
+    """
+    Parsea una apertura: FEN/EPD (contiene '/') o jugadas UCI/SAN desde la posición inicial.
+
+    Returns:
+        {"name", "fen" (None = posición inicial), "moves" (UCI)}
+    """
+    text = text.strip()
+    if "/" in text:
+        try:
+            board = chess.Board(text)
+            name = f"Posición {index}"
+        except ValueError:
+            try:
+                board, ops = chess.Board.from_epd(text)
+            except ValueError as e:
+                raise ValueError(f"Apertura {index}: posición inválida: {e}")
+            name = str(ops.get("id", f"Posición {index}"))
+        if board.is_game_over():
+            raise ValueError(f"Apertura {index}: la posición ya está terminada")
+        return {"name": name, "fen": board.fen(), "moves": []}
+
+    board = chess.Board()
+    for token in text.split():
+        # Admite números de jugada de PGN ("1.", "2...")
+        if token.rstrip(".").isdigit() or token.endswith("."):
+            continue
+        try:
+            move = board.parse_uci(token)
+        except ValueError:
+            try:
+                move = board.parse_san(token)
+            except ValueError:
+                raise ValueError(f"Apertura {index}: jugada inválida '{token}'")
+        board.push(move)
+    if board.is_game_over():
+        raise ValueError(f"Apertura {index}: la posición ya está terminada")
+    return {"name": text, "fen": None, "moves": [move.uci() for move in board.move_stack]}
+
+
+def parse_openings(openings: Optional[Union[str, List[str]]] = None) -> List[Dict[str, Any]]:
+    """
+    Normaliza las aperturas de un torneo.
+
+    Args:
+        openings: Lista de aperturas o texto con una por línea. Cada una es una FEN/EPD o
+                  una secuencia de jugadas (UCI o SAN) desde la posición inicial.
+                  None usa DEFAULT_OPENINGS
+
+    Returns:
+        Lista de {"name", "fen", "moves"}
+
+    Raises:
+        ValueError: Si alguna apertura no es válida o hay demasiadas
+    """
+    if openings is None:
+        return [
+            {"name": name, "fen": None, "moves": moves.split()}
+            for name, moves in DEFAULT_OPENINGS
+        ]
+
+    lines = openings.splitlines() if isinstance(openings, str) else openings
+    if not isinstance(lines, list):
+        raise ValueError("'openings' debe ser una lista o un texto con una apertura por línea")
+    lines = [line for line in lines if isinstance(line, str) and line.strip()]
+    if not lines:
+        raise ValueError("'openings' no contiene ninguna apertura")
+    if len(lines) > MAX_OPENINGS:
+        raise ValueError(f"Demasiadas aperturas: {len(lines)} (máximo {MAX_OPENINGS})")
+    return [_parse_opening(line, index) for index, line in enumerate(lines, start=1)]
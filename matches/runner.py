@@ -0,0 +1,429 @@
+"""
+Partidas motor contra motor jugadas en el servidor.
+El servidor juega la partida completa a la velocidad de los motores (sin una petición
+HTTP ni un render del navegador por jugada), con reloj, adjudicación y retransmisión
+de las jugadas a cualquier número de espectadores.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+import chess
+import chess.pgn
+
+from engines import EngineOverloadedError, normalize_fen
+from sessions import game_kwargs
+
+from .adjudication import COLOR_NAMES, Adjudicator, open_tablebase, outcome_dict
+from .clock import DEFAULT_TIME_MARGIN_MS, GameClock, TimeControl
+
+if TYPE_CHECKING:
+    from engine_manager import EngineManager
+
+logger = logging.getLogger(__name__)
+
+# Estados de una partida
+MATCH_STATES = ("queued", "running", "finished", "stopped")
+FINISHED_STATES = ("finished", "stopped")
+
+# Configuración por defecto (sobrescribible con MATCHES_MAX_RUNNING)
+DEFAULT_MAX_RUNNING = 4
+# Partidas terminadas que se conservan en memoria para consultarlas
+MAX_FINISHED_MATCHES = 200
+# Las partidas llevan reloj: su búsqueda no se interrumpe, pero cede el turno a las interactivas
+MATCH_PRIORITY = "compare"
+# Segundos de espera de instancia tolerados además del tiempo del reloj
+QUEUE_ALLOWANCE = 10.0
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class MatchForfeit(Exception):
+    """Un motor pierde la partida por tiempo, jugada ilegal o error"""
+
+    def __init__(self, termination: str, detail: str):
+        """
+        Args:
+            termination: Motivo (time_forfeit, illegal_move, engine_error)
+            detail: Descripción legible
+        """
+        self.termination = termination
+        super().__init__(detail)
+
+
+class Match:
+    """Partida entre dos motores: tablero, reloj, adjudicación y espectadores"""
+
+    def __init__(
+        self,
+        match_id: str,
+        white: str,
+        black: str,
+        board: chess.Board,
+        time_control: Optional[TimeControl],
+        depth: Optional[int],
+        adjudicator: Adjudicator,
+        time_margin_ms: int = DEFAULT_TIME_MARGIN_MS
+    ):
+        """
+        Args:
+            match_id: Identificador de la partida
+            white: Motor de las blancas
+            black: Motor de las negras
+            board: Posición inicial (con las jugadas de apertura ya aplicadas)
+            time_control: Control de tiempo (None = sin reloj, búsqueda a 'depth')
+            depth: Profundidad por jugada si no hay reloj
+            adjudicator: Adjudicación de la partida
+            time_margin_ms: Exceso de tiempo tolerado por jugada
+        """
+        self.id = match_id
+        self.players: Dict[bool, str] = {chess.WHITE: white, chess.BLACK: black}
+        self.board = board
+        self.start_fen = board.root().fen()
+        self.opening = [move.uci() for move in board.move_stack]
+        self.time_control = time_control
+        self.depth = depth
+        self.clock = GameClock(time_control, time_margin_ms) if time_control else None
+        self.adjudicator = adjudicator
+
+        self.status = "queued"
+        self.outcome: Optional[Dict[str, Any]] = None
+        self.moves: List[Dict[str, Any]] = []
+        self.created_at = _now()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        # Se activa al terminar (ver MatchRunner.wait)
+        self.done = asyncio.Event()
+        self._subscribers: List[asyncio.Queue] = []
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Envía un evento a los espectadores"""
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    def pgn(self, headers: Optional[Dict[str, str]] = None) -> str:
+        """
+        Partida en PGN con los motores, el control de tiempo y la terminación.
+
+        Args:
+            headers: Cabeceras adicionales (p. ej. Event y Round de un torneo)
+        """
+        game = chess.pgn.Game.from_board(self.board)
+        game.headers["Event"] = "Chess Trainer match"
+        game.headers["Date"] = self.created_at[:10].replace("-", ".")
+        game.headers["White"] = self.players[chess.WHITE]
+        game.headers["Black"] = self.players[chess.BLACK]
+        game.headers["Result"] = self.outcome["result"] if self.outcome else "*"
+        game.headers["TimeControl"] = str(self.time_control) if self.time_control else "-"
+        if self.outcome:
+            game.headers["Termination"] = self.outcome["termination"]
+        game.headers.update(headers or {})
+        return str(game)
+
+    def state(self, include_moves: bool = True) -> Dict[str, Any]:
+        """
+        Estado de la partida para la API.
+
+        Args:
+            include_moves: Incluir las jugadas y el PGN (para espectadores que se unen a mitad)
+        """
+        state = {
+            "id": self.id,
+            "white": self.players[chess.WHITE],
+            "black": self.players[chess.BLACK],
+            "status": self.status,
+            "start_fen": self.start_fen,
+            "opening": self.opening,
+            "fen": self.board.fen(),
+            "ply": len(self.board.move_stack),
+            "time_control": str(self.time_control) if self.time_control else None,
+            "depth": self.depth,
+            "clock": self.clock.to_dict() if self.clock else None,
+            "outcome": self.outcome,
+            "adjudication": self.adjudicator.options,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if include_moves:
+            state["moves"] = self.moves
+            state["pgn"] = self.pgn()
+        return state
+
+
+class MatchRunner:
+    """
+    Partidas motor contra motor en curso y terminadas recientemente.
+    Cada partida se juega en su propia tarea; como máximo max_running a la vez,
+    las demás esperan en orden de llegada.
+    """
+
+    def __init__(self, engine_manager: "EngineManager", max_running: Optional[int] = None):
+        """
+        Args:
+            engine_manager: Gestor de motores que juega las partidas
+            max_running: Partidas simultáneas (default: MATCHES_MAX_RUNNING o 4)
+        """
+        self.engine_manager = engine_manager
+        self.max_running = max_running or int(os.getenv("MATCHES_MAX_RUNNING", DEFAULT_MAX_RUNNING))
+        self._slots = asyncio.Semaphore(self.max_running)
+        self._matches: "OrderedDict[str, Match]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def create(
+        self,
+        white: str,
+        black: str,
+        time_control: Optional[str] = None,
+        depth: Optional[int] = None,
+        fen: Optional[str] = None,
+        adjudication: Optional[Dict[str, Any]] = None,
+        time_margin_ms: int = DEFAULT_TIME_MARGIN_MS,
+        moves: Optional[List[str]] = None
+    ) -> Match:
+        """
+        Crea una partida y la pone en marcha.
+
+        Args:
+            white: Motor de las blancas
+            black: Motor de las negras
+            time_control: Control de tiempo "base+incremento" en segundos (None = sin reloj)
+            depth: Profundidad por jugada (sin reloj, o motores sin control de tiempo)
+            fen: Posición inicial (default: posición inicial estándar)
+            adjudication: Umbrales de adjudicación (ver DEFAULT_ADJUDICATION)
+            time_margin_ms: Exceso de tiempo tolerado por jugada
+            moves: Jugadas de apertura (UCI) desde 'fen' antes de que jueguen los motores
+
+        Raises:
+            ValueError: Si un motor no existe, el control de tiempo, la adjudicación o las jugadas
+                        de apertura no son válidos
+            InvalidFENError: Si la FEN no es válida
+        """
+        for name in (white, black):
+            self.engine_manager.get_engine(name)
+        parsed_time_control = TimeControl.parse(time_control) if time_control else None
+        if parsed_time_control is None and depth is None:
+            raise ValueError("La partida necesita 'time_control' o 'depth'")
+        board = chess.Board(normalize_fen(fen, require_moves=True)) if fen else chess.Board()
+        for uci in moves or []:
+            board.push(board.parse_uci(uci))
+        adjudicator = Adjudicator(adjudication, open_tablebase())
+
+        match = Match(
+            uuid.uuid4().hex[:16], white, black, board,
+            parsed_time_control, depth, adjudicator, time_margin_ms
+        )
+        self._matches[match.id] = match
+        self._tasks[match.id] = asyncio.create_task(self._run(match))
+        self._discard_finished()
+        logger.info(f"Partida {match.id} creada: {white} vs {black} ({parsed_time_control or f'depth {depth}'})")
+        return match
+
+    async def get(self, match_id: str) -> Match:
+        """
+        Partida por id.
+
+        Raises:
+            KeyError: Si no existe o ya se descartó
+        """
+        match = self._matches.get(match_id)
+        if match is None:
+            raise KeyError(f"Partida '{match_id}' no encontrada")
+        return match
+
+    async def list_matches(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Partidas más recientes primero (sin jugadas)"""
+        return [
+            match.state(include_moves=False)
+            for match in reversed(self._matches.values())
+            if status is None or match.status == status
+        ]
+
+    async def wait(self, match_id: str) -> Match:
+        """Espera a que termine una partida"""
+        match = await self.get(match_id)
+        await match.done.wait()
+        return match
+
+    async def stop(self, match_id: str) -> Match:
+        """
+        Detiene una partida en curso (queda sin resultado, '*').
+
+        Raises:
+            KeyError: Si la partida no existe
+        """
+        match = await self.get(match_id)
+        task = self._tasks.get(match_id)
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return match
+
+    async def events(self, match_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Retransmisión de una partida: su estado completo y después cada evento hasta que termina.
+
+        Raises:
+            KeyError: Si la partida no existe
+        """
+        match = await self.get(match_id)
+        if match.status in FINISHED_STATES:
+            yield {"type": "state", **match.state()}
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        match._subscribers.append(queue)
+        try:
+            yield {"type": "state", **match.state()}
+            while True:
+                event = await queue.get()
+                yield event
+                if event["type"] == "end":
+                    return
+        finally:
+            match._subscribers.remove(queue)
+
+    async def shutdown(self) -> None:
+        """Detiene todas las partidas en curso"""
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Partidas por estado"""
+        by_status = {status: 0 for status in MATCH_STATES}
+        for match in self._matches.values():
+            by_status[match.status] += 1
+        return {"max_running": self.max_running, **by_status}
+
+    def _discard_finished(self) -> None:
+        """Descarta las partidas terminadas más antiguas por encima de MAX_FINISHED_MATCHES"""
+        finished = [match_id for match_id, match in self._matches.items() if match.status in FINISHED_STATES]
+        for match_id in finished[:max(0, len(finished) - MAX_FINISHED_MATCHES)]:
+            del self._matches[match_id]
+            self._tasks.pop(match_id, None)
+
+    async def _run(self, match: Match) -> None:
+        """Juega la partida cuando hay hueco y publica cada jugada"""
+        try:
+            async with self._slots:
+                match.status = "running"
+                match.started_at = _now()
+                match.publish({"type": "status", **match.state(include_moves=False)})
+                logger.info(f"Partida {match.id} en curso")
+                outcome = await self._play(match)
+            self._finish(match, "finished", outcome)
+        except asyncio.CancelledError:
+            self._finish(match, "stopped", None)
+            raise
+        except Exception as e:
+            logger.error(f"Partida {match.id}: error inesperado: {e}")
+            self._finish(match, "stopped", None)
+
+    async def _play(self, match: Match) -> Dict[str, Any]:
+        """Alterna las jugadas de los motores hasta el final o la adjudicación"""
+        board = match.board
+        while True:
+            outcome = board.outcome(claim_draw=True)
+            if outcome is not None:
+                return outcome_dict(outcome.winner, outcome.termination.name.lower())
+            adjudicated = match.adjudicator.check(board)
+            if adjudicated is not None:
+                return adjudicated
+
+            color = board.turn
+            try:
+                event = await self._engine_move(match, color)
+            except MatchForfeit as e:
+                logger.info(f"Partida {match.id}: {match.players[color]} pierde ({e.termination}): {e}")
+                # Sin material para dar mate, el rival no puede ganar por tiempo
+                if e.termination == "time_forfeit" and board.has_insufficient_material(not color):
+                    return outcome_dict(None, "timeout_vs_insufficient_material")
+                return {**outcome_dict(not color, e.termination), "detail": str(e)}
+            match.moves.append(event)
+            match.publish(event)
+
+    async def _engine_move(self, match: Match, color: bool) -> Dict[str, Any]:
+        """
+        Pide la jugada al motor de 'color', descuenta su tiempo y la aplica.
+
+        Raises:
+            MatchForfeit: Si el motor se queda sin tiempo, juega una jugada ilegal o falla
+        """
+        board = match.board
+        engine_name = match.players[color]
+        engine = self.engine_manager.get_engine(engine_name)
+        kwargs = game_kwargs(board, match.start_fen, engine.motor_type)
+        # Afinidad por bando: en autopartidas cada color conserva su instancia
+        kwargs.update(priority=MATCH_PRIORITY, affinity=f"{match.id}:{COLOR_NAMES[color]}")
+        timeout = None
+        if match.clock:
+            kwargs["clock"] = match.clock.uci()
+            timeout = match.clock.timeout(color) + QUEUE_ALLOWANCE
+
+        while True:
+            started = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(
+                    self.engine_manager.get_best_move(
+                        engine_name, board.fen(), match.depth, use_cache=False, **dict(kwargs)
+                    ),
+                    timeout
+                )
+            except EngineOverloadedError as e:
+                # Saturación del motor: no cuenta en el reloj, reintentar cuando indique
+                logger.info(f"Partida {match.id}: {engine_name} saturado, reintento en {e.retry_after}s")
+                await asyncio.sleep(e.retry_after)
+                continue
+            except asyncio.TimeoutError:
+                raise MatchForfeit("time_forfeit", f"{engine_name} no respondió dentro de su tiempo")
+            except Exception as e:
+                raise MatchForfeit("engine_error", f"{engine_name} falló: {e}")
+            break
+
+        # El tiempo en cola esperando instancia no se descuenta del reloj
+        elapsed_ms = (time.perf_counter() - started) * 1000 - result.timings.get("queue_ms", 0)
+        if match.clock and not match.clock.charge(color, elapsed_ms):
+            raise MatchForfeit("time_forfeit", f"{engine_name} excedió su tiempo ({elapsed_ms:.0f}ms)")
+
+        try:
+            move = chess.Move.from_uci(result.move)
+        except ValueError:
+            move = None
+        if move is None or move not in board.legal_moves:
+            raise MatchForfeit("illegal_move", f"{engine_name} jugó una jugada ilegal: {result.move}")
+
+        san = board.san(move)
+        board.push(move)
+        match.adjudicator.record(color, result.analysis)
+        return {
+            "type": "move",
+            "match_id": match.id,
+            "ply": len(board.move_stack),
+            "move": move.uci(),
+            "san": san,
+            "color": COLOR_NAMES[color],
+            "engine": engine_name,
+            "fen": board.fen(),
+            "elapsed_ms": round(elapsed_ms, 1),
+            "clock": match.clock.to_dict() if match.clock else None,
+            "analysis": result.analysis,
+        }
+
+    def _finish(self, match: Match, status: str, outcome: Optional[Dict[str, Any]]) -> None:
+        """Marca la partida como terminada y avisa a los espectadores"""
+        match.status = status
+        match.outcome = outcome or {"result": "*", "termination": "stopped", "winner": None}
+        match.finished_at = _now()
+        match.done.set()
+        logger.info(f"Partida {match.id} {status}: {match.outcome['result']} ({match.outcome['termination']})")
+        match.publish({"type": "end", "match_id": match.id, **match.outcome, "pgn": match.pgn()})
@@ -0,0 +1,162 @@
+"""
+Estadística de resultados entre motores: Elo con intervalo de confianza y SPRT.
+Modelo logístico de Elo; el SPRT usa la aproximación GSPRT sobre la media y la varianza
+de las puntuaciones (por parejas de partidas con la misma apertura cuando se dispone de ellas).
+"""
+
+import math
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# z para un intervalo de confianza del 95%
+Z_95 = 1.959964
+# Puntuación mínima/máxima al convertir a Elo (evita infinitos con 0% o 100%)
+SCORE_EPSILON = 1e-3
+# Varianza mínima en el SPRT: con resultados idénticos (p. ej. todo victorias) la varianza
+# observada es 0 y el LLR no estaría definido; así hacen falta varias parejas para concluir
+MIN_VARIANCE = 0.01
+
+
+def score_from_elo(elo: float) -> float:
+    """Puntuación esperada con una diferencia de Elo dada"""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_from_score(score: float) -> float:
+    """Diferencia de Elo que corresponde a una puntuación (0..1)"""
+    score = min(max(score, SCORE_EPSILON), 1 - SCORE_EPSILON)
+    return -400 * math.log10(1 / score - 1)
+
+
+def _mean_variance(samples: Dict[float, int]) -> Tuple[int, float, float]:
+    """Número de muestras, media y varianza de una distribución {valor: frecuencia}"""
+    n = sum(samples.values())
+    if n == 0:
+        return 0, 0.0, 0.0
+    mean = sum(value * count for value, count in samples.items()) / n
+    variance = sum(count * (value - mean) ** 2 for value, count in samples.items()) / n
+    return n, mean, variance
+
+
+def elo_estimate(wins: int, draws: int, losses: int) -> Dict[str, Any]:
+    """
+    Elo de un resultado con su intervalo de confianza del 95%.
+
+    Args:
+        wins: Victorias
+        draws: Tablas
+        losses: Derrotas
+
+    Returns:
+        {"games", "score", "elo", "elo_error" (semiancho del intervalo), "los"
+         (probabilidad de ser superior)}; elo y elo_error son None sin partidas
+    """
+    n, mean, variance = _mean_variance({1.0: wins, 0.5: draws, 0.0: losses})
+    if n == 0:
+        return {"games": 0, "score": None, "elo": None, "elo_error": None, "los": None}
+
+    margin = Z_95 * math.sqrt(variance / n)
+    low, high = elo_from_score(mean - margin), elo_from_score(mean + margin)
+    decisive = wins + losses
+    los = 0.5 * (1 + math.erf((wins - losses) / math.sqrt(2 * decisive))) if decisive else 0.5
+    return {
+        "games": n,
+        "score": round(mean, 4),
+        "elo": round(elo_from_score(mean), 1) + 0.0,   # + 0.0: evita "-0.0"
+        "elo_error": round((high - low) / 2, 1),
+        "los": round(los, 4),
+    }
+
+
+def pair_samples(pair_points: Iterable[float]) -> Dict[float, int]:
+    """
+    Distribución pentanomial: puntos de cada pareja de partidas (0, 0.5, 1, 1.5, 2)
+    normalizados a puntuación por partida (0 .. 1).
+    """
+    samples: Dict[float, int] = {}
+    for points in pair_points:
+        samples[points / 2] = samples.get(points / 2, 0) + 1
+    return samples
+
+
+class SPRT:
+    """
+    Test secuencial de razón de probabilidades entre dos hipótesis de Elo.
+    H0: la diferencia es elo0; H1: es elo1. Se acepta una de las dos en cuanto el
+    LLR sale del intervalo [log(beta / (1 - alpha)), log((1 - beta) / alpha)].
+    """
+
+    def __init__(self, elo0: float = 0.0, elo1: float = 5.0, alpha: float = 0.05, beta: float = 0.05):
+        """
+        Args:
+            elo0: Diferencia de Elo de H0
+            elo1: Diferencia de Elo de H1 (mayor que elo0)
+            alpha: Probabilidad de aceptar H1 siendo cierta H0
+            beta: Probabilidad de aceptar H0 siendo cierta H1
+
+        Raises:
+            ValueError: Si los parámetros no son coherentes
+        """
+        if elo1 <= elo0:
+            raise ValueError("SPRT requiere elo1 > elo0")
+        if not (0 < alpha < 1 and 0 < beta < 1):
+            raise ValueError("SPRT requiere 0 < alpha < 1 y 0 < beta < 1")
+        self.elo0 = float(elo0)
+        self.elo1 = float(elo1)
+        self.alpha = float(alpha)
+        self.beta = float(beta)
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+
+    @classmethod
+    def from_params(cls, params: Optional[Dict[str, Any]]) -> Optional["SPRT"]:
+        """
+        Crea el test a partir de {"elo0", "elo1", "alpha", "beta"} (None si no se pide).
+
+        Raises:
+            ValueError: Si hay parámetros desconocidos o no válidos
+        """
+        if not params:
+            return None
+        unknown = set(params) - {"elo0", "elo1", "alpha", "beta"}
+        if unknown:
+            raise ValueError(f"Parámetros de SPRT desconocidos: {', '.join(sorted(unknown))}")
+        try:
+            return cls(**{key: float(value) for key, value in params.items()})
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Parámetros de SPRT inválidos: {e}")
+
+    def llr(self, samples: Dict[float, int]) -> float:
+        """
+        Log-likelihood ratio (aproximación GSPRT) de una distribución de puntuaciones.
+
+        Args:
+            samples: {puntuación (0..1): frecuencia}, por partida o por pareja (ver pair_samples)
+        """
+        n, mean, variance = _mean_variance(samples)
+        if n == 0:
+            return 0.0
+        variance = max(variance, MIN_VARIANCE)
+        score0, score1 = score_from_elo(self.elo0), score_from_elo(self.elo1)
+        return n * (score1 - score0) * (2 * mean - score0 - score1) / (2 * variance)
+
+    def decision(self, llr: float) -> Optional[str]:
+        """'H1' o 'H0' si el test ha terminado, None si hay que seguir jugando"""
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+    def to_dict(self, samples: Dict[float, int]) -> Dict[str, Any]:
+        """Estado del test: parámetros, LLR, límites y decisión"""
+        llr = self.llr(samples)
+        return {
+            "elo0": self.elo0,
+            "elo1": self.elo1,
+            "alpha": self.alpha,
+            "beta": self.beta,
+            "llr": round(llr, 3),
+            "lower": round(self.lower, 3),
+            "upper": round(self.upper, 3),
+            "decision": self.decision(llr),
+        }
@@ -0,0 +1,325 @@
+"""
+Torneos entre motores: todos contra todos (round_robin) o uno contra el resto (gauntlet).
+Cada apertura se juega por parejas (una partida con cada color) y las partidas se juegan
+en paralelo en el MatchRunner, sin superar la capacidad de cada motor (max_parallel).
+Los resultados dan la clasificación, el Elo con su intervalo de confianza por
+enfrentamiento y, con dos motores, un SPRT que puede detener el torneo en cuanto hay
+una conclusión. Todas las partidas se escriben en un archivo PGN.
+"""
+
+import asyncio
+import logging
+import os
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .clock import DEFAULT_TIME_CONTROL, TimeControl
+from .adjudication import Adjudicator
+from .openings import parse_openings
+from .stats import SPRT, elo_estimate, pair_samples
+
+if TYPE_CHECKING:
+    from engine_manager import EngineManager
+    from .runner import MatchRunner
+
+logger = logging.getLogger(__name__)
+
+TOURNAMENT_FORMATS = ("round_robin", "gauntlet")
+
+# Configuración por defecto (sobrescribible con TOURNAMENTS_PGN_DIR)
+DEFAULT_PGN_DIR = "data/tournaments"
+# Partidas máximas por torneo
+MAX_TOURNAMENT_GAMES = 10000
+
+POINTS = {"1-0": (1.0, 0.0), "0-1": (0.0, 1.0), "1/2-1/2": (0.5, 0.5)}
+
+
+def tournament_pgn_path(tournament_id: str) -> str:
+    """Archivo PGN de un torneo (en TOURNAMENTS_PGN_DIR)"""
+    return os.path.join(os.getenv("TOURNAMENTS_PGN_DIR", DEFAULT_PGN_DIR), f"{tournament_id}.pgn")
+
+
+def read_tournament_pgn(tournament_id: str) -> str:
+    """Partidas ya escritas de un torneo ("" si aún no hay ninguna)"""
+    path = tournament_pgn_path(tournament_id)
+    if not os.path.exists(path):
+        return ""
+    with open(path, encoding="utf-8") as pgn_file:
+        return pgn_file.read()
+
+
+class Tournament:
+    """Calendario, ejecución y resultados de un torneo"""
+
+    def __init__(self, engine_manager: "EngineManager", params: Dict[str, Any], tournament_id: str = "tournament"):
+        """
+        Valida los parámetros y construye el calendario.
+
+        Args:
+            engine_manager: Gestor de motores (valida los nombres y da la capacidad de cada motor)
+            params: engines (lista; en gauntlet el primero juega contra los demás), format
+                    (round_robin | gauntlet), openings (ver parse_openings), rounds (vueltas
+                    a las aperturas), time_control, depth, adjudication, concurrency,
+                    sprt ({"elo0", "elo1", "alpha", "beta"}, solo con dos motores), name
+            tournament_id: Identificador (nombre del archivo PGN)
+
+        Raises:
+            ValueError: Si algún parámetro no es válido
+        """
+        engines = params.get("engines")
+        if not isinstance(engines, list) or len(engines) < 2 or len(set(engines)) != len(engines):
+            raise ValueError("'engines' debe ser una lista de al menos dos motores distintos")
+        for name in engines:
+            engine_manager.get_engine(name)
+
+        self.format = params.get("format", "round_robin")
+        if self.format not in TOURNAMENT_FORMATS:
+            raise ValueError(f"Formato de torneo desconocido: {self.format}. Válidos: {', '.join(TOURNAMENT_FORMATS)}")
+
+        self.id = tournament_id
+        self.name = params.get("name") or f"Torneo {tournament_id}"
+        self.engines: List[str] = engines
+        self.openings = parse_openings(params.get("openings"))
+        self.rounds = int(params.get("rounds", 1))
+        if self.rounds < 1:
+            raise ValueError("'rounds' debe ser al menos 1")
+
+        self.time_control = params.get("time_control", DEFAULT_TIME_CONTROL)
+        self.depth = params.get("depth")
+        if self.time_control:
+            TimeControl.parse(self.time_control)
+        elif self.depth is None:
+            raise ValueError("El torneo necesita 'time_control' o 'depth'")
+        self.adjudication = params.get("adjudication")
+        Adjudicator(self.adjudication)
+
+        self.sprt = SPRT.from_params(params.get("sprt"))
+        if self.sprt and len(engines) != 2:
+            raise ValueError("SPRT requiere exactamente dos motores")
+
+        # Partidas simultáneas por motor: una por instancia (pool_size / max_parallel)
+        self.capacity = {name: engine_manager.get_engine(name).max_parallel for name in engines}
+        self.concurrency = params.get("concurrency")
+
+        self.games = self._schedule()
+        if len(self.games) > MAX_TOURNAMENT_GAMES:
+            raise ValueError(f"El torneo tiene {len(self.games)} partidas (máximo {MAX_TOURNAMENT_GAMES})")
+
+        self.pgn_path = tournament_pgn_path(tournament_id)
+        self.stopped_by: Optional[str] = None
+
+    def _pairings(self) -> List[Tuple[str, str]]:
+        """Enfrentamientos: todos contra todos, o el primero contra cada uno de los demás"""
+        if self.format == "gauntlet":
+            return [(self.engines[0], opponent) for opponent in self.engines[1:]]
+        return [
+            (first, second)
+            for index, first in enumerate(self.engines)
+            for second in self.engines[index + 1:]
+        ]
+
+    def _schedule(self) -> List[Dict[str, Any]]:
+        """
+        Calendario completo. Las parejas de una misma apertura quedan seguidas y los
+        enfrentamientos se intercalan para que un torneo cortado quede equilibrado.
+        """
+        games = []
+        for round_number in range(1, self.rounds + 1):
+            for opening_index, opening in enumerate(self.openings):
+                for first, second in self._pairings():
+                    pair = f"{round_number}.{opening_index + 1}.{first}.{second}"
+                    for white, black in ((first, second), (second, first)):
+                        games.append({
+                            "game": len(games) + 1,
+                            "round": round_number,
+                            "pair": pair,
+                            "opening": opening,
+                            "white": white,
+                            "black": black,
+                        })
+        return games
+
+    async def run(
+        self,
+        runner: "MatchRunner",
+        report: Callable[[int, int, Optional[Dict[str, Any]]], Awaitable[None]]
+    ) -> Dict[str, Any]:
+        """
+        Juega el torneo.
+
+        Args:
+            runner: MatchRunner donde se juegan las partidas
+            report: Progreso (partidas terminadas, total, resultado de la partida)
+
+        Returns:
+            Resumen (ver summary) con la ruta del PGN
+        """
+        concurrency = max(1, int(self.concurrency or runner.max_running))
+        pending = list(self.games)
+        running: Dict[asyncio.Task, Dict[str, Any]] = {}
+        busy: Counter = Counter()
+        finished = 0
+
+        os.makedirs(os.path.dirname(self.pgn_path) or ".", exist_ok=True)
+        # El torneo se juega desde el principio (también al reanudarse tras un reinicio)
+        await asyncio.to_thread(self._write_pgn, "", "w")
+        logger.info(f"Torneo {self.id}: {len(self.games)} partidas, {concurrency} simultáneas")
+
+        try:
+            while pending or running:
+                # Lanzar las partidas cuyos dos motores tienen una instancia libre
+                for game in list(pending):
+                    if len(running) >= concurrency:
+                        break
+                    if any(busy[name] >= self.capacity[name] for name in (game["white"], game["black"])):
+                        continue
+                    pending.remove(game)
+                    busy.update((game["white"], game["black"]))
+                    running[asyncio.create_task(self._play(runner, game))] = game
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    game = running.pop(task)
+                    busy.subtract((game["white"], game["black"]))
+                    item = task.result()
+                    if item is None:
+                        continue
+                    finished += 1
+                    self._check_sprt()
+                    await report(finished, len(self.games), item)
+
+                if self.stopped_by is not None:
+                    # SPRT concluido: las partidas en curso ya no cuentan
+                    break
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            for game in running.values():
+                if game.get("match_id"):
+                    await runner.stop(game["match_id"])
+
+        await report(finished, finished, None)
+        return self.summary()
+
+    async def _play(self, runner: "MatchRunner", game: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Juega una partida del calendario y guarda su PGN (None si se detuvo sin resultado)"""
+        opening = game["opening"]
+        match = await runner.create(
+            white=game["white"],
+            black=game["black"],
+            time_control=self.time_control,
+            depth=self.depth,
+            fen=opening["fen"],
+            moves=opening["moves"],
+            adjudication=self.adjudication
+        )
+        game["match_id"] = match.id
+        await runner.wait(match.id)
+
+        outcome = match.outcome or {}
+        if outcome.get("result") not in POINTS:
+            return None
+        game["result"] = outcome["result"]
+        game["termination"] = outcome["termination"]
+        game["plies"] = len(match.board.move_stack)
+
+        pgn = match.pgn({"Event": self.name, "Round": str(game["game"]), "Opening": opening["name"]})
+        await asyncio.to_thread(self._write_pgn, pgn + "\n\n", "a")
+        item = {
+            key: game[key]
+            for key in ("game", "round", "white", "black", "match_id", "result", "termination", "plies")
+        }
+        item["opening"] = opening["name"]
+        return item
+
+    def _write_pgn(self, text: str, mode: str) -> None:
+        with open(self.pgn_path, mode, encoding="utf-8") as pgn_file:
+            pgn_file.write(text)
+
+    def _pair_points(self, first: str, second: str) -> List[float]:
+        """Puntos de 'first' contra 'second' en cada pareja de apertura completa (0 .. 2)"""
+        pairs: Dict[str, List[float]] = {}
+        for game in self.games:
+            if game.get("result") in POINTS and {game["white"], game["black"]} == {first, second}:
+                white_points, black_points = POINTS[game["result"]]
+                points = white_points if game["white"] == first else black_points
+                pairs.setdefault(game["pair"], []).append(points)
+        return [sum(points) for points in pairs.values() if len(points) == 2]
+
+    def _check_sprt(self) -> None:
+        """Detiene el torneo si el SPRT ya acepta una hipótesis"""
+        if self.sprt is None or self.stopped_by is not None:
+            return
+        samples = pair_samples(self._pair_points(*self.engines))
+        decision = self.sprt.decision(self.sprt.llr(samples))
+        if decision is not None:
+            self.stopped_by = f"sprt_{decision.lower()}"
+            logger.info(f"Torneo {self.id}: SPRT acepta {decision}, se detiene")
+
+    def _record(self, engine: str, opponent: Optional[str] = None) -> Tuple[int, int, int]:
+        """Victorias, tablas y derrotas de 'engine' (contra 'opponent' o contra todos)"""
+        wins = draws = losses = 0
+        for game in self.games:
+            if game.get("result") not in POINTS or engine not in (game["white"], game["black"]):
+                continue
+            if opponent is not None and opponent not in (game["white"], game["black"]):
+                continue
+            white_points, _ = POINTS[game["result"]]
+            points = white_points if game["white"] == engine else 1 - white_points
+            if points == 1:
+                wins += 1
+            elif points == 0:
+                losses += 1
+            else:
+                draws += 1
+        return wins, draws, losses
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Resultados: clasificación (Elo frente al resto), enfrentamientos (Elo del primero
+        frente al segundo, con distribución pentanomial por parejas) y SPRT.
+        """
+        standings = []
+        for engine in self.engines:
+            wins, draws, losses = self._record(engine)
+            standings.append({
+                "engine": engine,
+                "points": wins + draws / 2,
+                "wins": wins,
+                "draws": draws,
+                "losses": losses,
+                **elo_estimate(wins, draws, losses),
+            })
+        standings.sort(key=lambda row: (row["points"], row["score"] or 0), reverse=True)
+
+        pairings = []
+        for first, second in self._pairings():
+            wins, draws, losses = self._record(first, second)
+            pentanomial = Counter(self._pair_points(first, second))
+            pairings.append({
+                "engine": first,
+                "opponent": second,
+                "wins": wins,
+                "draws": draws,
+                "losses": losses,
+                "pentanomial": [pentanomial.get(points, 0) for points in (0, 0.5, 1, 1.5, 2)],
+                **elo_estimate(wins, draws, losses),
+            })
+
+        played = sum(1 for game in self.games if game.get("result") in POINTS)
+        return {
+            "name": self.name,
+            "format": self.format,
+            "engines": self.engines,
+            "time_control": self.time_control,
+            "depth": self.depth,
+            "openings": len(self.openings),
+            "games_scheduled": len(self.games),
+            "games_played": played,
+            "stopped_by": self.stopped_by,
+            "standings": standings,
+            "pairings": pairings,
+            "sprt": self.sprt.to_dict(pair_samples(self._pair_points(*self.engines))) if self.sprt else None,
+            "pgn_path": self.pgn_path,
+        }
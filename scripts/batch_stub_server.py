@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Servidor local que imita las APIs batch de OpenAI y Anthropic para pruebas.
+Responde a cada petición con la primera jugada legal de la posición (FEN del prompt)
+y una explicación fija, sin llamar a ningún proveedor real.
+
+Uso:
+    python scripts/batch_stub_server.py --port 8090 --delay 2
+
+Configuración del motor para usarlo:
+    openai:    api_url: "http://localhost:8090/v1/chat/completions"
+    anthropic: api_url: "http://localhost:8090/v1/messages"
+    batch_poll_interval: 1
+"""
+
+import argparse
+import itertools
+import json
+import re
+import time
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from typing import Any, Dict, Optional
+
+import chess
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+FEN_PATTERN = re.compile(
+    r"([rnbqkpRNBQKP1-8]+(?:/[rnbqkpRNBQKP1-8]+){7}\s+[wb]\s+(?:-|[KQkq]+)\s+(?:-|[a-h][36])\s+\d+\s+\d+)"
+)
+
+app = FastAPI(title="Stand-in de APIs batch")
+
+# Estado en memoria
+_ids = itertools.count(1)
+_files: Dict[str, str] = {}
+_batches: Dict[str, Dict[str, Any]] = {}
+_delay = 0.0
+
+
+def _answer(body: Dict[str, Any]) -> Dict[str, str]:
+    """Jugada y explicación para el payload de una petición"""
+    text = json.dumps(body, ensure_ascii=False)
+    match = FEN_PATTERN.search(text)
+    move = None
+    if match:
+        board = chess.Board(match.group(1))
+        move = next(iter(board.legal_moves), None)
+    uci = move.uci() if move else "0000"
+    return {"move": uci, "explanation": f"Jugada de prueba {uci} del servidor stand-in."}
+
+
+def _structured(body: Dict[str, Any]) -> bool:
+    """La petición pide la respuesta como JSON (response_format o tool obligatoria)"""
+    return "response_format" in body or "tool_choice" in body
+
+
+def _openai_completion(body: Dict[str, Any]) -> Dict[str, Any]:
+    answer = _answer(body)
+    content = json.dumps(answer) if _structured(body) else f"{answer['move']}\n{answer['explanation']}"
+    return {
+        "id": f"chatcmpl-{next(_ids)}",
+        "object": "chat.completion",
+        "model": body.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": len(json.dumps(body)) // 4, "completion_tokens": 20},
+    }
+
+
+def _anthropic_message(body: Dict[str, Any]) -> Dict[str, Any]:
+    answer = _answer(body)
+    if _structured(body):
+        content = [{"type": "tool_use", "id": f"toolu_{next(_ids)}", "name": body["tool_choice"]["name"], "input": answer}]
+    else:
+        content = [{"type": "text", "text": f"{answer['move']}\n{answer['explanation']}"}]
+    return {
+        "id": f"msg_{next(_ids)}",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model"),
+        "content": content,
+        "usage": {"input_tokens": len(json.dumps(body)) // 4, "output_tokens": 20},
+    }
+
+
+def _ready(batch: Dict[str, Any]) -> bool:
+    return time.time() - batch["created_at"] >= _delay
+
+
+# ---------------------------------------------------------------------------
+# OpenAI: /v1/files + /v1/batches
+# ---------------------------------------------------------------------------
+
+@app.post("/v1/files")
+async def upload_file(request: Request):
+    raw = await request.body()
+    header = f"Content-Type: {request.headers.get('content-type')}\r\n\r\n".encode()
+    message = BytesParser(policy=default_policy).parsebytes(header + raw)
+    content: Optional[bytes] = None
+    for part in message.iter_parts():
+        if part.get_param("name", header="content-disposition") == "file":
+            content = part.get_payload(decode=True)
+    if content is None:
+        raise HTTPException(status_code=400, detail="Falta el campo 'file'")
+
+    file_id = f"file-{next(_ids)}"
+    _files[file_id] = content.decode("utf-8")
+    return {"id": file_id, "object": "file", "purpose": "batch", "bytes": len(content)}
+
+
+@app.get("/v1/files/{file_id}/content", response_class=PlainTextResponse)
+async def file_content(file_id: str):
+    if file_id not in _files:
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+    return _files[file_id]
+
+
+@app.post("/v1/batches")
+async def create_openai_batch(payload: Dict[str, Any]):
+    input_file = _files.get(payload.get("input_file_id"))
+    if input_file is None:
+        raise HTTPException(status_code=400, detail="input_file_id desconocido")
+    batch_id = f"batch_{next(_ids)}"
+    _batches[batch_id] = {
+        "kind": "openai",
+        "created_at": time.time(),
+        "requests": [json.loads(line) for line in input_file.splitlines() if line.strip()],
+    }
+    return {"id": batch_id, "object": "batch", "status": "validating", "endpoint": payload.get("endpoint")}
+
+
+@app.get("/v1/batches/{batch_id}")
+async def get_openai_batch(batch_id: str):
+    batch = _batches.get(batch_id)
+    if batch is None or batch["kind"] != "openai":
+        raise HTTPException(status_code=404, detail="Lote no encontrado")
+    if not _ready(batch):
+        return {"id": batch_id, "object": "batch", "status": "in_progress"}
+
+    if "output_file_id" not in batch:
+        lines = [
+            json.dumps({
+                "id": f"batch_req_{next(_ids)}",
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": _openai_completion(request["body"])},
+                "error": None,
+            })
+            for request in batch["requests"]
+        ]
+        batch["output_file_id"] = f"file-{next(_ids)}"
+        _files[batch["output_file_id"]] = "\n".join(lines)
+
+    return {
+        "id": batch_id,
+        "object": "batch",
+        "status": "completed",
+        "output_file_id": batch["output_file_id"],
+        "error_file_id": None,
+        "request_counts": {"total": len(batch["requests"]), "completed": len(batch["requests"]), "failed": 0},
+    }
+
+
+# ---------------------------------------------------------------------------
+# Anthropic: /v1/messages/batches
+# ---------------------------------------------------------------------------
+
+@app.post("/v1/messages/batches")
+async def create_anthropic_batch(payload: Dict[str, Any]):
+    batch_id = f"msgbatch_{next(_ids)}"
+    _batches[batch_id] = {"kind": "anthropic", "created_at": time.time(), "requests": payload.get("requests", [])}
+    return {"id": batch_id, "type": "message_batch", "processing_status": "in_progress"}
+
+
+@app.get("/v1/messages/batches/{batch_id}")
+async def get_anthropic_batch(batch_id: str, request: Request):
+    batch = _batches.get(batch_id)
+    if batch is None or batch["kind"] != "anthropic":
+        raise HTTPException(status_code=404, detail="Lote no encontrado")
+    if not _ready(batch):
+        return {"id": batch_id, "type": "message_batch", "processing_status": "in_progress", "results_url": None}
+    return {
+        "id": batch_id,
+        "type": "message_batch",
+        "processing_status": "ended",
+        "results_url": str(request.url_for("anthropic_batch_results", batch_id=batch_id)),
+    }
+
+
+@app.get("/v1/messages/batches/{batch_id}/results", response_class=PlainTextResponse, name="anthropic_batch_results")
+async def anthropic_batch_results(batch_id: str):
+    batch = _batches.get(batch_id)
+    if batch is None or not _ready(batch):
+        raise HTTPException(status_code=404, detail="Resultados no disponibles")
+    return "\n".join(
+        json.dumps({
+            "custom_id": request["custom_id"],
+            "result": {"type": "succeeded", "message": _anthropic_message(request["params"])},
+        })
+        for request in batch["requests"]
+    )
+
+
+def main():
+    global _delay
+    parser = argparse.ArgumentParser(description="Stand-in local de las APIs batch de OpenAI y Anthropic")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--delay", type=float, default=2.0, help="Segundos hasta que un lote termina")
+    args = parser.parse_args()
+    _delay = args.delay
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
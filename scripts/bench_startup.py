@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Mide el tiempo de arranque de la API por fases en procesos nuevos (arranque en frío).
+Cada repetición importa main en un intérprete limpio, espera a que los motores se creen,
+verifiquen y precalienten, y recoge las fases de GET /health -> startup.
+
+Fases:
+    imports_ms       Importar main y sus dependencias
+    init_ms          Crear los gestores (solo lee la configuración YAML)
+    load_config_ms   Lectura de config/engines_*.yaml (incluida en init_ms)
+    build_ms         Creación de los motores (en segundo plano, con la API ya aceptando peticiones)
+    availability_ms  Verificación de disponibilidad
+    warmup_ms        Precalentamiento de procesos y conexiones
+
+Uso (desde la raíz del repositorio):
+    python scripts/bench_startup.py --runs 5
+    python scripts/bench_startup.py --runs 5 --no-warmup   # solo hasta la creación de motores
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código que ejecuta cada repetición: imprime las fases como JSON en la última línea
+CHILD = """
+import asyncio, json, logging, time
+import main
+logging.disable(logging.CRITICAL)
+manager = main.engine_manager
+timings = dict(main.STARTUP_TIMINGS)
+if {warmup}:
+    asyncio.run(manager.startup())
+else:
+    started = time.perf_counter()
+    asyncio.run(manager.build_all())
+    timings["build_ms"] = round((time.perf_counter() - started) * 1000, 1)
+print(json.dumps({{**timings, **manager.startup_timings}}))
+"""
+
+
+def run_once(warmup: bool) -> Dict[str, float]:
+    """Arranca un intérprete nuevo y devuelve sus fases (más el tiempo total del proceso)"""
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(warmup=warmup)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    phases = json.loads(output.strip().splitlines()[-1])
+    phases["process_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return phases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Repeticiones (default: 5)")
+    parser.add_argument("--no-warmup", action="store_true", help="No verificar ni precalentar motores")
+    args = parser.parse_args()
+
+    samples: Dict[str, List[float]] = {}
+    for run in range(1, args.runs + 1):
+        phases = run_once(not args.no_warmup)
+        print(f"Repetición {run}: {phases}")
+        for phase, value in phases.items():
+            samples.setdefault(phase, []).append(value)
+
+    print(f"\n{'Fase':<18}{'mediana ms':>12}{'mín ms':>10}{'máx ms':>10}")
+    for phase, values in samples.items():
+        print(f"{phase:<18}{statistics.median(values):>12.1f}{min(values):>10.1f}{max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
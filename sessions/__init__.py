@@ -0,0 +1,16 @@
+"""
+Sesiones de partida en el servidor (WebSocket /ws/game).
+El servidor conserva el tablero de cada partida y envía las jugadas de los motores.
+"""
+
+from .manager import GameSession, SessionManager, SessionError, game_kwargs, validate_options
+from .connection import GameConnection
+
+__all__ = [
+    'GameSession',
+    'SessionManager',
+    'SessionError',
+    'GameConnection',
+    'game_kwargs',
+    'validate_options',
+]
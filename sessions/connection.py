@@ -0,0 +1,176 @@
+"""
+Conexión WebSocket de una partida (/ws/game).
+
+Mensajes del cliente (JSON):
+    {"type": "new", "white", "black", "fen", "depth", "strategy", "explanation"}  crea una sesión
+    {"type": "resume", "session_id"}                                              retoma una sesión
+    {"type": "move", "move": "e2e4"}                                              jugada del humano (UCI)
+    {"type": "play"}                                          pide la jugada del motor (p. ej. tras un 429)
+    {"type": "options", "depth", "strategy", "explanation"}                       cambia opciones
+    {"type": "close"}                                                             cierra la sesión
+    {"type": "ping"}
+
+Mensajes del servidor:
+    {"type": "session", ...}          estado completo (ver GameSession.state)
+    {"type": "thinking", "engine"}    el motor empieza a pensar
+    {"type": "move", "by", "move", "san", "color", "ply", "fen", ...}  jugada aplicada
+    {"type": "game_over", "result", "termination", "winner"}
+    {"type": "error", "detail", "retry_after"}
+    {"type": "pong"}
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from engines import EngineOverloadedError, InvalidFENError
+
+from .manager import GameSession, SessionError, SessionManager, validate_options
+
+logger = logging.getLogger(__name__)
+
+
+class GameConnection:
+    """
+    Atiende los mensajes de un cliente conectado a una sesión.
+    Las jugadas de los motores se calculan en segundo plano para seguir recibiendo
+    mensajes mientras piensan; en partidas motor contra motor se encadenan solas.
+    """
+
+    def __init__(self, manager: SessionManager, send: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """
+        Args:
+            manager: Gestor de sesiones
+            send: Envía un mensaje JSON al cliente
+        """
+        self.manager = manager
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self.session: Optional[GameSession] = None
+        self._play_task: Optional[asyncio.Task] = None
+
+    async def send(self, event: Dict[str, Any]) -> None:
+        async with self._send_lock:
+            await self._send(event)
+
+    async def handle(self, message: Any) -> bool:
+        """
+        Procesa un mensaje del cliente. Los errores se envían como {"type": "error"}.
+
+        Returns:
+            False si la conexión debe cerrarse
+        """
+        if not isinstance(message, dict):
+            await self.send({"type": "error", "detail": "El mensaje debe ser un objeto JSON"})
+            return True
+
+        kind = message.get("type")
+        try:
+            if kind == "ping":
+                await self.send({"type": "pong"})
+            elif kind == "new":
+                await self._stop_play()
+                self.session = self.manager.create(
+                    white=message.get("white"),
+                    black=message.get("black"),
+                    fen=message.get("fen"),
+                    depth=message.get("depth"),
+                    strategy=message.get("strategy"),
+                    explanation=bool(message.get("explanation", False))
+                )
+                await self.send(self.session.state())
+                self._start_play()
+            elif kind == "resume":
+                await self._stop_play()
+                self.session = self.manager.get(str(message.get("session_id")))
+                await self.send(self.session.state())
+                self._start_play()
+            elif kind == "move":
+                session = self._require_session()
+                event = await self.manager.human_move(session, str(message.get("move", "")))
+                await self.send(event)
+                await self._after_move()
+            elif kind == "play":
+                self._require_session()
+                self._start_play()
+            elif kind == "options":
+                session = self._require_session()
+                depth, strategy = validate_options(
+                    message.get("depth", session.depth), message.get("strategy", session.strategy)
+                )
+                session.depth, session.strategy = depth, strategy
+                if "explanation" in message:
+                    session.explanation = bool(message["explanation"])
+                await self.send(session.state())
+            elif kind == "close":
+                await self.close(end_session=True)
+                return False
+            else:
+                await self.send({"type": "error", "detail": f"Tipo de mensaje desconocido: {kind}"})
+        except (SessionError, InvalidFENError) as e:
+            await self.send({"type": "error", "detail": str(e)})
+        except KeyError as e:
+            await self.send({"type": "error", "detail": str(e.args[0])})
+        except ValueError as e:
+            await self.send({"type": "error", "detail": str(e)})
+        return True
+
+    def _require_session(self) -> GameSession:
+        if self.session is None:
+            raise SessionError("No hay sesión: envía 'new' o 'resume' primero")
+        # Cada mensaje cuenta como actividad (y la sesión puede haber expirado)
+        return self.manager.get(self.session.id)
+
+    async def _after_move(self) -> None:
+        """Tras una jugada: fin de partida o turno del motor"""
+        outcome = self.session.outcome()
+        if outcome is not None:
+            await self.send({"type": "game_over", **outcome})
+        else:
+            self._start_play()
+
+    def _start_play(self) -> None:
+        """Lanza las jugadas del motor si le toca y no hay ya una en curso"""
+        if self.session is None or self.session.engine_to_move is None:
+            return
+        if self._play_task is None or self._play_task.done():
+            self._play_task = asyncio.create_task(self._play(self.session))
+
+    async def _play(self, session: GameSession) -> None:
+        """Juega con los motores mientras les toque"""
+        while (engine_name := session.engine_to_move) is not None:
+            await self.send({"type": "thinking", "engine": engine_name})
+            try:
+                event = await self.manager.engine_move(session)
+            except EngineOverloadedError as e:
+                await self.send({"type": "error", "detail": str(e), "retry_after": e.retry_after})
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Sesión {session.id}: error del motor {engine_name}: {e}")
+                await self.send({"type": "error", "detail": str(e)})
+                return
+            await self.send(event)
+
+        outcome = session.outcome()
+        if outcome is not None:
+            await self.send({"type": "game_over", **outcome})
+
+    async def _stop_play(self) -> None:
+        if self._play_task is not None and not self._play_task.done():
+            self._play_task.cancel()
+            await asyncio.gather(self._play_task, return_exceptions=True)
+        self._play_task = None
+
+    async def close(self, end_session: bool = False) -> None:
+        """
+        Termina la conexión. La sesión se conserva para 'resume' salvo que se cierre explícitamente.
+
+        Args:
+            end_session: Descartar también la sesión
+        """
+        await self._stop_play()
+        if end_session and self.session is not None:
+            self.manager.close(self.session.id)
+            self.session = None
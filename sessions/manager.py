@@ -0,0 +1,406 @@
+"""
+Sesiones de partida mantenidas en el servidor.
+Cada sesión conserva el chess.Board de la partida: las jugadas del cliente se validan
+de una en una (sin reenviar la FEN ni el historial completo) y el motor recibe la
+posición como partida ('position startpos moves ...') con afinidad a la misma instancia
+del pool, de modo que conserva su tabla hash entre jugadas.
+Las sesiones se descartan por LRU (máximo de sesiones) y por inactividad.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import chess
+
+from engines import MotorType, normalize_fen
+
+if TYPE_CHECKING:
+    from engine_manager import EngineManager
+
+    from .connection import GameConnection
+
+logger = logging.getLogger(__name__)
+
+# Configuración por defecto (sobrescribible con GAME_SESSIONS_MAX y GAME_SESSION_IDLE_TIMEOUT)
+DEFAULT_MAX_SESSIONS = 200
+DEFAULT_IDLE_TIMEOUT = 1800.0
+# Segundos entre barridos de sesiones inactivas
+SWEEP_INTERVAL = 60.0
+
+COLOR_NAMES = {chess.WHITE: "white", chess.BLACK: "black"}
+
+
+def game_kwargs(board: chess.Board, start_fen: str, motor_type: MotorType) -> Dict[str, Any]:
+    """
+    Parámetros de get_best_move que describen la partida hasta la posición actual.
+    Los motores UCI/REST la reciben como partida (position_moves desde start_fen); los
+    generativos, el historial ya construido y el número de jugadas (sin volver a parsearlo).
+
+    Args:
+        board: Tablero con las jugadas de la partida
+        start_fen: Posición inicial de la partida
+        motor_type: Tipo del motor al que se pide la jugada
+    """
+    moves = [move.uci() for move in board.move_stack]
+    if motor_type == MotorType.GENERATIVE:
+        return {
+            "move_history": " ".join(moves) if moves else "Inicio de la partida",
+            "move_count": len(moves),
+        }
+    return {"position_moves": moves, "start_fen": start_fen}
+
+
+class SessionError(ValueError):
+    """Petición no válida para el estado de la sesión (jugada ilegal, turno del motor...)"""
+
+
+def validate_options(depth: Any = None, strategy: Any = None) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Valida las opciones de los motores de una sesión (llegan del cliente por WebSocket).
+
+    Args:
+        depth: Profundidad de los motores (entero positivo o None)
+        strategy: Estrategia para motores generativos (una de get_valid_strategies o None)
+
+    Returns:
+        Tupla (depth, strategy) validada
+
+    Raises:
+        SessionError: Si alguna opción no es válida
+    """
+    if depth is not None and (isinstance(depth, bool) or not isinstance(depth, int) or depth < 1):
+        raise SessionError(f"Profundidad inválida: {depth!r} (debe ser un entero positivo)")
+    if strategy is not None:
+        # engines.generative importa jinja2 y httpx: se carga en el primer uso, no al arrancar
+        from engines.generative import get_valid_strategies
+        valid_strategies = get_valid_strategies()
+        if not isinstance(strategy, str) or strategy.lower() not in [s.lower() for s in valid_strategies]:
+            raise SessionError(
+                f"Estrategia inválida: {strategy!r}. Estrategias válidas: {', '.join(valid_strategies)}"
+            )
+    return depth, strategy
+
+
+class GameSession:
+    """Partida en curso: tablero, motores por color y opciones de juego"""
+
+    def __init__(
+        self,
+        session_id: str,
+        white: Optional[str],
+        black: Optional[str],
+        board: chess.Board,
+        depth: Optional[int] = None,
+        strategy: Optional[str] = None,
+        explanation: bool = False
+    ):
+        """
+        Args:
+            session_id: Identificador de la sesión
+            white: Motor de las blancas (None = humano)
+            black: Motor de las negras (None = humano)
+            board: Posición inicial
+            depth: Profundidad de los motores (None = la de cada motor)
+            strategy: Estrategia para motores generativos
+            explanation: Pedir explicación a los motores generativos
+        """
+        self.id = session_id
+        self.players: Dict[bool, Optional[str]] = {chess.WHITE: white, chess.BLACK: black}
+        self.board = board
+        self.start_fen = board.fen()
+        self.depth = depth
+        self.strategy = strategy
+        self.explanation = explanation
+        self.last_active = time.monotonic()
+        # Serializa las jugadas (humanas y del motor) sobre el tablero
+        self.lock = asyncio.Lock()
+
+    def touch(self) -> None:
+        """Marca la sesión como activa"""
+        self.last_active = time.monotonic()
+
+    @property
+    def engine_to_move(self) -> Optional[str]:
+        """Motor al que le toca mover (None si le toca al humano o la partida terminó)"""
+        if self.outcome() is not None:
+            return None
+        return self.players[self.board.turn]
+
+    def outcome(self) -> Optional[Dict[str, Any]]:
+        """Resultado de la partida (None si sigue en curso)"""
+        outcome = self.board.outcome(claim_draw=True)
+        if outcome is None:
+            return None
+        return {
+            "result": outcome.result(),
+            "termination": outcome.termination.name.lower(),
+            "winner": COLOR_NAMES[outcome.winner] if outcome.winner is not None else None,
+        }
+
+    def push(self, uci: str) -> Dict[str, Any]:
+        """
+        Valida y aplica una jugada.
+
+        Args:
+            uci: Jugada en formato UCI
+
+        Returns:
+            Evento de la jugada (move, san, fen resultante, ply, color)
+
+        Raises:
+            SessionError: Si la partida terminó o la jugada no es legal
+        """
+        if self.outcome() is not None:
+            raise SessionError("La partida ha terminado")
+        try:
+            move = chess.Move.from_uci(uci)
+        except (ValueError, TypeError):
+            raise SessionError(f"Jugada con formato inválido: {uci}")
+        if move not in self.board.legal_moves:
+            raise SessionError(f"Jugada ilegal: {uci}")
+
+        color = COLOR_NAMES[self.board.turn]
+        san = self.board.san(move)
+        self.board.push(move)
+        return {
+            "type": "move",
+            "move": move.uci(),
+            "san": san,
+            "color": color,
+            "ply": len(self.board.move_stack),
+            "fen": self.board.fen(),
+        }
+
+    def engine_kwargs(self, motor_type: MotorType) -> Dict[str, Any]:
+        """
+        Parámetros de get_best_move para la jugada del motor: la partida (ver game_kwargs),
+        afinidad a la instancia de la jugada anterior y las opciones de los generativos.
+        """
+        kwargs = game_kwargs(self.board, self.start_fen, motor_type)
+        kwargs.update(priority="interactive", affinity=self.id)
+        if motor_type == MotorType.GENERATIVE:
+            if self.strategy:
+                kwargs["strategy"] = self.strategy
+            if self.explanation:
+                kwargs["explanation"] = True
+        return kwargs
+
+    def state(self) -> Dict[str, Any]:
+        """Estado completo de la sesión (al crearla o reanudarla)"""
+        return {
+            "type": "session",
+            "session_id": self.id,
+            "white": self.players[chess.WHITE],
+            "black": self.players[chess.BLACK],
+            "start_fen": self.start_fen,
+            "fen": self.board.fen(),
+            "moves": [move.uci() for move in self.board.move_stack],
+            "turn": COLOR_NAMES[self.board.turn],
+            "depth": self.depth,
+            "strategy": self.strategy,
+            "explanation": self.explanation,
+            "outcome": self.outcome(),
+        }
+
+
+class SessionManager:
+    """Sesiones de partida activas, con expulsión LRU y por inactividad"""
+
+    def __init__(
+        self,
+        engine_manager: "EngineManager",
+        max_sessions: Optional[int] = None,
+        idle_timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            engine_manager: Gestor de motores que juega las partidas
+            max_sessions: Sesiones simultáneas (default: GAME_SESSIONS_MAX o 200)
+            idle_timeout: Segundos sin actividad antes de descartar una sesión
+                          (default: GAME_SESSION_IDLE_TIMEOUT o 1800)
+        """
+        self.engine_manager = engine_manager
+        self.max_sessions = max_sessions or int(os.getenv("GAME_SESSIONS_MAX", DEFAULT_MAX_SESSIONS))
+        self.idle_timeout = idle_timeout or float(os.getenv("GAME_SESSION_IDLE_TIMEOUT", DEFAULT_IDLE_TIMEOUT))
+        self._sessions: "OrderedDict[str, GameSession]" = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+
+        # Métricas
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+
+    async def start(self) -> None:
+        """Arranca el barrido periódico de sesiones inactivas"""
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep())
+
+    async def shutdown(self) -> None:
+        """Detiene el barrido y descarta todas las sesiones"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        self._sessions.clear()
+
+    def connect(self, send: Callable[[Dict[str, Any]], Awaitable[None]]) -> "GameConnection":
+        """
+        Atiende a un cliente conectado por WebSocket.
+
+        Args:
+            send: Envía un mensaje JSON al cliente
+
+        Returns:
+            Conexión que procesa los mensajes del cliente (ver GameConnection)
+        """
+        from .connection import GameConnection
+        return GameConnection(self, send)
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(min(SWEEP_INTERVAL, self.idle_timeout))
+            self.expire_idle()
+
+    def create(
+        self,
+        white: Optional[str] = None,
+        black: Optional[str] = None,
+        fen: Optional[str] = None,
+        depth: Optional[int] = None,
+        strategy: Optional[str] = None,
+        explanation: bool = False
+    ) -> GameSession:
+        """
+        Crea una sesión nueva (descarta la menos usada si se supera el máximo).
+
+        Args:
+            white: Motor de las blancas (None o "human" = humano)
+            black: Motor de las negras (None o "human" = humano)
+            fen: Posición inicial (default: posición inicial estándar)
+            depth: Profundidad de los motores
+            strategy: Estrategia para motores generativos
+            explanation: Pedir explicación a los motores generativos
+
+        Raises:
+            ValueError: Si un motor no existe
+            SessionError: Si depth o strategy no son válidas
+            InvalidFENError: Si la FEN no es válida
+        """
+        depth, strategy = validate_options(depth, strategy)
+        players = [None if name in (None, "", "human") else name for name in (white, black)]
+        for name in players:
+            if name is not None:
+                self.engine_manager.get_engine(name)
+        board = chess.Board(normalize_fen(fen, require_moves=True)) if fen else chess.Board()
+
+        session = GameSession(uuid.uuid4().hex[:16], players[0], players[1], board, depth, strategy, explanation)
+        self._sessions[session.id] = session
+        self.created += 1
+        while len(self._sessions) > self.max_sessions:
+            evicted_id, _ = self._sessions.popitem(last=False)
+            self.evicted += 1
+            logger.info(f"Sesión {evicted_id} descartada (máximo de {self.max_sessions} sesiones)")
+        logger.info(f"Sesión {session.id} creada: {players[0] or 'humano'} vs {players[1] or 'humano'}")
+        return session
+
+    def get(self, session_id: str) -> GameSession:
+        """
+        Sesión por id (cuenta como actividad).
+
+        Raises:
+            KeyError: Si no existe o ya se descartó
+        """
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise KeyError(f"Sesión '{session_id}' no encontrada o expirada")
+        self._sessions.move_to_end(session_id)
+        session.touch()
+        return session
+
+    def close(self, session_id: str) -> None:
+        """Descarta una sesión"""
+        if self._sessions.pop(session_id, None) is not None:
+            logger.info(f"Sesión {session_id} cerrada")
+
+    def expire_idle(self) -> int:
+        """
+        Descarta las sesiones sin actividad durante idle_timeout.
+
+        Returns:
+            Número de sesiones descartadas
+        """
+        limit = time.monotonic() - self.idle_timeout
+        expired = [session_id for session_id, session in self._sessions.items() if session.last_active < limit]
+        for session_id in expired:
+            del self._sessions[session_id]
+        if expired:
+            self.expired += len(expired)
+            logger.info(f"{len(expired)} sesiones descartadas por inactividad")
+        return len(expired)
+
+    async def engine_move(self, session: GameSession) -> Dict[str, Any]:
+        """
+        Pide la jugada al motor al que le toca y la aplica.
+
+        Returns:
+            Evento de la jugada con el motor, la explicación, el análisis y los tiempos
+
+        Raises:
+            SessionError: Si no le toca a un motor o el motor devolvió una jugada ilegal
+            EngineOverloadedError: Si el motor está saturado
+        """
+        async with session.lock:
+            engine_name = session.engine_to_move
+            if engine_name is None:
+                raise SessionError("No le toca mover a ningún motor")
+            engine = self.engine_manager.get_engine(engine_name)
+
+            result = await self.engine_manager.get_best_move(
+                engine_name,
+                session.board.fen(),
+                session.depth,
+                **session.engine_kwargs(engine.motor_type)
+            )
+            event = session.push(result.move)
+            session.touch()
+
+        event.update({
+            "by": "engine",
+            "engine": engine_name,
+            "explanation": result.explanation,
+            "analysis": result.analysis,
+            "timings": result.timings,
+            "source": result.source,
+        })
+        return event
+
+    async def human_move(self, session: GameSession, uci: str) -> Dict[str, Any]:
+        """
+        Aplica la jugada del humano.
+
+        Raises:
+            SessionError: Si le toca a un motor o la jugada no es legal
+        """
+        async with session.lock:
+            if session.players[session.board.turn] is not None:
+                raise SessionError("Le toca mover al motor")
+            event = session.push(uci)
+            session.touch()
+        event["by"] = "human"
+        return event
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Sesiones activas y descartadas"""
+        return {
+            "active": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "idle_timeout": self.idle_timeout,
+            "created": self.created,
+            "evicted": self.evicted,
+            "expired": self.expired,
+        }
@@ -0,0 +1,101 @@
+"""
+Tests del control de admisión por motor.
+"""
+
+import pytest
+
+from engines import AdmissionController, EngineOverloadedError
+
+
+def _controller(in_flight=None, avg_service=None, **kwargs):
+    controller = AdmissionController("fake", **{"max_concurrency": 1, **kwargs})
+    controller._in_flight.update(in_flight or {})
+    controller.avg_service = avg_service
+    return controller
+
+
+def test_rejects_when_queue_is_full():
+    controller = _controller({"interactive": 3}, max_queue=2)
+    assert controller.queued("interactive") == 2
+    with pytest.raises(EngineOverloadedError) as error:
+        controller.check("interactive")
+    assert error.value.engine == "fake"
+    assert error.value.retry_after >= 1
+    assert controller.rejected == 1
+
+
+def test_only_counts_requests_ahead():
+    # Un lote en cola no bloquea una jugada interactiva, pero sí otro lote
+    controller = _controller({"batch": 5}, max_queue=2)
+    controller.check("interactive")
+    controller.check("compare")
+    with pytest.raises(EngineOverloadedError):
+        controller.check("batch")
+
+
+def test_background_is_never_rejected():
+    controller = _controller({"background": 50, "interactive": 10}, max_queue=0, avg_service=60.0)
+    controller.check("background")
+    assert controller.rejected == 0
+
+
+def test_rejects_on_estimated_wait():
+    controller = _controller({"interactive": 3}, avg_service=2.0, max_concurrency=2, max_queue_wait=1.5)
+    # 3 en curso con 2 huecos: la nueva espera a que terminen 2 (2 × 2.0s / 2)
+    assert controller.estimated_wait("interactive") == pytest.approx(2.0)
+    with pytest.raises(EngineOverloadedError) as error:
+        controller.check("interactive")
+    assert error.value.retry_after == 2
+
+
+def test_no_estimate_without_samples():
+    controller = _controller({"interactive": 1})
+    assert controller.estimated_wait() == 0.0
+    controller.check("interactive")
+
+
+@pytest.mark.asyncio
+async def test_admit_tracks_requests_in_flight():
+    controller = _controller(max_queue=1)
+    async with controller.admit("interactive"):
+        async with controller.admit("batch"):
+            assert controller.get_stats()["in_flight_by_priority"]["batch"] == 1
+            assert controller.in_flight == 2
+        # La segunda petición interactiva ya tendría una en cola por delante
+        async with controller.admit("interactive"):
+            with pytest.raises(EngineOverloadedError):
+                async with controller.admit("interactive"):
+                    pass
+    assert controller.in_flight == 0
+    assert (controller.admitted, controller.rejected) == (3, 1)
+    assert controller.avg_service is not None and controller.avg_latency is not None
+
+
+@pytest.mark.asyncio
+async def test_failed_requests_do_not_update_averages():
+    controller = _controller()
+    with pytest.raises(RuntimeError):
+        async with controller.admit("interactive"):
+            raise RuntimeError("fallo del motor")
+    assert controller.in_flight == 0
+    assert controller.avg_service is None and controller.avg_latency is None
+
+
+@pytest.mark.asyncio
+async def test_admit_without_check():
+    controller = _controller({"batch": 10}, max_queue=0)
+    async with controller.admit("batch", check=False):
+        assert controller.get_stats()["in_flight_by_priority"]["batch"] == 11
+
+
+def test_from_stats_roundtrip():
+    controller = _controller({"interactive": 2, "batch": 1}, avg_service=0.25, max_concurrency=2, max_queue=4)
+    controller.avg_latency = 0.5
+    copy = AdmissionController.from_stats("fake", controller.get_stats())
+    assert copy.get_stats() == controller.get_stats()
+    copy.check("interactive")
+
+    # La copia decide igual que el original (p. ej. en un worker con el snapshot del broker)
+    saturated = _controller({"interactive": 6}, max_concurrency=2, max_queue=4)
+    with pytest.raises(EngineOverloadedError):
+        AdmissionController.from_stats("fake", saturated.get_stats()).check("interactive")
@@ -0,0 +1,97 @@
+"""
+Tests del procesamiento por lotes contra el stand-in de scripts/batch_stub_server.py.
+La aplicación del stand-in se sirve en proceso con httpx.ASGITransport.
+"""
+
+import importlib.util
+from pathlib import Path
+
+import httpx
+import pytest
+
+from engines.factory import EngineFactory
+from engines.protocols import HTTPClientPool
+from engines.protocols.batch import ProviderBatch
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+OPEN = "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2"
+
+API_URLS = {
+    "openai": "http://api.test/v1/chat/completions",
+    "anthropic": "http://api.test/v1/messages",
+}
+
+
+def _load_stub():
+    path = Path(__file__).resolve().parents[1] / "scripts" / "batch_stub_server.py"
+    spec = importlib.util.spec_from_file_location("batch_stub_server", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Sirve las peticiones HTTP de los motores con la aplicación del stand-in (lotes listos al momento)"""
+    module = _load_stub()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=module.app))
+    monkeypatch.setattr(HTTPClientPool, "acquire", classmethod(lambda cls, url, config: (("stub",), client)))
+    return module
+
+
+def _engine(provider):
+    return EngineFactory.create_engine(f"{provider}-batch", {
+        "engine_type": "generative", "provider": provider, "model": "test-model",
+        "api_url": API_URLS[provider], "api_key": f"key-batch-{provider}", "batch_poll_interval": 0,
+    })
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("provider", ["openai", "anthropic"])
+async def test_provider_batch_roundtrip(stub, provider):
+    engine = _engine(provider)
+    await engine.initialize()
+    items = [
+        {"custom_id": f"pos-{index}", "prompt": f"Posición: {fen}", "legal_moves": ["g1f3", "b1c3"]}
+        for index, fen in enumerate([START, OPEN])
+    ]
+
+    texts = await ProviderBatch(engine.protocol).run(items)
+
+    assert set(texts) == {"pos-0", "pos-1"}
+    assert all(texts.values())
+    assert len(stub._batches) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("provider", ["openai", "anthropic"])
+async def test_provider_batch_rejects_unsafe_custom_ids(stub, provider):
+    batch = ProviderBatch(_engine(provider).protocol)
+    with pytest.raises(ValueError):
+        await batch.submit([{"custom_id": "WAC.001", "prompt": START}])
+    with pytest.raises(ValueError):
+        await batch.submit([{"custom_id": "a", "prompt": START}, {"custom_id": "a", "prompt": OPEN}])
+    assert not stub._batches
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("provider", ["openai", "anthropic"])
+async def test_annotate_batch_keeps_caller_ids(stub, provider):
+    engine = _engine(provider)
+    positions = [
+        {"id": "WAC.001", "fen": START},
+        {"id": "WAC.001", "fen": OPEN},
+        {"id": 7, "fen": "no es una FEN"},
+        {"fen": OPEN},
+    ]
+
+    annotations = await engine.annotate_batch(positions)
+
+    assert [a["id"] for a in annotations] == ["WAC.001", "WAC.001", 7, "pos-3"]
+    # Los ids repetidos o con caracteres no admitidos no se pisan ni invalidan el lote
+    assert [a["fen"] for a in annotations] == [START, OPEN, "no es una FEN", OPEN]
+    assert all(a["move"] and a["explanation"] and a["error"] is None for a in annotations if a["id"] != 7)
+    # La FEN inválida solo deja su error
+    assert annotations[2]["move"] is None and annotations[2]["error"]
+    assert len(stub._batches) == 1
+    assert len(next(iter(stub._batches.values()))["requests"]) == 3
@@ -0,0 +1,121 @@
+"""
+Tests del análisis de partidas: probabilidad de ganar, precisión y clasificación de jugadas.
+"""
+
+import pytest
+
+from engines import MotorType, MoveResult
+from engines.game_analysis import (
+    EVAL_CAP_CP, MATE_CP, GameAnalyzer, GameParseError, classify, move_accuracy, parse_game,
+    score_to_cp, win_percent
+)
+
+
+class ScriptedEngine:
+    """Motor de prueba: devuelve en orden las respuestas (jugada, cp) indicadas"""
+
+    name = "scripted"
+    motor_type = MotorType.TRADITIONAL
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    async def get_move(self, fen, depth=None, **kwargs):
+        self.calls.append((fen, kwargs))
+        move, cp = self.answers.pop(0)
+        return MoveResult(move=move, engine=self.name, analysis={"depth": 10, "score_cp": cp})
+
+
+def test_win_percent():
+    assert win_percent(0) == pytest.approx(50.0)
+    assert win_percent(300) + win_percent(-300) == pytest.approx(100.0)
+    assert win_percent(100) > win_percent(50) > 50
+    # Las evaluaciones se acotan a ±EVAL_CAP_CP
+    assert win_percent(MATE_CP) == win_percent(EVAL_CAP_CP)
+
+
+def test_move_accuracy():
+    assert move_accuracy(60.0, 60.0) == pytest.approx(100.0, abs=1e-3)
+    # Mejorar la probabilidad de ganar no da más de 100
+    assert move_accuracy(40.0, 60.0) == pytest.approx(100.0, abs=1e-3)
+    assert 0 < move_accuracy(60.0, 40.0) < move_accuracy(60.0, 55.0) < 100
+    assert move_accuracy(100.0, 0.0) == 0.0
+
+
+@pytest.mark.parametrize("win_drop, label", [
+    (0.0, None), (4.9, None), (5.0, "inaccuracy"), (10.0, "mistake"), (14.9, "mistake"), (30.0, "blunder"),
+])
+def test_classify(win_drop, label):
+    assert classify(win_drop) == label
+
+
+def test_score_to_cp():
+    assert score_to_cp(None) is None
+    assert score_to_cp({"score_cp": -45}) == -45
+    assert score_to_cp({"mate": 3}) == MATE_CP - 3
+    assert score_to_cp({"mate": -2}) == -MATE_CP + 2
+
+
+def test_parse_game_moves_and_pgn():
+    board, moves = parse_game(moves=["e2e4", "e7e5"])
+    assert board.fen() == "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+    assert [move.uci() for move in moves] == ["e2e4", "e7e5"]
+    _, moves = parse_game(pgn="1. e4 e5 2. Nf3 *")
+    assert [move.uci() for move in moves] == ["e2e4", "e7e5", "g1f3"]
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"moves": []},
+    {"moves": ["e2e5"]},
+    {"moves": ["zz"]},
+    {"moves": ["e2e4"], "start_fen": "not a fen"},
+])
+def test_parse_game_rejects_invalid(kwargs):
+    with pytest.raises(GameParseError):
+        parse_game(**kwargs)
+
+
+async def _analyze(engine, moves):
+    board, game_moves = parse_game(moves=moves)
+    return [event async for event in GameAnalyzer(engine, board, game_moves).run()]
+
+
+@pytest.mark.asyncio
+async def test_analyzer_classifies_moves():
+    # Cada posición se evalúa una vez (cp desde el punto de vista del bando que mueve)
+    engine = ScriptedEngine([("e2e4", 30), ("e7e5", -30), ("e1e2", 400)])
+    events = await _analyze(engine, ["e2e4", "f7f6"])
+    white, black, summary = events
+
+    assert white["cp_loss"] == 0
+    assert white["accuracy"] == pytest.approx(100.0, abs=0.1)
+    assert white["classification"] is None
+    assert (white["eval_before"], white["eval_after"]) == (30, 30)
+
+    # f7f6 en lugar de e7e5: de -30 a -400 para las negras
+    assert black["best_san"] == "e5"
+    assert black["cp_loss"] == 370
+    assert black["classification"] == "blunder"
+    assert (black["eval_before"], black["eval_after"]) == (30, 400)
+
+    assert summary["white"]["acpl"] == 0
+    assert summary["black"]["acpl"] == 370
+    assert summary["black"]["blunders"] == 1
+    assert summary["black"]["accuracy"] < summary["white"]["accuracy"]
+
+    # Los motores no generativos reciben la partida para conservar su tabla hash
+    assert [kwargs["position_moves"] for _, kwargs in engine.calls] == [[], ["e2e4"], ["e2e4", "f7f6"]]
+
+
+@pytest.mark.asyncio
+async def test_analyzer_does_not_evaluate_checkmate():
+    engine = ScriptedEngine([("e2e4", 20), ("e7e5", 0), ("d2d4", -50), ("d8h4", 900)])
+    events = await _analyze(engine, ["f2f3", "e7e5", "g2g4", "d8h4"])
+    mate = events[3]
+
+    assert len(engine.calls) == 4
+    assert mate["cp_loss"] == 0
+    assert mate["eval_after"] == -MATE_CP
+    assert events[-1]["plies"] == 4
@@ -0,0 +1,111 @@
+"""
+Tests de GenerativeEngine con peticiones concurrentes sobre el mismo protocolo.
+El servidor del LLM se simula con httpx.MockTransport.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from engines.factory import EngineFactory
+from engines.protocols import HTTPClientPool
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+OPEN = "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2"
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Sirve las peticiones HTTP de los motores con 'handler' (async) en lugar de la red"""
+    def install(handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(HTTPClientPool, "acquire", classmethod(lambda cls, url, config: (("mock",), client)))
+    return install
+
+
+@pytest.mark.asyncio
+async def test_concurrent_moves_report_their_own_usage(serve):
+    async def ollama(request):
+        prompt = json.loads(request.content)["prompt"]
+        slow = OPEN in prompt
+        if slow:
+            await asyncio.sleep(0.1)
+        return httpx.Response(200, json={
+            "response": "g1f3", "done": True,
+            "prompt_eval_count": 200 if slow else 100, "eval_count": 20 if slow else 10,
+        })
+
+    serve(ollama)
+    engine = EngineFactory.create_engine("llm", {
+        "engine_type": "generative", "provider": "local", "endpoint": "http://llm.test", "flavor": "ollama",
+    })
+    slow, fast = await asyncio.gather(engine.get_move(OPEN), engine.get_move(START))
+
+    assert (slow.usage["prompt_tokens"], slow.usage["completion_tokens"]) == (200, 20)
+    assert (fast.usage["prompt_tokens"], fast.usage["completion_tokens"]) == (100, 10)
+    assert engine.token_stats.get_stats()["prompt_tokens"] == 300
+
+
+def _openai_engine(api_key, **config):
+    # Cada test usa su propia API key: los limitadores se comparten por proveedor y key
+    return EngineFactory.create_engine("gpt", {
+        "engine_type": "generative", "provider": "openai", "model": "gpt-test",
+        "api_url": "http://api.test/v1/chat/completions", "api_key": api_key, **config,
+    })
+
+
+def _chat(content):
+    return httpx.Response(200, json={"choices": [{"message": {"role": "assistant", "content": content}}]})
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_counts_only_own_attempts(serve):
+    calls = {OPEN: 0, START: 0}
+
+    async def openai(request):
+        fen = OPEN if OPEN in request.content.decode() else START
+        calls[fen] += 1
+        if fen == OPEN:
+            # 503 inmediato y después la jugada, mientras la otra petición sigue en curso
+            if calls[fen] == 1:
+                return httpx.Response(503, headers={"retry-after": "0"}, json={"error": "busy"})
+            await asyncio.sleep(0.2)
+            return _chat("g1f3")
+        await asyncio.sleep(0.05)
+        # Primera respuesta sin jugada legal: consume un intento por respuesta inválida
+        return _chat("g1f3" if calls[fen] > 1 else "no sé")
+
+    serve(openai)
+    engine = _openai_engine("key-budget", max_retries=2)
+    # START empieza antes: el 503 de OPEN y su reintento ocurren mientras espera su respuesta
+    invalid_first, retried = await asyncio.gather(engine.get_move(START), engine.get_move(OPEN))
+
+    # Cada petición gastó sus 2 intentos: los reintentos 503 de una no cuentan para la otra
+    assert retried.move == invalid_first.move == "g1f3"
+    assert calls == {OPEN: 2, START: 2}
+
+
+@pytest.mark.asyncio
+async def test_connection_retry_releases_limiter_slot(serve):
+    failed = []
+
+    async def openai(request):
+        if OPEN in request.content.decode() and not failed:
+            failed.append(True)
+            raise httpx.ConnectError("connection refused", request=request)
+        return _chat("g1f3")
+
+    serve(openai)
+    engine = _openai_engine("key-slot", rate_limit={"max_concurrency": 1})
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    retried = asyncio.create_task(engine.get_move(OPEN))
+    await asyncio.sleep(0.05)
+
+    # Durante la espera del reintento el hueco del limitador queda libre para otra petición
+    other = await engine.get_move(START)
+    assert other.move == "g1f3"
+    assert loop.time() - started < 0.5
+    assert (await retried).move == "g1f3"
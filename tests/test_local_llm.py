@@ -0,0 +1,36 @@
+"""
+Tests de LocalLLMProtocol: extracción del texto de cada formato de respuesta.
+"""
+
+import pytest
+
+from engines.protocols.local_llm import LocalLLMProtocol
+
+
+@pytest.fixture
+def protocol():
+    return LocalLLMProtocol({"endpoint": "http://localhost:8080"})
+
+
+@pytest.mark.parametrize("data, expected", [
+    # Ollama /api/generate
+    ({"response": "e2e4", "done": True}, "e2e4"),
+    # llama.cpp /completion
+    ({"content": "e2e4", "stop": True}, "e2e4"),
+    # LM Studio / LocalAI
+    ({"text": "e2e4"}, "e2e4"),
+    # OpenAI-compatible completions
+    ({"choices": [{"text": "e2e4", "index": 0}]}, "e2e4"),
+    # OpenAI-compatible chat
+    ({"choices": [{"message": {"role": "assistant", "content": "e2e4"}}]}, "e2e4"),
+    # Formatos genéricos
+    ({"output": "e2e4"}, "e2e4"),
+    ({"generated_text": "e2e4"}, "e2e4"),
+])
+def test_extract_text_formats(protocol, data, expected):
+    assert protocol._extract_text(data) == expected
+
+
+def test_extract_text_unknown_format(protocol):
+    assert protocol._extract_text({"foo": "bar"}) is None
+    assert protocol._extract_text({"choices": []}) is None
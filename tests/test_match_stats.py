@@ -0,0 +1,88 @@
+"""
+Tests de la estadística de resultados entre motores (Elo, LOS y SPRT).
+"""
+
+import math
+
+import pytest
+
+from matches.stats import SPRT, elo_estimate, elo_from_score, pair_samples, score_from_elo
+
+
+@pytest.mark.parametrize("elo", [-400.0, -50.0, 0.0, 35.0, 190.85])
+def test_elo_and_score_are_inverse(elo):
+    assert elo_from_score(score_from_elo(elo)) == pytest.approx(elo)
+
+
+def test_elo_from_score_known_values():
+    assert elo_from_score(0.5) == pytest.approx(0.0)
+    # 75% = 3 a 1: 400 * log10(3)
+    assert elo_from_score(0.75) == pytest.approx(400 * math.log10(3))
+    # 0% y 100% se acotan en lugar de dar infinito
+    assert math.isfinite(elo_from_score(0.0)) and math.isfinite(elo_from_score(1.0))
+
+
+def test_elo_estimate_without_games():
+    assert elo_estimate(0, 0, 0) == {"games": 0, "score": None, "elo": None, "elo_error": None, "los": None}
+
+
+def test_elo_estimate_values():
+    result = elo_estimate(6, 2, 4)
+    assert result["games"] == 12
+    assert result["score"] == pytest.approx(7 / 12, abs=1e-4)
+    assert result["elo"] == pytest.approx(elo_from_score(7 / 12), abs=0.1)
+    assert result["elo_error"] > 0
+    # LOS solo depende de las partidas decisivas: 0.5 * (1 + erf((6 - 4) / sqrt(2 * 10)))
+    assert result["los"] == pytest.approx(0.5 * (1 + math.erf(2 / math.sqrt(20))), abs=1e-4)
+
+
+def test_elo_estimate_even_result():
+    result = elo_estimate(3, 4, 3)
+    assert result["elo"] == 0.0 and str(result["elo"]) == "0.0"
+    assert result["los"] == 0.5
+    assert elo_estimate(0, 5, 0)["los"] == 0.5
+
+
+def test_pair_samples_normalizes_pair_points():
+    assert pair_samples([2, 1.5, 1, 1, 0.5, 0]) == {1.0: 1, 0.75: 1, 0.5: 2, 0.25: 1, 0.0: 1}
+
+
+def test_sprt_bounds():
+    sprt = SPRT(elo0=0, elo1=5, alpha=0.05, beta=0.05)
+    assert sprt.upper == pytest.approx(math.log(19))
+    assert sprt.lower == pytest.approx(-math.log(19))
+    assert sprt.llr({}) == 0.0
+    assert sprt.decision(0.0) is None
+
+
+def test_sprt_needs_several_identical_pairs():
+    # Sin varianza observada se usa MIN_VARIANCE: 8 parejas ganadas no bastan, 9 sí
+    sprt = SPRT(elo0=0, elo1=5)
+    assert sprt.decision(sprt.llr({1.0: 8})) is None
+    assert sprt.decision(sprt.llr({1.0: 9})) == "H1"
+    assert sprt.decision(sprt.llr({0.0: 9})) == "H0"
+
+
+def test_sprt_even_results_favour_h0():
+    sprt = SPRT(elo0=0, elo1=5)
+    state = sprt.to_dict({0.25: 40, 0.5: 120, 0.75: 40})
+    assert state["lower"] < state["llr"] < 0
+    assert state["decision"] is None
+
+
+def test_sprt_from_params():
+    assert SPRT.from_params(None) is None
+    sprt = SPRT.from_params({"elo0": "0", "elo1": 10})
+    assert (sprt.elo0, sprt.elo1, sprt.alpha, sprt.beta) == (0.0, 10.0, 0.05, 0.05)
+
+
+@pytest.mark.parametrize("params", [
+    {"elo0": 5, "elo1": 0},
+    {"elo1": 5, "alpha": 0},
+    {"elo1": 5, "beta": 1.5},
+    {"elo1": "x"},
+    {"elo1": 5, "gamma": 1},
+])
+def test_sprt_from_params_rejects_invalid(params):
+    with pytest.raises(ValueError):
+        SPRT.from_params(params)
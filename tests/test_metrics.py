@@ -0,0 +1,46 @@
+"""
+Tests de la exposición de métricas en formato Prometheus (GET /metrics).
+"""
+
+import pytest
+
+from engines.analysis_cache import AnalysisCache
+from engines.metrics import render_metrics
+from engines.protocols import HTTPClientPool
+
+
+def _samples(text, name):
+    """Líneas de muestra de una métrica: {etiquetas: valor}"""
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith(f"chess_{name}{{"):
+            labels, value = line[len(f"chess_{name}"):].rsplit(" ", 1)
+            # Prometheus rechaza muestras repetidas con las mismas etiquetas
+            assert labels not in samples, f"Muestra duplicada: {line}"
+            samples[labels] = float(value)
+    return samples
+
+
+@pytest.mark.asyncio
+async def test_http_clients_on_one_origin_have_distinct_series():
+    url = "https://api.openai.com/v1/chat/completions"
+    configs = [
+        {"name": "gpt-a"},
+        {"name": "gpt-b"},
+        {"name": "gpt-c", "max_connections": 50},
+        {"name": "gpt-d", "share_http_client": False},
+    ]
+    keys = [HTTPClientPool.acquire(url, config)[0] for config in configs]
+    try:
+        text = render_metrics({}, AnalysisCache(0).get_stats())
+        refs = _samples(text, "http_client_refs")
+        max_connections = _samples(text, "http_client_max_connections")
+    finally:
+        await HTTPClientPool.close_all()
+
+    # gpt-a y gpt-b comparten cliente; gpt-c (otros límites) y gpt-d (no compartido) tienen el suyo
+    assert len(set(keys)) == 3
+    assert sorted(refs.values()) == [1.0, 1.0, 2.0]
+    assert sorted(max_connections.values()) == [20.0, 20.0, 50.0]
+    assert all('origin="https://api.openai.com"' in labels for labels in refs)
+    assert "chess_http_clients 3" in text
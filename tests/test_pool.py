@@ -0,0 +1,122 @@
+"""
+Tests del pool de instancias: orden por prioridad e interrupción de búsquedas.
+"""
+
+import asyncio
+
+import pytest
+
+from engines.pool import ProtocolPool, priority_rank
+
+
+class FakeProtocol:
+    """Instancia de prueba: solo registra las interrupciones"""
+
+    def __init__(self):
+        self.config = {"name": "fake"}
+        self.restarts = 0
+        self.preempt_requested = False
+        self.preempt_calls = 0
+
+    def preempt(self) -> bool:
+        self.preempt_calls += 1
+        self.preempt_requested = True
+        return True
+
+    async def cleanup(self) -> None:
+        pass
+
+
+async def _waiter(pool, priority, order, **kwargs):
+    async with pool.lease(priority, **kwargs):
+        order.append(priority)
+
+
+async def _queue(pool, priorities, order):
+    """Encola una petición por prioridad, en ese orden de llegada"""
+    tasks = []
+    for priority in priorities:
+        tasks.append(asyncio.create_task(_waiter(pool, priority, order)))
+        await asyncio.sleep(0)
+    return tasks
+
+
+def test_priority_rank():
+    assert priority_rank("interactive") < priority_rank("compare") < priority_rank("batch") < priority_rank("background")
+    with pytest.raises(ValueError):
+        priority_rank("urgent")
+
+
+@pytest.mark.asyncio
+async def test_waiters_served_by_priority_then_arrival():
+    pool = ProtocolPool(FakeProtocol, size=1)
+    order = []
+    async with pool.lease("interactive"):
+        tasks = await _queue(pool, ["background", "batch", "interactive", "compare", "batch"], order)
+        assert pool.get_stats()["waiting_by_priority"] == {"interactive": 1, "compare": 1, "batch": 2, "background": 1}
+    await asyncio.gather(*tasks)
+    assert order == ["interactive", "compare", "batch", "batch", "background"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_is_skipped():
+    pool = ProtocolPool(FakeProtocol, size=1)
+    order = []
+    async with pool.lease("interactive"):
+        tasks = await _queue(pool, ["interactive", "batch"], order)
+        tasks[0].cancel()
+        await asyncio.sleep(0)
+        assert pool.waiting == 1
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert order == ["batch"]
+    assert (pool.in_use, pool.waiting) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_preempts_preemptible_search():
+    pool = ProtocolPool(FakeProtocol, size=1)
+    order = []
+    async with pool.lease("background") as protocol:
+        tasks = await _queue(pool, ["interactive", "compare"], order)
+        # Una sola interrupción por préstamo, aunque esperen varias peticiones
+        assert protocol.preempt_calls == 1
+        assert pool.preemptions == 1
+    await asyncio.gather(*tasks)
+    assert order == ["interactive", "compare"]
+    assert protocol.preempt_requested is False
+
+
+@pytest.mark.asyncio
+async def test_no_preemption_of_equal_or_higher_priority():
+    pool = ProtocolPool(FakeProtocol, size=1)
+    order = []
+    async with pool.lease("batch") as protocol:
+        tasks = await _queue(pool, ["batch", "background"], order)
+        assert protocol.preempt_calls == 0
+    async with pool.lease("interactive", preemptible=False) as protocol:
+        tasks += await _queue(pool, ["interactive"], order)
+        assert protocol.preempt_calls == 0
+    await asyncio.gather(*tasks)
+    assert pool.preemptions == 0
+
+
+@pytest.mark.asyncio
+async def test_preempts_lowest_priority_lease():
+    pool = ProtocolPool(FakeProtocol, size=2)
+    order = []
+    async with pool.lease("batch") as batch_protocol, pool.lease("background") as background_protocol:
+        tasks = await _queue(pool, ["interactive"], order)
+        assert (batch_protocol.preempt_calls, background_protocol.preempt_calls) == (0, 1)
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_lifo_and_affinity():
+    pool = ProtocolPool(FakeProtocol, size=2)
+    async with pool.lease(affinity="game-1") as first, pool.lease(affinity="game-2") as second:
+        assert first is not second
+    # LIFO: sin afinidad se presta la última devuelta ('first', que se libera después)
+    async with pool.lease() as protocol:
+        assert protocol is first
+    async with pool.lease(affinity="game-2") as protocol:
+        assert protocol is second
@@ -0,0 +1,84 @@
+"""
+Tests de la recarga de configuración de motores (solo se aplican las diferencias).
+"""
+
+import asyncio
+
+import pytest
+import yaml
+
+from engine_manager import EngineManager
+from engines import MoveResult
+from engines.analysis_cache import AnalysisCache
+
+FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+def _engine(depth=10):
+    # El comando no existe: los motores se crean sin arrancar ningún proceso
+    return {"engine_type": "traditional", "command": "/nonexistent/engine", "default_depth": depth}
+
+
+def _write(path, engines):
+    path.write_text(yaml.safe_dump({"engines": engines}, sort_keys=False))
+
+
+def _cache(manager, name):
+    key = AnalysisCache.make_key(name, FEN, None)
+    manager.analysis_cache.put(key, MoveResult(move="e2e4", engine=name))
+    return key
+
+
+@pytest.mark.asyncio
+async def test_reload_applies_only_the_diff(tmp_path):
+    path = tmp_path / "engines.yaml"
+    _write(path, {"kept": _engine(), "changed": _engine(), "removed": _engine()})
+    manager = EngineManager(str(path), cache_size=16)
+    before = manager.engines
+    kept_key, changed_key = _cache(manager, "kept"), _cache(manager, "changed")
+
+    _write(path, {"kept": _engine(), "changed": _engine(depth=20), "added": _engine()})
+    diff = await manager.reload_config(drain_timeout=1)
+
+    assert diff == {"added": ["added"], "changed": ["changed"], "removed": ["removed"], "unchanged": ["kept"], "failed": {}}
+    engines = manager.engines
+    assert list(engines) == ["kept", "changed", "added"]
+    # Los motores sin cambios conservan la instancia (procesos, conexiones y caché)
+    assert engines["kept"] is before["kept"]
+    assert engines["changed"] is not before["changed"]
+    assert engines["changed"].config["default_depth"] == 20
+    assert manager.analysis_cache.get(kept_key) is not None
+    assert manager.analysis_cache.get(changed_key) is None
+
+    # Los reemplazados y eliminados se cierran en segundo plano
+    assert set(manager._retiring.values()) == {before["changed"], before["removed"]}
+    await asyncio.gather(*manager._retiring)
+    assert not manager._retiring
+
+
+@pytest.mark.asyncio
+async def test_reload_keeps_engine_with_invalid_config(tmp_path):
+    path = tmp_path / "engines.yaml"
+    _write(path, {"kept": _engine(), "broken": _engine()})
+    manager = EngineManager(str(path), cache_size=0)
+    before = manager.engines
+
+    _write(path, {"kept": _engine(), "broken": {"engine_type": "bogus"}, "new-broken": {"engine_type": "bogus"}})
+    diff = await manager.reload_config()
+
+    # Un motor que ya existía sigue con su configuración anterior; uno nuevo inválido no se añade
+    assert set(diff["failed"]) == {"broken", "new-broken"}
+    assert (diff["added"], diff["changed"], diff["removed"]) == ([], [], [])
+    assert manager.engines == before
+    assert not manager._retiring
+
+
+@pytest.mark.asyncio
+async def test_reload_without_changes(tmp_path):
+    path = tmp_path / "engines.yaml"
+    _write(path, {"kept": _engine()})
+    manager = EngineManager(str(path), cache_size=0)
+    # Motores aún no creados (se crean en el primer uso): siguen sin crearse
+    diff = await manager.reload_config()
+    assert diff["unchanged"] == ["kept"]
+    assert manager._engines == {}
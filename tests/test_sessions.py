@@ -0,0 +1,24 @@
+"""
+Tests de la validación de opciones de las sesiones de partida.
+"""
+
+import pytest
+
+from sessions import SessionError, validate_options
+
+
+def test_validate_options_accepts_valid_values():
+    assert validate_options(None, None) == (None, None)
+    assert validate_options(12, "aggressive") == (12, "aggressive")
+
+
+@pytest.mark.parametrize("depth", ["7", 0, -1, True, 2.5])
+def test_validate_options_rejects_depth(depth):
+    with pytest.raises(SessionError):
+        validate_options(depth=depth)
+
+
+@pytest.mark.parametrize("strategy", ["bogus", 5])
+def test_validate_options_rejects_strategy(strategy):
+    with pytest.raises(SessionError):
+        validate_options(strategy=strategy)
@@ -0,0 +1,56 @@
+"""
+Tests de UCIProtocol con un motor UCI falso (script de Python como subproceso).
+"""
+
+import sys
+
+import pytest
+
+from engines.protocols.uci import UCIProtocol
+
+# Primera búsqueda: más líneas 'info' que las que lee request_move y un bestmove
+# que solo llega tras 'stop'. Las siguientes responden al momento.
+FAKE_ENGINE = """
+import sys
+
+searches = 0
+for line in sys.stdin:
+    command = line.strip()
+    if command == "uci":
+        print("uciok", flush=True)
+    elif command == "isready":
+        print("readyok", flush=True)
+    elif command.startswith("go"):
+        searches += 1
+        if searches == 1:
+            for depth in range(1500):
+                print(f"info depth {depth % 60 + 1} score cp 10 pv a2a3")
+            sys.stdout.flush()
+        else:
+            print("bestmove e2e4", flush=True)
+    elif command == "stop":
+        print("bestmove a2a3", flush=True)
+    elif command == "quit":
+        break
+"""
+
+
+@pytest.fixture
+def protocol(tmp_path):
+    script = tmp_path / "fake_engine.py"
+    script.write_text(FAKE_ENGINE)
+    return UCIProtocol({"name": "fake", "command": f"{sys.executable} {script}"})
+
+
+@pytest.mark.asyncio
+async def test_exhausted_read_stops_search(protocol):
+    try:
+        with pytest.raises(RuntimeError):
+            await protocol.request_move(depth=5)
+        assert protocol._stale_search and not protocol._searching
+
+        # El bestmove de la búsqueda detenida se descarta: no es la respuesta de la siguiente
+        assert await protocol.request_move(depth=5) == "e2e4"
+        assert not protocol._stale_search
+    finally:
+        await protocol.cleanup()